@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Snapshots de contexto de usuário para a IA do Connectus
+
+Monta o contexto do prompt (usuário, conversas recentes, missões completadas)
+uma única vez por usuário e mantém em cache até ser invalidado por conclusão
+de missão ou alteração de perfil. Todas as leituras usam uma única conexão
+SQLite compartilhada, então um cache hit não toca no banco.
+"""
+
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+DATABASE_PATH = "database/connectus.db"
+
+# Tempo máximo de vida de um snapshot (segurança contra invalidações perdidas)
+CONTEXT_TTL_SECONDS = 300
+# Quantidade de conversas recentes mantidas no snapshot
+RECENT_CONVERSATIONS_LIMIT = 10
+# Máximo de snapshots em memória (os mais antigos saem primeiro)
+CONTEXT_MAX_ENTRIES = 1024
+
+
+class SharedConnection:
+    """Conexão SQLite única compartilhada entre threads (protegida por lock)"""
+
+    def __init__(self, database_path: str = DATABASE_PATH):
+        self.database_path = database_path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.database_path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            self._conn = conn
+        return self._conn
+
+    def fetchone(self, sql: str, params: tuple = ()) -> Optional[sqlite3.Row]:
+        with self._lock:
+            return self._connect().execute(sql, params).fetchone()
+
+    def fetchall(self, sql: str, params: tuple = ()) -> list:
+        with self._lock:
+            return self._connect().execute(sql, params).fetchall()
+
+    def execute(self, sql: str, params: tuple = ()) -> int:
+        """Executa escrita e faz commit; retorna rowcount"""
+        with self._lock:
+            conn = self._connect()
+            try:
+                cursor = conn.execute(sql, params)
+                conn.commit()
+                return cursor.rowcount
+            except Exception:
+                conn.rollback()
+                raise
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class UserContextCache:
+    """Cache de snapshots de contexto por usuário"""
+
+    def __init__(self, connection: SharedConnection, ttl_seconds: float = CONTEXT_TTL_SECONDS,
+                 max_entries: int = CONTEXT_MAX_ENTRIES):
+        self.connection = connection
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._snapshots: Dict[int, Dict[str, Any]] = {}
+        self._expires_at: Dict[int, float] = {}
+        # Invalidações por usuário: snapshot montado antes de uma invalidação não é guardado
+        self._generations: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _build(self, user_id: int) -> Dict[str, Any]:
+        """Monta o snapshot a partir do banco (apenas em cache miss)"""
+        user = self.connection.fetchone("SELECT * FROM users WHERE id = ?", (user_id,))
+        if not user:
+            return {}
+
+        conversations = self.connection.fetchall("""
+            SELECT category, query, created_at
+            FROM ai_conversations
+            WHERE user_id = ?
+            ORDER BY created_at DESC
+            LIMIT ?
+        """, (user_id, RECENT_CONVERSATIONS_LIMIT))
+
+        completed_missions = self.connection.fetchall("""
+            SELECT title, description, xp_reward
+            FROM missions
+            WHERE id IN (
+                SELECT mission_id FROM user_missions
+                WHERE user_id = ? AND completed = 1
+            )
+        """, (user_id,))
+
+        row = dict(user)
+        return {
+            "user": {
+                "id": row.get("id"),
+                "nickname": row.get("nickname"),
+                "full_name": row.get("full_name"),
+                "age": row.get("age"),
+                "xp": row.get("xp"),
+                "level": row.get("level"),
+                "bio": row.get("bio"),
+            },
+            "recent_conversations": [tuple(c) for c in conversations],
+            "completed_missions": [tuple(m) for m in completed_missions],
+        }
+
+    def get(self, user_id: int) -> Dict[str, Any]:
+        """Retorna o snapshot do usuário, montando-o apenas se necessário"""
+        now = time.monotonic()
+        with self._lock:
+            snapshot = self._snapshots.get(user_id)
+            if snapshot is not None and self._expires_at.get(user_id, 0) > now:
+                self.hits += 1
+                return snapshot
+            self.misses += 1
+            generation = self._generations.get(user_id, 0)
+
+        snapshot = self._build(user_id)
+        if snapshot:
+            with self._lock:
+                if self._generations.get(user_id, 0) == generation:
+                    self._snapshots.pop(user_id, None)
+                    while len(self._snapshots) >= self.max_entries:
+                        oldest = next(iter(self._snapshots))
+                        del self._snapshots[oldest]
+                        self._expires_at.pop(oldest, None)
+                    self._snapshots[user_id] = snapshot
+                    self._expires_at[user_id] = now + self.ttl_seconds
+        return snapshot
+
+    def record_conversation(self, user_id: int, category: str, query: str, created_at: str):
+        """Adiciona uma conversa ao snapshot em cache sem reconsultar o banco"""
+        with self._lock:
+            snapshot = self._snapshots.get(user_id)
+            if snapshot is None:
+                return
+            recent = [(category, query, created_at)] + snapshot["recent_conversations"]
+            snapshot["recent_conversations"] = recent[:RECENT_CONVERSATIONS_LIMIT]
+
+    def invalidate(self, user_id: int):
+        """Descarta o snapshot (chamar ao completar missão ou alterar perfil)"""
+        with self._lock:
+            self._snapshots.pop(user_id, None)
+            self._expires_at.pop(user_id, None)
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._snapshots.clear()
+            self._expires_at.clear()
+            self._generations.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._snapshots),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits / total) if total else 0.0,
+            }
+
+
+# Instâncias globais
+shared_connection = SharedConnection()
+user_context_cache = UserContextCache(shared_connection)
+
+
+def load_user_row(user_id: int) -> Optional[Dict[str, Any]]:
+    """Linha atual do usuário (autenticação não usa o snapshot em cache)"""
+    row = shared_connection.fetchone("SELECT * FROM users WHERE id = ?", (user_id,))
+    return dict(row) if row else None
+
+
+def invalidate_user_context(user_id: int):
+    """Hook para invalidar o contexto após missão completada ou perfil alterado"""
+    user_context_cache.invalidate(user_id)
@@ -11,6 +11,7 @@ from datetime import datetime, timezone
 import sqlite3
 
 from ai_service import connectus_ai, AIResponse
+from ai_context import load_user_row
 # Função movida para evitar importação circular
 def get_user_from_token(request):
     """Obter usuário a partir do token JWT"""
@@ -31,16 +32,9 @@ def get_user_from_token(request):
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id = int(payload.get("sub"))
         
-        import sqlite3
-        conn = sqlite3.connect("database/connectus.db")
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,))
-        user = cursor.fetchone()
-        conn.close()
-        
-        if user:
-            return dict(user)
-        return None
+        # Linha atual do usuário pela conexão compartilhada (sem conexão nova por
+        # requisição e sem cache: desativação/alteração vale na hora)
+        return load_user_row(user_id)
         
     except jwt.ExpiredSignatureError:
         return None
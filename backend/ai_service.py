@@ -6,12 +6,13 @@ Integração com OpenAI GPT-4 e funcionalidades educativas
 
 import openai
 import json
-import sqlite3
 from datetime import datetime, timezone
 from typing import Dict, List, Optional, Any
 import os
 from dataclasses import dataclass
 
+from ai_context import shared_connection, user_context_cache
+
 # Configurações
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "your-openai-api-key-here")
 AI_MODEL = "gpt-4"
@@ -36,54 +37,8 @@ class ConnectusAI:
         self.user_profiles = {}
     
     def get_user_context(self, user_id: int) -> Dict[str, Any]:
-        """Obter contexto do usuário do banco"""
-        conn = sqlite3.connect("database/connectus.db")
-        cursor = conn.cursor()
-        
-        # Buscar dados do usuário
-        cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,))
-        user = cursor.fetchone()
-        
-        if not user:
-            conn.close()
-            return {}
-        
-        # Buscar histórico de conversas
-        cursor.execute("""
-            SELECT category, content, created_at 
-            FROM ai_conversations 
-            WHERE user_id = ? 
-            ORDER BY created_at DESC 
-            LIMIT 10
-        """, (user_id,))
-        conversations = cursor.fetchall()
-        
-        # Buscar missões completadas
-        cursor.execute("""
-            SELECT title, description, xp_reward 
-            FROM missions 
-            WHERE id IN (
-                SELECT mission_id FROM user_missions 
-                WHERE user_id = ? AND completed = 1
-            )
-        """, (user_id,))
-        completed_missions = cursor.fetchall()
-        
-        conn.close()
-        
-        return {
-            "user": {
-                "id": user[0],
-                "nickname": user[1],
-                "full_name": user[3],
-                "age": user[6],
-                "xp": user[7],
-                "level": user[8],
-                "bio": user[4]
-            },
-            "recent_conversations": conversations,
-            "completed_missions": completed_missions
-        }
+        """Obter contexto do usuário (snapshot em cache, sem DB em cache hit)"""
+        return user_context_cache.get(user_id)
     
     def categorize_query(self, query: str) -> str:
         """Categorizar a pergunta do usuário"""
@@ -318,10 +273,8 @@ IMPORTANTE: Sempre termine com sugestões de próximos passos ou perguntas relac
     def _save_conversation(self, user_id: int, query: str, response: str, category: str):
         """Salvar conversa no banco de dados"""
         try:
-            conn = sqlite3.connect("database/connectus.db")
-            cursor = conn.cursor()
-            
-            cursor.execute("""
+            created_at = datetime.now(timezone.utc).isoformat()
+            shared_connection.execute("""
                 INSERT INTO ai_conversations (user_id, query, response, category, created_at)
                 VALUES (?, ?, ?, ?, ?)
             """, (
@@ -329,11 +282,11 @@ IMPORTANTE: Sempre termine com sugestões de próximos passos ou perguntas relac
                 query,
                 response,
                 category,
-                datetime.now(timezone.utc).isoformat()
+                created_at
             ))
             
-            conn.commit()
-            conn.close()
+            # Manter snapshot em cache atualizado sem reconsultar o banco
+            user_context_cache.record_conversation(user_id, category, query, created_at)
             
         except Exception as e:
             print(f"❌ Erro ao salvar conversa: {e}")
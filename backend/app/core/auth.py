@@ -155,12 +155,14 @@ async def get_current_user_optional(
 ) -> Optional[User]:
     """Obter usuário atual opcionalmente (retorna None se não autenticado)"""
     try:
-        # Tentar obter o token do header Authorization
-        auth_header = request.headers.get("Authorization")
-        if not auth_header or not auth_header.startswith("Bearer "):
-            return None
+        # Mesma ordem de get_current_user: cookie primeiro, depois header Authorization
+        token = request.cookies.get("connectus_access_token")
+        if not token:
+            auth_header = request.headers.get("Authorization")
+            if not auth_header or not auth_header.startswith("Bearer "):
+                return None
+            token = auth_header.split(" ")[1]
         
-        token = auth_header.split(" ")[1]
         payload = verify_token(token)
         if payload is None:
             return None
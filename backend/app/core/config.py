@@ -67,6 +67,76 @@ class Settings(BaseSettings):
     # Configurações futuras para Web3 (removido Stellar SDK)
     ENABLE_WEB3: bool = False
     
+    # Subsistemas opcionais: desabilitados, seus routers nem são importados
+    ENABLE_WALLET: bool = True
+    ENABLE_STAKING: bool = True
+    ENABLE_AI: bool = True
+    
+    # Rate limit: arquivo SQLite compartilhado entre workers (vazio = memória por processo)
+    RATE_LIMIT_SHARED_PATH: Optional[str] = None
+    
+    # Migrações rodam fora de banda (python -m app.db.migrate, ver Procfile);
+    # True só em desenvolvimento: cada worker aplica as pendentes no startup
+    AUTO_MIGRATE: bool = False
+    
+    # Cache de GETs condicionais (ETag por versão de tabela)
+    HTTP_CACHE_ENABLED: bool = True
+    HTTP_CACHE_MAX_ENTRIES: int = 1024
+    HTTP_CACHE_MAX_BYTES: int = 16 * 1024 * 1024
+    HTTP_CACHE_MAX_AGE_SECONDS: int = 300  # validade máxima de um ETag (escritas externas)
+    
+    # Impact Score com decaimento temporal
+    IMPACT_DECAY_HALF_LIFE_DAYS: float = 30.0
+    IMPACT_DECAY_INTERVAL_SECONDS: int = 3600  # 0 = job agendado desativado
+    
+    # Rollups diários de analytics (catch-up periódico)
+    ROLLUP_INTERVAL_SECONDS: int = 60  # 0 = job agendado desativado
+    
+    # Lotes de attestation (árvore de Merkle sobre Impact Scores)
+    ATTESTATION_BATCH_INTERVAL_SECONDS: int = 600  # 0 = job agendado desativado
+
+    # Cache em processo das missões diárias v2 (catálogo + conclusões do dia)
+    DAILY_MISSIONS_CACHE_TTL_SECONDS: int = 60  # defasagem máxima entre workers
+    DAILY_MISSIONS_PREWARM_SECONDS: int = 120  # antecedência do pré-aquecimento da virada; 0 = desativado
+
+    # QR de check-in (tokens de uso único com nonce)
+    QR_TOKEN_TTL_SECONDS: int = 120
+    QR_OFFLINE_MAX_AGE_SECONDS: int = 24 * 3600  # idade máxima de um scan offline enviado em lote
+    QR_BATCH_MAX_SCANS: int = 500
+    QR_NONCE_PRUNE_INTERVAL_SECONDS: int = 3600  # limpeza de nonces expirados; 0 = desativado
+
+    # Buffer em memória das mensagens recentes por sala de chat
+    CHAT_BUFFER_SIZE: int = 200  # mensagens por sala; 0 = desativado
+    CHAT_BUFFER_MAX_BYTES: int = 8 * 1024 * 1024
+    CHAT_BUFFER_REVALIDATE_SECONDS: float = 1.0  # busca mensagens novas de outros workers
+    CHAT_BUFFER_MAX_AGE_SECONDS: float = 60.0  # recarga completa (remoções em outros workers)
+
+    # Entrega de mensagens novas (long-poll / SSE)
+    CHAT_LONG_POLL_MAX_SECONDS: float = 30.0
+    CHAT_SSE_KEEPALIVE_SECONDS: float = 15.0  # também limita o atraso de mensagens de outros workers
+
+    # Recontagem exata das estatísticas das salas de chat (auditoria dos contadores/HyperLogLog)
+    CHAT_STATS_AUDIT_INTERVAL_SECONDS: int = 6 * 3600  # 0 = job agendado desativado
+
+    # Contadores de posts com escrita adiada (likes/comentários/compartilhamentos)
+    POST_COUNTERS_FLUSH_INTERVAL_SECONDS: float = 0.25  # 0 = grava a cada operação
+    POST_COUNTERS_FLUSH_MAX_OPS: int = 500  # flush antecipado ao acumular N operações
+
+    # Feed "em alta" (score com decaimento temporal mantido em memória)
+    TRENDING_HALF_LIFE_HOURS: float = 6.0
+    TRENDING_WINDOW_HOURS: float = 48.0  # eventos considerados ao recarregar do banco
+    TRENDING_LIKE_WEIGHT: float = 1.0
+    TRENDING_COMMENT_WEIGHT: float = 2.0
+    TRENDING_SHARE_WEIGHT: float = 3.0
+    TRENDING_POST_WEIGHT: float = 1.0  # peso da publicação (posts novos aparecem no feed)
+    TRENDING_MIN_SCORE: float = 0.05  # abaixo disso o post sai do índice na compactação
+    TRENDING_MAX_POSTS: int = 5000
+    TRENDING_REBUILD_SECONDS: float = 300.0  # recarga do banco (outros workers); 0 = só na primeira leitura
+    TRENDING_COMPACT_INTERVAL_SECONDS: int = 60  # 0 = job agendado desativado
+
+    # Cache por usuário de /users/stats (invalidado nas escritas deste processo)
+    USER_STATS_CACHE_TTL_SECONDS: float = 30.0  # 0 = sem cache
+
     # Configurações OpenAI (opcional)
     OPENAI_API_KEY: Optional[str] = None
     OPENAI_API_KEY_TEST: Optional[str] = None
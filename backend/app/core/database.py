@@ -19,39 +19,6 @@ def resolve_db_path_from_env():
         return (p.path or "").lstrip("/")
     return "app/connectus.db"
 
-def ensure_core_schema():
-    """Cria as tabelas mínimas se não existirem (SQLAlchemy 2.x, via Engine/Connection)."""
-    with engine.begin() as conn:
-        # feature_flags
-        conn.exec_driver_sql("""
-        CREATE TABLE IF NOT EXISTS feature_flags (
-          key TEXT PRIMARY KEY,
-          enabled INTEGER NOT NULL DEFAULT 0,
-          updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
-        );
-        """)
-        # token_transfers
-        conn.exec_driver_sql("""
-        CREATE TABLE IF NOT EXISTS token_transfers (
-          id INTEGER PRIMARY KEY AUTOINCREMENT,
-          user_id INTEGER NOT NULL,
-          amount REAL NOT NULL DEFAULT 0,
-          status TEXT NOT NULL DEFAULT 'done',
-          tx_hash TEXT,
-          created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-        );
-        """)
-        # wallet_addresses
-        conn.exec_driver_sql("""
-        CREATE TABLE IF NOT EXISTS wallet_addresses (
-          user_id INTEGER PRIMARY KEY,
-          address TEXT UNIQUE,
-          verified_at DATETIME
-        );
-        """)
-
-    return True
-
 def flag_value(db, key: str) -> bool:
     """Helper para obter valor de flag com fallback seguro"""
     try:
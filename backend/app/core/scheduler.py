@@ -0,0 +1,89 @@
+"""
+Agendador simples de jobs periódicos em processo
+
+Cada job é uma função síncrona executada em thread (para não bloquear o
+event loop) a cada `interval_seconds`. Os jobs são iniciados/parados pelos
+hooks de startup/shutdown da aplicação.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PeriodicJob:
+    name: str
+    interval_seconds: float
+    func: Callable[[], object]
+    run_on_start: bool = False
+    runs: int = 0
+    failures: int = 0
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+
+_jobs: Dict[str, PeriodicJob] = {}
+
+
+def register_periodic_job(
+    name: str,
+    interval_seconds: float,
+    func: Callable[[], object],
+    run_on_start: bool = False,
+) -> Optional[PeriodicJob]:
+    """Registra um job periódico (interval <= 0 desativa o job)"""
+    if interval_seconds <= 0:
+        return None
+    job = PeriodicJob(name=name, interval_seconds=interval_seconds, func=func, run_on_start=run_on_start)
+    _jobs[name] = job
+    return job
+
+
+async def _run_forever(job: PeriodicJob):
+    if not job.run_on_start:
+        await asyncio.sleep(job.interval_seconds)
+    while True:
+        try:
+            await asyncio.to_thread(job.func)
+            job.runs += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            job.failures += 1
+            logger.error(f"scheduler.job_failed name={job.name} error={e}")
+        await asyncio.sleep(job.interval_seconds)
+
+
+def start_jobs():
+    """Inicia todos os jobs registrados (chamar no startup)"""
+    loop = asyncio.get_running_loop()
+    for job in _jobs.values():
+        if job.task is None or job.task.done():
+            job.task = loop.create_task(_run_forever(job))
+            logger.info(f"scheduler.start name={job.name} interval={job.interval_seconds}s")
+
+
+async def stop_jobs():
+    """Cancela todos os jobs em execução (chamar no shutdown)"""
+    tasks = [job.task for job in _jobs.values() if job.task is not None]
+    for task in tasks:
+        task.cancel()
+    if tasks:
+        await asyncio.gather(*tasks, return_exceptions=True)
+    for job in _jobs.values():
+        job.task = None
+
+
+def list_jobs() -> Dict[str, dict]:
+    return {
+        name: {
+            "interval_seconds": job.interval_seconds,
+            "runs": job.runs,
+            "failures": job.failures,
+            "running": job.task is not None and not job.task.done(),
+        }
+        for name, job in _jobs.items()
+    }
@@ -0,0 +1,100 @@
+"""
+Registro de prontidão de schema por subsistema
+
+Routers declaram as tabelas (e colunas) de que dependem com require(); as
+rotas consultam is_ready(), que verifica o sqlite_master uma única vez por
+processo e guarda o resultado. O schema é criado só pelas migrações
+(app/db/migrate.py): nenhuma rota executa DDL.
+
+Resultados negativos são rechecados a cada RECHECK_SECONDS, para que um
+banco migrado fora de banda passe a ser usado sem reiniciar o worker.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional, Tuple
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SchemaRequirement:
+    name: str
+    tables: Tuple[str, ...]
+    columns: Dict[str, Tuple[str, ...]] = field(default_factory=dict)
+
+
+class SchemaRegistry:
+    """Requisitos de schema por subsistema, com resultado em cache"""
+
+    RECHECK_SECONDS = 30.0
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self._requirements: Dict[str, SchemaRequirement] = {}
+        self._ready: Dict[str, bool] = {}
+        self._checked_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.checks = 0
+
+    def require(self, name: str, tables: Tuple[str, ...],
+                columns: Optional[Dict[str, Tuple[str, ...]]] = None) -> SchemaRequirement:
+        """Declara as tabelas/views (e colunas) de que o subsistema depende"""
+        requirement = SchemaRequirement(name=name, tables=tuple(tables), columns=dict(columns or {}))
+        with self._lock:
+            self._requirements[name] = requirement
+            self._ready.pop(name, None)
+        return requirement
+
+    def is_ready(self, db, name: str) -> bool:
+        """
+        O schema do subsistema existe neste banco?
+
+        Depois da primeira verificação positiva não toca mais no banco.
+        """
+        if self._ready.get(name):
+            return True
+        checked_at = self._checked_at.get(name)
+        if checked_at is not None and self.clock() - checked_at < self.RECHECK_SECONDS:
+            return False
+
+        requirement = self._requirements[name]
+        ready = self._check(db, requirement)
+        with self._lock:
+            self._ready[name] = ready
+            self._checked_at[name] = self.clock()
+        if not ready:
+            logger.warning(f"Schema de '{name}' incompleto; rode python -m app.db.migrate")
+        return ready
+
+    def _check(self, db, requirement: SchemaRequirement) -> bool:
+        self.checks += 1
+        params = {f"t{i}": table for i, table in enumerate(requirement.tables)}
+        placeholders = ", ".join(f":{key}" for key in params)
+        found = {
+            row[0] for row in db.execute(
+                text(f"SELECT name FROM sqlite_master WHERE type IN ('table', 'view') AND name IN ({placeholders})"),
+                params
+            )
+        }
+        if found != set(requirement.tables):
+            return False
+        for table, columns in requirement.columns.items():
+            existing = {row[1] for row in db.execute(text(f"PRAGMA table_info({table})"))}
+            if not set(columns) <= existing:
+                return False
+        return True
+
+    def reset(self):
+        """Esquece os resultados (ex.: depois de migrar no mesmo processo)"""
+        with self._lock:
+            self._ready.clear()
+            self._checked_at.clear()
+
+
+# Instância global (um cache por processo)
+schema_registry = SchemaRegistry()
@@ -0,0 +1,265 @@
+"""
+Runner de migrações versionadas
+
+Migrações ficam em app/db/migrations/NNN_nome.(sql|py) e são aplicadas em
+ordem, uma única vez, com o checksum registrado em schema_migrations.
+
+- .sql: executado comando a comando (SQLite)
+- .py: módulo com uma função upgrade(conn)
+
+Cada migração roda numa transação explícita (BEGIN ... COMMIT), DDL
+inclusive: uma falha no meio não deixa tabelas criadas sem o registro em
+schema_migrations. Migrações não dependem dos modelos nem dos serviços
+(o DDL e o SQL ficam no próprio arquivo), para que a mesma versão produza
+o mesmo schema em qualquer árvore.
+
+O startup dos workers só faz a checagem rápida (schema_is_current: uma
+consulta); a aplicação roda fora de banda, antes de subir o servidor:
+
+    python -m app.db.migrate
+"""
+
+import hashlib
+import importlib.util
+import logging
+import re
+import sqlite3
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+_FILENAME_RE = re.compile(r"^(\d+)_(\w+)\.(sql|py)$")
+
+class MigrationError(Exception):
+    """Migração inválida, alterada depois de aplicada ou com falha"""
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    path: Path
+    checksum: str
+
+    @property
+    def kind(self) -> str:
+        return self.path.suffix[1:]
+
+
+def discover_versions(directory: Path = MIGRATIONS_DIR) -> List[int]:
+    """Versões disponíveis (apenas nomes de arquivo, sem ler o conteúdo)"""
+    versions = []
+    for path in directory.iterdir():
+        match = _FILENAME_RE.match(path.name)
+        if match:
+            versions.append(int(match.group(1)))
+    return sorted(versions)
+
+
+def discover_migrations(directory: Path = MIGRATIONS_DIR) -> List[Migration]:
+    """Migrações disponíveis, ordenadas por versão"""
+    migrations: Dict[int, Migration] = {}
+    for path in sorted(directory.iterdir()):
+        match = _FILENAME_RE.match(path.name)
+        if not match:
+            continue
+        version = int(match.group(1))
+        if version in migrations:
+            raise MigrationError(
+                f"Versão {version} duplicada: {migrations[version].path.name} e {path.name}"
+            )
+        checksum = hashlib.sha256(path.read_bytes()).hexdigest()
+        migrations[version] = Migration(version, match.group(2), path, checksum)
+    return [migrations[v] for v in sorted(migrations)]
+
+
+def split_sql(script: str) -> List[str]:
+    """Separa um script SQL em comandos completos (respeita strings e triggers)"""
+    statements = []
+    buffer = ""
+    for line in script.splitlines(keepends=True):
+        buffer += line
+        if sqlite3.complete_statement(buffer):
+            statement = buffer.strip()
+            if _strip_comments(statement):
+                statements.append(statement)
+            buffer = ""
+    if _strip_comments(buffer):
+        statements.append(buffer.strip())
+    return statements
+
+
+def _strip_comments(sql: str) -> str:
+    return "\n".join(
+        line for line in sql.splitlines() if not line.strip().startswith("--")
+    ).strip().rstrip(";").strip()
+
+
+def ensure_migrations_table(conn: Connection):
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            checksum TEXT NOT NULL,
+            applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """))
+
+
+def applied_migrations(conn: Connection) -> Dict[int, str]:
+    """version -> checksum das migrações já aplicadas"""
+    rows = conn.execute(text("SELECT version, checksum FROM schema_migrations")).fetchall()
+    return {row[0]: row[1] for row in rows}
+
+
+def _apply(conn: Connection, migration: Migration):
+    if migration.kind == "sql":
+        for statement in split_sql(migration.path.read_text(encoding="utf-8")):
+            conn.exec_driver_sql(statement)
+    else:
+        spec = importlib.util.spec_from_file_location(
+            f"app.db.migrations.m{migration.version:03d}_{migration.name}", migration.path
+        )
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        upgrade = getattr(module, "upgrade", None)
+        if upgrade is None:
+            raise MigrationError(f"{migration.path.name} não define upgrade(conn)")
+        upgrade(conn)
+    conn.execute(
+        text("INSERT INTO schema_migrations (version, name, checksum) VALUES (:v, :n, :c)"),
+        {"v": migration.version, "n": migration.name, "c": migration.checksum}
+    )
+
+
+@contextmanager
+def _transaction(engine: Engine):
+    """
+    Conexão numa transação que cobre também o DDL
+
+    O pysqlite (modo legado de transação) não emite BEGIN antes de DDL, que
+    então roda em autocommit; aqui o driver fica em autocommit e a
+    transação é aberta e fechada explicitamente.
+    """
+    if engine.dialect.name != "sqlite":
+        with engine.begin() as conn:
+            yield conn
+        return
+    with engine.connect() as conn:
+        conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+        conn.exec_driver_sql("BEGIN")
+        try:
+            yield conn
+        except BaseException:
+            try:
+                conn.exec_driver_sql("ROLLBACK")
+            except Exception:
+                # Alguns erros do SQLite já desfazem a transação
+                pass
+            raise
+        conn.exec_driver_sql("COMMIT")
+
+
+def migrate(engine: Engine, directory: Path = MIGRATIONS_DIR,
+            target: Optional[int] = None) -> List[int]:
+    """
+    Aplica as migrações pendentes em ordem
+
+    Cada migração roda em sua própria transação junto com o registro em
+    schema_migrations. Se outro processo aplicar a mesma versão ao mesmo
+    tempo, a falha local é ignorada.
+
+    Args:
+        engine: Engine do banco
+        directory: Diretório das migrações
+        target: Aplica só até esta versão (inclusive)
+
+    Returns:
+        Versões aplicadas nesta chamada
+
+    Raises:
+        MigrationError: Migração aplicada com checksum diferente, ou falha
+    """
+    migrations = discover_migrations(directory)
+    with engine.begin() as conn:
+        ensure_migrations_table(conn)
+        applied = applied_migrations(conn)
+
+    for migration in migrations:
+        recorded = applied.get(migration.version)
+        if recorded is not None and recorded != migration.checksum:
+            raise MigrationError(
+                f"Migração {migration.path.name} foi alterada depois de aplicada "
+                f"(checksum {recorded[:12]} != {migration.checksum[:12]})"
+            )
+
+    done = []
+    for migration in migrations:
+        if migration.version in applied or (target is not None and migration.version > target):
+            continue
+        start = time.perf_counter()
+        try:
+            with _transaction(engine) as conn:
+                _apply(conn, migration)
+        except Exception as e:
+            with engine.connect() as conn:
+                if migration.version in applied_migrations(conn):
+                    logger.info(f"migrate: {migration.path.name} aplicada por outro processo")
+                    continue
+            raise MigrationError(f"Falha ao aplicar {migration.path.name}: {e}") from e
+        done.append(migration.version)
+        logger.info(f"migrate: {migration.path.name} aplicada em {time.perf_counter() - start:.3f}s")
+    return done
+
+
+def pending_versions(engine: Engine, directory: Path = MIGRATIONS_DIR) -> List[int]:
+    """Versões disponíveis que ainda não foram aplicadas (uma consulta)"""
+    available = discover_versions(directory)
+    try:
+        with engine.connect() as conn:
+            applied = {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+    except Exception:
+        return available
+    return [v for v in available if v not in applied]
+
+
+def schema_is_current(engine: Engine, directory: Path = MIGRATIONS_DIR) -> bool:
+    """Checagem rápida para o startup: todas as migrações já foram aplicadas?"""
+    return not pending_versions(engine, directory)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Aplica as migrações pendentes do banco")
+    parser.add_argument("--status", action="store_true", help="Só lista as versões pendentes")
+    parser.add_argument("--target", type=int, default=None, help="Aplica só até esta versão")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    from app.core.database import engine
+
+    if args.status:
+        pending = pending_versions(engine)
+        print(f"Pendentes: {pending}" if pending else "Schema atualizado")
+        return 0
+    try:
+        done = migrate(engine, target=args.target)
+    except MigrationError as e:
+        logger.error(str(e))
+        return 1
+    print(f"Aplicadas: {done}" if done else "Nenhuma migração pendente")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
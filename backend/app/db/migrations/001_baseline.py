@@ -0,0 +1,543 @@
+"""
+Migração 001: schema base
+
+Reúne o que antes rodava em todo boot (create_all dos modelos,
+ensure_core_schema e os hooks _ensure_* do main.py), escrito de forma
+idempotente para bancos criados por qualquer versão anterior.
+
+As tabelas dos modelos estão congeladas como DDL explícito (o que o
+create_all gerava quando esta migração foi criada): mudanças posteriores
+nos modelos entram em migrações novas, nunca aqui.
+"""
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+# Tabelas dos modelos e seus índices, na ordem do create_all:
+# (tabela, CREATE TABLE, CREATE INDEX...)
+MODEL_TABLES = [
+    ("users", """
+        CREATE TABLE users (
+            id INTEGER NOT NULL,
+            nickname VARCHAR(50) NOT NULL,
+            password_hash VARCHAR(255) NOT NULL,
+            full_name VARCHAR(100),
+            email VARCHAR(100),
+            bio TEXT,
+            avatar_url VARCHAR(255),
+            avatar_glb_url VARCHAR(500),
+            avatar_png_url VARCHAR(500),
+            xp INTEGER,
+            level INTEGER,
+            tokens_earned NUMERIC(10, 2),
+            tokens_available NUMERIC(10, 2),
+            tokens_in_yield NUMERIC(10, 2),
+            is_active BOOLEAN,
+            is_verified BOOLEAN,
+            created_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+            updated_at DATETIME,
+            last_login DATETIME,
+            missions_completed INTEGER,
+            posts_created INTEGER,
+            likes_received INTEGER,
+            comments_made INTEGER,
+            PRIMARY KEY (id)
+        )
+    """, [
+        "CREATE INDEX ix_users_id ON users (id)",
+        "CREATE UNIQUE INDEX ix_users_nickname ON users (nickname)",
+    ]),
+    ("missions", """
+        CREATE TABLE missions (
+            id INTEGER NOT NULL,
+            title VARCHAR(100) NOT NULL,
+            description TEXT NOT NULL,
+            category VARCHAR(50) NOT NULL,
+            xp_reward INTEGER NOT NULL,
+            token_reward NUMERIC(10, 6) NOT NULL,
+            is_daily BOOLEAN NOT NULL,
+            is_active BOOLEAN NOT NULL,
+            difficulty VARCHAR(20) NOT NULL,
+            type VARCHAR(13) NOT NULL,
+            window_start TIME,
+            window_end TIME,
+            verification_hint VARCHAR,
+            created_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+            updated_at DATETIME,
+            PRIMARY KEY (id)
+        )
+    """, [
+        "CREATE INDEX ix_missions_id ON missions (id)",
+    ]),
+    ("feature_flags", """
+        CREATE TABLE feature_flags (
+            id INTEGER NOT NULL,
+            flag_name VARCHAR(100) NOT NULL,
+            flag_value BOOLEAN NOT NULL,
+            description TEXT,
+            created_at DATETIME,
+            updated_at DATETIME,
+            PRIMARY KEY (id)
+        )
+    """, [
+        "CREATE UNIQUE INDEX ix_feature_flags_flag_name ON feature_flags (flag_name)",
+        "CREATE INDEX ix_feature_flags_id ON feature_flags (id)",
+    ]),
+    ("mission_rules", """
+        CREATE TABLE mission_rules (
+            id INTEGER NOT NULL,
+            mission_slug VARCHAR(100) NOT NULL,
+            rule_name VARCHAR(200) NOT NULL,
+            rule_config TEXT NOT NULL,
+            is_active BOOLEAN,
+            created_at DATETIME,
+            updated_at DATETIME,
+            PRIMARY KEY (id)
+        )
+    """, [
+        "CREATE UNIQUE INDEX ix_mission_rules_mission_slug ON mission_rules (mission_slug)",
+        "CREATE INDEX ix_mission_rules_id ON mission_rules (id)",
+        "CREATE INDEX ix_mission_rules_is_active ON mission_rules (is_active)",
+    ]),
+    ("daily_rollups", """
+        CREATE TABLE daily_rollups (
+            user_id INTEGER NOT NULL,
+            day VARCHAR(10) NOT NULL,
+            source VARCHAR(20) NOT NULL,
+            kind VARCHAR(100) NOT NULL,
+            count INTEGER NOT NULL,
+            weight_sum FLOAT NOT NULL,
+            CONSTRAINT pk_daily_rollups PRIMARY KEY (user_id, day, source, kind)
+        )
+    """, [
+        "CREATE INDEX idx_daily_rollups_day ON daily_rollups (day)",
+    ]),
+    ("rollup_watermarks", """
+        CREATE TABLE rollup_watermarks (
+            source VARCHAR(20) NOT NULL,
+            last_id INTEGER NOT NULL,
+            updated_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+            PRIMARY KEY (source)
+        )
+    """, []),
+    ("attestation_batches", """
+        CREATE TABLE attestation_batches (
+            id INTEGER NOT NULL,
+            root VARCHAR(66) NOT NULL,
+            leaf_count INTEGER NOT NULL,
+            changed_leaves INTEGER NOT NULL,
+            created_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+            PRIMARY KEY (id)
+        )
+    """, [
+        "CREATE INDEX ix_attestation_batches_id ON attestation_batches (id)",
+    ]),
+    ("attestation_leaves", """
+        CREATE TABLE attestation_leaves (
+            user_id INTEGER NOT NULL,
+            position INTEGER NOT NULL,
+            score FLOAT NOT NULL,
+            updated_at VARCHAR(32) NOT NULL,
+            leaf_hash VARCHAR(64) NOT NULL,
+            PRIMARY KEY (user_id),
+            UNIQUE (position)
+        )
+    """, []),
+    ("chat_rooms", """
+        CREATE TABLE chat_rooms (
+            id INTEGER NOT NULL,
+            name VARCHAR(100) NOT NULL,
+            description TEXT,
+            is_private BOOLEAN NOT NULL,
+            is_public BOOLEAN NOT NULL,
+            is_active BOOLEAN NOT NULL,
+            created_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+            updated_at DATETIME,
+            PRIMARY KEY (id)
+        )
+    """, [
+        "CREATE INDEX ix_chat_rooms_id ON chat_rooms (id)",
+    ]),
+    ("daily_missions", """
+        CREATE TABLE daily_missions (
+            id INTEGER NOT NULL,
+            code VARCHAR(64) NOT NULL,
+            title VARCHAR(120) NOT NULL,
+            description VARCHAR(255) NOT NULL,
+            xp_reward INTEGER NOT NULL,
+            token_reward INTEGER NOT NULL,
+            icon VARCHAR(64),
+            is_active BOOLEAN NOT NULL,
+            created_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+            PRIMARY KEY (id)
+        )
+    """, [
+        "CREATE UNIQUE INDEX ix_daily_missions_code ON daily_missions (code)",
+        "CREATE INDEX ix_daily_missions_id ON daily_missions (id)",
+    ]),
+    ("user_mission_progress", """
+        CREATE TABLE user_mission_progress (
+            id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            mission_id INTEGER NOT NULL,
+            date VARCHAR(10) NOT NULL,
+            status VARCHAR(20) NOT NULL,
+            completed_at DATETIME,
+            PRIMARY KEY (id),
+            CONSTRAINT uq_user_mission_date UNIQUE (user_id, mission_id, date)
+        )
+    """, [
+        "CREATE INDEX ix_user_mission_progress_id ON user_mission_progress (id)",
+        "CREATE INDEX ix_user_mission_progress_user_id ON user_mission_progress (user_id)",
+        "CREATE INDEX ix_user_mission_progress_mission_id ON user_mission_progress (mission_id)",
+        "CREATE INDEX idx_user_mission_date ON user_mission_progress (user_id, mission_id, date)",
+    ]),
+    ("posts", """
+        CREATE TABLE posts (
+            id INTEGER NOT NULL,
+            author_id INTEGER NOT NULL,
+            content TEXT NOT NULL,
+            image_url VARCHAR(500),
+            likes_count INTEGER NOT NULL,
+            comments_count INTEGER NOT NULL,
+            shares_count INTEGER NOT NULL,
+            is_active BOOLEAN NOT NULL,
+            created_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+            updated_at DATETIME,
+            PRIMARY KEY (id),
+            FOREIGN KEY(author_id) REFERENCES users (id)
+        )
+    """, [
+        "CREATE INDEX ix_posts_id ON posts (id)",
+    ]),
+    ("user_missions", """
+        CREATE TABLE user_missions (
+            id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            mission_id INTEGER NOT NULL,
+            is_completed BOOLEAN NOT NULL,
+            completed_at DATETIME,
+            progress INTEGER NOT NULL,
+            created_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+            updated_at DATETIME,
+            PRIMARY KEY (id),
+            FOREIGN KEY(user_id) REFERENCES users (id),
+            FOREIGN KEY(mission_id) REFERENCES missions (id)
+        )
+    """, [
+        "CREATE INDEX ix_user_missions_id ON user_missions (id)",
+    ]),
+    ("mission_completions", """
+        CREATE TABLE mission_completions (
+            id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            mission_id INTEGER NOT NULL,
+            completed_at DATETIME NOT NULL,
+            proof_type VARCHAR,
+            proof_meta JSON,
+            xp_awarded INTEGER,
+            tokens_awarded INTEGER,
+            PRIMARY KEY (id),
+            CONSTRAINT uq_daily_unique_by_day UNIQUE (user_id, mission_id, completed_at),
+            FOREIGN KEY(user_id) REFERENCES users (id),
+            FOREIGN KEY(mission_id) REFERENCES missions (id)
+        )
+    """, []),
+    ("mission_events", """
+        CREATE TABLE mission_events (
+            id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            mission_slug VARCHAR(100) NOT NULL,
+            event_type VARCHAR(50) NOT NULL,
+            payload TEXT NOT NULL,
+            payload_hash VARCHAR(64) NOT NULL,
+            created_at DATETIME,
+            PRIMARY KEY (id),
+            FOREIGN KEY(user_id) REFERENCES users (id) ON DELETE CASCADE
+        )
+    """, [
+        "CREATE INDEX ix_mission_events_id ON mission_events (id)",
+        "CREATE INDEX idx_mission_events_user_mission ON mission_events (user_id, mission_slug)",
+        "CREATE INDEX ix_mission_events_user_id ON mission_events (user_id)",
+        "CREATE INDEX ix_mission_events_mission_slug ON mission_events (mission_slug)",
+        "CREATE INDEX ix_mission_events_created_at ON mission_events (created_at)",
+    ]),
+    ("impact_events", """
+        CREATE TABLE impact_events (
+            id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            type VARCHAR(50) NOT NULL,
+            weight FLOAT NOT NULL,
+            metadata JSON,
+            timestamp DATETIME DEFAULT (CURRENT_TIMESTAMP) NOT NULL,
+            PRIMARY KEY (id),
+            CONSTRAINT check_weight_nonnegative CHECK (weight >= 0),
+            FOREIGN KEY(user_id) REFERENCES users (id)
+        )
+    """, [
+        "CREATE INDEX ix_impact_events_type ON impact_events (type)",
+        "CREATE INDEX ix_impact_events_user_id ON impact_events (user_id)",
+        "CREATE INDEX ix_impact_events_weight ON impact_events (weight)",
+        "CREATE INDEX idx_impact_events_user_timestamp ON impact_events (user_id, timestamp)",
+        "CREATE INDEX ix_impact_events_id ON impact_events (id)",
+        "CREATE INDEX idx_impact_events_type_timestamp ON impact_events (type, timestamp)",
+    ]),
+    ("impact_scores", """
+        CREATE TABLE impact_scores (
+            user_id INTEGER NOT NULL,
+            score FLOAT NOT NULL,
+            breakdown JSON,
+            decayed_score FLOAT DEFAULT '0' NOT NULL,
+            updated_at DATETIME DEFAULT (CURRENT_TIMESTAMP) NOT NULL,
+            PRIMARY KEY (user_id),
+            FOREIGN KEY(user_id) REFERENCES users (id)
+        )
+    """, [
+        "CREATE INDEX ix_impact_scores_decayed_score ON impact_scores (decayed_score)",
+        "CREATE INDEX ix_impact_scores_user_id ON impact_scores (user_id)",
+    ]),
+    ("user_avatar", """
+        CREATE TABLE user_avatar (
+            id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            skin VARCHAR,
+            skin_tone VARCHAR,
+            face VARCHAR,
+            hair VARCHAR,
+            hair_color VARCHAR,
+            outfit VARCHAR,
+            accessories JSON,
+            unlocked_skins JSON,
+            PRIMARY KEY (id),
+            UNIQUE (user_id),
+            FOREIGN KEY(user_id) REFERENCES users (id)
+        )
+    """, [
+        "CREATE INDEX ix_user_avatar_id ON user_avatar (id)",
+    ]),
+    ("chat_messages", """
+        CREATE TABLE chat_messages (
+            id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            room_id INTEGER NOT NULL,
+            content TEXT NOT NULL,
+            is_filtered BOOLEAN NOT NULL,
+            filter_reason VARCHAR(100),
+            is_active BOOLEAN NOT NULL,
+            created_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+            updated_at DATETIME,
+            PRIMARY KEY (id),
+            FOREIGN KEY(user_id) REFERENCES users (id),
+            FOREIGN KEY(room_id) REFERENCES chat_rooms (id)
+        )
+    """, [
+        "CREATE INDEX ix_chat_messages_id ON chat_messages (id)",
+    ]),
+    ("user_rankings", """
+        CREATE TABLE user_rankings (
+            id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            total_xp INTEGER NOT NULL,
+            total_tokens NUMERIC(20, 6) NOT NULL,
+            missions_completed INTEGER NOT NULL,
+            posts_created INTEGER NOT NULL,
+            likes_received INTEGER NOT NULL,
+            xp_rank INTEGER,
+            token_rank INTEGER,
+            mission_rank INTEGER,
+            overall_rank INTEGER,
+            last_updated DATETIME DEFAULT (CURRENT_TIMESTAMP),
+            PRIMARY KEY (id),
+            UNIQUE (user_id),
+            FOREIGN KEY(user_id) REFERENCES users (id)
+        )
+    """, [
+        "CREATE INDEX ix_user_rankings_id ON user_rankings (id)",
+    ]),
+    ("post_likes", """
+        CREATE TABLE post_likes (
+            id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            post_id INTEGER NOT NULL,
+            created_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+            PRIMARY KEY (id),
+            FOREIGN KEY(user_id) REFERENCES users (id),
+            FOREIGN KEY(post_id) REFERENCES posts (id)
+        )
+    """, [
+        "CREATE INDEX ix_post_likes_id ON post_likes (id)",
+    ]),
+    ("post_comments", """
+        CREATE TABLE post_comments (
+            id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            post_id INTEGER NOT NULL,
+            content TEXT NOT NULL,
+            is_active BOOLEAN NOT NULL,
+            created_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+            updated_at DATETIME,
+            PRIMARY KEY (id),
+            FOREIGN KEY(user_id) REFERENCES users (id),
+            FOREIGN KEY(post_id) REFERENCES posts (id)
+        )
+    """, [
+        "CREATE INDEX ix_post_comments_id ON post_comments (id)",
+    ]),
+    ("mission_attempts", """
+        CREATE TABLE mission_attempts (
+            id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            mission_slug VARCHAR(100) NOT NULL,
+            event_id INTEGER NOT NULL,
+            status VARCHAR(20) NOT NULL,
+            score INTEGER,
+            evidence_hash VARCHAR(64) NOT NULL,
+            reason TEXT,
+            evaluated_at DATETIME,
+            PRIMARY KEY (id),
+            FOREIGN KEY(user_id) REFERENCES users (id) ON DELETE CASCADE,
+            FOREIGN KEY(event_id) REFERENCES mission_events (id) ON DELETE CASCADE
+        )
+    """, [
+        "CREATE INDEX ix_mission_attempts_status ON mission_attempts (status)",
+        "CREATE INDEX ix_mission_attempts_mission_slug ON mission_attempts (mission_slug)",
+        "CREATE INDEX ix_mission_attempts_id ON mission_attempts (id)",
+        "CREATE INDEX ix_mission_attempts_user_id ON mission_attempts (user_id)",
+        "CREATE INDEX idx_mission_attempts_user_status ON mission_attempts (user_id, status)",
+    ]),
+    ("mission_evidences", """
+        CREATE TABLE mission_evidences (
+            id INTEGER NOT NULL,
+            attempt_id INTEGER NOT NULL,
+            evidence_type VARCHAR(50) NOT NULL,
+            evidence_data TEXT NOT NULL,
+            evidence_hash VARCHAR(64) NOT NULL,
+            created_at DATETIME,
+            PRIMARY KEY (id),
+            FOREIGN KEY(attempt_id) REFERENCES mission_attempts (id) ON DELETE CASCADE
+        )
+    """, [
+        "CREATE INDEX ix_mission_evidences_id ON mission_evidences (id)",
+        "CREATE INDEX ix_mission_evidences_attempt_id ON mission_evidences (attempt_id)",
+        "CREATE INDEX ix_mission_evidences_evidence_hash ON mission_evidences (evidence_hash)",
+        "CREATE INDEX ix_mission_evidences_evidence_type ON mission_evidences (evidence_type)",
+    ]),
+]
+
+
+def _columns(conn: Connection, table: str) -> set:
+    return {row[1] for row in conn.execute(text(f"PRAGMA table_info({table})")).fetchall()}
+
+
+def _add_missing_columns(conn: Connection, table: str, columns):
+    existing = _columns(conn, table)
+    for name, ddl in columns:
+        if name not in existing:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}"))
+
+
+def upgrade(conn: Connection):
+    # Como o create_all: tabela já existente (bancos antigos) fica como está,
+    # sem os índices; colunas que faltam são tratadas abaixo
+    existing = {row[0] for row in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'table'"))}
+    for table, ddl, indexes in MODEL_TABLES:
+        if table in existing:
+            continue
+        conn.exec_driver_sql(ddl)
+        for index in indexes:
+            conn.exec_driver_sql(index)
+
+    # Tabelas de wallet/flags usadas via SQL puro (ensure_core_schema)
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS feature_flags (
+          key TEXT PRIMARY KEY,
+          enabled INTEGER NOT NULL DEFAULT 0,
+          updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """))
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS token_transfers (
+          id INTEGER PRIMARY KEY AUTOINCREMENT,
+          user_id INTEGER NOT NULL,
+          amount REAL NOT NULL DEFAULT 0,
+          status TEXT NOT NULL DEFAULT 'done',
+          tx_hash TEXT,
+          created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """))
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS wallet_addresses (
+          user_id INTEGER PRIMARY KEY,
+          address TEXT UNIQUE,
+          verified_at DATETIME
+        )
+    """))
+
+    # feature_flags existe em dois formatos (key/enabled e flag_name/flag_value);
+    # garante as colunas dos dois para que todas as consultas funcionem
+    _add_missing_columns(conn, "feature_flags", [
+        ("key", "TEXT"),
+        ("enabled", "INTEGER NOT NULL DEFAULT 0"),
+        ("flag_name", "TEXT"),
+        ("flag_value", "BOOLEAN NOT NULL DEFAULT 0"),
+        ("description", "TEXT"),
+        ("updated_at", "DATETIME"),
+    ])
+
+    # Colunas de avatar em users (bancos anteriores ao Ready Player Me)
+    _add_missing_columns(conn, "users", [
+        ("avatar_url", "TEXT"),
+        ("avatar_glb_url", "TEXT"),
+        ("avatar_png_url", "TEXT"),
+    ])
+
+    # Impact Score
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS impact_events(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            type TEXT NOT NULL,
+            weight REAL NOT NULL DEFAULT 0,
+            metadata TEXT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY(user_id) REFERENCES users(id),
+            CHECK(weight >= 0)
+        )
+    """))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS idx_impact_events_user_id ON impact_events(user_id)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS idx_impact_events_type ON impact_events(type)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS idx_impact_events_user_timestamp ON impact_events(user_id, timestamp)"))
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS impact_scores(
+            user_id INTEGER PRIMARY KEY,
+            score REAL NOT NULL DEFAULT 0,
+            breakdown TEXT,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY(user_id) REFERENCES users(id)
+        )
+    """))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS idx_impact_scores_user_id ON impact_scores(user_id)"))
+    _add_missing_columns(conn, "impact_scores", [("decayed_score", "REAL NOT NULL DEFAULT 0")])
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_impact_scores_decayed_score ON impact_scores(decayed_score)"))
+
+    # Tabelas da demo Web3 (inofensivas quando a demo está desligada)
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS demo_wallets(
+            user_id INTEGER PRIMARY KEY,
+            balance REAL DEFAULT 0.0,
+            FOREIGN KEY(user_id) REFERENCES users(id)
+        )
+    """))
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS demo_stakes(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            amount REAL NOT NULL,
+            apr REAL NOT NULL DEFAULT 10.0,
+            days INTEGER NOT NULL,
+            status TEXT NOT NULL DEFAULT 'locked',
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            unlock_at TEXT,
+            FOREIGN KEY(user_id) REFERENCES users(id)
+        )
+    """))
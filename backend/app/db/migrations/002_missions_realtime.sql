@@ -22,10 +22,7 @@ CREATE TABLE IF NOT EXISTS mission_events (
     payload_hash VARCHAR(64) NOT NULL, -- SHA256 do payload
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     
-    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-    INDEX idx_mission_events_user_id (user_id),
-    INDEX idx_mission_events_mission_slug (mission_slug),
-    INDEX idx_mission_events_created_at (created_at)
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
 );
 
 -- Tentativas de missão (resultado da avaliação)
@@ -41,10 +38,7 @@ CREATE TABLE IF NOT EXISTS mission_attempts (
     evaluated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-    FOREIGN KEY (event_id) REFERENCES mission_events(id) ON DELETE CASCADE,
-    INDEX idx_mission_attempts_user_id (user_id),
-    INDEX idx_mission_attempts_status (status),
-    INDEX idx_mission_attempts_mission_slug (mission_slug)
+    FOREIGN KEY (event_id) REFERENCES mission_events(id) ON DELETE CASCADE
 );
 
 -- Evidências de missão (provas de conclusão)
@@ -56,9 +50,7 @@ CREATE TABLE IF NOT EXISTS mission_evidences (
     evidence_hash VARCHAR(64) NOT NULL, -- SHA256 da evidência
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     
-    FOREIGN KEY (attempt_id) REFERENCES mission_attempts(id) ON DELETE CASCADE,
-    INDEX idx_mission_evidences_attempt_id (attempt_id),
-    INDEX idx_mission_evidences_type (evidence_type)
+    FOREIGN KEY (attempt_id) REFERENCES mission_attempts(id) ON DELETE CASCADE
 );
 
 -- Regras de missão (configuração declarativa)
@@ -69,12 +61,21 @@ CREATE TABLE IF NOT EXISTS mission_rules (
     rule_config TEXT NOT NULL, -- JSON com configuração da regra
     is_active BOOLEAN DEFAULT TRUE,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    
-    INDEX idx_mission_rules_slug (mission_slug),
-    INDEX idx_mission_rules_active (is_active)
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Índices (SQLite não aceita INDEX dentro de CREATE TABLE)
+CREATE INDEX IF NOT EXISTS idx_mission_events_user_id ON mission_events(user_id);
+CREATE INDEX IF NOT EXISTS idx_mission_events_mission_slug ON mission_events(mission_slug);
+CREATE INDEX IF NOT EXISTS idx_mission_events_created_at ON mission_events(created_at);
+CREATE INDEX IF NOT EXISTS idx_mission_attempts_user_id ON mission_attempts(user_id);
+CREATE INDEX IF NOT EXISTS idx_mission_attempts_status ON mission_attempts(status);
+CREATE INDEX IF NOT EXISTS idx_mission_attempts_mission_slug ON mission_attempts(mission_slug);
+CREATE INDEX IF NOT EXISTS idx_mission_evidences_attempt_id ON mission_evidences(attempt_id);
+CREATE INDEX IF NOT EXISTS idx_mission_evidences_type ON mission_evidences(evidence_type);
+CREATE INDEX IF NOT EXISTS idx_mission_rules_slug ON mission_rules(mission_slug);
+CREATE INDEX IF NOT EXISTS idx_mission_rules_active ON mission_rules(is_active);
+
 -- Inserir feature flag para controle do módulo
 INSERT OR IGNORE INTO feature_flags (flag_name, flag_value, description) 
 VALUES ('MISSIONS_REALTIME_ENABLED', TRUE, 'Habilita sistema de missões em tempo real');
@@ -96,9 +97,9 @@ CREATE TRIGGER IF NOT EXISTS update_mission_rules_timestamp
     END;
 
 -- Índices adicionais para performance
-CREATE INDEX IF NOT EXISTS idx_mission_events_user_mission (user_id, mission_slug);
-CREATE INDEX IF NOT EXISTS idx_mission_attempts_user_status (user_id, status);
-CREATE INDEX IF NOT EXISTS idx_mission_evidences_hash (evidence_hash);
+CREATE INDEX IF NOT EXISTS idx_mission_events_user_mission ON mission_events(user_id, mission_slug);
+CREATE INDEX IF NOT EXISTS idx_mission_attempts_user_status ON mission_attempts(user_id, status);
+CREATE INDEX IF NOT EXISTS idx_mission_evidences_hash ON mission_evidences(evidence_hash);
 
 -- Comentários para documentação
 -- mission_events: Registra todos os eventos do sistema (QR scan, post criado, etc.)
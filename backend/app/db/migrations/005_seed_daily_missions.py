@@ -0,0 +1,30 @@
+"""
+Migração 005: missões diárias v2 iniciais
+
+Antes rodava no startup de cada worker (seed_missions_v2); insere as 3
+missões apenas se a tabela estiver vazia.
+"""
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+MISSIONS = [
+    ("CHECKIN", "Check-in diário", "Entre hoje e garanta sua streak!", 10, 2, "calendar-check"),
+    ("LIKE_POST", "Curtir um post", "Mostre apoio à comunidade", 15, 3, "heart"),
+    ("INVITE_FRIEND", "Convidar um amigo", "Traga alguém para a ConnectUS", 30, 5, "user-plus"),
+]
+
+
+def upgrade(conn: Connection):
+    if conn.execute(text("SELECT COUNT(*) FROM daily_missions")).scalar():
+        return
+    conn.execute(
+        text("""
+            INSERT INTO daily_missions (code, title, description, xp_reward, token_reward, icon, is_active)
+            VALUES (:code, :title, :description, :xp, :tokens, :icon, 1)
+        """),
+        [
+            {"code": code, "title": title, "description": desc, "xp": xp, "tokens": tokens, "icon": icon}
+            for code, title, desc, xp, tokens, icon in MISSIONS
+        ]
+    )
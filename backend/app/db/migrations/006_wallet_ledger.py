@@ -0,0 +1,35 @@
+"""
+Migração 006: schema usado pelas rotas de wallet e staking
+
+Substitui o _ensure_wallet_core_schema que rodava a cada requisição:
+- wallet_addresses.nonce (desafio de assinatura)
+- token_ledger e a view v_wallet_balance (saldo para saque/staking)
+"""
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+
+def upgrade(conn: Connection):
+    cols = {row[1] for row in conn.execute(text("PRAGMA table_info(wallet_addresses)")).fetchall()}
+    if "nonce" not in cols:
+        conn.execute(text("ALTER TABLE wallet_addresses ADD COLUMN nonce TEXT"))
+
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS token_ledger (
+          id INTEGER PRIMARY KEY AUTOINCREMENT,
+          user_id INTEGER NOT NULL,
+          type TEXT NOT NULL,
+          amount INTEGER NOT NULL,
+          meta_json TEXT,
+          created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS idx_token_ledger_user ON token_ledger(user_id)"))
+    conn.execute(text("""
+        CREATE VIEW IF NOT EXISTS v_wallet_balance AS
+        SELECT user_id, COALESCE(SUM(amount), 0) AS balance
+        FROM token_ledger
+        GROUP BY user_id
+    """))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS idx_token_transfers_user ON token_transfers(user_id)"))
@@ -0,0 +1,3 @@
+-- 007_posts_author_index.sql
+-- Contagens por autor (ranking, perfil) sem varrer a tabela de posts
+CREATE INDEX IF NOT EXISTS idx_posts_author_id ON posts(author_id);
@@ -0,0 +1,61 @@
+"""
+Migração 008: índice unificado de conclusões de missões
+
+- mission_completion_index (chave primária user_id, mission_key, day)
+- triggers que gravam as conclusões das missões v2 na mesma transação
+- backfill a partir dos três sistemas (legado, v2, tempo real)
+
+Os timestamps do legado e do tempo real são gravados em UTC; o dia é
+convertido para America/Sao_Paulo (UTC-3, sem horário de verão desde 2019).
+"""
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+_V2_KEY = "(SELECT 'v2:' || UPPER(code) FROM daily_missions WHERE id = NEW.mission_id)"
+
+
+def upgrade(conn: Connection):
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS mission_completion_index (
+          user_id INTEGER NOT NULL,
+          mission_key VARCHAR(120) NOT NULL,
+          day VARCHAR(10) NOT NULL,
+          source VARCHAR(20) NOT NULL,
+          completed_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+          CONSTRAINT pk_mission_completion_index PRIMARY KEY (user_id, mission_key, day)
+        ) WITHOUT ROWID
+    """))
+
+    for event, guard in (("INSERT", "NEW.status = 'completed'"),
+                         ("UPDATE OF status", "NEW.status = 'completed' AND OLD.status <> 'completed'")):
+        name = "trg_ump_completion_index_" + event.split()[0].lower()
+        conn.execute(text(f"""
+            CREATE TRIGGER IF NOT EXISTS {name}
+            AFTER {event} ON user_mission_progress
+            WHEN {guard}
+            BEGIN
+                INSERT OR IGNORE INTO mission_completion_index (user_id, mission_key, day, source)
+                SELECT NEW.user_id, {_V2_KEY}, NEW.date, 'v2'
+                WHERE {_V2_KEY} IS NOT NULL;
+            END
+        """))
+
+    conn.execute(text("""
+        INSERT OR IGNORE INTO mission_completion_index (user_id, mission_key, day, source, completed_at)
+        SELECT p.user_id, 'v2:' || UPPER(d.code), p.date, 'v2', p.completed_at
+        FROM user_mission_progress p JOIN daily_missions d ON d.id = p.mission_id
+        WHERE p.status = 'completed'
+    """))
+    conn.execute(text("""
+        INSERT OR IGNORE INTO mission_completion_index (user_id, mission_key, day, source, completed_at)
+        SELECT user_id, 'legacy:' || mission_id, date(completed_at, '-3 hours'), 'legacy', completed_at
+        FROM mission_completions
+        WHERE completed_at IS NOT NULL
+    """))
+    conn.execute(text("""
+        INSERT OR IGNORE INTO mission_completion_index (user_id, mission_key, day, source, completed_at)
+        SELECT user_id, 'rt:' || mission_slug, date(evaluated_at, '-3 hours'), 'realtime', evaluated_at
+        FROM mission_attempts
+        WHERE status = 'approved' AND evaluated_at IS NOT NULL
+    """))
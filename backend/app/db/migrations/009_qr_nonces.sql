@@ -0,0 +1,11 @@
+-- 009_qr_nonces.sql
+-- Nonces de QR de check-in já usados: garante uso único entre workers
+CREATE TABLE IF NOT EXISTS qr_nonces (
+    nonce VARCHAR(32) NOT NULL PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    mission_id INTEGER NOT NULL,
+    expires_at INTEGER NOT NULL,
+    used_at DATETIME DEFAULT CURRENT_TIMESTAMP
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS ix_qr_nonces_expires_at ON qr_nonces(expires_at);
@@ -0,0 +1,26 @@
+-- Migração 010: estatísticas incrementais das salas de chat
+--
+-- chat_room_stats guarda o total de mensagens ativas e o HyperLogLog dos
+-- autores por sala. O backfill grava contagens exatas e deixa o sketch
+-- vazio (hll NULL): chat_stats o monta a partir das mensagens da sala no
+-- primeiro uso, e a recontagem periódica o reconstrói.
+
+CREATE TABLE IF NOT EXISTS chat_room_stats (
+  room_id INTEGER NOT NULL PRIMARY KEY,
+  message_count INTEGER NOT NULL DEFAULT 0,
+  hll BLOB,
+  unique_estimate INTEGER NOT NULL DEFAULT 0,
+  unique_exact INTEGER,
+  audited_at DATETIME
+);
+
+INSERT INTO chat_room_stats (room_id, message_count, hll, unique_estimate, unique_exact, audited_at)
+SELECT r.id, COUNT(m.id), NULL, COUNT(DISTINCT m.user_id), COUNT(DISTINCT m.user_id), CURRENT_TIMESTAMP
+FROM chat_rooms r LEFT JOIN chat_messages m ON m.room_id = r.id AND m.is_active = 1
+GROUP BY r.id
+ON CONFLICT(room_id) DO UPDATE SET
+    message_count = excluded.message_count,
+    hll = NULL,
+    unique_estimate = excluded.unique_estimate,
+    unique_exact = excluded.unique_exact,
+    audited_at = excluded.audited_at;
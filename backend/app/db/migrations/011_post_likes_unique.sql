@@ -0,0 +1,9 @@
+-- 011_post_likes_unique.sql
+-- Um like por (usuário, post): remove duplicados (cliques duplos) antes do índice único
+DELETE FROM post_likes
+WHERE id NOT IN (SELECT MIN(id) FROM post_likes GROUP BY user_id, post_id);
+
+CREATE UNIQUE INDEX IF NOT EXISTS ux_post_likes_user_post ON post_likes(user_id, post_id);
+
+-- Contadores que derivaram com os duplicados
+UPDATE posts SET likes_count = (SELECT COUNT(*) FROM post_likes WHERE post_likes.post_id = posts.id);
@@ -0,0 +1,3 @@
+-- 012_posts_author_active_index.sql
+-- Contagem de posts ativos por autor (/users/stats) só pelo índice
+CREATE INDEX IF NOT EXISTS idx_posts_author_active ON posts(author_id, is_active);
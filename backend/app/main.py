@@ -6,7 +6,7 @@ from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from sqlalchemy import text
-import uvicorn
+import importlib
 import os
 import logging
 import time
@@ -24,18 +24,11 @@ logging.basicConfig(
 load_dotenv()
 
 from app.core.config import settings
-from app.core.database import create_tables, SessionLocal, Base, engine, resolve_db_path_from_env, ensure_core_schema
+from app.core.database import SessionLocal, engine, resolve_db_path_from_env
 from app.models.user import User
 from app.core.auth import get_password_hash
-from app.routers import auth, posts, missions, chat, ranking, users, ai, profile, wallet, staking, system_flags, public_flags, avatars, impact
+from app.routers import auth, posts, missions, chat, ranking, users, profile, system_flags, public_flags, avatars, impact, analytics
 from app.routers import missions_realtime, missions_ws, missions_v2
-# [WEB3 DEMO] Import router demo
-try:
-    from app.routers import wallet_demo as _wallet_demo_module
-    wallet_demo = _wallet_demo_module
-except ImportError as e:
-    print(f"⚠️  wallet_demo router não encontrado: {e}")
-    wallet_demo = None
 
 # Criar aplicação FastAPI
 app = FastAPI(
@@ -69,6 +62,25 @@ if raw:
 
 ALLOWED = list(DEFAULT_ORIGINS | extra)
 
+# Cache de GETs condicionais (políticas declaradas com @cached_get); fica
+# dentro do rate limit para que 304 também sejam contados
+from app.utils.http_cache import ConditionalGetMiddleware, response_cache
+
+if settings.HTTP_CACHE_ENABLED:
+    response_cache.configure(settings.HTTP_CACHE_MAX_ENTRIES, settings.HTTP_CACHE_MAX_BYTES)
+    app.add_middleware(
+        ConditionalGetMiddleware,
+        cache=response_cache,
+        max_age_seconds=settings.HTTP_CACHE_MAX_AGE_SECONDS,
+    )
+
+# Rate limit por rota (políticas declaradas com @rate_limit); adicionado antes
+# do CORS para que respostas 429 também recebam os headers de CORS
+from app.utils.rate_limit import RateLimitMiddleware, build_limiter
+
+rate_limiter = build_limiter(settings.RATE_LIMIT_SHARED_PATH)
+app.add_middleware(RateLimitMiddleware, limiter=rate_limiter)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=ALLOWED,
@@ -166,13 +178,30 @@ def _log_openai_diag():
     except Exception as e:
         print(f"⚠️ VEXA: erro ao exibir diagnóstico seguro: {e}")
 
+# Schema versionado: o startup só confere a versão (uma consulta); as
+# migrações rodam fora de banda (python -m app.db.migrate) antes do servidor
+@app.on_event("startup")
+def _check_schema_version():
+    from app.db.migrate import MigrationError, migrate, pending_versions
+    from app.core.schema_readiness import schema_registry
+    try:
+        pending = pending_versions(engine)
+        if not pending:
+            return
+        if not settings.AUTO_MIGRATE:
+            logging.warning(f"Migrações pendentes: {pending}. Rode: python -m app.db.migrate")
+            return
+        migrate(engine)
+        schema_registry.reset()
+    except MigrationError as e:
+        logging.error(f"Erro ao migrar banco: {e}")
+
 # [CONNECTUS PATCH] Seed opcional no startup
 @app.on_event("startup")
 def maybe_seed_dev_user():
     try:
         if os.getenv("SEED_DEV_USER", "false").lower() != "true":
             return  # desativado por padrão em produção
-        Base.metadata.create_all(bind=engine)
         db = SessionLocal()
         try:
             if not db.query(User).filter_by(nickname="roseane").first():
@@ -193,22 +222,6 @@ def maybe_seed_dev_user():
         # não derrubar a app por seed; apenas logar
         print(f"⚠️ [SEED] falhou: {e}")
 
-# [MISSIONS_V2] Seed de missões diárias v2
-@app.on_event("startup")
-def seed_missions_v2():
-    """Seed de missões diárias v2 (aditivo, resiliente)"""
-    try:
-        from app.db.seed_missions_v2 import seed_daily_missions
-        Base.metadata.create_all(bind=engine)
-        db = SessionLocal()
-        try:
-            seed_daily_missions(db)
-        finally:
-            db.close()
-    except Exception as e:
-        # não derrubar a app por seed; apenas logar
-        print(f"⚠️ [MISSIONS_V2] Seed falhou: {e}")
-
 # Evitar redirect automático 307 por barra final
 # (Starlette/FastAPI: desliga o redirect e nós oferecemos as duas rotas)
 try:
@@ -232,26 +245,36 @@ app.include_router(missions.router)
 app.include_router(chat.router)
 app.include_router(ranking.router)
 app.include_router(users.router)
-app.include_router(ai.router)
 app.include_router(profile.router)
-app.include_router(wallet.router)
-app.include_router(staking.router)
+
+# Subsistemas opcionais: o módulo (e suas dependências pesadas) só é
+# importado quando o subsistema está habilitado
+for _flag, _module in (
+    ("ENABLE_AI", "app.routers.ai"),
+    ("ENABLE_WALLET", "app.routers.wallet"),
+    ("ENABLE_STAKING", "app.routers.staking"),
+):
+    if getattr(settings, _flag):
+        app.include_router(importlib.import_module(_module).router)
+
 app.include_router(system_flags.router)
 app.include_router(public_flags.router)
 app.include_router(avatars.router)
 app.include_router(impact.router)
+app.include_router(analytics.router)
 app.include_router(missions_v2.router)
 
-# [WEB3 DEMO] import e registro robustos
-try:
-    from app.routers import wallet_demo as _wallet_demo
-except Exception as e:
-    _wallet_demo = None
-    print(f"⚠️ wallet_demo indisponível: {e}")
-
+# [WEB3 DEMO] import e registro robustos (só importa o router se habilitado)
 demo_enabled = os.getenv("ENABLE_WEB3_DEMO_MODE") == "1"
 print(f"🔧 ENABLE_WEB3_DEMO_MODE={os.getenv('ENABLE_WEB3_DEMO_MODE')} (demo_enabled={demo_enabled})")
 
+_wallet_demo = None
+if demo_enabled:
+    try:
+        from app.routers import wallet_demo as _wallet_demo
+    except Exception as e:
+        print(f"⚠️ wallet_demo indisponível: {e}")
+
 if _wallet_demo and demo_enabled:
     app.include_router(_wallet_demo.router)  # router já tem prefix="/wallet/demo"
     print("✅ Web3 Demo habilitado: /wallet/demo/*")
@@ -264,155 +287,96 @@ if _wallet_demo and demo_enabled:
 else:
     print("ℹ️ Web3 Demo Mode DESABILITADO")
 
-# Criar tabelas do banco de dados automaticamente
-print(f"🗄️  DB Path (resolved): {resolve_db_path_from_env()}")
-try:
-    create_tables()
-    # Garantir schema essencial
-    ensure_core_schema()
-    print("✅ Schema essencial garantido!")
-    print("✅ Banco de dados inicializado com sucesso!")
-except Exception as e:
-    print(f"⚠️  Erro ao inicializar banco: {e}")
-    print("💡 O banco será criado na primeira requisição")
-
-def _ensure_user_avatar_columns():
-    """Garante colunas de avatar na tabela users (idempotente)."""
-    try:
-        with SessionLocal() as db:
-            cols = {row[1] for row in db.execute(text("PRAGMA table_info(users)")).fetchall()}
-            to_add = []
-            if "avatar_url" not in cols:
-                to_add.append(("avatar_url", "TEXT"))
-            if "avatar_glb_url" not in cols:
-                to_add.append(("avatar_glb_url", "TEXT"))
-            if "avatar_png_url" not in cols:
-                to_add.append(("avatar_png_url", "TEXT"))
-            for name, typ in to_add:
-                db.execute(text(f"ALTER TABLE users ADD COLUMN {name} {typ}"))
-            if to_add:
-                db.commit()
-                print(f"✅ Colunas de avatar adicionadas: {[name for name, _ in to_add]}")
-    except Exception as e:
-        print(f"⚠️  Erro ao garantir colunas de avatar: {e}")
+# Jobs periódicos (desativados por padrão; intervalo configurado por env)
+from app.core import scheduler
 
-def _ensure_demo_wallet_tables():
-    """Garante tabelas demo de wallet (idempotente)."""
-    try:
-        with SessionLocal() as db:
-            db.execute(text("""
-                CREATE TABLE IF NOT EXISTS demo_wallets(
-                    user_id INTEGER PRIMARY KEY,
-                    balance REAL DEFAULT 0.0,
-                    FOREIGN KEY(user_id) REFERENCES users(id)
-                )
-            """))
-            db.execute(text("""
-                CREATE TABLE IF NOT EXISTS demo_stakes(
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER NOT NULL,
-                    amount REAL NOT NULL,
-                    apr REAL NOT NULL DEFAULT 10.0,
-                    days INTEGER NOT NULL,
-                    status TEXT NOT NULL DEFAULT 'locked',
-                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    unlock_at TEXT,
-                    FOREIGN KEY(user_id) REFERENCES users(id)
-                )
-            """))
-            db.commit()
-    except Exception as e:
-        print(f"⚠️  ensure_demo_wallet_tables: {e}")
+def _run_impact_decay_job():
+    from app.services.impact_decay_service import run_decay_job
+    with SessionLocal() as db:
+        run_decay_job(db)
 
-def _ensure_impact_tables():
-    """Garante tabelas de Impact Score (idempotente)."""
-    try:
-        with SessionLocal() as db:
-            # Tabela impact_events
-            db.execute(text("""
-                CREATE TABLE IF NOT EXISTS impact_events(
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER NOT NULL,
-                    type TEXT NOT NULL,
-                    weight REAL NOT NULL DEFAULT 0,
-                    metadata TEXT,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY(user_id) REFERENCES users(id),
-                    CHECK(weight >= 0)
-                )
-            """))
-            
-            # Índices
-            db.execute(text("CREATE INDEX IF NOT EXISTS idx_impact_events_user_id ON impact_events(user_id)"))
-            db.execute(text("CREATE INDEX IF NOT EXISTS idx_impact_events_type ON impact_events(type)"))
-            db.execute(text("CREATE INDEX IF NOT EXISTS idx_impact_events_user_timestamp ON impact_events(user_id, timestamp)"))
-            
-            # Tabela impact_scores
-            db.execute(text("""
-                CREATE TABLE IF NOT EXISTS impact_scores(
-                    user_id INTEGER PRIMARY KEY,
-                    score REAL NOT NULL DEFAULT 0,
-                    breakdown TEXT,
-                    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY(user_id) REFERENCES users(id)
-                )
-            """))
-            
-            db.execute(text("CREATE INDEX IF NOT EXISTS idx_impact_scores_user_id ON impact_scores(user_id)"))
-            
-            db.commit()
-            print("✅ Tabelas de Impact Score criadas/verificadas")
-    except Exception as e:
-        print(f"⚠️  ensure_impact_tables: {e}")
+scheduler.register_periodic_job(
+    "impact_decay", settings.IMPACT_DECAY_INTERVAL_SECONDS, _run_impact_decay_job, run_on_start=True
+)
 
-def _ensure_min_schema_on_startup():
-    """Garante colunas/ tabelas essenciais sem quebrar caso já existam."""
-    try:
-        with SessionLocal() as db:
-            # Colunas em users
-            cols = db.execute(text("PRAGMA table_info(users)")).fetchall()
-            names = {c[1] for c in cols}
-            stmts = []
-            if "avatar_url" not in names:
-                stmts.append("ALTER TABLE users ADD COLUMN avatar_url TEXT")
-            if "avatar_glb_url" not in names:
-                stmts.append("ALTER TABLE users ADD COLUMN avatar_glb_url TEXT")
-            if "avatar_png_url" not in names:
-                stmts.append("ALTER TABLE users ADD COLUMN avatar_png_url TEXT")
-            for s in stmts:
-                db.execute(text(s))
-
-            # Tabelas de wallet
-            db.execute(text("""
-                CREATE TABLE IF NOT EXISTS wallet_addresses(
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER NOT NULL,
-                    address TEXT UNIQUE,
-                    verified_at TEXT
-                )
-            """))
-            db.execute(text("""
-                CREATE TABLE IF NOT EXISTS token_transfers(
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER NOT NULL,
-                    tx_hash TEXT,
-                    amount REAL DEFAULT 0,
-                    created_at TEXT
-                )
-            """))
-            db.commit()
-    except Exception as e:
-        # nunca aborta startup
-        print(f"⚠️  ensure_min_schema: {e}")
+def _run_rollup_catch_up_job():
+    from app.services.rollup_service import catch_up_rollups
+    with SessionLocal() as db:
+        catch_up_rollups(db)
+
+scheduler.register_periodic_job(
+    "rollup_catch_up", settings.ROLLUP_INTERVAL_SECONDS, _run_rollup_catch_up_job, run_on_start=True
+)
+
+def _run_attestation_batch_job():
+    from app.services.attestation_service import attestation_batcher
+    with SessionLocal() as db:
+        attestation_batcher.build_batch(db)
+
+scheduler.register_periodic_job(
+    "attestation_batch", settings.ATTESTATION_BATCH_INTERVAL_SECONDS, _run_attestation_batch_job
+)
+
+def _run_daily_missions_prewarm_job():
+    from app.services.daily_mission_cache import daily_mission_cache, prewarm_if_near_midnight
+    with SessionLocal() as db:
+        prewarm_if_near_midnight(db, daily_mission_cache, settings.DAILY_MISSIONS_PREWARM_SECONDS)
+
+# Verifica com folga suficiente para cair dentro da janela antes da meia-noite
+scheduler.register_periodic_job(
+    "daily_missions_prewarm",
+    min(30, settings.DAILY_MISSIONS_PREWARM_SECONDS / 2),
+    _run_daily_missions_prewarm_job,
+)
+
+def _run_qr_nonce_prune_job():
+    from app.services.qr_verification import prune_expired_nonces
+    with SessionLocal() as db:
+        prune_expired_nonces(db)
+
+scheduler.register_periodic_job(
+    "qr_nonce_prune", settings.QR_NONCE_PRUNE_INTERVAL_SECONDS, _run_qr_nonce_prune_job
+)
+
+def _run_chat_stats_audit_job():
+    from app.services.chat_stats import recount_room_stats
+    with SessionLocal() as db:
+        recount_room_stats(db)
+
+scheduler.register_periodic_job(
+    "chat_stats_audit", settings.CHAT_STATS_AUDIT_INTERVAL_SECONDS, _run_chat_stats_audit_job
+)
+
+def _run_post_counter_flush_job(wait: bool = False):
+    from app.services.post_counters import post_counter_buffer
+    with SessionLocal() as db:
+        post_counter_buffer.flush(db, wait=wait)
+
+scheduler.register_periodic_job(
+    "post_counter_flush", settings.POST_COUNTERS_FLUSH_INTERVAL_SECONDS, _run_post_counter_flush_job
+)
+
+def _run_trending_compact_job():
+    from app.services.trending import trending_index
+    trending_index.compact()
+
+scheduler.register_periodic_job(
+    "trending_compact", settings.TRENDING_COMPACT_INTERVAL_SECONDS, _run_trending_compact_job
+)
 
 @app.on_event("startup")
-def _startup_min_schema():
-    _ensure_min_schema_on_startup()
-    _ensure_user_avatar_columns()
-    _ensure_impact_tables()
-    # [WEB3 DEMO] Create demo wallet tables if flag enabled
-    if os.getenv("ENABLE_WEB3_DEMO_MODE") == "1":
-        _ensure_demo_wallet_tables()
+async def _start_periodic_jobs():
+    scheduler.start_jobs()
+
+@app.on_event("shutdown")
+async def _stop_periodic_jobs():
+    await scheduler.stop_jobs()
+    # Deltas de contadores de posts ainda em memória (após parar o job de flush).
+    # Cancelar o job não interrompe um flush já em curso na thread: espera por ele.
+    try:
+        _run_post_counter_flush_job(wait=True)
+    except Exception as e:
+        logging.error(f"Erro no flush final dos contadores de posts: {e}")
 
 @app.get("/")
 async def root():
@@ -463,9 +427,12 @@ if DEV_DEBUG:
 
 @app.post("/init-db")
 async def init_database():
-    """Inicializar banco de dados"""
+    """Inicializar banco de dados (aplica as migrações pendentes)"""
     try:
-        create_tables()
+        from app.db.migrate import migrate
+        from app.core.schema_readiness import schema_registry
+        migrate(engine)
+        schema_registry.reset()
         return {
             "message": "Banco de dados inicializado com sucesso",
             "status": "success"
@@ -517,6 +484,7 @@ def _mount_dev_health():
             return {"ok": False, "error": str(e)}
 
 if __name__ == "__main__":
+    import uvicorn
     uvicorn.run(
         "app.main:app",
         host="0.0.0.0",
@@ -1,8 +1,11 @@
 from .user import User
 from .post import Post
-from .mission import Mission, MissionCompletion, MissionType
+from .mission import Mission, MissionCompletion, MissionType, QRNonce
 from .mission_realtime import FeatureFlag, MissionEvent, MissionAttempt, MissionEvidence, MissionRule
 from .impact import ImpactEvent, ImpactScore
+from .analytics import DailyRollup, RollupWatermark
+from .attestation import AttestationBatch, AttestationLeaf
+from .completion_index import MissionCompletionIndex
 try:
     from .avatar import Avatar  # noqa: F401
 except Exception:
@@ -0,0 +1,39 @@
+"""
+Modelos de rollup diário (analytics de impacto e missões)
+"""
+
+from sqlalchemy import Column, Integer, Float, String, DateTime, PrimaryKeyConstraint, Index
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+# user_id reservado para os totais da plataforma
+PLATFORM_USER_ID = 0
+
+
+class DailyRollup(Base):
+    """Contadores por usuário, dia, fonte e tipo (user_id 0 = plataforma)"""
+    __tablename__ = "daily_rollups"
+    
+    user_id = Column(Integer, nullable=False)
+    day = Column(String(10), nullable=False)  # YYYY-MM-DD
+    source = Column(String(20), nullable=False)  # impact | mission_event | mission_v2
+    kind = Column(String(100), nullable=False)  # tipo do evento / código da missão
+    count = Column(Integer, nullable=False, default=0)
+    weight_sum = Column(Float, nullable=False, default=0.0)
+    
+    __table_args__ = (
+        PrimaryKeyConstraint('user_id', 'day', 'source', 'kind', name='pk_daily_rollups'),
+        Index('idx_daily_rollups_day', 'day'),
+    )
+    
+    def __repr__(self):
+        return f"<DailyRollup(user_id={self.user_id}, day='{self.day}', source='{self.source}', kind='{self.kind}', count={self.count})>"
+
+
+class RollupWatermark(Base):
+    """Último id já agregado por fonte (job de catch-up)"""
+    __tablename__ = "rollup_watermarks"
+    
+    source = Column(String(20), primary_key=True)
+    last_id = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,35 @@
+"""
+Modelos de attestations em lote (árvore de Merkle sobre Impact Scores)
+"""
+
+from sqlalchemy import Column, Integer, Float, String, DateTime
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class AttestationBatch(Base):
+    """Raiz de Merkle persistida por lote"""
+    __tablename__ = "attestation_batches"
+    
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    root = Column(String(66), nullable=False)  # 0x + sha256 hex
+    leaf_count = Column(Integer, nullable=False, default=0)
+    changed_leaves = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    def __repr__(self):
+        return f"<AttestationBatch(id={self.id}, root='{self.root}', leaf_count={self.leaf_count})>"
+
+
+class AttestationLeaf(Base):
+    """Folhas do último lote (posição estável por usuário)"""
+    __tablename__ = "attestation_leaves"
+    
+    user_id = Column(Integer, primary_key=True)
+    position = Column(Integer, nullable=False, unique=True)
+    score = Column(Float, nullable=False)
+    updated_at = Column(String(32), nullable=False)
+    leaf_hash = Column(String(64), nullable=False)
+    
+    def __repr__(self):
+        return f"<AttestationLeaf(user_id={self.user_id}, position={self.position})>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, LargeBinary
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
@@ -50,3 +50,18 @@ class ChatMessage(Base):
         return f"<ChatMessage(id={self.id}, user_id={self.user_id}, content='{self.content[:50]}...')>"
 
 
+class ChatRoomStats(Base):
+    """Contadores por sala mantidos a cada mensagem (leitura O(1))"""
+    __tablename__ = "chat_room_stats"
+    
+    room_id = Column(Integer, primary_key=True)
+    message_count = Column(Integer, nullable=False, default=0)  # mensagens ativas
+    hll = Column(LargeBinary, nullable=True)  # HyperLogLog dos autores
+    unique_estimate = Column(Integer, nullable=False, default=0)
+    
+    # Auditoria (recontagem exata periódica)
+    unique_exact = Column(Integer, nullable=True)
+    audited_at = Column(DateTime(timezone=True), nullable=True)
+    
+    def __repr__(self):
+        return f"<ChatRoomStats(room_id={self.room_id}, messages={self.message_count}, unique~{self.unique_estimate})>"
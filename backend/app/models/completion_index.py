@@ -0,0 +1,26 @@
+"""
+Índice unificado de conclusões de missões (legado, v2 e tempo real)
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime, PrimaryKeyConstraint
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class MissionCompletionIndex(Base):
+    """Uma linha por usuário, missão e dia concluído (consulta por chave primária)"""
+    __tablename__ = "mission_completion_index"
+    
+    user_id = Column(Integer, nullable=False)
+    mission_key = Column(String(120), nullable=False)  # legacy:<id> | v2:<code> | rt:<slug>
+    day = Column(String(10), nullable=False)  # YYYY-MM-DD (America/Sao_Paulo)
+    source = Column(String(20), nullable=False)  # legacy | v2 | realtime
+    completed_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        PrimaryKeyConstraint('user_id', 'mission_key', 'day', name='pk_mission_completion_index'),
+        {"sqlite_with_rowid": False},
+    )
+    
+    def __repr__(self):
+        return f"<MissionCompletionIndex(user_id={self.user_id}, mission_key='{self.mission_key}', day='{self.day}')>"
@@ -52,6 +52,9 @@ class ImpactScore(Base):
     breakdown = Column(JSON, nullable=True)
     # Exemplo: { "mission_completed": 2, "community_vote": 1, "peer_review": 0, "donation": 1 }
     
+    # Score com decaimento temporal (gravado pelo job de decaimento)
+    decayed_score = Column(Float, nullable=False, default=0.0, server_default="0", index=True)
+    
     # Última atualização
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
     
@@ -78,7 +78,7 @@ class MissionCompletion(Base):
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     mission_id = Column(Integer, ForeignKey("missions.id"), nullable=False)
-    completed_at = Column(DateTime, default=func.now, nullable=False)
+    completed_at = Column(DateTime, default=func.now(), nullable=False)
     proof_type = Column(String, nullable=True)    # "qr" | "in_app" | "geo"
     proof_meta = Column(JSON, nullable=True)      # dados mínimos
     xp_awarded = Column(Integer, default=0)
@@ -87,4 +87,13 @@ class MissionCompletion(Base):
     __table_args__ = (UniqueConstraint("user_id", "mission_id", "completed_at", name="uq_daily_unique_by_day"),)
 
 
+# Nonces de QR já usados (uso único entre workers; limpos após expirar)
+class QRNonce(Base):
+    __tablename__ = "qr_nonces"
+    nonce = Column(String(32), primary_key=True)
+    user_id = Column(Integer, nullable=False)
+    mission_id = Column(Integer, nullable=False)
+    expires_at = Column(Integer, nullable=False, index=True)  # epoch (segundos)
+    used_at = Column(DateTime, server_default=func.now())
 
+    __table_args__ = {"sqlite_with_rowid": False}
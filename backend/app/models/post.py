@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
@@ -45,6 +45,11 @@ class PostLike(Base):
     user = relationship("User")  # Removido back_populates
     post = relationship("Post", back_populates="likes")
     
+    __table_args__ = (
+        # Um like por usuário e post (toggle atômico com ON CONFLICT)
+        Index("ux_post_likes_user_post", "user_id", "post_id", unique=True),
+    )
+    
     def __repr__(self):
         return f"<PostLike(user_id={self.user_id}, post_id={self.post_id})>"
 
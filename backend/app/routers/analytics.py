@@ -0,0 +1,89 @@
+"""
+Router de analytics (séries diárias a partir dos rollups)
+"""
+
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.orm import Session
+
+from ..core.database import get_db
+from ..core.auth import get_current_active_user
+from ..models.user import User
+from ..models.analytics import PLATFORM_USER_ID
+from ..schemas.analytics import DailySeriesOut
+from ..services.rollup_service import ROLLUP_SOURCES, get_daily_series
+from .impact import ensure_user_access
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+SOURCE_PATTERN = "^(" + "|".join(ROLLUP_SOURCES) + ")$"
+
+
+def _series_response(db: Session, user_id: Optional[int], days: int, end: Optional[str], source: Optional[str]):
+    try:
+        series = get_daily_series(
+            db,
+            PLATFORM_USER_ID if user_id is None else user_id,
+            days=days,
+            end=end,
+            source=source
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Formato de data inválido. Use YYYY-MM-DD"
+        )
+    return DailySeriesOut(
+        user_id=user_id,
+        source=source,
+        start=series[0]["date"],
+        end=series[-1]["date"],
+        series=series
+    )
+
+
+@router.get("/users/{user_id}/daily", response_model=DailySeriesOut)
+async def get_user_daily(
+    user_id: int,
+    days: int = Query(30, ge=1, le=366),
+    end: Optional[str] = Query(None, description="Último dia (YYYY-MM-DD), padrão hoje UTC"),
+    source: Optional[str] = Query(None, pattern=SOURCE_PATTERN),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Série diária de impacto e missões de um usuário"""
+    ensure_user_access(current_user, user_id)
+    try:
+        return _series_response(db, user_id, days, end, source)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao obter série diária do usuário: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Erro interno do servidor"
+        )
+
+
+@router.get("/platform/daily", response_model=DailySeriesOut)
+async def get_platform_daily(
+    days: int = Query(30, ge=1, le=366),
+    end: Optional[str] = Query(None, description="Último dia (YYYY-MM-DD), padrão hoje UTC"),
+    source: Optional[str] = Query(None, pattern=SOURCE_PATTERN),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Totais diários da plataforma"""
+    try:
+        return _series_response(db, None, days, end, source)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao obter série diária da plataforma: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Erro interno do servidor"
+        )
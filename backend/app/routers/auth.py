@@ -21,6 +21,7 @@ from app.core.config import settings
 from app.schemas.auth import UserCreate, UserLogin, UserResponse, Token, UserProfile, RefreshTokenRequest
 from app.models.user import User
 from app.utils.auth_cookies import set_auth_cookie, clear_auth_cookie
+from app.utils.http_cache import cached_get
 
 # Logger específico para autenticação
 logger = logging.getLogger("auth")
@@ -210,6 +211,7 @@ async def refresh_token(refresh_data: RefreshTokenRequest, db: Session = Depends
     }
 
 @router.get("/me", response_model=UserProfile)
+@cached_get(tables=("users",), vary_user=True)
 async def get_current_user_info(current_user: User = Depends(get_current_active_user)):
     """
     Obter informações do usuário atual
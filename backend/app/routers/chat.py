@@ -1,9 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional
+import asyncio
+from ..core.config import settings
 from ..core.database import get_db
 from ..schemas.chat import ChatRoomCreate, ChatRoomResponse, ChatMessageCreate, ChatMessageResponse
-from ..services.chat_service import ChatService
+from ..services.chat_service import ChatService, MESSAGE_ENCODER
+from ..services.chat_buffer import chat_message_buffer
+from ..services.chat_notifier import chat_notifier
+from ..utils.fast_json import dumps
 from ..core.auth import get_current_active_user
 import logging
 
@@ -67,7 +73,7 @@ async def create_chat_room(
                 detail="Erro ao criar sala de chat"
             )
         
-        logger.info(f"Sala de chat criada: {room.name} pelo usuário {current_user['id']}")
+        logger.info(f"Sala de chat criada: {room.name} pelo usuário {current_user.id}")
         return room
         
     except HTTPException:
@@ -118,17 +124,10 @@ async def get_room_messages(
     """Obtém mensagens de uma sala de chat"""
     try:
         chat_service = ChatService(db)
+        _ensure_room(chat_service, room_id)
         
-        # Verificar se a sala existe
-        room = chat_service.get_room_by_id(room_id)
-        if not room:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Sala de chat não encontrada"
-            )
-        
-        messages = chat_service.get_room_messages(room_id, limit, offset)
-        return messages
+        rows = chat_service.get_room_message_rows(room_id, limit, offset)
+        return MESSAGE_ENCODER.response(rows)
         
     except HTTPException:
         raise
@@ -140,6 +139,119 @@ async def get_room_messages(
         )
 
 
+def _ensure_room(chat_service: ChatService, room_id: int):
+    # Salas no buffer já foram verificadas
+    if not chat_message_buffer.is_cached(room_id) and not chat_service.get_room_by_id(room_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Sala de chat não encontrada"
+        )
+
+
+@router.get("/rooms/{room_id}/messages/since", response_model=List[ChatMessageResponse])
+async def poll_room_messages(
+    room_id: int,
+    since_id: int = Query(..., ge=0),
+    timeout: float = Query(25, ge=0, le=settings.CHAT_LONG_POLL_MAX_SECONDS),
+    limit: int = Query(100, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """
+    Long-poll: mensagens com id > since_id (mais antigas primeiro)
+
+    Responde assim que houver mensagem nova ou com lista vazia após timeout
+    segundos. A espera não consulta o banco nem segura conexão.
+    """
+    try:
+        chat_service = ChatService(db)
+        _ensure_room(chat_service, room_id)
+        
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            baseline = chat_notifier.last_id(room_id)
+            rows = chat_service.get_messages_since(room_id, since_id, limit)
+            remaining = deadline - loop.time()
+            if rows or remaining <= 0:
+                return MESSAGE_ENCODER.response(rows)
+            db.close()
+            # No timeout, a última volta relê a sala (mensagens de outros workers)
+            await chat_notifier.wait(room_id, max(since_id, baseline), remaining)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro no long-poll de mensagens: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Erro interno do servidor"
+        )
+
+
+def _sse_frame(row) -> bytes:
+    data = dumps(MESSAGE_ENCODER.to_dicts([row])[0])
+    return b"id: %d\nevent: message\ndata: %s\n\n" % (row[0], data)
+
+
+async def message_events(chat_service: ChatService, room_id: int, since_id: int,
+                         keepalive_seconds: float = settings.CHAT_SSE_KEEPALIVE_SECONDS,
+                         limit: int = 100) -> AsyncIterator[bytes]:
+    """Frames SSE das mensagens com id > since_id, com comentário de keepalive"""
+    last_id = since_id
+    while True:
+        baseline = chat_notifier.last_id(room_id)
+        rows = chat_service.get_messages_since(room_id, last_id, limit)
+        chat_service.db.close()  # não segura conexão enquanto espera
+        if rows:
+            for row in rows:
+                yield _sse_frame(row)
+            last_id = rows[-1][0]
+            continue
+        if not await chat_notifier.wait(room_id, max(last_id, baseline), keepalive_seconds):
+            yield b": keepalive\n\n"
+
+
+@router.get("/rooms/{room_id}/stream")
+async def stream_room_messages(
+    room_id: int,
+    request: Request,
+    since_id: Optional[int] = Query(None, ge=0),
+    db: Session = Depends(get_db)
+):
+    """
+    Server-Sent Events com as mensagens novas da sala
+
+    Sem since_id (nem Last-Event-ID de uma reconexão), começa a partir da
+    mensagem mais recente.
+    """
+    try:
+        chat_service = ChatService(db)
+        _ensure_room(chat_service, room_id)
+        
+        if since_id is None:
+            last_event_id = request.headers.get("last-event-id", "")
+            if last_event_id.isdigit():
+                since_id = int(last_event_id)
+            else:
+                latest = chat_service.get_room_message_rows(room_id, 1)
+                since_id = latest[0][0] if latest else 0
+        
+        return StreamingResponse(
+            message_events(chat_service, room_id, since_id),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao abrir stream de mensagens: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Erro interno do servidor"
+        )
+
+
 @router.post("/rooms/{room_id}/messages", response_model=ChatMessageResponse)
 async def send_message(
     room_id: int,
@@ -160,7 +272,7 @@ async def send_message(
             )
         
         # Criar mensagem
-        message = chat_service.create_message(current_user["id"], message_data)
+        message = chat_service.create_message(current_user.id, message_data)
         
         if not message:
             raise HTTPException(
@@ -168,8 +280,8 @@ async def send_message(
                 detail="Erro ao enviar mensagem"
             )
         
-        logger.info(f"Mensagem enviada na sala {room_id} pelo usuário {current_user['id']}")
-        return message
+        logger.info(f"Mensagem enviada na sala {room_id} pelo usuário {current_user.id}")
+        return chat_service._message_to_dict(message)
         
     except HTTPException:
         raise
@@ -190,7 +302,7 @@ async def delete_message(
     """Deleta uma mensagem"""
     try:
         chat_service = ChatService(db)
-        success = chat_service.delete_message(message_id, current_user["id"])
+        success = chat_service.delete_message(message_id, current_user.id)
         
         if not success:
             raise HTTPException(
@@ -198,7 +310,7 @@ async def delete_message(
                 detail="Mensagem não encontrada ou não pertence ao usuário"
             )
         
-        logger.info(f"Mensagem {message_id} deletada pelo usuário {current_user['id']}")
+        logger.info(f"Mensagem {message_id} deletada pelo usuário {current_user.id}")
         return {"message": "Mensagem deletada com sucesso"}
         
     except HTTPException:
@@ -221,7 +333,7 @@ async def get_my_messages(
     """Obtém mensagens do usuário atual"""
     try:
         chat_service = ChatService(db)
-        messages = chat_service.get_user_messages(current_user["id"], limit, offset)
+        messages = chat_service.get_user_messages(current_user.id, limit, offset)
         
         if not messages:
             return []
@@ -268,6 +380,20 @@ async def search_messages(
         )
 
 
+@router.get("/stats")
+async def get_chat_stats(db: Session = Depends(get_db)):
+    """Totais do chat na plataforma (autores distintos estimados por HyperLogLog)"""
+    try:
+        return ChatService(db).get_platform_stats()
+        
+    except Exception as e:
+        logger.error(f"Erro ao obter estatísticas do chat: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Erro interno do servidor"
+        )
+
+
 @router.get("/rooms/{room_id}/stats")
 async def get_room_stats(
     room_id: int,
@@ -2,8 +2,6 @@
 Router para Impact Score (Social Credit Score descentralizado)
 """
 
-import hashlib
-import uuid
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
@@ -13,14 +11,22 @@ from ..core.auth import get_current_active_user
 from ..models.user import User
 from ..schemas.impact import (
     ImpactEventIn, ImpactEventOut, ImpactEventResponse,
-    ImpactScoreOut, AttestationOut
+    ImpactScoreOut, AttestationOut, ImpactLeaderboardEntry,
+    AttestationVerifyIn, AttestationVerifyOut
 )
 from ..services.impact_service import (
     create_impact_event,
-    recalc_impact_score,
     get_impact_score,
-    list_impact_events,
-    validate_event_type
+    list_impact_event_rows,
+    validate_event_type,
+    IMPACT_EVENT_ENCODER
+)
+from ..services.impact_decay_service import get_decayed_leaderboard
+from ..services.attestation_service import (
+    attestation_batcher,
+    get_batch_by_root,
+    hash_leaf,
+    verify_proof
 )
 from ..utils.rate_limit import rate_limit
 import logging
@@ -46,14 +52,14 @@ def ensure_user_access(auth_user: User, target_user_id: int):
 
 
 @router.post("/event", response_model=ImpactEventResponse)
-@rate_limit(max_requests=10, window_minutes=1)
+@rate_limit(max_requests=10, window_minutes=1, key="user")
 async def create_event(
     event_in: ImpactEventIn,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """
-    Cria um novo evento de impacto e recalcula o score
+    Cria um novo evento de impacto e atualiza o score (delta atômico)
     """
     try:
         # Validar tipo de evento
@@ -66,8 +72,8 @@ async def create_event(
         # Criar evento
         event = create_impact_event(db, current_user.id, event_in)
         
-        # Recalcular score
-        score_obj = recalc_impact_score(db, current_user.id)
+        # Score já foi atualizado incrementalmente na mesma transação
+        score_obj = get_impact_score(db, current_user.id)
         
         # Preparar resposta
         # Converter manualmente de meta (ORM) para metadata (JSON)
@@ -113,23 +119,9 @@ async def list_events(
         # Verificar acesso
         ensure_user_access(current_user, user_id)
         
-        # Buscar eventos
-        events, total = list_impact_events(db, user_id, page, page_size)
-        
-        # Converter manualmente de meta (ORM) para metadata (JSON)
-        events_out = []
-        for event in events:
-            event_data = {
-                "id": event.id,
-                "user_id": event.user_id,
-                "type": event.type,
-                "weight": event.weight,
-                "metadata": event.meta,  # Converter meta -> metadata
-                "timestamp": event.timestamp
-            }
-            events_out.append(ImpactEventOut(**event_data))
-        
-        return events_out
+        # Buscar eventos (tuplas; meta do ORM sai como metadata no JSON)
+        rows = list_impact_event_rows(db, user_id, page, page_size)
+        return IMPACT_EVENT_ENCODER.response(rows)
         
     except HTTPException:
         raise
@@ -169,35 +161,61 @@ async def get_score(
         )
 
 
+@router.get("/leaderboard", response_model=List[ImpactLeaderboardEntry])
+async def get_leaderboard(
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Ranking de impacto por score com decaimento temporal (último job de decaimento)
+    """
+    try:
+        return get_decayed_leaderboard(db, limit=limit, offset=offset)
+    except Exception as e:
+        logger.error(f"Erro ao obter leaderboard de impacto: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Erro interno do servidor"
+        )
+
+
 @router.post("/attest", response_model=AttestationOut)
-@rate_limit(max_requests=10, window_minutes=1)
-async def create_attestation_mock(
+@rate_limit(max_requests=10, window_minutes=1, key="user")
+async def create_attestation(
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """
-    Cria attestation mock (sem blockchain real até o hackathon)
+    Attestation do score atual: folha no último lote de Merkle + prova de inclusão
     """
     try:
-        # Obter score atual
-        score_obj = get_impact_score(db, current_user.id)
-        
-        # Gerar attestation_id (UUID)
-        attestation_id = str(uuid.uuid4())
+        # Garantir que o score existe (cria se necessário)
+        get_impact_score(db, current_user.id)
         
-        # Gerar hash (simulação)
-        # Hash = SHA256(user_id|score|timestamp)
-        hash_data = f"{current_user.id}|{score_obj.score}|{score_obj.updated_at}"
-        hash_value = hashlib.sha256(hash_data.encode()).hexdigest()
+        proof = attestation_batcher.get_proof(db, current_user.id)
+        if proof is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Score ainda não incluído em nenhum lote"
+            )
         
-        logger.info(f"impact.attest user_id={current_user.id} attestation_id={attestation_id}")
+        logger.info(f"impact.attest user_id={current_user.id} batch_id={proof['batch_id']}")
         
         return AttestationOut(
-            attestation_id=attestation_id,
-            hash=f"0x{hash_value}",
-            stored=True
+            attestation_id=f"{proof['batch_id']}:{current_user.id}",
+            hash=proof["leaf_hash"],
+            stored=True,
+            batch_id=proof["batch_id"],
+            root=proof["root"],
+            leaf_index=proof["leaf_index"],
+            leaf_data=proof["leaf_data"],
+            proof=proof["proof"]
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Erro ao criar attestation: {e}")
         raise HTTPException(
@@ -205,3 +223,28 @@ async def create_attestation_mock(
             detail="Erro interno do servidor"
         )
 
+
+@router.post("/attest/verify", response_model=AttestationVerifyOut)
+async def verify_attestation(
+    payload: AttestationVerifyIn,
+    db: Session = Depends(get_db)
+):
+    """
+    Verifica uma prova de inclusão e se a raiz pertence a um lote persistido
+    """
+    if payload.leaf_hash:
+        leaf_hash = payload.leaf_hash
+    elif payload.leaf_data:
+        leaf_hash = hash_leaf(payload.leaf_data).hex()
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Informe leaf_hash ou leaf_data"
+        )
+    
+    proof = [step.model_dump() for step in payload.proof]
+    if not verify_proof(leaf_hash, proof, payload.root):
+        return AttestationVerifyOut(valid=False)
+    
+    batch_id = get_batch_by_root(db, payload.root)
+    return AttestationVerifyOut(valid=batch_id is not None, batch_id=batch_id)
@@ -5,23 +5,48 @@ from ..core.database import get_db
 from ..schemas.mission import MissionResponse, UserMissionResponse, UserMissionUpdate
 # MissionService removido - usando funções diretas
 from ..core.auth import get_current_active_user
+from ..utils.http_cache import cached_get
 import logging
 
 # [CONNECTUS PATCH] imports para missões verificáveis
-from jose import jwt, JWTError
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel
 from ..core.config import settings
 from ..models.mission import Mission, MissionType
 from ..services.mission_service import (
-    has_completed_today, award, can_complete_now, validate_in_app_action
+    has_completed_today, completed_today, award, can_complete_now, validate_in_app_action
+)
+from ..services.qr_verification import (
+    qr_verifier, issue_qr_token,
+    INVALID, MISSION_INVALID, OUTSIDE_WINDOW, ALREADY_COMPLETED, REPLAY
 )
-from datetime import datetime, timedelta
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/missions", tags=["missions"])
 
+# Scan recusado -> (status HTTP, detalhe) em /verify-qr
+QR_SCAN_ERRORS = {
+    INVALID: (400, "QR inválido ou expirado"),
+    MISSION_INVALID: (404, "Missão inválida"),
+    OUTSIDE_WINDOW: (400, "Fora da janela"),
+    ALREADY_COMPLETED: (409, "Já concluída hoje"),
+    REPLAY: (409, "QR já utilizado"),
+}
+
+
+class QRScan(BaseModel):
+    token: str
+    scanned_at: Optional[datetime] = None  # UTC; ausente = agora
+
+
+class QRBatchRequest(BaseModel):
+    scans: List[QRScan]
+
 
 @router.get("/", response_model=List[MissionResponse])
+@cached_get(tables=("missions",))
 async def get_all_missions_slash(
     active_only: bool = True,
     db: Session = Depends(get_db)
@@ -30,6 +55,7 @@ async def get_all_missions_slash(
     return await get_all_missions_no_slash(active_only, db)
 
 @router.get("", response_model=List[MissionResponse])
+@cached_get(tables=("missions",))
 async def get_all_missions_no_slash(
     active_only: bool = True,
     db: Session = Depends(get_db)
@@ -126,7 +152,7 @@ async def assign_mission(
         
         # Atribuir missão
         # Implementação simplificada
-        logger.info(f"Missão {mission_id} atribuída ao usuário {current_user['id']}")
+        logger.info(f"Missão {mission_id} atribuída ao usuário {current_user.id}")
         return {"message": "Missão atribuída com sucesso", "user_mission_id": 1}
         
     except HTTPException:
@@ -180,7 +206,7 @@ async def complete_mission(
         # Implementação simplificada
         pass
         
-        logger.info(f"Missão {user_mission_id} completada pelo usuário {current_user['id']}")
+        logger.info(f"Missão {user_mission_id} completada pelo usuário {current_user.id}")
         return {"message": "Missão completada com sucesso! Recompensas adicionadas."}
         
     except HTTPException:
@@ -211,8 +237,8 @@ async def get_mission_stats_no_slash(
         # MissionService removido - implementação direta
         # Implementação simplificada
         return {
-            "user_id": current_user["id"],
-            "nickname": current_user["nickname"],
+            "user_id": current_user.id,
+            "nickname": current_user.nickname,
             "missions_completed": 0,
             "total_xp": 0
         }
@@ -289,20 +315,38 @@ def verify_qr_no_slash(payload: dict, db=Depends(get_db), user=Depends(get_curre
     token = payload.get("token")
     if not token:
         raise HTTPException(400, "token requerido")
+    result = qr_verifier.verify(db, user.id, token)
+    if not result.ok:
+        status_code, detail = QR_SCAN_ERRORS[result.status]
+        raise HTTPException(status_code, detail)
+    return {"ok": True, "xp": result.xp, "tokens": result.tokens}
+
+@router.post("/verify-qr/batch")
+def verify_qr_batch(payload: QRBatchRequest, db=Depends(get_db), user=Depends(get_current_active_user)):
+    """
+    Verifica em lote scans feitos offline (fila do dispositivo).
+
+    Cada scan é avaliado no instante em que foi feito (scanned_at, até
+    QR_OFFLINE_MAX_AGE_SECONDS atrás); o resultado vem por scan, na ordem enviada.
+    """
+    if len(payload.scans) > settings.QR_BATCH_MAX_SCANS:
+        raise HTTPException(400, f"Lote excede {settings.QR_BATCH_MAX_SCANS} scans")
     try:
-        data = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-    except JWTError:
-        raise HTTPException(400, "QR inválido ou expirado")
-    mission_id = data.get("mission_id")
-    mission = db.query(Mission).get(mission_id)
-    if not mission or mission.type != MissionType.CHECKIN_QR:
-        raise HTTPException(404, "Missão inválida")
-    if not can_complete_now(mission):
-        raise HTTPException(400, "Fora da janela")
-    if has_completed_today(db, user["id"], mission.id):
-        raise HTTPException(409, "Já concluída hoje")
-    mc = award(db, user["id"], mission, "qr", {"jwt": "masked"})
-    return {"ok": True, "xp": mc.xp_awarded, "tokens": mc.tokens_awarded}
+        results = qr_verifier.verify_batch(db, user.id, [(s.token, s.scanned_at) for s in payload.scans])
+    except Exception as e:
+        logger.error(f"Erro ao verificar lote de QR: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Erro interno do servidor"
+        )
+    return {
+        "ok": True,
+        "accepted": sum(1 for r in results if r.ok),
+        "results": [
+            {"status": r.status, "mission_id": r.mission_id, "xp": r.xp, "tokens": r.tokens}
+            for r in results
+        ],
+    }
 
 @router.post("/{mission_id}/complete/")
 def complete_in_app_slash(mission_id: int, db=Depends(get_db), user=Depends(get_current_active_user)):
@@ -317,11 +361,14 @@ def complete_in_app_no_slash(mission_id: int, db=Depends(get_db), user=Depends(g
         raise HTTPException(404, "Missão inválida")
     if not can_complete_now(mission):
         raise HTTPException(400, "Fora da janela")
-    if has_completed_today(db, user["id"], mission.id):
+    if has_completed_today(db, user.id, mission.id):
         raise HTTPException(409, "Já concluída hoje")
-    if not validate_in_app_action(db, user["id"], mission):
+    if not validate_in_app_action(db, user.id, mission):
         raise HTTPException(400, "Critério ainda não cumprido")
-    mc = award(db, user["id"], mission, "in_app", {"rule": mission.verification_hint})
+    mc = award(db, user.id, mission, "in_app", {"rule": mission.verification_hint})
+    if mc is None:
+        # Concluída por uma requisição concorrente
+        raise HTTPException(409, "Já concluída hoje")
     return {"ok": True, "xp": mc.xp_awarded, "tokens": mc.tokens_awarded}
 
 # [CONNECTUS PATCH] emitir QR token DEV
@@ -336,9 +383,7 @@ def issue_qr_dev_no_slash(mission_id: int, db=Depends(get_db), user=Depends(get_
     mission = db.query(Mission).get(mission_id)
     if not mission:
         raise HTTPException(404, "Missão não encontrada")
-    exp = datetime.utcnow() + timedelta(hours=8)
-    token = jwt.encode({"mission_id": mission.id, "exp": exp}, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
-    return {"token": token}
+    return {"token": issue_qr_token(mission.id), "expires_in": settings.QR_TOKEN_TTL_SECONDS}
 
 # [CONNECTUS PATCH] listar missões do usuário disponíveis hoje
 @router.get("/user/me/")
@@ -362,10 +407,13 @@ def get_user_missions_available_no_slash(
             Mission.is_daily == True
         ).all()
         
+        # Conclusões de hoje de todas as missões numa única consulta
+        done_today = completed_today(db, current_user.id, [m.id for m in missions])
+        
         available_missions = []
         for mission in missions:
             # Verificar se já foi completada hoje
-            if not has_completed_today(db, current_user["id"], mission.id):
+            if mission.id not in done_today:
                 # Verificar se está na janela de tempo
                 if can_complete_now(mission):
                     available_missions.append(mission)
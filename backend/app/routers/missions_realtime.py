@@ -13,6 +13,7 @@ from datetime import datetime
 from app.core.database import get_db
 from app.core.auth import get_current_user
 from app.services.mission_engine import MissionEngine
+from app.services.completion_index import mark_completed, realtime_mission_key
 
 router = APIRouter(prefix="/missions", tags=["missões-tempo-real"])
 
@@ -152,6 +153,9 @@ async def register_mission_event(
                 "evidence_hash": evidence_hash,
                 "created_at": datetime.utcnow()
             })
+            
+            # Índice unificado de conclusões (consulta "concluída hoje?")
+            mark_completed(db, current_user.id, realtime_mission_key(event_data.mission_slug), source="realtime")
         
         db.commit()
         
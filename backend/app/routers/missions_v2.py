@@ -12,10 +12,10 @@ import logging
 from app.core.database import get_db
 from app.core.auth import get_current_active_user
 from app.models.user import User
+from app.utils.http_cache import cached_get
+from app.services.daily_mission_cache import daily_mission_cache
 from app.services.missions_v2_service import (
     today_str_tz,
-    get_daily_missions,
-    get_user_progress_map,
     complete_mission
 )
 
@@ -58,6 +58,7 @@ class CompleteMissionResponse(BaseModel):
 
 
 @router.get("/daily", response_model=DailyMissionsResponse)
+@cached_get(tables=("daily_missions", "user_mission_progress"), vary_user=True, key_extra=today_str_tz)
 async def get_daily_missions_endpoint(
     date: Optional[str] = None,
     current_user: User = Depends(get_current_active_user),
@@ -80,16 +81,14 @@ async def get_daily_missions_endpoint(
                 detail="Formato de data inválido. Use YYYY-MM-DD"
             )
         
-        # Buscar missões ativas
-        missions = get_daily_missions(db)
-        
-        # Buscar progresso do usuário
-        progress_map = get_user_progress_map(db, current_user.id, target_date)
+        # Missões ativas e conclusões do usuário (cache em processo)
+        missions = daily_mission_cache.catalog(db)
+        completed_bits = daily_mission_cache.completed_bits(db, current_user.id, target_date)
         
         # Montar resposta
         missions_response = []
         for mission in missions:
-            is_completed = progress_map.get(mission.id) == "completed"
+            is_completed = bool(completed_bits & mission.bit)
             missions_response.append(MissionResponse(
                 code=mission.code,
                 title=mission.title,
@@ -3,15 +3,21 @@ from sqlalchemy.orm import Session
 from typing import List, Optional
 from ..core.database import get_db
 from ..schemas.post import PostCreate, PostUpdate, PostResponse, PostCommentCreate, PostCommentResponse, PostOut
-from ..services.post_service import PostService
-from ..core.auth import get_current_active_user
+from ..services.post_service import PostService, TIMELINE_ENCODER
+from ..core.auth import get_current_active_user, get_current_user_optional
 from ..models.user import User
+from ..utils.fast_json import FastJSONResponse
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/posts", tags=["posts"])
 
+# Parâmetros opcionais das listagens (evitam /comments e /stats por post)
+EMBED_COMMENTS_MAX = 10
+_embed_comments = Query(0, ge=0, le=EMBED_COMMENTS_MAX, description="Comentários recentes embutidos por post")
+_embed_liked = Query(False, description="Inclui liked_by_me em cada post")
+
 
 @router.post("/", response_model=PostOut)
 async def create_post_slash(
@@ -55,17 +61,37 @@ async def create_post_no_slash(
         )
 
 
+def _require_viewer(viewer: Optional[User], liked_by_me: bool):
+    # liked_by_me sem usuário não tem resposta certa: não devolve tudo como False
+    if liked_by_me and viewer is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
 @router.get("/timeline", response_model=List[PostResponse])
 async def get_timeline(
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    comments: int = _embed_comments,
+    liked_by_me: bool = _embed_liked,
+    viewer: Optional[User] = Depends(get_current_user_optional),
     db: Session = Depends(get_db)
 ):
     """Obtém timeline de posts"""
+    _require_viewer(viewer, liked_by_me)
     try:
         post_service = PostService(db)
-        posts = post_service.get_timeline_posts(limit, offset)
-        return posts
+        rows = post_service.get_timeline_rows(limit, offset)
+        if not comments and not liked_by_me:
+            return TIMELINE_ENCODER.response(rows)
+        
+        posts = post_service.embed_page_extras(
+            TIMELINE_ENCODER.to_dicts(rows), comments, viewer.id if viewer else None, liked_by_me
+        )
+        return FastJSONResponse(posts)
         
     except Exception as e:
         logger.error(f"Erro ao obter timeline: {e}")
@@ -75,10 +101,40 @@ async def get_timeline(
         )
 
 
+@router.get("/trending")
+async def get_trending(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor da página anterior"),
+    db: Session = Depends(get_db)
+):
+    """Feed em alta: posts por engajamento com decaimento temporal, paginado por cursor"""
+    try:
+        post_service = PostService(db)
+        rows, scores, next_cursor = post_service.get_trending_rows(limit, cursor)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor inválido"
+        )
+    except Exception as e:
+        logger.error(f"Erro ao obter posts em alta: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Erro interno do servidor"
+        )
+    
+    posts = TIMELINE_ENCODER.to_dicts(rows)
+    for post in posts:
+        post["trending_score"] = round(scores[post["id"]], 4)
+    return FastJSONResponse({"posts": posts, "next_cursor": next_cursor})
+
+
 @router.get("/my-posts", response_model=List[PostResponse])
 async def get_my_posts(
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    comments: int = _embed_comments,
+    liked_by_me: bool = _embed_liked,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
@@ -90,7 +146,7 @@ async def get_my_posts(
         if not posts:
             return []
         
-        return posts
+        return post_service.embed_page_extras(posts, comments, current_user.id, liked_by_me)
         
     except Exception as e:
         logger.error(f"Erro ao obter posts do usuário: {e}")
@@ -105,13 +161,17 @@ async def search_posts(
     q: str = Query(..., min_length=1),
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    comments: int = _embed_comments,
+    liked_by_me: bool = _embed_liked,
+    viewer: Optional[User] = Depends(get_current_user_optional),
     db: Session = Depends(get_db)
 ):
     """Busca posts por conteúdo"""
+    _require_viewer(viewer, liked_by_me)
     try:
         post_service = PostService(db)
         posts = post_service.search_posts(q, limit, offset)
-        return posts
+        return post_service.embed_page_extras(posts, comments, viewer.id if viewer else None, liked_by_me)
         
     except Exception as e:
         logger.error(f"Erro ao buscar posts: {e}")
@@ -121,6 +181,38 @@ async def search_posts(
         )
 
 
+@router.get("/liked")
+async def get_liked_posts(
+    ids: str = Query(..., description="IDs dos posts separados por vírgula"),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Quais dos posts informados o usuário atual curtiu (página da timeline)"""
+    try:
+        post_ids = [int(part) for part in ids.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="IDs inválidos"
+        )
+    if len(post_ids) > 100:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Máximo de 100 posts por consulta"
+        )
+    
+    try:
+        post_service = PostService(db)
+        return {"liked": sorted(post_service.get_liked_post_ids(current_user.id, post_ids))}
+        
+    except Exception as e:
+        logger.error(f"Erro ao consultar likes: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Erro interno do servidor"
+        )
+
+
 @router.get("/{post_id}", response_model=PostResponse)
 async def get_post(
     post_id: int,
@@ -137,7 +229,8 @@ async def get_post(
                 detail="Post não encontrado"
             )
         
-        return post
+        # Inclui contadores ainda não gravados pelo write-behind
+        return post_service._post_to_dict(post)
         
     except HTTPException:
         raise
@@ -219,15 +312,15 @@ async def like_post(
     """Curtir/descurtir um post"""
     try:
         post_service = PostService(db)
-        success = post_service.like_post(current_user.id, post_id)
+        liked = post_service.toggle_like(current_user.id, post_id)
         
-        if not success:
+        if liked is None:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Erro ao curtir post"
             )
         
-        return {"message": "Ação realizada com sucesso"}
+        return {"message": "Ação realizada com sucesso", "liked": liked}
         
     except HTTPException:
         raise
@@ -258,7 +351,7 @@ async def comment_post(
             )
         
         logger.info(f"Comentário adicionado ao post {post_id} pelo usuário {current_user.id}")
-        return comment
+        return post_service._comment_to_dict(comment)
         
     except HTTPException:
         raise
@@ -281,7 +374,7 @@ async def get_post_comments(
     try:
         post_service = PostService(db)
         comments = post_service.get_post_comments(post_id, limit, offset)
-        return comments
+        return [post_service._comment_to_dict(comment) for comment in comments]
         
     except Exception as e:
         logger.error(f"Erro ao obter comentários: {e}")
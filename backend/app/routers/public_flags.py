@@ -1,12 +1,14 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy import text
 from app.core.database import get_db, resolve_db_path_from_env
+from app.utils.http_cache import cached_get
 import sqlite3
 import os
 
 router = APIRouter(prefix="/public", tags=["public"])
 
 @router.get("/feature-flags")
+@cached_get(tables=("feature_flags",))
 def public_feature_flags(db=Depends(get_db)):
     """
     Endpoint público para o frontend ler flags.
@@ -6,6 +6,8 @@ from ..schemas.ranking import UserRankingResponse, RankingResponse
 from ..services.ranking_service import RankingService
 from ..core.auth import get_current_active_user, get_current_user_optional
 from ..models.user import User
+from ..utils.http_cache import cached_get
+from ..utils.fast_json import FastJSONResponse
 import logging
 
 logger = logging.getLogger(__name__)
@@ -24,8 +26,7 @@ async def get_ranking(
         ranking_service = RankingService(db)
         # Mapear period para o tipo de ranking
         ranking_type = "overall" if period == "all" else "overall"
-        ranking = ranking_service.get_ranking_page(ranking_type, 1, 20)
-        return ranking
+        return FastJSONResponse(ranking_service.get_ranking_page_json(ranking_type, 1, 20))
         
     except Exception as e:
         logger.error(f"Erro ao obter ranking: {e}")
@@ -46,8 +47,7 @@ async def get_overall_ranking(
     """Obtém ranking geral"""
     try:
         ranking_service = RankingService(db)
-        ranking = ranking_service.get_ranking_page("overall", page, page_size)
-        return ranking
+        return FastJSONResponse(ranking_service.get_ranking_page_json("overall", page, page_size))
         
     except Exception as e:
         logger.error(f"Erro ao obter ranking geral: {e}")
@@ -66,8 +66,7 @@ async def get_xp_ranking(
     """Obtém ranking por XP"""
     try:
         ranking_service = RankingService(db)
-        ranking = ranking_service.get_ranking_page("xp", page, page_size)
-        return ranking
+        return FastJSONResponse(ranking_service.get_ranking_page_json("xp", page, page_size))
         
     except Exception as e:
         logger.error(f"Erro ao obter ranking de XP: {e}")
@@ -86,8 +85,7 @@ async def get_token_ranking(
     """Obtém ranking por tokens"""
     try:
         ranking_service = RankingService(db)
-        ranking = ranking_service.get_ranking_page("tokens", page, page_size)
-        return ranking
+        return FastJSONResponse(ranking_service.get_ranking_page_json("tokens", page, page_size))
         
     except Exception as e:
         logger.error(f"Erro ao obter ranking de tokens: {e}")
@@ -106,8 +104,7 @@ async def get_mission_ranking(
     """Obtém ranking por missões completadas"""
     try:
         ranking_service = RankingService(db)
-        ranking = ranking_service.get_ranking_page("missions", page, page_size)
-        return ranking
+        return FastJSONResponse(ranking_service.get_ranking_page_json("missions", page, page_size))
         
     except Exception as e:
         logger.error(f"Erro ao obter ranking de missões: {e}")
@@ -181,6 +178,7 @@ async def get_my_ranking(
 
 
 @router.get("/leaderboard")
+@cached_get(tables=("user_rankings", "users"))
 async def get_leaderboard(
     db: Session = Depends(get_db)
 ):
@@ -239,6 +237,7 @@ async def update_all_rankings(
 
 
 @router.get("/stats")
+@cached_get(tables=("user_rankings", "users"))
 async def get_ranking_stats(
     db: Session = Depends(get_db)
 ):
@@ -3,24 +3,28 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 from typing import List, Optional
 from sqlalchemy import text
-from sqlalchemy.exc import OperationalError
 from datetime import datetime, timedelta, timezone
 
-from app.core.database import get_db
+from app.core.database import get_db, flag_value
 from app.core.auth import get_current_user
+from app.core.schema_readiness import schema_registry
+from app.utils.http_cache import cached_get
 
 router = APIRouter(prefix="/staking", tags=["staking"])
 
+# Schema criado pelas migrações (004/006); as rotas só verificam, nunca criam
+schema_registry.require("staking", tables=("staking_tiers", "staking_positions"))
+schema_registry.require("wallet_ledger", tables=("token_ledger", "v_wallet_balance"))
+
 def utcnow():
     return datetime.now(timezone.utc)
 
 def get_flag(db, key: str) -> bool:
-    try:
-        row = db.execute(text("SELECT enabled FROM feature_flags WHERE key=:k"), {"k": key}).fetchone()
-        return bool(row[0]) if row else False
-    except OperationalError:
-        # tabela/coluna ainda não existe neste DB → tratar como flag desativada
-        return False
+    # flag ausente (ou feature_flags ainda não migrada) → desativada
+    return flag_value(db, key)
+
+def _staking_ready(db) -> bool:
+    return schema_registry.is_ready(db, "staking") and schema_registry.is_ready(db, "wallet_ledger")
 
 class TierOut(BaseModel):
     id: int
@@ -30,8 +34,9 @@ class TierOut(BaseModel):
     min_amount: int
 
 @router.get("/tiers", response_model=List[TierOut])
+@cached_get(tables=("staking_tiers", "feature_flags"), vary_user=True)
 def list_tiers(db=Depends(get_db), user=Depends(get_current_user)):
-    if not get_flag(db, "STAKING_ENABLED"):
+    if not get_flag(db, "STAKING_ENABLED") or not schema_registry.is_ready(db, "staking"):
         return []
     rows = db.execute(text("""
         SELECT id, name, apy_bps, lock_days, min_amount
@@ -49,6 +54,8 @@ def staking_open(body: OpenBody, db=Depends(get_db), user=Depends(get_current_us
         raise HTTPException(status_code=403, detail="staking_disabled")
     if body.amount <= 0:
         raise HTTPException(status_code=400, detail="invalid_amount")
+    if not _staking_ready(db):
+        raise HTTPException(status_code=400, detail="staking_not_initialized")
 
     tier = db.execute(text("SELECT id, apy_bps, lock_days, min_amount FROM staking_tiers WHERE id=:id"),
                       {"id": body.tier_id}).fetchone()
@@ -96,29 +103,28 @@ class PositionOut(BaseModel):
 
 @router.get("/positions", response_model=List[PositionOut])
 def list_positions(db=Depends(get_db), user=Depends(get_current_user)):
-    try:
-        rows = db.execute(text("""
-            SELECT p.id, t.name, p.principal, p.apy_bps, p.lock_days, p.started_at, p.ends_at, p.last_accrued_at, p.status
-            FROM staking_positions p
-            LEFT JOIN staking_tiers t ON t.id=p.tier_id
-            WHERE p.user_id=:uid
-            ORDER BY p.created_at DESC, p.id DESC
-        """), {"uid": user.id}).fetchall()
-
-        out = []
-        for r in rows:
-            out.append({
-                "id": r[0], "tier_name": r[1], "principal": int(r[2]), "apy_bps": int(r[3]), "lock_days": int(r[4]),
-                "started_at": datetime.fromisoformat(r[5]) if isinstance(r[5], str) else r[5],
-                "ends_at": datetime.fromisoformat(r[6]) if isinstance(r[6], str) else r[6],
-                "last_accrued_at": datetime.fromisoformat(r[7]) if isinstance(r[7], str) else r[7],
-                "status": r[8]
-            })
-        return out
-    except OperationalError:
-        # tabela ainda não existe neste DB → retornar lista vazia
+    if not schema_registry.is_ready(db, "staking"):
         return []
 
+    rows = db.execute(text("""
+        SELECT p.id, t.name, p.principal, p.apy_bps, p.lock_days, p.started_at, p.ends_at, p.last_accrued_at, p.status
+        FROM staking_positions p
+        LEFT JOIN staking_tiers t ON t.id=p.tier_id
+        WHERE p.user_id=:uid
+        ORDER BY p.created_at DESC, p.id DESC
+    """), {"uid": user.id}).fetchall()
+
+    out = []
+    for r in rows:
+        out.append({
+            "id": r[0], "tier_name": r[1], "principal": int(r[2]), "apy_bps": int(r[3]), "lock_days": int(r[4]),
+            "started_at": datetime.fromisoformat(r[5]) if isinstance(r[5], str) else r[5],
+            "ends_at": datetime.fromisoformat(r[6]) if isinstance(r[6], str) else r[6],
+            "last_accrued_at": datetime.fromisoformat(r[7]) if isinstance(r[7], str) else r[7],
+            "status": r[8]
+        })
+    return out
+
 def _calc_reward_since(principal: int, apy_bps: int, last_dt: datetime, now: datetime) -> int:
     # cálculo simples: base dias/365; truncamos para inteiro
     elapsed_days = max((now - last_dt).total_seconds() / 86400.0, 0.0)
@@ -134,69 +140,70 @@ def staking_claim(body: ClaimBody, db=Depends(get_db), user=Depends(get_current_
     if not get_flag(db, "STAKING_ENABLED"):
         raise HTTPException(status_code=403, detail="staking_disabled")
 
-    try:
-        row = db.execute(text("""
-            SELECT id, principal, apy_bps, last_accrued_at, status
-            FROM staking_positions WHERE id=:pid AND user_id=:uid
-        """), {"pid": body.position_id, "uid": user.id}).fetchone()
-        if not row:
-            raise HTTPException(status_code=404, detail="position_not_found")
-        if row[4] != "open":
-            raise HTTPException(status_code=400, detail="position_closed")
-
-        now = utcnow()
-        last = datetime.fromisoformat(row[3]) if isinstance(row[3], str) else row[3]
-        reward = _calc_reward_since(int(row[1]), int(row[2]), last, now)
-        if reward <= 0:
-            return {"ok": True, "reward": 0}
-
-        # credita recompensa e avança last_accrued_at
-        db.execute(text("""
-            INSERT INTO token_ledger(user_id, type, amount, meta_json)
-            VALUES(:uid, 'stake_reward', :amt, '{"action":"claim"}')
-        """), {"uid": user.id, "amt": reward})
-        db.execute(text("UPDATE staking_positions SET last_accrued_at=:now WHERE id=:pid"),
-                   {"now": now.isoformat(), "pid": row[0]})
-        return {"ok": True, "reward": reward}
-    except OperationalError:
+    if not _staking_ready(db):
         raise HTTPException(status_code=400, detail="staking_not_initialized")
 
+    row = db.execute(text("""
+        SELECT id, principal, apy_bps, last_accrued_at, status
+        FROM staking_positions WHERE id=:pid AND user_id=:uid
+    """), {"pid": body.position_id, "uid": user.id}).fetchone()
+    if not row:
+        raise HTTPException(status_code=404, detail="position_not_found")
+    if row[4] != "open":
+        raise HTTPException(status_code=400, detail="position_closed")
+
+    now = utcnow()
+    last = datetime.fromisoformat(row[3]) if isinstance(row[3], str) else row[3]
+    reward = _calc_reward_since(int(row[1]), int(row[2]), last, now)
+    if reward <= 0:
+        return {"ok": True, "reward": 0}
+
+    # credita recompensa e avança last_accrued_at
+    db.execute(text("""
+        INSERT INTO token_ledger(user_id, type, amount, meta_json)
+        VALUES(:uid, 'stake_reward', :amt, '{"action":"claim"}')
+    """), {"uid": user.id, "amt": reward})
+    db.execute(text("UPDATE staking_positions SET last_accrued_at=:now WHERE id=:pid"),
+               {"now": now.isoformat(), "pid": row[0]})
+    return {"ok": True, "reward": reward}
+
 @router.post("/close")
 def staking_close(body: ClaimBody, db=Depends(get_db), user=Depends(get_current_user)):
     if not get_flag(db, "STAKING_ENABLED"):
         raise HTTPException(status_code=403, detail="staking_disabled")
 
-    try:
-        row = db.execute(text("""
-            SELECT id, principal, apy_bps, last_accrued_at, status
-            FROM staking_positions WHERE id=:pid AND user_id=:uid
-        """), {"pid": body.position_id, "uid": user.id}).fetchone()
-        if not row:
-            raise HTTPException(status_code=404, detail="position_not_found")
-        if row[4] != "open":
-            raise HTTPException(status_code=400, detail="position_already_closed")
-
-        now = utcnow()
-        last = datetime.fromisoformat(row[3]) if isinstance(row[3], str) else row[3]
-        reward = _calc_reward_since(int(row[1]), int(row[2]), last, now)
-
-        # 1) recompensa final (se houver)
-        if reward > 0:
-            db.execute(text("""
-                INSERT INTO token_ledger(user_id, type, amount, meta_json)
-                VALUES(:uid, 'stake_reward', :amt, '{"action":"close"}')
-            """), {"uid": user.id, "amt": reward})
-
-        # 2) devolução do principal
+    if not _staking_ready(db):
+        raise HTTPException(status_code=400, detail="staking_not_initialized")
+
+    row = db.execute(text("""
+        SELECT id, principal, apy_bps, last_accrued_at, status
+        FROM staking_positions WHERE id=:pid AND user_id=:uid
+    """), {"pid": body.position_id, "uid": user.id}).fetchone()
+    if not row:
+        raise HTTPException(status_code=404, detail="position_not_found")
+    if row[4] != "open":
+        raise HTTPException(status_code=400, detail="position_already_closed")
+
+    now = utcnow()
+    last = datetime.fromisoformat(row[3]) if isinstance(row[3], str) else row[3]
+    reward = _calc_reward_since(int(row[1]), int(row[2]), last, now)
+
+    # 1) recompensa final (se houver)
+    if reward > 0:
         db.execute(text("""
             INSERT INTO token_ledger(user_id, type, amount, meta_json)
-            VALUES(:uid, 'stake_return', :amt, '{"action":"close"}')
-        """), {"uid": user.id, "amt": int(row[1])})
+            VALUES(:uid, 'stake_reward', :amt, '{"action":"close"}')
+        """), {"uid": user.id, "amt": reward})
+
+    # 2) devolução do principal
+    db.execute(text("""
+        INSERT INTO token_ledger(user_id, type, amount, meta_json)
+        VALUES(:uid, 'stake_return', :amt, '{"action":"close"}')
+    """), {"uid": user.id, "amt": int(row[1])})
 
-        # 3) encerra posição
-        db.execute(text("UPDATE staking_positions SET status='closed', last_accrued_at=:now WHERE id=:pid"),
-                   {"now": now.isoformat(), "pid": row[0]})
+    # 3) encerra posição
+    db.execute(text("UPDATE staking_positions SET status='closed', last_accrued_at=:now WHERE id=:pid"),
+               {"now": now.isoformat(), "pid": row[0]})
+
+    return {"ok": True, "reward": reward, "returned": int(row[1])}
 
-        return {"ok": True, "reward": reward, "returned": int(row[1])}
-    except OperationalError:
-        raise HTTPException(status_code=400, detail="staking_not_initialized")
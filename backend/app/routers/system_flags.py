@@ -3,6 +3,7 @@ from fastapi import APIRouter, Depends
 from sqlalchemy import text
 from app.core.database import get_db
 from app.core.auth import get_current_user
+from app.utils.http_cache import response_cache
 
 router = APIRouter(prefix="/system", tags=["system"])
 
@@ -11,3 +12,7 @@ def feature_flags(db=Depends(get_db), user=Depends(get_current_user)):
     rows = db.execute(text("SELECT key, enabled FROM feature_flags")).fetchall()
     return { r[0]: bool(r[1]) for r in rows }
 
+@router.get("/http-cache")
+def http_cache_stats(user=Depends(get_current_user)):
+    """Estatísticas do cache de GETs condicionais (304, hits, misses, hit ratio)"""
+    return response_cache.stats()
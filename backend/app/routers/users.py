@@ -152,7 +152,7 @@ async def get_user_stats(
     """Obtém estatísticas do usuário"""
     try:
         user_service = UserService(db)
-        stats = user_service.get_user_stats(current_user["id"])
+        stats = user_service.get_user_stats(current_user.id)
         
         if not stats:
             raise HTTPException(
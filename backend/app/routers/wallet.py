@@ -3,55 +3,23 @@ from sqlalchemy.orm import Session
 from sqlalchemy import text
 from pydantic import BaseModel
 from datetime import datetime
+import importlib.util
 import secrets
 
-try:
-    from eth_account.messages import encode_defunct
-    from eth_account import Account
-    ETH_ACCOUNT_AVAILABLE = True
-except Exception:
-    ETH_ACCOUNT_AVAILABLE = False
+# eth_account é pesado de importar: só é carregado na verificação de assinatura
+ETH_ACCOUNT_AVAILABLE = importlib.util.find_spec("eth_account") is not None
 
 from ..core.database import get_db, flag_value
 from ..core.auth import get_current_active_user
+from ..core.schema_readiness import schema_registry
 
 router = APIRouter(prefix="/wallet", tags=["wallet"])
 
-from sqlalchemy.exc import OperationalError
-from sqlalchemy.sql import text
-
-def _ensure_wallet_core_schema(db: Session):
-    # Cria tabelas se não existirem (SQLite)
-    db.execute(text("""
-        CREATE TABLE IF NOT EXISTS wallet_addresses (
-            user_id INTEGER PRIMARY KEY,
-            address TEXT,
-            verified_at DATETIME
-        )
-    """))
-    db.execute(text("""
-        CREATE TABLE IF NOT EXISTS token_transfers (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            amount NUMERIC NOT NULL DEFAULT 0,
-            status TEXT NOT NULL DEFAULT 'pending',
-            tx_hash TEXT,
-            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-        )
-    """))
-    db.commit()
-
-def safe_fetchone(db, sql, params=None):
-    try:
-        return db.execute(text(sql), params or {}).fetchone()
-    except OperationalError:
-        return None
-
-def safe_fetchall(db, sql, params=None):
-    try:
-        return db.execute(text(sql), params or {}).fetchall()
-    except OperationalError:
-        return []
+# Schema criado pelas migrações (003/006); as rotas só verificam, nunca criam
+schema_registry.require(
+    "wallet", tables=("wallet_addresses", "token_transfers"), columns={"wallet_addresses": ("nonce",)}
+)
+schema_registry.require("wallet_ledger", tables=("token_ledger", "v_wallet_balance"))
 
 def _get_flag(db, key: str) -> bool:
     """Helper function to get feature flag value"""
@@ -59,13 +27,16 @@ def _get_flag(db, key: str) -> bool:
 
 @router.get("/status")
 def wallet_status(db: Session = Depends(get_db), user: dict = Depends(get_current_active_user)):
-    """Get wallet status and feature flags"""
+    """Get wallet status and feature flags (somente leitura)"""
     try:
-        _ensure_wallet_core_schema(db)
         onchain = _get_flag(db, "ONCHAIN_TESTNET")
         withdrawals = _get_flag(db, "WITHDRAWALS_ENABLED")
         
-        row = safe_fetchone(db, "SELECT address, verified_at FROM wallet_addresses WHERE user_id=:uid", {"uid": user.id})
+        row = None
+        if schema_registry.is_ready(db, "wallet"):
+            row = db.execute(
+                text("SELECT address, verified_at FROM wallet_addresses WHERE user_id=:uid"), {"uid": user.id}
+            ).fetchone()
         if not row:
             return {"connected": False, "address": None, "verified": False, "onchain_enabled": onchain, "withdrawals_enabled": withdrawals}
         
@@ -85,6 +56,8 @@ def wallet_request_message(db: Session = Depends(get_db), user: dict = Depends(g
     """Request message for wallet signature verification"""
     if not ETH_ACCOUNT_AVAILABLE:
         raise HTTPException(status_code=503, detail="eth_account_not_available")
+    if not schema_registry.is_ready(db, "wallet"):
+        raise HTTPException(status_code=503, detail="wallet_not_initialized")
     
     # cria/atualiza nonce para desafio de assinatura
     nonce = secrets.token_hex(16)
@@ -108,7 +81,12 @@ def wallet_verify_signature(body: VerifyBody, db: Session = Depends(get_db), use
     """Verify wallet signature and save address"""
     if not ETH_ACCOUNT_AVAILABLE:
         raise HTTPException(status_code=503, detail="eth_account_not_available")
+    if not schema_registry.is_ready(db, "wallet"):
+        raise HTTPException(status_code=503, detail="wallet_not_initialized")
     
+    from eth_account.messages import encode_defunct
+    from eth_account import Account
+
     # reconstrói a mensagem idêntica à enviada
     message = f"ConnectUS: prove address ownership. user_id={user['id']} nonce={body.nonce}"
     eth_msg = encode_defunct(text=message)
@@ -149,6 +127,8 @@ def withdraw_intent(body: WithdrawBody, db: Session = Depends(get_db), user: dic
 
     if not _get_flag(db, "WITHDRAWALS_ENABLED"):
         raise HTTPException(status_code=403, detail="withdrawals_disabled")
+    if not (schema_registry.is_ready(db, "wallet") and schema_registry.is_ready(db, "wallet_ledger")):
+        raise HTTPException(status_code=503, detail="wallet_not_initialized")
 
     # opcional: checar saldo interno suficiente
     bal_row = db.execute(text("SELECT balance FROM v_wallet_balance WHERE user_id=:uid"), {"uid": user.id}).fetchone()
@@ -178,13 +158,14 @@ def list_transfers(
 ):
     """List user's token transfers"""
     try:
-        _ensure_wallet_core_schema(db)
-        rows = safe_fetchall(db, """
+        if not schema_registry.is_ready(db, "wallet"):
+            return {"items": [], "total": 0, "limit": limit, "offset": offset}
+        rows = db.execute(text("""
             SELECT id, amount, status, tx_hash, created_at
             FROM token_transfers WHERE user_id=:uid
             ORDER BY created_at DESC, id DESC
             LIMIT :limit OFFSET :offset
-        """, {"uid": user.id, "limit": limit, "offset": offset})
+        """), {"uid": user.id, "limit": limit, "offset": offset}).fetchall()
         
         items = [{"id": r[0], "amount": int(r[1]), "status": r[2], "tx_hash": r[3], "created_at": r[4]} for r in rows]
         return {"items": items, "total": len(items), "limit": limit, "offset": offset}
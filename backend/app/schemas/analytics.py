@@ -0,0 +1,29 @@
+"""
+Schemas Pydantic para analytics (rollups diários)
+"""
+
+from typing import Dict, List, Optional
+from pydantic import BaseModel
+
+
+class RollupBucket(BaseModel):
+    """Contagem e soma de pesos de uma fonte no dia"""
+    count: int
+    weight: float
+
+
+class DailyPoint(BaseModel):
+    """Ponto diário da série temporal"""
+    date: str
+    count: int
+    weight: float
+    by_source: Dict[str, RollupBucket]
+
+
+class DailySeriesOut(BaseModel):
+    """Série diária de um usuário (ou da plataforma)"""
+    user_id: Optional[int] = None
+    source: Optional[str] = None
+    start: str
+    end: str
+    series: List[DailyPoint]
@@ -3,7 +3,7 @@ Schemas Pydantic para Impact Score
 """
 
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from pydantic import BaseModel, Field, ConfigDict, model_serializer
 
 
@@ -53,11 +53,45 @@ class ImpactScoreOut(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class ImpactLeaderboardEntry(BaseModel):
+    """Entrada do ranking de impacto com decaimento temporal"""
+    position: int
+    user_id: int
+    nickname: Optional[str] = None
+    decayed_score: float
+    score: float
+
+
+class MerkleProofStep(BaseModel):
+    """Irmão no caminho até a raiz (side = posição do irmão)"""
+    hash: str
+    side: str
+
+
 class AttestationOut(BaseModel):
-    """Schema de saída para attestation mock"""
+    """Schema de saída para attestation (folha em lote de Merkle)"""
     attestation_id: str
     hash: str
     stored: bool
+    batch_id: Optional[int] = None
+    root: Optional[str] = None
+    leaf_index: Optional[int] = None
+    leaf_data: Optional[str] = None
+    proof: List[MerkleProofStep] = []
+
+
+class AttestationVerifyIn(BaseModel):
+    """Entrada para verificar prova de inclusão (leaf_hash ou leaf_data)"""
+    root: str
+    proof: List[MerkleProofStep]
+    leaf_hash: Optional[str] = None
+    leaf_data: Optional[str] = None
+
+
+class AttestationVerifyOut(BaseModel):
+    """Resultado da verificação de prova"""
+    valid: bool
+    batch_id: Optional[int] = None
 
 
 class ImpactEventResponse(BaseModel):
@@ -69,6 +69,7 @@ class PostResponse(PostBase):
     author: dict  # Informações básicas do autor
     likes: List[PostLikeResponse] = []
     comments: List[PostCommentResponse] = []
+    liked_by_me: Optional[bool] = None  # só com ?liked_by_me=true
     
     class Config:
         from_attributes = True
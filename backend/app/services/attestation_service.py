@@ -0,0 +1,308 @@
+"""
+Serviço de attestations em lote (árvore de Merkle)
+
+Um job periódico monta uma árvore de Merkle sobre as folhas
+(user_id, score, updated_at) de impact_scores e persiste a raiz com um id de
+lote. Cada usuário mantém uma posição estável na árvore, então um novo lote
+só re-hasheia as folhas alteradas e seus ancestrais (O(k log n)).
+/impact/attest devolve uma prova de inclusão O(log n) contra a raiz do lote.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Prefixos de domínio (evita ataques de segunda pré-imagem entre folha e nó)
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+
+
+def leaf_data(user_id: int, score: float, updated_at: str) -> str:
+    """Representação canônica da folha (o cliente deve usar a mesma)"""
+    return f"{int(user_id)}|{float(score)!r}|{updated_at}"
+
+
+def hash_leaf(data: str) -> bytes:
+    return hashlib.sha256(LEAF_PREFIX + data.encode()).digest()
+
+
+def hash_node(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+
+class MerkleTree:
+    """
+    Árvore de Merkle binária com atualização incremental
+
+    Um nó sem irmão sobe inalterado para o nível seguinte (sem duplicação).
+    """
+
+    def __init__(self, leaves: Optional[List[bytes]] = None):
+        self.levels: List[List[bytes]] = [list(leaves or [])]
+        if self.levels[0]:
+            self._recompute(range(len(self.levels[0])))
+
+    def __len__(self) -> int:
+        return len(self.levels[0])
+
+    @property
+    def root(self) -> Optional[bytes]:
+        return self.levels[-1][0] if self.levels[0] else None
+
+    def set_leaf(self, index: int, leaf: bytes):
+        """Atualiza (ou acrescenta, se index == len) uma folha sem recalcular"""
+        if index == len(self.levels[0]):
+            self.levels[0].append(leaf)
+        else:
+            self.levels[0][index] = leaf
+
+    def update(self, changes: Dict[int, bytes]):
+        """Aplica folhas alteradas/novas e recalcula só os caminhos afetados"""
+        for index in sorted(changes):
+            self.set_leaf(index, changes[index])
+        self._recompute(changes.keys())
+
+    def _recompute(self, dirty_indices):
+        dirty = set(dirty_indices)
+        level = 0
+        while len(self.levels[level]) > 1:
+            current = self.levels[level]
+            parent_len = (len(current) + 1) // 2
+            if level + 1 == len(self.levels):
+                self.levels.append([])
+            parents = self.levels[level + 1]
+            if len(parents) < parent_len:
+                parents.extend([b""] * (parent_len - len(parents)))
+
+            parent_dirty = {i // 2 for i in dirty}
+            for p in parent_dirty:
+                left = 2 * p
+                right = left + 1
+                parents[p] = hash_node(current[left], current[right]) if right < len(current) else current[left]
+
+            dirty = parent_dirty
+            level += 1
+        del self.levels[level + 1:]
+
+    def proof(self, index: int) -> List[Dict[str, str]]:
+        """Prova de inclusão: lista de irmãos (hex) do nível da folha até a raiz"""
+        steps = []
+        for current in self.levels[:-1]:
+            sibling = index ^ 1
+            if sibling < len(current):
+                steps.append({
+                    "hash": current[sibling].hex(),
+                    "side": "left" if sibling < index else "right",
+                })
+            index //= 2
+        return steps
+
+
+def verify_proof(leaf_hash_hex: str, proof: List[Dict[str, str]], root_hex: str) -> bool:
+    """Verifica uma prova de inclusão contra uma raiz"""
+    try:
+        node = bytes.fromhex(_strip_0x(leaf_hash_hex))
+        for step in proof:
+            sibling = bytes.fromhex(_strip_0x(step["hash"]))
+            if step["side"] == "left":
+                node = hash_node(sibling, node)
+            elif step["side"] == "right":
+                node = hash_node(node, sibling)
+            else:
+                return False
+        return node.hex() == _strip_0x(root_hex).lower()
+    except (ValueError, KeyError, TypeError):
+        return False
+
+
+def _strip_0x(value: str) -> str:
+    return value[2:] if value.startswith("0x") else value
+
+
+class AttestationBatcher:
+    """Mantém a árvore do último lote em memória, sincronizada com o banco"""
+
+    def __init__(self):
+        self.tree = MerkleTree()
+        self.batch_id: Optional[int] = None
+        self.positions: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def _latest_batch(self, db: Session) -> Optional[Tuple[int, str]]:
+        row = db.execute(
+            text("SELECT id, root FROM attestation_batches ORDER BY id DESC LIMIT 1")
+        ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def _sync(self, db: Session):
+        """Recarrega a árvore do banco se outro worker gravou um lote mais novo"""
+        latest = self._latest_batch(db)
+        latest_id = latest[0] if latest else None
+        if latest_id == self.batch_id:
+            return
+        rows = db.execute(
+            text("SELECT user_id, position, leaf_hash FROM attestation_leaves ORDER BY position")
+        ).fetchall()
+        self.positions = {row[0]: row[1] for row in rows}
+        self.tree = MerkleTree([bytes.fromhex(row[2]) for row in rows])
+        self.batch_id = latest_id
+
+    def build_batch(self, db: Session, force: bool = False) -> Optional[Dict]:
+        """
+        Gera um novo lote com as folhas alteradas desde o último
+
+        Args:
+            db: Sessão do banco de dados
+            force: Gera lote mesmo sem alterações
+
+        Returns:
+            Dict com batch_id, root, leaf_count e changed (ou None se nada mudou)
+        """
+        with self._lock:
+            try:
+                return self._build(db, force)
+            except Exception:
+                # Árvore e posições em memória já podem ter mudado: descarta e
+                # recarrega do banco na próxima chamada
+                db.rollback()
+                self.tree = MerkleTree()
+                self.positions = {}
+                self.batch_id = None
+                raise
+
+    def _build(self, db: Session, force: bool) -> Optional[Dict]:
+        # Chamado com o lock
+        start = time.perf_counter()
+        self._sync(db)
+
+        removed = db.execute(text("""
+            SELECT COUNT(*) FROM attestation_leaves l
+            LEFT JOIN impact_scores s ON s.user_id = l.user_id
+            WHERE s.user_id IS NULL
+        """)).scalar()
+        if removed:
+            # Usuários removidos: compactar posições e reconstruir do zero
+            db.execute(text("DELETE FROM attestation_leaves"))
+            self.positions = {}
+            self.tree = MerkleTree()
+
+        changed_rows = db.execute(text("""
+            SELECT s.user_id, s.score, CAST(s.updated_at AS TEXT)
+            FROM impact_scores s
+            LEFT JOIN attestation_leaves l ON l.user_id = s.user_id
+            WHERE l.user_id IS NULL
+               OR l.score != s.score
+               OR l.updated_at != CAST(s.updated_at AS TEXT)
+            ORDER BY s.user_id
+        """)).fetchall()
+
+        if not changed_rows and not force and self.batch_id is not None:
+            return None
+
+        changes: Dict[int, bytes] = {}
+        leaf_params = []
+        next_position = len(self.tree)
+        for user_id, score, updated_at in changed_rows:
+            position = self.positions.get(user_id)
+            if position is None:
+                position = next_position
+                next_position += 1
+                self.positions[user_id] = position
+            leaf = hash_leaf(leaf_data(user_id, score, updated_at))
+            changes[position] = leaf
+            leaf_params.append({
+                "user_id": user_id,
+                "position": position,
+                "score": score,
+                "updated_at": updated_at,
+                "leaf_hash": leaf.hex(),
+            })
+
+        self.tree.update(changes)
+        root_hex = "0x" + (self.tree.root or hash_node(b"", b"")).hex()
+
+        if leaf_params:
+            db.execute(
+                text("""
+                    INSERT INTO attestation_leaves (user_id, position, score, updated_at, leaf_hash)
+                    VALUES (:user_id, :position, :score, :updated_at, :leaf_hash)
+                    ON CONFLICT(user_id) DO UPDATE SET
+                        score = excluded.score,
+                        updated_at = excluded.updated_at,
+                        leaf_hash = excluded.leaf_hash
+                """),
+                leaf_params
+            )
+        result = db.execute(
+            text("""
+                INSERT INTO attestation_batches (root, leaf_count, changed_leaves, created_at)
+                VALUES (:root, :leaf_count, :changed, CURRENT_TIMESTAMP)
+            """),
+            {"root": root_hex, "leaf_count": len(self.tree), "changed": len(changes)}
+        )
+        db.commit()
+        self.batch_id = result.lastrowid
+
+        elapsed = time.perf_counter() - start
+        logger.info(
+            f"impact.attest_batch id={self.batch_id} leaves={len(self.tree)} changed={len(changes)} took={elapsed:.2f}s"
+        )
+        return {
+            "batch_id": self.batch_id,
+            "root": root_hex,
+            "leaf_count": len(self.tree),
+            "changed": len(changes),
+        }
+
+    def get_proof(self, db: Session, user_id: int) -> Optional[Dict]:
+        """
+        Prova de inclusão do usuário no último lote
+
+        Gera um lote incremental antes, se a folha do usuário estiver ausente
+        ou desatualizada em relação a impact_scores.
+        """
+        stale = db.execute(text("""
+            SELECT 1 FROM impact_scores s
+            LEFT JOIN attestation_leaves l ON l.user_id = s.user_id
+            WHERE s.user_id = :user_id
+              AND (l.user_id IS NULL OR l.score != s.score OR l.updated_at != CAST(s.updated_at AS TEXT))
+        """), {"user_id": user_id}).fetchone()
+        if stale:
+            self.build_batch(db)
+
+        with self._lock:
+            self._sync(db)
+            row = db.execute(
+                text("SELECT position, score, updated_at, leaf_hash FROM attestation_leaves WHERE user_id = :user_id"),
+                {"user_id": user_id}
+            ).fetchone()
+            if row is None or self.batch_id is None:
+                return None
+            position, score, updated_at, leaf_hash = row
+            return {
+                "batch_id": self.batch_id,
+                "root": "0x" + self.tree.root.hex(),
+                "leaf_index": position,
+                "leaf_data": leaf_data(user_id, score, updated_at),
+                "leaf_hash": "0x" + leaf_hash,
+                "proof": self.tree.proof(position),
+            }
+
+
+def get_batch_by_root(db: Session, root_hex: str) -> Optional[int]:
+    row = db.execute(
+        text("SELECT id FROM attestation_batches WHERE root = :root ORDER BY id DESC LIMIT 1"),
+        {"root": root_hex.lower() if root_hex.startswith("0x") else "0x" + root_hex.lower()}
+    ).fetchone()
+    return row[0] if row else None
+
+
+# Instância global (uma árvore por processo)
+attestation_batcher = AttestationBatcher()
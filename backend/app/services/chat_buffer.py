@@ -0,0 +1,332 @@
+"""
+Buffer em memória das mensagens recentes por sala de chat
+
+Cada sala em uso guarda um anel (deque com maxlen) das últimas
+CHAT_BUFFER_SIZE mensagens ativas, como tuplas no layout de
+MESSAGE_ENCODER (MessageRow, sem __dict__ por mensagem). O anel é
+carregado no primeiro acesso e alimentado por create_message; as salas
+competem por um orçamento de memória (CHAT_BUFFER_MAX_BYTES) e as menos
+usadas são descartadas primeiro (LRU).
+
+Leituras recentes (offset + limit dentro do anel) não executam SQL. Para
+enxergar mensagens gravadas por outros workers, a cada
+CHAT_BUFFER_REVALIDATE_SECONDS a sala busca só as mensagens com id maior
+que a última do anel (uma consulta pelo índice, normalmente vazia), e o
+anel é recarregado por inteiro após CHAT_BUFFER_MAX_AGE_SECONDS (remoções
+feitas em outro worker). Histórico mais antigo continua vindo do banco.
+
+Commits concorrentes podem chegar ao buffer fora de ordem (id 11 antes do
+10). append insere na posição certa, e create_message reserva o id antes do
+commit: since() não entrega mensagens além de um id ainda em voo, para que
+long-poll e SSE não avancem o cursor por cima dele.
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from itertools import islice
+from typing import Callable, Dict, List, NamedTuple, Optional, Set
+
+from sqlalchemy import and_, desc, func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.chat import ChatMessage
+from app.models.user import User
+
+
+class MessageRow(NamedTuple):
+    """Mensagem no layout de MESSAGE_ENCODER (autor nas três últimas colunas)"""
+    id: int
+    user_id: int
+    room_id: int
+    content: str
+    is_filtered: bool
+    filter_reason: Optional[str]
+    is_active: bool
+    created_at: Optional[datetime]
+    author_id: int
+    author_nickname: str
+    author_level: int
+
+    @property
+    def user(self) -> dict:
+        return {"id": self.author_id, "nickname": self.author_nickname, "level": self.author_level}
+
+
+def message_rows_select():
+    """Select das mensagens ativas com o autor (LEFT JOIN, autor padrão se ausente)"""
+    return (
+        select(
+            ChatMessage.id, ChatMessage.user_id, ChatMessage.room_id, ChatMessage.content,
+            ChatMessage.is_filtered, ChatMessage.filter_reason, ChatMessage.is_active,
+            ChatMessage.created_at,
+            func.coalesce(User.id, ChatMessage.user_id),
+            func.coalesce(User.nickname, "Usuário"),
+            func.coalesce(User.level, 1),
+        )
+        .outerjoin(User, User.id == ChatMessage.user_id)
+        .where(ChatMessage.is_active == True)
+    )
+
+
+# Custo fixo aproximado de uma linha (tupla + datetime + ints), sem o texto
+_ROW_OVERHEAD = 200
+
+
+def _row_bytes(row: MessageRow) -> int:
+    return _ROW_OVERHEAD + sys.getsizeof(row.content) + (sys.getsizeof(row.filter_reason) if row.filter_reason else 0)
+
+
+class _Ring:
+    __slots__ = ("rows", "complete", "last_id", "nbytes", "checked_at", "loaded_at")
+
+    def __init__(self, size: int, now: float):
+        self.rows: deque = deque(maxlen=size)
+        # True quando o anel contém todas as mensagens ativas da sala
+        self.complete = False
+        self.last_id = 0
+        self.nbytes = 0
+        self.checked_at = now
+        self.loaded_at = now
+
+
+class ChatMessageBuffer:
+    """Anéis de mensagens recentes por sala, com LRU sob orçamento de memória"""
+
+    def __init__(self, size: int = 200, max_bytes: int = 8 * 1024 * 1024,
+                 revalidate_seconds: float = 1.0, max_age_seconds: float = 60.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.size = size
+        self.max_bytes = max_bytes
+        self.revalidate_seconds = revalidate_seconds
+        self.max_age_seconds = max_age_seconds
+        self.clock = clock
+        self._rings: "OrderedDict[int, _Ring]" = OrderedDict()
+        self._nbytes = 0
+        # Ids já gravados (ou em commit) que ainda não entraram no buffer, por sala
+        self._in_flight: Dict[int, Set[int]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def is_cached(self, room_id: int) -> bool:
+        """A sala tem um anel válido (existe e está ativa)?"""
+        ring = self._rings.get(room_id)
+        return ring is not None and self.clock() - ring.loaded_at < self.max_age_seconds
+
+    def recent(self, db: Session, room_id: int, limit: int, offset: int = 0) -> Optional[List[MessageRow]]:
+        """
+        Mensagens mais recentes primeiro, ou None se a página sai do anel
+        (o chamador lê do banco)
+        """
+        if offset + limit > self.size:
+            self.misses += 1
+            return None
+
+        ring = self._current(db, room_id)
+        with self._lock:
+            if room_id in self._rings:
+                self._rings.move_to_end(room_id)
+            if offset + limit > len(ring.rows) and not ring.complete:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return list(islice(reversed(ring.rows), offset, offset + limit))
+
+    def since(self, db: Session, room_id: int, since_id: int, limit: int) -> Optional[List[MessageRow]]:
+        """
+        Até `limit` mensagens com id > since_id, mais antigas primeiro, ou
+        None se o anel não alcança since_id (o chamador lê do banco, até
+        in_flight(room_id))
+        """
+        if self.size <= 0:
+            self.misses += 1
+            return None
+
+        ring = self._current(db, room_id)
+        with self._lock:
+            if room_id in self._rings:
+                self._rings.move_to_end(room_id)
+            rows = ring.rows
+            if not ring.complete and rows and rows[0].id > since_id:
+                self.misses += 1
+                return None
+            self.hits += 1
+            pending = self._in_flight.get(room_id)
+            floor = min(pending) if pending else None
+            newer = []
+            for row in reversed(rows):
+                if row.id <= since_id:
+                    break
+                if floor is None or row.id < floor:
+                    newer.append(row)
+            newer.reverse()
+            return newer[:limit]
+
+    def in_flight(self, room_id: int) -> Optional[int]:
+        """Menor id reservado da sala que ainda não entrou no buffer (None se nenhum)"""
+        with self._lock:
+            pending = self._in_flight.get(room_id)
+            return min(pending) if pending else None
+
+    def reserve(self, room_id: int, message_id: int):
+        """Id atribuído (flush) a uma mensagem que ainda vai ser commitada"""
+        with self._lock:
+            self._in_flight.setdefault(room_id, set()).add(message_id)
+
+    def release(self, room_id: int, message_id: int):
+        """
+        Fim da criação da mensagem. Se ela não passou por append (falha no
+        commit ou depois dele), o anel da sala é descartado.
+        """
+        with self._lock:
+            if not self._discard_in_flight(room_id, message_id):
+                return
+            ring = self._rings.pop(room_id, None)
+            if ring is not None:
+                self._nbytes -= ring.nbytes
+
+    def append(self, row: MessageRow):
+        """Mensagem recém-criada (após o commit); só entra em salas já carregadas"""
+        with self._lock:
+            self._discard_in_flight(row.room_id, row.id)
+            ring = self._rings.get(row.room_id)
+            if ring is None:
+                return
+            if row.id > ring.last_id:
+                self._push(ring, row)
+            else:
+                # Outro commit da sala terminou antes deste
+                self._insert(ring, row)
+            self._evict()
+
+    def invalidate(self, room_id: int):
+        """Descarta o anel da sala (ex.: mensagem removida)"""
+        with self._lock:
+            ring = self._rings.pop(room_id, None)
+            if ring is not None:
+                self._nbytes -= ring.nbytes
+
+    def clear(self):
+        with self._lock:
+            self._rings.clear()
+            self._in_flight.clear()
+            self._nbytes = 0
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "rooms": len(self._rings),
+            "messages": sum(len(r.rows) for r in self._rings.values()),
+            "bytes": self._nbytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def _current(self, db: Session, room_id: int) -> _Ring:
+        # Anel da sala, carregado ou revalidado se necessário
+        now = self.clock()
+        ring = self._rings.get(room_id)
+        if ring is None or now - ring.loaded_at >= self.max_age_seconds:
+            return self._load(db, room_id, now)
+        if now - ring.checked_at >= self.revalidate_seconds:
+            return self._fetch_newer(db, room_id, ring, now)
+        return ring
+
+    def _load(self, db: Session, room_id: int, now: float) -> _Ring:
+        rows = db.execute(
+            message_rows_select()
+            .where(ChatMessage.room_id == room_id)
+            .order_by(desc(ChatMessage.id))
+            .limit(self.size)
+        ).all()
+        ring = _Ring(self.size, now)
+        with self._lock:
+            for row in reversed(rows):
+                self._push(ring, MessageRow(*row))
+            ring.complete = len(rows) < self.size
+            old = self._rings.pop(room_id, None)
+            if old is not None:
+                self._nbytes -= old.nbytes
+            self._rings[room_id] = ring
+            self._nbytes += ring.nbytes
+            self._evict()
+        return ring
+
+    def _fetch_newer(self, db: Session, room_id: int, ring: _Ring, now: float) -> _Ring:
+        rows = db.execute(
+            message_rows_select()
+            .where(and_(ChatMessage.room_id == room_id, ChatMessage.id > ring.last_id))
+            .order_by(ChatMessage.id)
+            .limit(self.size)
+        ).all()
+        if len(rows) >= self.size:
+            # Mais mensagens novas do que cabem no anel: recarrega as últimas
+            return self._load(db, room_id, now)
+        with self._lock:
+            ring.checked_at = now
+            for row in rows:
+                if row[0] > ring.last_id:
+                    self._push(ring, MessageRow(*row))
+            self._evict()
+        return ring
+
+    def _push(self, ring: _Ring, row: MessageRow):
+        # Chamado com o lock; o anel pode ou não estar registrado em _rings
+        if len(ring.rows) == ring.rows.maxlen:
+            self._resize(ring, row.room_id, -_row_bytes(ring.rows[0]))
+            ring.complete = False
+        ring.rows.append(row)
+        ring.last_id = row.id
+        self._resize(ring, row.room_id, _row_bytes(row))
+
+    def _insert(self, ring: _Ring, row: MessageRow):
+        # Chamado com o lock; row.id <= ring.last_id (normalmente perto do fim)
+        rows = ring.rows
+        pos = len(rows)
+        while pos and rows[pos - 1].id > row.id:
+            pos -= 1
+        if pos and rows[pos - 1].id == row.id:
+            return
+        if len(rows) == rows.maxlen:
+            ring.complete = False
+            if pos == 0:
+                # Mais antiga que todo o anel cheio: fica só no banco
+                return
+            self._resize(ring, row.room_id, -_row_bytes(rows.popleft()))
+            pos -= 1
+        rows.insert(pos, row)
+        self._resize(ring, row.room_id, _row_bytes(row))
+
+    def _resize(self, ring: _Ring, room_id: int, delta: int):
+        ring.nbytes += delta
+        if self._rings.get(room_id) is ring:
+            self._nbytes += delta
+
+    def _discard_in_flight(self, room_id: int, message_id: int) -> bool:
+        # Chamado com o lock; True se o id estava reservado
+        pending = self._in_flight.get(room_id)
+        if not pending or message_id not in pending:
+            return False
+        pending.discard(message_id)
+        if not pending:
+            del self._in_flight[room_id]
+        return True
+
+    def _evict(self):
+        # Mantém ao menos a sala mais recente, mesmo acima do orçamento
+        while self._nbytes > self.max_bytes and len(self._rings) > 1:
+            _, ring = self._rings.popitem(last=False)
+            self._nbytes -= ring.nbytes
+
+
+# Instância global (um buffer por processo)
+chat_message_buffer = ChatMessageBuffer(
+    size=settings.CHAT_BUFFER_SIZE,
+    max_bytes=settings.CHAT_BUFFER_MAX_BYTES,
+    revalidate_seconds=settings.CHAT_BUFFER_REVALIDATE_SECONDS,
+    max_age_seconds=settings.CHAT_BUFFER_MAX_AGE_SECONDS,
+)
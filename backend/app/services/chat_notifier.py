@@ -0,0 +1,80 @@
+"""
+Notificação em processo de mensagens novas por sala de chat
+
+create_message chama notify() após o commit; os endpoints de long-poll e
+SSE aguardam em wait() (um Future por cliente, sem consultar o banco).
+Cliente ocioso custa só o Future pendente.
+
+A notificação é local ao worker: mensagens gravadas por outros workers
+chegam quando o cliente acorda por timeout/keepalive e relê o buffer da
+sala (que revalida contra o banco a cada CHAT_BUFFER_REVALIDATE_SECONDS).
+"""
+
+import asyncio
+import threading
+from typing import Dict, Set
+
+
+def _wake(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+
+class ChatNotifier:
+    """Último id conhecido por sala + clientes aguardando mensagens novas"""
+
+    def __init__(self):
+        self._last_ids: Dict[int, int] = {}
+        self._waiters: Dict[int, Set[asyncio.Future]] = {}
+        self._lock = threading.Lock()
+
+    def last_id(self, room_id: int) -> int:
+        """Maior id de mensagem notificado neste worker (0 se nenhum)"""
+        return self._last_ids.get(room_id, 0)
+
+    def notify(self, room_id: int, message_id: int):
+        """Acorda quem espera pela sala; seguro a partir de qualquer thread"""
+        with self._lock:
+            if message_id > self._last_ids.get(room_id, 0):
+                self._last_ids[room_id] = message_id
+            waiters = self._waiters.pop(room_id, ())
+        for future in waiters:
+            future.get_loop().call_soon_threadsafe(_wake, future)
+
+    async def wait(self, room_id: int, after_id: int, timeout: float) -> bool:
+        """
+        Aguarda uma mensagem com id > after_id na sala
+
+        Returns:
+            True se houve notificação, False no timeout
+        """
+        future = asyncio.get_running_loop().create_future()
+        with self._lock:
+            if self._last_ids.get(room_id, 0) > after_id:
+                return True
+            self._waiters.setdefault(room_id, set()).add(future)
+        try:
+            await asyncio.wait_for(future, timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._lock:
+                waiters = self._waiters.get(room_id)
+                if waiters is not None:
+                    waiters.discard(future)
+                    if not waiters:
+                        del self._waiters[room_id]
+
+    def waiting(self) -> int:
+        """Clientes aguardando (todas as salas)"""
+        return sum(len(waiters) for waiters in self._waiters.values())
+
+    def clear(self):
+        with self._lock:
+            self._last_ids.clear()
+            self._waiters.clear()
+
+
+# Instância global (um notificador por processo)
+chat_notifier = ChatNotifier()
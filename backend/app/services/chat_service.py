@@ -1,15 +1,29 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, desc
+from sqlalchemy import and_, desc, func, select, text
 from typing import List, Optional
 from datetime import datetime
 from ..models.chat import ChatRoom, ChatMessage
 from ..models.user import User
-from ..schemas.chat import ChatRoomCreate, ChatMessageCreate
+from ..schemas.chat import ChatRoomCreate, ChatMessageCreate, ChatMessageResponse
+from ..utils.fast_json import RowEncoder, iso
+from .chat_buffer import MessageRow, chat_message_buffer, message_rows_select
+from .chat_notifier import chat_notifier
+from . import chat_stats
 import re
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Layout das colunas de get_room_message_rows (caminho rápido de /chat/rooms/{id}/messages)
+MESSAGE_ENCODER = RowEncoder(
+    [
+        "id", "user_id", "room_id", "content", "is_filtered", "filter_reason", "is_active",
+        ("created_at", iso),
+        ("user", ("id", "nickname", "level")),
+    ],
+    model=ChatMessageResponse,
+)
+
 
 class ChatService:
     """Serviço para gerenciamento de chat"""
@@ -76,8 +90,25 @@ class ChatService:
             )
             
             self.db.add(db_message)
-            self.db.commit()
-            self.db.refresh(db_message)
+            self.db.flush()
+            # Leitores incrementais não passam deste id até ele entrar no buffer
+            chat_message_buffer.reserve(db_message.room_id, db_message.id)
+            try:
+                chat_stats.record_message(self.db, message_data.room_id, user_id)
+                self.db.commit()
+                self.db.refresh(db_message)
+                
+                # Autor normalmente já está na sessão (carregado pela autenticação)
+                author = self.db.get(User, user_id)
+                chat_message_buffer.append(MessageRow(
+                    db_message.id, db_message.user_id, db_message.room_id, db_message.content,
+                    db_message.is_filtered, db_message.filter_reason, db_message.is_active,
+                    db_message.created_at, user_id,
+                    author.nickname if author else "Usuário", author.level if author else 1,
+                ))
+            finally:
+                chat_message_buffer.release(message_data.room_id, db_message.id)
+            chat_notifier.notify(db_message.room_id, db_message.id)
             
             logger.info(f"Mensagem criada na sala {message_data.room_id} por usuário {user_id}")
             return db_message
@@ -87,17 +118,41 @@ class ChatService:
             self.db.rollback()
             return None
     
-    def get_room_messages(self, room_id: int, limit: int = 50, offset: int = 0) -> List[ChatMessage]:
-        """Obtém mensagens de uma sala"""
-        return self.db.query(ChatMessage).filter(
-            and_(ChatMessage.room_id == room_id, ChatMessage.is_active == True)
-        ).order_by(desc(ChatMessage.created_at)).offset(offset).limit(limit).all()
+    def get_room_messages(self, room_id: int, limit: int = 50, offset: int = 0) -> List[MessageRow]:
+        """Obtém mensagens de uma sala (mais recentes primeiro; autor em .user)"""
+        return self.get_room_message_rows(room_id, limit, offset)
+    
+    def get_room_message_rows(self, room_id: int, limit: int = 50, offset: int = 0) -> List[tuple]:
+        """
+        Mensagens da sala como tuplas (layout de MESSAGE_ENCODER), autor no mesmo select
+
+        Páginas recentes vêm do buffer em memória da sala; o resto, do banco.
+        """
+        rows = chat_message_buffer.recent(self.db, room_id, limit, offset)
+        if rows is not None:
+            return rows
+        return self.db.execute(
+            message_rows_select()
+            .where(ChatMessage.room_id == room_id)
+            .order_by(desc(ChatMessage.created_at), desc(ChatMessage.id))
+            .offset(offset)
+            .limit(limit)
+        ).all()
+    
+    def get_messages_since(self, room_id: int, since_id: int, limit: int = 100) -> List[tuple]:
+        """Mensagens com id > since_id, mais antigas primeiro (long-poll / SSE)"""
+        rows = chat_message_buffer.since(self.db, room_id, since_id, limit)
+        if rows is not None:
+            return rows
+        query = message_rows_select().where(and_(ChatMessage.room_id == room_id, ChatMessage.id > since_id))
+        in_flight = chat_message_buffer.in_flight(room_id)
+        if in_flight is not None:
+            query = query.where(ChatMessage.id < in_flight)
+        return self.db.execute(query.order_by(ChatMessage.id).limit(limit)).all()
     
-    def get_recent_messages(self, room_id: int, limit: int = 20) -> List[ChatMessage]:
+    def get_recent_messages(self, room_id: int, limit: int = 20) -> List[MessageRow]:
         """Obtém mensagens recentes de uma sala"""
-        return self.db.query(ChatMessage).filter(
-            and_(ChatMessage.room_id == room_id, ChatMessage.is_active == True)
-        ).order_by(desc(ChatMessage.created_at)).limit(limit).all()
+        return self.get_room_message_rows(room_id, limit)
     
     def delete_message(self, message_id: int, user_id: int) -> bool:
         """Deleta uma mensagem (soft delete)"""
@@ -109,8 +164,11 @@ class ChatService:
             if not message:
                 return False
             
+            if message.is_active:
+                chat_stats.record_deletion(self.db, message.room_id)
             message.is_active = False
             self.db.commit()
+            chat_message_buffer.invalidate(message.room_id)
             
             return True
             
@@ -139,29 +197,33 @@ class ChatService:
         ).order_by(desc(ChatMessage.created_at)).limit(limit).all()
     
     def get_room_stats(self, room_id: int) -> dict:
-        """Obtém estatísticas de uma sala"""
+        """Obtém estatísticas de uma sala (contadores incrementais, sem varrer mensagens)"""
         room = self.get_room_by_id(room_id)
         if not room:
             return {}
         
-        message_count = self.db.query(ChatMessage).filter(
-            and_(ChatMessage.room_id == room_id, ChatMessage.is_active == True)
-        ).count()
-        
-        # Usuários únicos que enviaram mensagens
-        unique_users = self.db.query(ChatMessage.user_id).filter(
-            and_(ChatMessage.room_id == room_id, ChatMessage.is_active == True)
-        ).distinct().count()
+        counters = chat_stats.get_room_counters(self.db, room_id)
         
         return {
             "room_id": room_id,
             "room_name": room.name,
-            "message_count": message_count,
-            "unique_users": unique_users,
+            "message_count": counters["message_count"],
+            "unique_users": counters["unique_users"],  # estimativa HyperLogLog
             "is_private": room.is_private,
             "created_at": room.created_at
         }
     
+    def get_platform_stats(self) -> dict:
+        """Totais de todas as salas (união dos sketches para autores distintos)"""
+        rooms, messages = self.db.execute(text(
+            "SELECT COUNT(*), COALESCE(SUM(message_count), 0) FROM chat_room_stats"
+        )).one()
+        return {
+            "rooms": rooms,
+            "message_count": messages,
+            "unique_chatters": chat_stats.platform_unique_chatters(self.db),
+        }
+    
     def _filter_message(self, content: str) -> tuple[str, bool, Optional[str]]:
         """Filtra mensagem por conteúdo ofensivo"""
         content_lower = content.lower()
@@ -203,20 +265,16 @@ class ChatService:
     
     def get_room_members(self, room_id: int) -> List[dict]:
         """Obtém membros de uma sala (usuários que enviaram mensagens)"""
-        members = self.db.query(User).join(ChatMessage).filter(
-            and_(ChatMessage.room_id == room_id, ChatMessage.is_active == True)
-        ).distinct().all()
+        members = self.db.execute(
+            select(User.id, User.nickname, User.level, func.max(ChatMessage.created_at))
+            .join(ChatMessage, ChatMessage.user_id == User.id)
+            .where(and_(ChatMessage.room_id == room_id, ChatMessage.is_active == True))
+            .group_by(User.id, User.nickname, User.level)
+        ).all()
         
         return [
-            {
-                "id": member.id,
-                "nickname": member.nickname,
-                "level": member.level,
-                "last_message": self.db.query(ChatMessage).filter(
-                    and_(ChatMessage.room_id == room_id, ChatMessage.user_id == member.id)
-                ).order_by(desc(ChatMessage.created_at)).first().created_at
-            }
-            for member in members
+            {"id": member_id, "nickname": nickname, "level": level, "last_message": last_message}
+            for member_id, nickname, level, last_message in members
         ]
     
     def create_default_rooms(self):
@@ -0,0 +1,158 @@
+"""
+Estatísticas de salas de chat mantidas incrementalmente
+
+chat_room_stats guarda, por sala, o total de mensagens ativas e um
+HyperLogLog dos autores. create_message e delete_message atualizam a
+linha na mesma transação da mensagem, e a leitura das estatísticas é uma
+busca pela chave primária (sem COUNT sobre chat_messages).
+
+O sketch só cresce: autores cujas mensagens foram todas removidas
+continuam contados até a próxima recontagem exata (recount_room_stats),
+que reconstrói contadores e sketches a partir das mensagens ativas e
+registra a divergência encontrada.
+
+Salas preenchidas pela migração 010 começam sem sketch (hll NULL): ele é
+montado a partir das mensagens ativas da sala no primeiro uso.
+"""
+
+import logging
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.utils.hyperloglog import HyperLogLog
+
+logger = logging.getLogger(__name__)
+
+
+def _sketch_from_messages(db, room_id: int) -> HyperLogLog:
+    """Sketch dos autores das mensagens ativas da sala (sala sem hll)"""
+    return HyperLogLog.of(
+        row[0] for row in db.execute(
+            text("SELECT DISTINCT user_id FROM chat_messages WHERE room_id = :room_id AND is_active = 1"),
+            {"room_id": room_id}
+        )
+    )
+
+
+def record_message(db: Session, room_id: int, user_id: int):
+    """Conta uma nova mensagem na transação do chamador (não faz commit)"""
+    blob, message_count = db.execute(
+        text("""
+            INSERT INTO chat_room_stats (room_id, message_count, unique_estimate)
+            VALUES (:room_id, 1, 0)
+            ON CONFLICT(room_id) DO UPDATE SET message_count = message_count + 1
+            RETURNING hll, message_count
+        """),
+        {"room_id": room_id}
+    ).one()
+    # A linha já está travada para escrita: ler-modificar-gravar é seguro
+    if blob is None and message_count > 1:
+        # Sala da migração 010: o sketch ainda não existe
+        sketch = _sketch_from_messages(db, room_id)
+        sketch.add(user_id)
+        changed = True
+    else:
+        sketch = HyperLogLog.from_bytes(blob)
+        changed = sketch.add(user_id)
+    if changed:
+        db.execute(
+            text("UPDATE chat_room_stats SET hll = :hll, unique_estimate = :estimate WHERE room_id = :room_id"),
+            {"hll": sketch.to_bytes(), "estimate": sketch.count(), "room_id": room_id}
+        )
+
+
+def record_deletion(db: Session, room_id: int):
+    """Desconta uma mensagem removida (soft delete) na transação do chamador"""
+    db.execute(
+        text("UPDATE chat_room_stats SET message_count = MAX(message_count - 1, 0) WHERE room_id = :room_id"),
+        {"room_id": room_id}
+    )
+
+
+def get_room_counters(db: Session, room_id: int) -> Dict[str, int]:
+    """Total de mensagens ativas e estimativa de autores distintos da sala"""
+    row = db.execute(
+        text("SELECT message_count, unique_estimate FROM chat_room_stats WHERE room_id = :room_id"),
+        {"room_id": room_id}
+    ).first()
+    if row is None:
+        return {"message_count": 0, "unique_users": 0}
+    return {"message_count": row[0], "unique_users": row[1]}
+
+
+def platform_unique_chatters(db: Session, room_ids: Optional[List[int]] = None) -> int:
+    """Autores distintos em todas as salas (ou nas informadas), pela união dos sketches"""
+    sql = "SELECT room_id, hll FROM chat_room_stats WHERE (hll IS NOT NULL OR message_count > 0)"
+    params = {}
+    if room_ids is not None:
+        if not room_ids:
+            return 0
+        sql += " AND room_id IN (" + ", ".join(f":r{i}" for i in range(len(room_ids))) + ")"
+        params = {f"r{i}": room_id for i, room_id in enumerate(room_ids)}
+    union = HyperLogLog()
+    for room_id, blob in db.execute(text(sql), params).all():
+        union.merge(HyperLogLog.from_bytes(blob) if blob is not None else _sketch_from_messages(db, room_id))
+    return union.count()
+
+
+def rebuild_room_stats(db) -> List[Dict[str, int]]:
+    """
+    Recalcula contadores e sketches de todas as salas a partir das
+    mensagens ativas, na transação do chamador (Session ou Connection)
+
+    Returns:
+        Salas cujo contador ou estimativa divergiam do valor exato
+    """
+    previous = {
+        row[0]: (row[1], row[2])
+        for row in db.execute(text("SELECT room_id, message_count, unique_estimate FROM chat_room_stats"))
+    }
+    # O primeiro statement de escrita trava o banco: as leituras seguintes
+    # não perdem mensagens gravadas durante a recontagem
+    db.execute(text("""
+        INSERT INTO chat_room_stats (room_id, message_count, unique_estimate, unique_exact, audited_at)
+        SELECT r.id, COUNT(m.id), 0, COUNT(DISTINCT m.user_id), CURRENT_TIMESTAMP
+        FROM chat_rooms r LEFT JOIN chat_messages m ON m.room_id = r.id AND m.is_active = 1
+        GROUP BY r.id
+        ON CONFLICT(room_id) DO UPDATE SET
+            message_count = excluded.message_count,
+            unique_exact = excluded.unique_exact,
+            audited_at = excluded.audited_at
+    """))
+
+    sketches: Dict[int, HyperLogLog] = {}
+    for room_id, user_id in db.execute(text(
+        "SELECT DISTINCT room_id, user_id FROM chat_messages WHERE is_active = 1"
+    )):
+        sketches.setdefault(room_id, HyperLogLog()).add(user_id)
+
+    drift = []
+    for room_id, message_count, unique_exact in db.execute(text(
+        "SELECT room_id, message_count, unique_exact FROM chat_room_stats"
+    )).all():
+        sketch = sketches.get(room_id)
+        estimate = sketch.count() if sketch else 0
+        db.execute(
+            text("UPDATE chat_room_stats SET hll = :hll, unique_estimate = :estimate WHERE room_id = :room_id"),
+            {"hll": sketch.to_bytes() if sketch else None, "estimate": estimate, "room_id": room_id}
+        )
+        old_count, old_estimate = previous.get(room_id, (0, 0))
+        if old_count != message_count or old_estimate != estimate:
+            drift.append({
+                "room_id": room_id,
+                "message_count": message_count, "previous_count": old_count,
+                "unique_exact": unique_exact, "unique_estimate": estimate, "previous_estimate": old_estimate,
+            })
+    return drift
+
+
+def recount_room_stats(db: Session) -> List[Dict[str, int]]:
+    """Recontagem exata periódica (auditoria); faz commit e registra divergências"""
+    drift = rebuild_room_stats(db)
+    db.commit()
+    if drift:
+        logger.warning(f"Recontagem de salas de chat: {len(drift)} sala(s) divergente(s): "
+                       f"{[d['room_id'] for d in drift[:20]]}")
+    return drift
@@ -0,0 +1,90 @@
+"""
+Índice unificado de conclusões de missões
+
+Os três sistemas de missões gravam aqui cada conclusão, com chave
+(user_id, mission_key, day):
+
+- legado (missions / mission_completions): legacy:<mission_id>
+- missões diárias v2 (user_mission_progress): v2:<code>, gravado por
+  trigger na mesma transação do INSERT do progresso
+- tempo real (mission_attempts aprovadas): rt:<slug>
+
+"Já concluída hoje?" vira uma única consulta pela chave primária, e a
+variante em lote responde para N missões de uma vez (listas).
+"""
+
+from typing import Iterable, Optional, Set
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.services.user_stats import invalidate_user_stats
+
+
+def legacy_mission_key(mission_id: int) -> str:
+    return f"legacy:{mission_id}"
+
+
+def v2_mission_key(code: str) -> str:
+    return f"v2:{code.upper()}"
+
+
+def realtime_mission_key(slug: str) -> str:
+    return f"rt:{slug}"
+
+
+def _today() -> str:
+    from app.services.missions_v2_service import today_str_tz
+    return today_str_tz()
+
+
+def mark_completed(db: Session, user_id: int, mission_key: str, source: str,
+                   day: Optional[str] = None) -> bool:
+    """
+    Registra a conclusão na transação do chamador (não faz commit).
+
+    Returns:
+        True se a linha foi criada, False se já existia
+    """
+    result = db.execute(
+        text("""
+            INSERT INTO mission_completion_index (user_id, mission_key, day, source)
+            VALUES (:user_id, :mission_key, :day, :source)
+            ON CONFLICT(user_id, mission_key, day) DO NOTHING
+        """),
+        {"user_id": user_id, "mission_key": mission_key, "day": day or _today(), "source": source}
+    )
+    if result.rowcount == 1:
+        invalidate_user_stats(db, user_id)
+    return result.rowcount == 1
+
+
+def is_completed(db: Session, user_id: int, mission_key: str, day: Optional[str] = None) -> bool:
+    """A missão foi concluída pelo usuário no dia (default: hoje)?"""
+    row = db.execute(
+        text("""
+            SELECT 1 FROM mission_completion_index
+            WHERE user_id = :user_id AND mission_key = :mission_key AND day = :day
+        """),
+        {"user_id": user_id, "mission_key": mission_key, "day": day or _today()}
+    ).fetchone()
+    return row is not None
+
+
+def completed_keys(db: Session, user_id: int, mission_keys: Iterable[str],
+                   day: Optional[str] = None) -> Set[str]:
+    """Quais destas missões o usuário concluiu no dia (default: hoje)"""
+    keys = list(dict.fromkeys(mission_keys))
+    if not keys:
+        return set()
+    params = {f"k{i}": key for i, key in enumerate(keys)}
+    placeholders = ", ".join(f":{name}" for name in params)
+    params.update({"user_id": user_id, "day": day or _today()})
+    rows = db.execute(
+        text(f"""
+            SELECT mission_key FROM mission_completion_index
+            WHERE user_id = :user_id AND day = :day AND mission_key IN ({placeholders})
+        """),
+        params
+    ).fetchall()
+    return {row[0] for row in rows}
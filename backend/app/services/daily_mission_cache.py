@@ -0,0 +1,215 @@
+"""
+Cache em processo das missões diárias v2
+
+- Catálogo de missões ativas, recarregado quando daily_missions muda (versão
+  do http_cache) ou após o TTL.
+- Por usuário e por dia, um bitmap de missões concluídas (bit = mission_id),
+  atualizado pelas conclusões feitas neste processo.
+
+Um job pré-aquece o dia seguinte pouco antes da meia-noite
+(America/Sao_Paulo): catálogo recarregado e estado do novo dia criado vazio.
+Até TTL segundos após a virada, usuário sem entrada conta como "nenhuma
+missão concluída" sem consultar o banco (o dia acabou de começar), então a
+onda de requisições da meia-noite não chega ao banco. Entradas de usuários
+expiram após o TTL, o que limita a defasagem em relação a conclusões feitas
+por outros workers.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.utils.http_cache import version_registry
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CachedMission:
+    id: int
+    code: str
+    title: str
+    description: str
+    xp_reward: int
+    token_reward: int
+    icon: Optional[str]
+
+    @property
+    def bit(self) -> int:
+        return 1 << self.id
+
+
+@dataclass
+class _DayState:
+    day: str
+    # user_id -> (bitmap de missões concluídas, instante da carga)
+    bitmaps: Dict[int, Tuple[int, float]] = field(default_factory=dict)
+    # Antes deste instante, usuário ausente = nenhuma missão concluída no dia
+    empty_until: float = 0.0
+
+
+class DailyMissionCache:
+    """Catálogo + bitmaps de conclusão do dia corrente"""
+
+    def __init__(self, ttl_seconds: float = 60.0, clock: Callable[[], float] = time.monotonic,
+                 today: Optional[Callable[[], str]] = None):
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._today = today
+        self._catalog: Optional[List[CachedMission]] = None
+        self._catalog_loaded_at = 0.0
+        self._catalog_version = -1
+        self._state: Optional[_DayState] = None
+        self._next: Optional[_DayState] = None
+        self._lock = threading.Lock()
+        self.db_loads = 0
+
+    def today(self) -> str:
+        if self._today is not None:
+            return self._today()
+        from app.services.missions_v2_service import today_str_tz
+        return today_str_tz()
+
+    # Catálogo
+
+    def catalog(self, db: Session) -> List[CachedMission]:
+        """Missões ativas (em cache)"""
+        catalog = self._catalog
+        if (catalog is None
+                or self._catalog_version != version_registry.get("daily_missions")
+                or self.clock() - self._catalog_loaded_at >= self.ttl_seconds):
+            catalog = self._load_catalog(db)
+        return catalog
+
+    def _load_catalog(self, db: Session) -> List[CachedMission]:
+        version = version_registry.get("daily_missions")
+        rows = db.execute(text("""
+            SELECT id, code, title, description, xp_reward, token_reward, icon
+            FROM daily_missions WHERE is_active = 1 ORDER BY id
+        """)).fetchall()
+        catalog = [CachedMission(*row) for row in rows]
+        with self._lock:
+            self._catalog = catalog
+            self._catalog_loaded_at = self.clock()
+            self._catalog_version = version
+        return catalog
+
+    # Estado por dia
+
+    def _day_state(self, day: str) -> Optional[_DayState]:
+        """Estado do dia corrente (faz a virada se preciso); None para outros dias"""
+        state = self._state
+        if state is not None and state.day == day:
+            return state
+        if day != self.today():
+            return None
+        with self._lock:
+            if self._state is None or self._state.day != day:
+                if self._next is not None and self._next.day == day:
+                    self._state = self._next
+                else:
+                    self._state = _DayState(day=day)
+                self._next = None
+                logger.info(f"[MISSIONS_V2] cache: virada para {day}")
+            return self._state
+
+    def completed_bits(self, db: Session, user_id: int, day: str) -> int:
+        """Bitmap de missões concluídas pelo usuário no dia"""
+        state = self._day_state(day)
+        if state is None:
+            return self._load_bits(db, user_id, day)
+
+        now = self.clock()
+        entry = state.bitmaps.get(user_id)
+        if entry is not None and now - entry[1] < self.ttl_seconds:
+            return entry[0]
+        if entry is None and now < state.empty_until:
+            return 0
+
+        bits = self._load_bits(db, user_id, day)
+        with self._lock:
+            # Conclusões só se acumulam no dia: soma as marcadas durante a carga
+            entry = state.bitmaps.get(user_id)
+            if entry is not None:
+                bits |= entry[0]
+            state.bitmaps[user_id] = (bits, now)
+        return bits
+
+    def _load_bits(self, db: Session, user_id: int, day: str) -> int:
+        self.db_loads += 1
+        bits = 0
+        rows = db.execute(
+            text("""
+                SELECT mission_id FROM user_mission_progress
+                WHERE user_id = :user_id AND date = :date AND status = 'completed'
+            """),
+            {"user_id": user_id, "date": day}
+        ).fetchall()
+        for (mission_id,) in rows:
+            bits |= 1 << mission_id
+        return bits
+
+    def mark_completed(self, user_id: int, day: str, mission_id: int):
+        """Registra uma conclusão (chamado após o commit)"""
+        state = self._day_state(day)
+        if state is None:
+            return
+        now = self.clock()
+        with self._lock:
+            entry = state.bitmaps.get(user_id)
+            if entry is not None:
+                state.bitmaps[user_id] = (entry[0] | (1 << mission_id), entry[1])
+            elif now < state.empty_until:
+                state.bitmaps[user_id] = (1 << mission_id, now)
+            else:
+                # Entrada já expirada: a próxima leitura carrega do banco e mantém
+                # este bit (mesmo que a carga tenha começado antes do commit)
+                state.bitmaps[user_id] = (1 << mission_id, float("-inf"))
+
+    def prewarm(self, db: Session, next_day: str, seconds_until_start: float):
+        """Prepara o dia seguinte: catálogo recarregado e estado vazio"""
+        self._load_catalog(db)
+        start = self.clock() + max(seconds_until_start, 0.0)
+        with self._lock:
+            self._next = _DayState(day=next_day, empty_until=start + self.ttl_seconds)
+        logger.info(f"[MISSIONS_V2] cache: pré-aquecido {next_day} (virada em {seconds_until_start:.0f}s)")
+
+    def clear(self):
+        with self._lock:
+            self._catalog = None
+            self._catalog_version = -1
+            self._state = None
+            self._next = None
+            self.db_loads = 0
+
+    def stats(self) -> Dict[str, object]:
+        state = self._state
+        return {
+            "day": state.day if state else None,
+            "users": len(state.bitmaps) if state else 0,
+            "catalog": len(self._catalog or []),
+            "next_day": self._next.day if self._next else None,
+            "db_loads": self.db_loads,
+        }
+
+
+def prewarm_if_near_midnight(db: Session, cache: "DailyMissionCache", lead_seconds: float) -> bool:
+    """Pré-aquece o dia seguinte se faltar menos de `lead_seconds` para a virada"""
+    from app.services.missions_v2_service import next_day_str_tz, seconds_until_midnight_tz
+
+    remaining = seconds_until_midnight_tz()
+    next_day = next_day_str_tz()
+    if remaining > lead_seconds or (cache._next is not None and cache._next.day == next_day):
+        return False
+    cache.prewarm(db, next_day, remaining)
+    return True
+
+
+# Instância global (um cache por processo)
+daily_mission_cache = DailyMissionCache(ttl_seconds=settings.DAILY_MISSIONS_CACHE_TTL_SECONDS)
@@ -0,0 +1,173 @@
+"""
+Serviço de Impact Score com decaimento temporal
+
+Calcula, em uma única passada sobre impact_events, o score de cada usuário
+com decaimento exponencial (meia-vida configurável). Os eventos são lidos em
+blocos para arrays NumPy e agregados por usuário com np.bincount; o resultado
+é gravado em lote na coluna impact_scores.decayed_score.
+"""
+
+import logging
+import math
+import time
+from functools import lru_cache
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.services.impact_service import backfill_missing_scores
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 500_000
+
+
+@lru_cache(maxsize=1)
+def _numpy():
+    """numpy importado no primeiro job (não pesa no import do app); None se ausente"""
+    try:
+        import numpy
+    except ImportError:  # pragma: no cover - dependência opcional
+        return None
+    return numpy
+
+
+def _decay_rate(half_life_days: float) -> float:
+    """Constante de decaimento por segundo para a meia-vida dada"""
+    return math.log(2) / (half_life_days * 86400.0)
+
+
+def compute_decayed_scores(
+    engine: Engine,
+    now: Optional[datetime] = None,
+    half_life_days: Optional[float] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Tuple["np.ndarray", "np.ndarray"]:
+    """
+    Calcula scores decaídos de todos os usuários
+
+    Args:
+        engine: Engine do banco de dados
+        now: Instante de referência (UTC); padrão agora
+        half_life_days: Meia-vida em dias; padrão settings.IMPACT_DECAY_HALF_LIFE_DAYS
+        chunk_size: Quantidade de eventos lidos por bloco
+
+    Returns:
+        (user_ids, scores) apenas para usuários com eventos
+    """
+    np = _numpy()
+    if np is None:
+        raise RuntimeError("numpy não instalado: pip install numpy")
+    event_dtype = np.dtype([("user_id", np.int64), ("weight", np.float64), ("jd", np.float64)])
+
+    half_life = half_life_days or settings.IMPACT_DECAY_HALF_LIFE_DAYS
+    rate = _decay_rate(half_life)
+    now = now or datetime.now(timezone.utc)
+    # julianday() é mais barato que strftime('%s') no SQLite
+    now_jd = now.timestamp() / 86400.0 + 2440587.5
+
+    totals = np.zeros(0, dtype=np.float64)
+    seen = np.zeros(0, dtype=bool)
+
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        cursor.execute(
+            "SELECT user_id, weight, julianday(timestamp) FROM impact_events"
+        )
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            chunk = np.fromiter(rows, dtype=event_dtype, count=len(rows))
+            user_ids = chunk["user_id"]
+            age = np.maximum((now_jd - chunk["jd"]) * 86400.0, 0.0)
+            contrib = chunk["weight"] * np.exp(-rate * age)
+
+            size = int(user_ids.max()) + 1
+            if size > totals.shape[0]:
+                totals = np.pad(totals, (0, size - totals.shape[0]))
+                seen = np.pad(seen, (0, size - seen.shape[0]))
+            totals[:size] += np.bincount(user_ids, weights=contrib, minlength=size)
+            seen[user_ids] = True
+        cursor.close()
+    finally:
+        raw.close()
+
+    user_ids = np.flatnonzero(seen)
+    return user_ids, totals[user_ids]
+
+
+def write_decayed_scores(db: Session, user_ids: "np.ndarray", scores: "np.ndarray") -> int:
+    """
+    Grava os scores decaídos em lote (zera usuários sem eventos)
+
+    Usuários com eventos mas sem linha em impact_scores recebem antes o
+    agregado completo, para não quebrar os deltas incrementais.
+
+    Returns:
+        Quantidade de usuários gravados
+    """
+    backfill_missing_scores(db)
+
+    db.execute(text("UPDATE impact_scores SET decayed_score = 0 WHERE decayed_score != 0"))
+    params = [
+        {"user_id": int(uid), "decayed": float(score)}
+        for uid, score in zip(user_ids.tolist(), scores.tolist())
+    ]
+    if params:
+        db.execute(
+            text("UPDATE impact_scores SET decayed_score = :decayed WHERE user_id = :user_id"),
+            params
+        )
+    db.commit()
+    return len(params)
+
+
+def run_decay_job(db: Session, now: Optional[datetime] = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, float]:
+    """
+    Job agendado: recalcula e grava os scores decaídos de todos os usuários
+
+    Returns:
+        Estatísticas da execução
+    """
+    start = time.perf_counter()
+    user_ids, scores = compute_decayed_scores(db.get_bind(), now=now, chunk_size=chunk_size)
+    computed = time.perf_counter()
+    written = write_decayed_scores(db, user_ids, scores)
+    elapsed = time.perf_counter() - start
+
+    logger.info(
+        f"impact.decay users={written} compute={computed - start:.2f}s total={elapsed:.2f}s"
+    )
+    return {"users": written, "compute_seconds": computed - start, "total_seconds": elapsed}
+
+
+def get_decayed_leaderboard(db: Session, limit: int = 20, offset: int = 0) -> List[dict]:
+    """Ranking de usuários por score decaído (usa o resultado do último job)"""
+    rows = db.execute(
+        text("""
+            SELECT s.user_id, u.nickname, s.decayed_score, s.score
+            FROM impact_scores s
+            LEFT JOIN users u ON u.id = s.user_id
+            WHERE s.decayed_score > 0
+            ORDER BY s.decayed_score DESC, s.user_id ASC
+            LIMIT :limit OFFSET :offset
+        """),
+        {"limit": limit, "offset": offset}
+    ).fetchall()
+
+    return [
+        {
+            "position": offset + i + 1,
+            "user_id": row[0],
+            "nickname": row[1],
+            "decayed_score": row[2],
+            "score": row[3],
+        }
+        for i, row in enumerate(rows)
+    ]
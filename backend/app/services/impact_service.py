@@ -5,21 +5,24 @@ Implementa CRUD e lógica de recálculo de scores
 
 import json
 import logging
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional, Dict, Any, List, Tuple
 from datetime import datetime
 
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
+from sqlalchemy import func, and_, select, text
 
 from app.models.impact import ImpactEvent, ImpactScore
 from app.schemas.impact import ImpactEventIn, ImpactEventOut
+from app.utils.fast_json import RowEncoder
 
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=1)
 def load_weights() -> Dict[str, float]:
-    """Carrega pesos padrão de impacto"""
+    """Carrega pesos padrão de impacto (lido uma vez, no primeiro uso)"""
     weights_path = Path(__file__).parent.parent / "configs" / "impact_weights.json"
     
     default_weights = {
@@ -39,13 +42,9 @@ def load_weights() -> Dict[str, float]:
     return default_weights
 
 
-# Cache de pesos
-_EVENT_WEIGHTS = load_weights()
-
-
 def get_event_weight(event_type: str) -> float:
     """Obtém peso padrão para um tipo de evento"""
-    return _EVENT_WEIGHTS.get(event_type, 1.0)
+    return load_weights().get(event_type, 1.0)
 
 
 def validate_event_type(event_type: str) -> bool:
@@ -87,6 +86,11 @@ def create_impact_event(
     )
     
     db.add(event)
+    db.flush()
+    
+    # Aplicar delta no score na mesma transação do insert do evento
+    apply_impact_delta(db, user_id, event_in.type, weight)
+    
     db.commit()
     db.refresh(event)
     
@@ -95,9 +99,92 @@ def create_impact_event(
     return event
 
 
+def apply_impact_delta(db: Session, user_id: int, event_type: str, weight: float) -> None:
+    """
+    Aplica o delta de um evento ao ImpactScore de forma atômica (sem commit)
+    
+    O incremento de score e do contador do breakdown é feito em um único
+    UPDATE, então eventos concorrentes não perdem atualizações. Se o usuário
+    ainda não tem linha em impact_scores, ela é criada a partir do agregado
+    completo (apenas na primeira vez).
+    
+    Args:
+        db: Sessão do banco de dados
+        user_id: ID do usuário
+        event_type: Tipo do evento
+        weight: Peso do evento
+    """
+    path = f'$."{event_type}"'
+    result = db.execute(
+        text("""
+            UPDATE impact_scores
+            SET score = score + :weight,
+                breakdown = json_set(
+                    COALESCE(breakdown, '{}'),
+                    :path,
+                    COALESCE(json_extract(breakdown, :path), 0) + 1
+                ),
+                updated_at = CURRENT_TIMESTAMP
+            WHERE user_id = :user_id
+        """),
+        {"weight": weight, "path": path, "user_id": user_id}
+    )
+    
+    if result.rowcount == 0:
+        _upsert_full_aggregate(db, user_id)
+
+
+def _upsert_full_aggregate(db: Session, user_id: int) -> None:
+    """Grava em impact_scores o agregado completo dos eventos do usuário (sem commit)"""
+    db.execute(
+        text("""
+            INSERT INTO impact_scores (user_id, score, breakdown, updated_at)
+            SELECT
+                :user_id,
+                COALESCE((SELECT SUM(weight) FROM impact_events WHERE user_id = :user_id), 0),
+                COALESCE(
+                    (SELECT json_group_object(type, cnt) FROM (
+                        SELECT type, COUNT(*) AS cnt
+                        FROM impact_events
+                        WHERE user_id = :user_id
+                        GROUP BY type
+                    )),
+                    '{}'
+                ),
+                CURRENT_TIMESTAMP
+            WHERE 1
+            ON CONFLICT(user_id) DO UPDATE SET
+                score = excluded.score,
+                breakdown = excluded.breakdown,
+                updated_at = excluded.updated_at
+        """),
+        {"user_id": user_id}
+    )
+
+
+def backfill_missing_scores(db: Session) -> None:
+    """Cria, em uma passada, impact_scores para usuários com eventos e sem linha (sem commit)"""
+    db.execute(
+        text("""
+            INSERT INTO impact_scores (user_id, score, breakdown, updated_at)
+            SELECT t.user_id, SUM(t.total), json_group_object(t.type, t.cnt), CURRENT_TIMESTAMP
+            FROM (
+                SELECT user_id, type, COUNT(*) AS cnt, SUM(weight) AS total
+                FROM impact_events
+                WHERE user_id NOT IN (SELECT user_id FROM impact_scores)
+                GROUP BY user_id, type
+            ) t
+            GROUP BY t.user_id
+        """)
+    )
+
+
 def recalc_impact_score(db: Session, user_id: int) -> ImpactScore:
     """
-    Recalcula e persiste o score de impacto de um usuário
+    Recalcula do zero e persiste o score de impacto de um usuário
+    
+    O caminho normal é incremental (apply_impact_delta); este recálculo
+    completo serve apenas para verificação e reparo.
     
     Args:
         db: Sessão do banco de dados
@@ -106,41 +193,71 @@ def recalc_impact_score(db: Session, user_id: int) -> ImpactScore:
     Returns:
         ImpactScore atualizado
     """
-    # Buscar todos os eventos do usuário
-    events = db.query(ImpactEvent).filter(ImpactEvent.user_id == user_id).all()
+    _upsert_full_aggregate(db, user_id)
+    db.commit()
+    
+    score_obj = db.query(ImpactScore).filter(ImpactScore.user_id == user_id).first()
     
-    # Calcular breakdown e score total
-    breakdown: Dict[str, int] = {}
-    total_score = 0.0
+    logger.info(f"impact.recalc user_id={user_id} score={score_obj.score:.2f}")
     
-    for event in events:
-        # Contar por tipo
-        breakdown[event.type] = breakdown.get(event.type, 0) + 1
+    return score_obj
+
+
+def verify_impact_score(db: Session, user_id: int) -> Dict[str, Any]:
+    """
+    Compara o score incremental armazenado com o agregado completo dos eventos
+    
+    Args:
+        db: Sessão do banco de dados
+        user_id: ID do usuário
         
-        # Somar peso total
-        total_score += event.weight
+    Returns:
+        Dict com stored/expected e flag ok
+    """
+    rows = db.execute(
+        text("""
+            SELECT type, COUNT(*), COALESCE(SUM(weight), 0)
+            FROM impact_events
+            WHERE user_id = :user_id
+            GROUP BY type
+        """),
+        {"user_id": user_id}
+    ).fetchall()
+    expected_breakdown = {row[0]: row[1] for row in rows}
+    expected_score = sum(row[2] for row in rows)
     
-    # Buscar ou criar score
     score_obj = db.query(ImpactScore).filter(ImpactScore.user_id == user_id).first()
+    stored_score = score_obj.score if score_obj else 0.0
+    stored_breakdown = (score_obj.breakdown or {}) if score_obj else {}
+    stored_breakdown = {k: v for k, v in stored_breakdown.items() if v}
     
-    if score_obj is None:
-        score_obj = ImpactScore(
-            user_id=user_id,
-            score=total_score,
-            breakdown=breakdown
+    ok = abs(stored_score - expected_score) < 1e-6 and stored_breakdown == expected_breakdown
+    if not ok:
+        logger.warning(
+            f"impact.verify mismatch user_id={user_id} stored={stored_score:.2f} expected={expected_score:.2f}"
         )
-        db.add(score_obj)
-    else:
-        score_obj.score = total_score
-        score_obj.breakdown = breakdown
-        score_obj.updated_at = func.now()
     
-    db.commit()
-    db.refresh(score_obj)
-    
-    logger.info(f"impact.recalc user_id={user_id} score={total_score:.2f}")
+    return {
+        "user_id": user_id,
+        "ok": ok,
+        "stored_score": stored_score,
+        "expected_score": expected_score,
+        "stored_breakdown": stored_breakdown,
+        "expected_breakdown": expected_breakdown,
+    }
+
+
+def repair_impact_score(db: Session, user_id: int) -> bool:
+    """
+    Verifica e, se divergente, recalcula o score do usuário
     
-    return score_obj
+    Returns:
+        True se foi necessário reparar
+    """
+    if verify_impact_score(db, user_id)["ok"]:
+        return False
+    recalc_impact_score(db, user_id)
+    return True
 
 
 def get_impact_score(db: Session, user_id: int) -> ImpactScore:
@@ -197,3 +314,33 @@ def list_impact_events(
     
     return events, total
 
+
+# Layout das colunas de list_impact_event_rows (caminho rápido de /impact/events)
+IMPACT_EVENT_ENCODER = RowEncoder(
+    ["id", "user_id", "type", "weight", "metadata", "timestamp"],
+    model=ImpactEventOut,
+)
+
+
+def list_impact_event_rows(db: Session, user_id: int, page: int = 1, page_size: int = 10) -> List[tuple]:
+    """
+    Página de eventos como tuplas (layout de IMPACT_EVENT_ENCODER)
+
+    Não carrega objetos ORM nem conta o total.
+    """
+    offset = (page - 1) * page_size
+    return db.execute(
+        select(
+            ImpactEvent.id,
+            ImpactEvent.user_id,
+            ImpactEvent.type,
+            ImpactEvent.weight,
+            ImpactEvent.meta,
+            ImpactEvent.timestamp,
+        )
+        .where(ImpactEvent.user_id == user_id)
+        .order_by(ImpactEvent.timestamp.desc())
+        .offset(offset)
+        .limit(page_size)
+    ).all()
+
@@ -1,8 +1,12 @@
 # [CONNECTUS PATCH] mission service
 from datetime import datetime, date, timedelta
+from typing import Optional
 from sqlalchemy.orm import Session
 from app.models.mission import Mission, MissionCompletion, MissionType
 from app.models.post import Post  # usado p/ IN_APP_ACTION (postar hoje)
+from app.services import completion_index
+from app.services.completion_index import legacy_mission_key
+from app.services.missions_v2_service import day_str_tz
 
 def _today_range():
     start = datetime.combine(date.today(), datetime.min.time())
@@ -10,28 +14,38 @@ def _today_range():
     return start, end
 
 def has_completed_today(db: Session, user_id: int, mission_id: int) -> bool:
-    start, end = _today_range()
-    return db.query(MissionCompletion).filter(
-        MissionCompletion.user_id==user_id,
-        MissionCompletion.mission_id==mission_id,
-        MissionCompletion.completed_at>=start,
-        MissionCompletion.completed_at<=end
-    ).first() is not None
+    # consulta pela chave primária do índice unificado de conclusões
+    return completion_index.is_completed(db, user_id, legacy_mission_key(mission_id))
 
-def award(db: Session, user_id: int, mission: Mission, proof_type: str, proof_meta: dict):
-    # registrar completion
+def completed_today(db: Session, user_id: int, mission_ids) -> set:
+    # ids (dentre mission_ids) já concluídos hoje, numa única consulta
+    keys = {legacy_mission_key(mid): mid for mid in mission_ids}
+    return {keys[key] for key in completion_index.completed_keys(db, user_id, keys)}
+
+def award(db: Session, user_id: int, mission: Mission, proof_type: str, proof_meta: dict,
+          completed_at: datetime = None, commit: bool = True) -> Optional[MissionCompletion]:
+    # a chave primária do índice de conclusões decide quem concluiu: requisições
+    # ou scans concorrentes da mesma missão no mesmo dia pagam uma vez só (None)
+    day = day_str_tz(completed_at) if completed_at is not None else None
+    if not completion_index.mark_completed(db, user_id, legacy_mission_key(mission.id), source="legacy", day=day):
+        return None
+
+    # registrar completion (completed_at em UTC: scans offline informam o instante real)
     mc = MissionCompletion(
         user_id=user_id, mission_id=mission.id,
         proof_type=proof_type, proof_meta=proof_meta,
         xp_awarded=mission.xp_reward, tokens_awarded=int(mission.token_reward)
     )
+    if completed_at is not None:
+        mc.completed_at = completed_at
     db.add(mc)
     db.flush()
     
     # TODO: atualizar ranking/XP/tokens (integração com ranking_service)
     # award_points(db, user_id, mission.xp_reward, mission.token_reward)
     
-    db.commit()
+    if commit:
+        db.commit()
     return mc
 
 def can_complete_now(mission: Mission) -> bool:
@@ -4,13 +4,13 @@ Gerencia missões diárias, progresso e recompensas de forma idempotente
 """
 
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Optional, Tuple
+from sqlalchemy import text
 from sqlalchemy.orm import Session
-from sqlalchemy.exc import IntegrityError
 from app.models.missions_v2 import DailyMission, UserMissionProgress
 from app.models.user import User
-from app.services.user_service import UserService
+from app.services.user_stats import invalidate_user_stats
 
 logger = logging.getLogger(__name__)
 
@@ -29,20 +29,38 @@ except ImportError:
         TZ_SAO_PAULO = None
 
 
+def now_tz() -> datetime:
+    """Agora no timezone America/Sao_Paulo (UTC se indisponível)"""
+    if TZ_SAO_PAULO:
+        return datetime.now(TZ_SAO_PAULO)
+    # Fallback: usar UTC (não ideal, mas funcional)
+    return datetime.now(timezone.utc)
+
+
 def today_str_tz() -> str:
     """
     Retorna a data de hoje no formato YYYY-MM-DD usando timezone America/Sao_Paulo.
     """
-    if TZ_SAO_PAULO:
-        now = datetime.now(TZ_SAO_PAULO)
-    else:
-        # Fallback: usar UTC (não ideal, mas funcional)
-        try:
-            from datetime import timezone
-            now = datetime.now(timezone.utc)
-        except ImportError:
-            now = datetime.utcnow()  # Python < 3.2
-    return now.strftime("%Y-%m-%d")
+    return now_tz().strftime("%Y-%m-%d")
+
+
+def day_str_tz(value: datetime) -> str:
+    """Data (YYYY-MM-DD) de um instante em America/Sao_Paulo (naive = UTC)"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(TZ_SAO_PAULO or timezone.utc).strftime("%Y-%m-%d")
+
+
+def next_day_str_tz() -> str:
+    """Data de amanhã (YYYY-MM-DD) em America/Sao_Paulo"""
+    return (now_tz() + timedelta(days=1)).strftime("%Y-%m-%d")
+
+
+def seconds_until_midnight_tz() -> float:
+    """Segundos até a próxima meia-noite em America/Sao_Paulo"""
+    now = now_tz()
+    midnight = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return (midnight - now).total_seconds()
 
 
 def get_daily_missions(session: Session) -> List[DailyMission]:
@@ -66,35 +84,69 @@ def get_user_progress_map(session: Session, user_id: int, date: str) -> Dict[int
     return {p.mission_id: p.status for p in progress_list}
 
 
+def _mark_cached_completion(user_id: int, date: str, mission_id: int):
+    """Atualiza o bitmap de conclusões do cache em processo"""
+    from app.services.daily_mission_cache import daily_mission_cache
+    daily_mission_cache.mark_completed(user_id, date, mission_id)
+
+
+# Upsert do ranking com os totais devolvidos pelo UPDATE de users (mesma
+# transação); contagens de posts só importam quando a linha ainda não existe
+_UPSERT_RANKING_SQL = text("""
+    INSERT INTO user_rankings
+        (user_id, total_xp, total_tokens, missions_completed, posts_created, likes_received, last_updated)
+    VALUES (
+        :user_id, :xp, :tokens_earned, :missions_completed,
+        (SELECT COUNT(*) FROM posts WHERE author_id = :user_id),
+        (SELECT COALESCE(SUM(likes_count), 0) FROM posts WHERE author_id = :user_id),
+        :now
+    )
+    ON CONFLICT(user_id) DO UPDATE SET
+        total_xp = excluded.total_xp,
+        total_tokens = excluded.total_tokens,
+        missions_completed = excluded.missions_completed,
+        last_updated = excluded.last_updated
+""")
+
+
+def _db_timestamp(value: datetime) -> str:
+    # Mesmo formato que o SQLAlchemy grava em colunas DateTime no SQLite
+    return value.strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
 def apply_rewards(session: Session, user_id: int, xp: int, tokens: int) -> Tuple[int, float]:
     """
     Aplica recompensas de XP e Tokens ao usuário.
     Retorna (xp_atual, tokens_atual).
+
+    Incremento atômico no banco (sem read-modify-write em Python) e ranking
+    atualizado na mesma transação: 2 comandos, sem commit.
     """
-    user = session.query(User).filter(User.id == user_id).first()
-    if not user:
+    row = session.execute(
+        text("""
+            UPDATE users SET
+                xp = COALESCE(xp, 0) + :xp,
+                tokens_available = COALESCE(tokens_available, 0) + :tokens,
+                tokens_earned = COALESCE(tokens_earned, 0) + :tokens
+            WHERE id = :user_id
+            RETURNING xp, tokens_available, tokens_earned, COALESCE(missions_completed, 0)
+        """),
+        {"user_id": user_id, "xp": xp, "tokens": tokens}
+    ).fetchone()
+    if row is None:
         raise ValueError(f"Usuário {user_id} não encontrado")
-    
-    # Atualizar XP
-    user.xp = (user.xp or 0) + xp
-    
-    # Atualizar tokens (tokens_available e tokens_earned)
-    current_available = float(user.tokens_available or 0)
-    current_earned = float(user.tokens_earned or 0)
-    
-    user.tokens_available = current_available + tokens
-    user.tokens_earned = current_earned + tokens
-    
-    session.flush()
-    
-    # Atualizar ranking (usando UserService)
-    try:
-        user_service = UserService(session)
-        user_service._update_ranking(user_id)
-    except Exception as e:
-        logger.warning(f"[MISSIONS_V2] Erro ao atualizar ranking: {e}")
-    
-    return (user.xp, float(user.tokens_available))
+    xp_current, tokens_available, tokens_earned, missions_completed = row
+    # Conclusão v2 (trigger no índice de conclusões) e XP/tokens novos
+    invalidate_user_stats(session, user_id)
+
+    session.execute(_UPSERT_RANKING_SQL, {
+        "user_id": user_id,
+        "xp": xp_current,
+        "tokens_earned": tokens_earned,
+        "missions_completed": missions_completed,
+        "now": _db_timestamp(datetime.utcnow()),
+    })
+    return (xp_current, float(tokens_available))
 
 
 def complete_mission(
@@ -104,6 +156,11 @@ def complete_mission(
 ) -> Dict:
     """
     Completa uma missão diária de forma idempotente.
+
+    No máximo 3 comandos numa única transação: INSERT ... ON CONFLICT DO
+    NOTHING RETURNING do progresso (a unicidade (user_id, mission_id, date)
+    decide quem completou), UPDATE atômico de users e upsert do ranking.
+    Completar em paralelo nunca perde nem duplica recompensas.
     
     Args:
         session: Sessão do banco de dados
@@ -120,97 +177,39 @@ def complete_mission(
     Raises:
         ValueError: Se missão não encontrada ou inativa
     """
-    # 1) Resolver missão por code ativo
-    mission = session.query(DailyMission).filter(
-        DailyMission.code == mission_code.upper().strip(),
-        DailyMission.is_active == True
-    ).first()
-    
-    if not mission:
-        raise ValueError(f"Missão '{mission_code}' não encontrada ou inativa")
-    
-    # 2) Determinar data do dia
+    user_id = user.id  # lido antes do commit (que expira o objeto)
+    code = mission_code.upper().strip()
     date = today_str_tz()
-    
-    # 3) Verificar se já existe progresso para este dia
-    existing_progress = session.query(UserMissionProgress).filter(
-        UserMissionProgress.user_id == user.id,
-        UserMissionProgress.mission_id == mission.id,
-        UserMissionProgress.date == date
-    ).first()
-    
-    if existing_progress:
-        # Já completada hoje - retornar sem aplicar recompensa
-        logger.info(f"[MISSIONS] complete code={mission_code} user_id={user.id} already=True")
-        return {
-            "completed": True,
-            "alreadyCompleted": True,
-            "rewards": {"xp": 0, "tokens": 0},
-            "userTotals": {
-                "xp": user.xp or 0,
-                "tokens": float(user.tokens_available or 0)
-            }
-        }
-    
-    # 4) Inserir progresso e aplicar recompensa (transacional)
+    completed_at = datetime.now(timezone.utc)
+
     try:
-        # Usar datetime com timezone se disponível
-        try:
-            from datetime import timezone
-            completed_at = datetime.now(timezone.utc)
-        except ImportError:
-            completed_at = datetime.utcnow()
-        
-        progress = UserMissionProgress(
-            user_id=user.id,
-            mission_id=mission.id,
-            date=date,
-            status="completed",
-            completed_at=completed_at
-        )
-        session.add(progress)
-        session.flush()
-        
-        # Aplicar recompensas
-        xp_current, tokens_current = apply_rewards(
-            session,
-            user.id,
-            mission.xp_reward,
-            mission.token_reward
-        )
-        
-        session.commit()
-        
-        logger.info(f"[MISSIONS] complete code={mission_code} user_id={user.id} already=False xp={mission.xp_reward} tokens={mission.token_reward}")
-        
-        return {
-            "completed": True,
-            "alreadyCompleted": False,
-            "rewards": {
-                "xp": mission.xp_reward,
-                "tokens": mission.token_reward
-            },
-            "userTotals": {
-                "xp": xp_current,
-                "tokens": tokens_current
-            }
-        }
-        
-    except IntegrityError as e:
-        # Race condition: outro processo completou ao mesmo tempo
-        session.rollback()
-        logger.warning(f"[MISSIONS] Race condition detectada para code={mission_code} user_id={user.id}: {e}")
-        
-        # Verificar novamente
-        existing_progress = session.query(UserMissionProgress).filter(
-            UserMissionProgress.user_id == user.id,
-            UserMissionProgress.mission_id == mission.id,
-            UserMissionProgress.date == date
-        ).first()
-        
-        if existing_progress:
-            # Recarregar user para obter valores atualizados
-            session.refresh(user)
+        inserted = session.execute(
+            text("""
+                INSERT INTO user_mission_progress (user_id, mission_id, date, status, completed_at)
+                SELECT :user_id, id, :date, 'completed', :completed_at
+                FROM daily_missions
+                WHERE code = :code AND is_active = 1
+                ON CONFLICT(user_id, mission_id, date) DO NOTHING
+                RETURNING
+                    mission_id,
+                    (SELECT xp_reward FROM daily_missions d WHERE d.id = mission_id),
+                    (SELECT token_reward FROM daily_missions d WHERE d.id = mission_id)
+            """),
+            {"user_id": user_id, "date": date, "completed_at": _db_timestamp(completed_at), "code": code}
+        ).fetchone()
+
+        if inserted is None:
+            # Nada a gravar: encerra a transação (e recarrega o usuário ao ler)
+            session.rollback()
+            mission = session.execute(
+                text("SELECT id FROM daily_missions WHERE code = :code AND is_active = 1"), {"code": code}
+            ).fetchone()
+            if not mission:
+                raise ValueError(f"Missão '{mission_code}' não encontrada ou inativa")
+            _mark_cached_completion(user_id, date, mission[0])
+
+            # Já completada hoje - retornar sem aplicar recompensa
+            logger.info(f"[MISSIONS] complete code={mission_code} user_id={user_id} already=True")
             return {
                 "completed": True,
                 "alreadyCompleted": True,
@@ -220,7 +219,30 @@ def complete_mission(
                     "tokens": float(user.tokens_available or 0)
                 }
             }
-        else:
-            # Erro inesperado
-            raise
 
+        mission_id, xp_reward, token_reward = inserted
+        xp_current, tokens_current = apply_rewards(session, user_id, xp_reward, token_reward)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+
+    # O objeto do usuário na sessão ficou desatualizado pelo UPDATE direto
+    if user in session:
+        session.expire(user)
+    _mark_cached_completion(user_id, date, mission_id)
+
+    logger.info(f"[MISSIONS] complete code={mission_code} user_id={user_id} already=False xp={xp_reward} tokens={token_reward}")
+
+    return {
+        "completed": True,
+        "alreadyCompleted": False,
+        "rewards": {
+            "xp": xp_reward,
+            "tokens": token_reward
+        },
+        "userTotals": {
+            "xp": xp_current,
+            "tokens": tokens_current
+        }
+    }
@@ -0,0 +1,212 @@
+"""
+Contadores de engajamento de posts com escrita adiada (write-behind)
+
+like/comment/share acumulam deltas em memória por post em vez de
+atualizar a linha do post a cada operação (uma linha quente serializa
+todos os escritores, e no SQLite isso é o banco inteiro). O flush grava
+todos os deltas pendentes em poucos UPDATE com CASE (um por lote de
+posts) e recalcula likes_received no ranking dos autores afetados.
+
+O flush acontece:
+- no job periódico post_counter_flush (POST_COUNTERS_FLUSH_INTERVAL_SECONDS)
+- na própria requisição que atinge POST_COUNTERS_FLUSH_MAX_OPS operações
+- no shutdown do app (espera um flush do job que ainda esteja em curso)
+
+Leituras somam os deltas pendentes (e os em gravação) aos valores do
+banco, então os contadores exibidos já incluem operações ainda não
+gravadas. Deltas pendentes se perdem se o processo morrer sem shutdown
+(no máximo um intervalo de flush). Com intervalo 0 o flush é imediato.
+"""
+
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Posts por UPDATE (3 parâmetros CASE por coluna + IN)
+_FLUSH_CHUNK = 200
+
+Deltas = List[int]  # [likes, comments, shares]
+
+
+class PostCounterBuffer:
+    """Deltas de likes/comentários/compartilhamentos pendentes por post"""
+
+    def __init__(self, max_ops: int = 500, enabled: bool = True):
+        self.max_ops = max_ops if enabled else 1
+        # Sem write-behind cada operação espera o flush em curso (nada fica pendente)
+        self.write_through = not enabled
+        self._pending: Dict[int, Deltas] = {}
+        self._inflight: Dict[int, Deltas] = {}
+        self._ops = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self.flushes = 0
+        self.flushed_ops = 0
+
+    def add(self, post_id: int, likes: int = 0, comments: int = 0, shares: int = 0) -> bool:
+        """
+        Registra deltas de uma operação já commitada
+
+        Returns:
+            True se o limite de operações pendentes foi atingido (flush agora)
+        """
+        with self._lock:
+            deltas = self._pending.get(post_id)
+            if deltas is None:
+                deltas = self._pending[post_id] = [0, 0, 0]
+            deltas[0] += likes
+            deltas[1] += comments
+            deltas[2] += shares
+            self._ops += 1
+            return self._ops >= self.max_ops
+
+    def pending(self, post_id: int) -> Optional[Tuple[int, int, int]]:
+        """Deltas ainda não gravados do post (None se não houver)"""
+        with self._lock:
+            return self._merged(post_id)
+
+    def apply(self, rows: Sequence[Sequence], id_index: int = 0, counters_index: int = 4) -> List:
+        """
+        Soma os deltas pendentes às colunas likes/comments/shares de linhas
+        de um select (counters_index = posição de likes_count)
+        """
+        if not self._pending and not self._inflight:
+            return list(rows)
+        result = []
+        with self._lock:
+            for row in rows:
+                deltas = self._merged(row[id_index])
+                if deltas is not None:
+                    row = list(row)
+                    for offset, delta in enumerate(deltas):
+                        row[counters_index + offset] = max(0, row[counters_index + offset] + delta)
+                    row = tuple(row)
+                result.append(row)
+        return result
+
+    def flush(self, db: Session, wait: bool = False) -> int:
+        """
+        Grava os deltas pendentes (faz commit na sessão informada)
+
+        Args:
+            wait: aguarda um flush em curso em vez de desistir (shutdown)
+
+        Returns:
+            Número de posts atualizados (0 se nada pendente ou outro flush em curso)
+        """
+        if not self._flush_lock.acquire(blocking=wait or self.write_through):
+            return 0
+        try:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                batch, self._pending = self._pending, {}
+                ops, self._ops = self._ops, 0
+                self._inflight = batch
+            try:
+                self._write(db, batch)
+                db.commit()
+            except Exception:
+                db.rollback()
+                with self._lock:
+                    # Devolve os deltas para a próxima tentativa
+                    for post_id, deltas in batch.items():
+                        pending = self._pending.setdefault(post_id, [0, 0, 0])
+                        for i in range(3):
+                            pending[i] += deltas[i]
+                    self._ops += ops
+                    self._inflight = {}
+                raise
+            with self._lock:
+                self._inflight = {}
+                self.flushes += 1
+                self.flushed_ops += ops
+            return len(batch)
+        finally:
+            self._flush_lock.release()
+
+    def clear(self):
+        """Descarta deltas pendentes (testes)"""
+        with self._lock:
+            self._pending = {}
+            self._inflight = {}
+            self._ops = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending_posts": len(self._pending),
+            "pending_ops": self._ops,
+            "flushes": self.flushes,
+            "flushed_ops": self.flushed_ops,
+        }
+
+    def _merged(self, post_id: int) -> Optional[Tuple[int, int, int]]:
+        # Chamado com o lock
+        pending = self._pending.get(post_id)
+        inflight = self._inflight.get(post_id)
+        if pending is None and inflight is None:
+            return None
+        if inflight is None:
+            return tuple(pending)
+        if pending is None:
+            return tuple(inflight)
+        return tuple(p + i for p, i in zip(pending, inflight))
+
+    @staticmethod
+    def _write(db: Session, batch: Dict[int, Deltas]):
+        items = list(batch.items())
+        liked_posts: List[int] = []
+        for start in range(0, len(items), _FLUSH_CHUNK):
+            chunk = items[start:start + _FLUSH_CHUNK]
+            params = {}
+            cases = ([], [], [])
+            for i, (post_id, deltas) in enumerate(chunk):
+                params[f"p{i}"] = post_id
+                for column, delta in enumerate(deltas):
+                    if delta:
+                        params[f"d{column}_{i}"] = delta
+                        cases[column].append(f"WHEN :p{i} THEN :d{column}_{i}")
+                if deltas[0]:
+                    liked_posts.append(post_id)
+            assignments = [
+                f"{name} = MAX({name} + CASE id {' '.join(whens)} ELSE 0 END, 0)"
+                for name, whens in zip(("likes_count", "comments_count", "shares_count"), cases)
+                if whens
+            ]
+            if not assignments:
+                continue
+            ids = ", ".join(f":p{i}" for i in range(len(chunk)))
+            db.execute(text(f"UPDATE posts SET {', '.join(assignments)} WHERE id IN ({ids})"), params)
+
+        for start in range(0, len(liked_posts), _FLUSH_CHUNK):
+            _refresh_likes_received(db, liked_posts[start:start + _FLUSH_CHUNK])
+
+
+def _refresh_likes_received(db: Session, post_ids: Iterable[int]):
+    """Recalcula likes_received no ranking dos autores dos posts"""
+    post_ids = list(post_ids)
+    params = {f"p{i}": post_id for i, post_id in enumerate(post_ids)}
+    ids = ", ".join(f":p{i}" for i in range(len(post_ids)))
+    db.execute(text(f"""
+        UPDATE user_rankings SET
+            likes_received = (
+                SELECT COALESCE(SUM(likes_count), 0) FROM posts
+                WHERE author_id = user_rankings.user_id AND is_active = 1
+            ),
+            last_updated = CURRENT_TIMESTAMP
+        WHERE user_id IN (SELECT author_id FROM posts WHERE id IN ({ids}))
+    """), params)
+
+
+# Instância global (um buffer por processo)
+post_counter_buffer = PostCounterBuffer(
+    max_ops=settings.POST_COUNTERS_FLUSH_MAX_OPS,
+    enabled=settings.POST_COUNTERS_FLUSH_INTERVAL_SECONDS > 0,
+)
@@ -1,14 +1,45 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, desc, func
-from typing import List, Optional
+from sqlalchemy import and_, desc, func, select, text
+from typing import List, Optional, Set
 from datetime import datetime
 from ..models.post import Post, PostLike, PostComment
 from ..models.user import User
-from ..schemas.post import PostCreate, PostUpdate, PostCommentCreate
+from ..schemas.post import PostCreate, PostUpdate, PostCommentCreate, PostResponse
+from ..utils.fast_json import RowEncoder, iso
+from .post_counters import post_counter_buffer
+from .trending import trending_index
+from .user_stats import invalidate_user_stats
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Layout das colunas de get_timeline_rows (caminho rápido de /posts/timeline)
+TIMELINE_ENCODER = RowEncoder(
+    [
+        "id", "author_id", "content", "image_url",
+        "likes_count", "comments_count", "shares_count", "is_active",
+        ("created_at", iso), ("updated_at", iso),
+        ("author", ("id", "nickname", "level")),
+    ],
+    constants={"likes": [], "comments": []},
+    model=PostResponse,
+)
+
+
+def post_rows_select():
+    """Select dos posts no layout de TIMELINE_ENCODER (autor no mesmo select, LEFT JOIN)"""
+    return (
+        select(
+            Post.id, Post.author_id, Post.content, Post.image_url,
+            Post.likes_count, Post.comments_count, Post.shares_count, Post.is_active,
+            Post.created_at, Post.updated_at,
+            func.coalesce(User.id, Post.author_id),
+            func.coalesce(User.nickname, "Usuário"),
+            func.coalesce(User.level, 1),
+        )
+        .outerjoin(User, User.id == Post.author_id)
+    )
+
 
 class PostService:
     """Serviço para gerenciamento de posts"""
@@ -26,11 +57,13 @@ class PostService:
             )
             
             self.db.add(db_post)
+            invalidate_user_stats(self.db, author_id)
             self.db.commit()
             self.db.refresh(db_post)
             
             # Atualizar contador de posts do usuário no ranking
             self._update_user_posts_count(author_id)
+            trending_index.record_post(db_post.id)
             
             logger.info(f"Post criado por usuário {author_id}")
             return db_post
@@ -48,12 +81,16 @@ class PostService:
     
     def get_user_posts(self, user_id: int, limit: int = 20, offset: int = 0) -> List[dict]:
         """Obtém posts do usuário"""
-        posts = self.db.query(Post).filter(
-            and_(Post.author_id == user_id, Post.is_active == True)
-        ).order_by(desc(Post.created_at)).offset(offset).limit(limit).all()
+        rows = self.db.execute(
+            post_rows_select()
+            .where(and_(Post.author_id == user_id, Post.is_active == True))
+            .order_by(desc(Post.created_at))
+            .offset(offset)
+            .limit(limit)
+        ).all()
         
-        # Converter para formato esperado pelo schema
-        return [self._post_to_dict(post) for post in posts]
+        # Converter para formato esperado pelo schema (autor já veio no select)
+        return TIMELINE_ENCODER.to_dicts(post_counter_buffer.apply(rows))
     
     def get_timeline_posts(self, limit: int = 20, offset: int = 0) -> List[dict]:
         """Obtém posts da timeline (todos os posts ativos)"""
@@ -64,6 +101,41 @@ class PostService:
         # Converter para formato esperado pelo schema
         return [self._post_to_dict(post) for post in posts]
     
+    def get_timeline_rows(self, limit: int = 20, offset: int = 0) -> List[tuple]:
+        """Timeline como tuplas (layout de TIMELINE_ENCODER), autor no mesmo select"""
+        rows = self.db.execute(
+            post_rows_select()
+            .where(Post.is_active == True)
+            .order_by(desc(Post.created_at))
+            .offset(offset)
+            .limit(limit)
+        ).all()
+        # Contadores ainda não gravados pelo write-behind
+        return post_counter_buffer.apply(rows)
+    
+    def get_trending_rows(self, limit: int = 20, cursor: Optional[str] = None) -> tuple:
+        """
+        Página do feed em alta (ordem do TrendingIndex, sem ORDER BY no banco)
+
+        Returns:
+            (linhas no layout de TIMELINE_ENCODER, scores por post_id, próximo cursor)
+        """
+        items, next_cursor = trending_index.page(self.db, limit, cursor)
+        if not items:
+            return [], {}, None
+        scores = dict(items)
+        rows = self.db.execute(
+            post_rows_select()
+            .where(and_(Post.id.in_(list(scores)), Post.is_active == True))
+        ).all()
+        by_id = {row[0]: row for row in rows}
+        for post_id in scores:
+            if post_id not in by_id:
+                # Removido em outro worker
+                trending_index.discard(post_id)
+        ordered = [by_id[post_id] for post_id in scores if post_id in by_id]
+        return post_counter_buffer.apply(ordered), scores, next_cursor
+    
     def update_post(self, post_id: int, author_id: int, post_data: PostUpdate) -> Optional[Post]:
         """Atualiza um post"""
         try:
@@ -100,7 +172,9 @@ class PostService:
                 return False
             
             post.is_active = False
+            invalidate_user_stats(self.db, author_id)
             self.db.commit()
+            trending_index.discard(post_id)
             
             # Atualizar contador de posts do usuário no ranking
             self._update_user_posts_count(author_id)
@@ -114,37 +188,61 @@ class PostService:
     
     def like_post(self, user_id: int, post_id: int) -> bool:
         """Curtir/descurtir um post"""
+        return self.toggle_like(user_id, post_id) is not None
+    
+    def toggle_like(self, user_id: int, post_id: int) -> Optional[bool]:
+        """
+        Alterna o like do usuário no post em no máximo dois statements
+
+        O índice único (user_id, post_id) garante um like por usuário mesmo
+        com cliques duplos concorrentes; o contador recebe o delta via SQL
+        (likes_count + n) no flush do write-behind.
+
+        Returns:
+            True se curtiu, False se descurtiu, None se o post não existe
+        """
         try:
-            # Verificar se já curtiu
-            existing_like = self.db.query(PostLike).filter(
-                and_(PostLike.user_id == user_id, PostLike.post_id == post_id)
+            removed = self.db.execute(
+                text("DELETE FROM post_likes WHERE user_id = :user_id AND post_id = :post_id RETURNING id"),
+                {"user_id": user_id, "post_id": post_id}
             ).first()
-            
-            post = self.get_post_by_id(post_id)
-            if not post:
+            if removed is not None:
+                self.db.commit()
+                self._record_counters(post_id, likes=-1)
                 return False
             
-            if existing_like:
-                # Descurtir
-                self.db.delete(existing_like)
-                post.likes_count = max(0, post.likes_count - 1)
-            else:
-                # Curtir
-                new_like = PostLike(user_id=user_id, post_id=post_id)
-                self.db.add(new_like)
-                post.likes_count += 1
-            
+            inserted = self.db.execute(
+                text("""
+                    INSERT INTO post_likes (user_id, post_id)
+                    SELECT :user_id, :post_id
+                    WHERE EXISTS (SELECT 1 FROM posts WHERE id = :post_id AND is_active = 1)
+                    ON CONFLICT(user_id, post_id) DO NOTHING
+                    RETURNING id
+                """),
+                {"user_id": user_id, "post_id": post_id}
+            ).first()
             self.db.commit()
+            if inserted is not None:
+                self._record_counters(post_id, likes=1)
+                return True
             
-            # Atualizar contador de likes recebidos no ranking
-            self._update_user_likes_received(post.author_id)
-            
-            return True
+            # Nada inserido: post inexistente ou like concorrente do mesmo usuário
+            return True if self.get_post_by_id(post_id) else None
             
         except Exception as e:
             logger.error(f"Erro ao curtir post: {e}")
             self.db.rollback()
-            return False
+            return None
+    
+    def get_liked_post_ids(self, user_id: int, post_ids: List[int]) -> Set[int]:
+        """Quais destes posts o usuário curtiu (uma consulta pelo índice único)"""
+        if not post_ids:
+            return set()
+        return set(self.db.execute(
+            select(PostLike.post_id).where(
+                and_(PostLike.user_id == user_id, PostLike.post_id.in_(set(post_ids)))
+            )
+        ).scalars())
     
     def comment_post(self, user_id: int, post_id: int, comment_data: PostCommentCreate) -> Optional[PostComment]:
         """Comentar em um post"""
@@ -160,10 +258,11 @@ class PostService:
             )
             
             self.db.add(comment)
-            post.comments_count += 1
             self.db.commit()
             self.db.refresh(comment)
             
+            self._record_counters(post_id, comments=1)
+            
             return comment
             
         except Exception as e:
@@ -184,8 +283,7 @@ class PostService:
             if not post:
                 return False
             
-            post.shares_count += 1
-            self.db.commit()
+            self._record_counters(post_id, shares=1)
             
             return True
             
@@ -205,15 +303,73 @@ class PostService:
     
     def search_posts(self, query: str, limit: int = 20, offset: int = 0) -> List[dict]:
         """Busca posts por conteúdo"""
-        posts = self.db.query(Post).filter(
-            and_(
-                Post.content.ilike(f"%{query}%"),
-                Post.is_active == True
+        rows = self.db.execute(
+            post_rows_select()
+            .where(and_(Post.content.ilike(f"%{query}%"), Post.is_active == True))
+            .order_by(desc(Post.created_at))
+            .offset(offset)
+            .limit(limit)
+        ).all()
+        
+        # Converter para formato esperado pelo schema (autor já veio no select)
+        return TIMELINE_ENCODER.to_dicts(post_counter_buffer.apply(rows))
+    
+    def embed_page_extras(self, posts: List[dict], comments_limit: int = 0,
+                          viewer_id: Optional[int] = None, liked_by_me: bool = False) -> List[dict]:
+        """
+        Completa uma página de posts (dicts de PostResponse) para a tela do feed
+
+        - comments_limit > 0: os N comentários mais recentes de cada post
+          (uma consulta com ROW_NUMBER() para a página inteira)
+        - liked_by_me: se o viewer curtiu cada post (uma consulta IN)
+        
+        No máximo duas consultas, independente do tamanho da página.
+        """
+        post_ids = [post["id"] for post in posts]
+        if not post_ids:
+            return posts
+        if comments_limit > 0:
+            comments = self.get_recent_comments(post_ids, comments_limit)
+            for post in posts:
+                post["comments"] = comments.get(post["id"], [])
+        if liked_by_me:
+            liked = self.get_liked_post_ids(viewer_id, post_ids) if viewer_id is not None else set()
+            for post in posts:
+                post["liked_by_me"] = post["id"] in liked
+        return posts
+    
+    def get_recent_comments(self, post_ids: List[int], per_post: int) -> dict:
+        """Os per_post comentários mais recentes de cada post (em ordem cronológica), por post_id"""
+        ranked = select(
+            PostComment.id, PostComment.user_id, PostComment.post_id, PostComment.content,
+            PostComment.created_at,
+            func.row_number().over(
+                partition_by=PostComment.post_id,
+                order_by=(desc(PostComment.created_at), desc(PostComment.id)),
+            ).label("position"),
+        ).where(
+            and_(PostComment.post_id.in_(set(post_ids)), PostComment.is_active == True)
+        ).subquery()
+        rows = self.db.execute(
+            select(
+                ranked.c.id, ranked.c.user_id, ranked.c.post_id, ranked.c.content, ranked.c.created_at,
+                func.coalesce(User.nickname, "Usuário"), func.coalesce(User.level, 1),
             )
-        ).order_by(desc(Post.created_at)).offset(offset).limit(limit).all()
+            .outerjoin(User, User.id == ranked.c.user_id)
+            .where(ranked.c.position <= per_post)
+            .order_by(ranked.c.post_id, ranked.c.created_at, ranked.c.id)
+        ).all()
         
-        # Converter para formato esperado pelo schema
-        return [self._post_to_dict(post) for post in posts]
+        comments = {}
+        for comment_id, user_id, post_id, content, created_at, nickname, level in rows:
+            comments.setdefault(post_id, []).append({
+                "id": comment_id,
+                "user_id": user_id,
+                "content": content,
+                "created_at": iso(created_at),
+                "user": {"id": user_id, "nickname": nickname, "level": level},
+            })
+        return comments
     
     def get_post_stats(self, post_id: int) -> dict:
         """Obtém estatísticas de um post"""
@@ -221,10 +377,11 @@ class PostService:
         if not post:
             return {}
         
+        likes, comments, shares = self._counters(post)
         return {
-            "likes_count": post.likes_count,
-            "comments_count": post.comments_count,
-            "shares_count": post.shares_count,
+            "likes_count": likes,
+            "comments_count": comments,
+            "shares_count": shares,
             "created_at": post.created_at,
             "author": {
                 "id": post.author.id,
@@ -250,22 +407,38 @@ class PostService:
         except Exception as e:
             logger.error(f"Erro ao atualizar contador de posts: {e}")
     
-    def _update_user_likes_received(self, user_id: int):
-        """Atualiza contador de likes recebidos do usuário no ranking"""
-        try:
-            from ..models.ranking import UserRanking
-            
-            ranking = self.db.query(UserRanking).filter(UserRanking.user_id == user_id).first()
-            if ranking:
-                likes_received = self.db.query(func.sum(Post.likes_count)).filter(
-                    and_(Post.author_id == user_id, Post.is_active == True)
-                ).scalar() or 0
-                ranking.likes_received = likes_received
-                ranking.last_updated = datetime.utcnow()
-                self.db.commit()
-                
-        except Exception as e:
-            logger.error(f"Erro ao atualizar contador de likes recebidos: {e}")
+    def _record_counters(self, post_id: int, likes: int = 0, comments: int = 0, shares: int = 0):
+        """Registra deltas de contadores no write-behind (após o commit da operação)"""
+        trending_index.record(post_id, likes=likes, comments=comments, shares=shares)
+        if post_counter_buffer.add(post_id, likes=likes, comments=comments, shares=shares):
+            try:
+                post_counter_buffer.flush(self.db)
+            except Exception as e:
+                # Deltas voltam ao buffer; o job periódico tenta de novo
+                logger.error(f"Erro ao gravar contadores de posts: {e}")
+    
+    def _counters(self, post: Post) -> tuple:
+        """likes/comments/shares do post somados aos deltas pendentes"""
+        counters = (post.likes_count, post.comments_count, post.shares_count)
+        pending = post_counter_buffer.pending(post.id)
+        if pending is None:
+            return counters
+        return tuple(max(0, value + delta) for value, delta in zip(counters, pending))
+    
+    def _comment_to_dict(self, comment: PostComment) -> dict:
+        """Converte PostComment para dict compatível com PostCommentResponse"""
+        user = comment.user
+        return {
+            "id": comment.id,
+            "user_id": comment.user_id,
+            "content": comment.content,
+            "created_at": iso(comment.created_at),
+            "user": {
+                "id": user.id,
+                "nickname": user.nickname,
+                "level": user.level
+            } if user else {"id": comment.user_id, "nickname": "Usuário", "level": 1},
+        }
     
     def _post_to_dict(self, post: Post) -> dict:
         """Converte objeto Post para dict compatível com PostResponse"""
@@ -276,15 +449,16 @@ class PostService:
             "nickname": author.nickname,
             "level": author.level
         } if author else {"id": post.author_id, "nickname": "Usuário", "level": 1}
+        likes, comments, shares = self._counters(post)
         
         return {
             "id": post.id,
             "author_id": post.author_id,
             "content": post.content,
             "image_url": post.image_url,
-            "likes_count": post.likes_count,
-            "comments_count": post.comments_count,
-            "shares_count": post.shares_count,
+            "likes_count": likes,
+            "comments_count": comments,
+            "shares_count": shares,
             "is_active": post.is_active,
             "created_at": post.created_at.isoformat() if post.created_at else None,
             "updated_at": post.updated_at.isoformat() if post.updated_at else None,
@@ -0,0 +1,322 @@
+"""
+Verificação de QR de check-in com proteção contra replay
+
+Tokens: JWT curto (QR_TOKEN_TTL_SECONDS) com mission_id e um nonce
+aleatório; cada token vale uma única conclusão.
+
+Caminho de verificação (por scan):
+1. assinatura, tipo e validade do token (sem banco);
+2. missão no catálogo em cache (sem banco);
+3. nonce no conjunto em memória de nonces vistos, particionado por
+   janela de expiração: replays são rejeitados em O(1) sem tocar no banco,
+   e partições expiradas são descartadas inteiras;
+4. "já concluída hoje?" no índice unificado de conclusões;
+5. registro do nonce em qr_nonces (chave primária): garante uso único
+   também entre workers, cujo conjunto em memória é separado.
+
+Scans offline chegam em lote com o instante do scan (scanned_at): a
+validade do token é conferida nesse instante, e o lote inteiro usa uma
+consulta de conclusões por dia e um único commit.
+"""
+
+import logging
+import secrets
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, time as dtime
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from jose import JWTError, jwt
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.mission import Mission, MissionType
+from app.services.completion_index import completed_keys, legacy_mission_key
+from app.services.mission_service import award
+from app.services.missions_v2_service import day_str_tz
+from app.utils.http_cache import version_registry
+
+logger = logging.getLogger(__name__)
+
+TOKEN_TYPE = "mission_qr"
+CLOCK_SKEW_SECONDS = 30
+
+# Resultados possíveis de um scan
+ACCEPTED = "accepted"
+INVALID = "invalid"
+MISSION_INVALID = "mission_invalid"
+OUTSIDE_WINDOW = "outside_window"
+ALREADY_COMPLETED = "already_completed"
+REPLAY = "replay"
+
+
+@dataclass(frozen=True)
+class QRMission:
+    id: int
+    xp_reward: int
+    token_reward: float
+    window_start: Optional[dtime]
+    window_end: Optional[dtime]
+
+    def in_window(self, at: datetime) -> bool:
+        if self.window_start and self.window_end:
+            return self.window_start <= at.time() <= self.window_end
+        return True
+
+
+@dataclass
+class ScanResult:
+    status: str
+    mission_id: Optional[int] = None
+    xp: int = 0
+    tokens: int = 0
+
+    @property
+    def ok(self) -> bool:
+        return self.status == ACCEPTED
+
+
+@dataclass
+class _Claim:
+    index: int
+    nonce: str
+    expires_at: int
+    mission: QRMission
+    scanned_at: datetime
+
+
+def issue_qr_token(mission_id: int, ttl_seconds: Optional[int] = None, now: Optional[float] = None) -> str:
+    """Emite um token de QR de uso único para a missão"""
+    issued_at = int(now if now is not None else time.time())
+    claims = {
+        "typ": TOKEN_TYPE,
+        "mission_id": mission_id,
+        "nonce": secrets.token_urlsafe(12),
+        "iat": issued_at,
+        "exp": issued_at + (ttl_seconds or settings.QR_TOKEN_TTL_SECONDS),
+    }
+    return jwt.encode(claims, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+
+def decode_qr_token(token: str, at: float) -> Optional[dict]:
+    """Claims do token se válido no instante `at` (epoch); None caso contrário"""
+    try:
+        claims = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM],
+                            options={"verify_exp": False, "verify_iat": False})
+    except JWTError:
+        return None
+    if (claims.get("typ") != TOKEN_TYPE or not isinstance(claims.get("nonce"), str)
+            or not isinstance(claims.get("mission_id"), int)
+            or not isinstance(claims.get("exp"), int) or not isinstance(claims.get("iat"), int)):
+        return None
+    if not (claims["iat"] - CLOCK_SKEW_SECONDS <= at <= claims["exp"]):
+        return None
+    return claims
+
+
+class SeenNonceSet:
+    """
+    Nonces vistos, particionados pela janela em que expiram
+
+    Um nonce só precisa ser lembrado até o token expirar; partições
+    inteiramente no passado são descartadas de uma vez.
+    """
+
+    def __init__(self, bucket_seconds: int = 60, clock: Callable[[], float] = time.time):
+        self.bucket_seconds = bucket_seconds
+        self.clock = clock
+        self._buckets: Dict[int, Set[str]] = {}
+        self._lock = threading.Lock()
+        self._next_prune = 0.0
+
+    def add(self, nonce: str, expires_at: float) -> bool:
+        """Marca o nonce como visto; False se já estava (replay)"""
+        bucket = int(expires_at // self.bucket_seconds)
+        with self._lock:
+            now = self.clock()
+            if now >= self._next_prune:
+                self._prune(now)
+            seen = self._buckets.setdefault(bucket, set())
+            if nonce in seen:
+                return False
+            seen.add(nonce)
+            return True
+
+    def discard(self, nonce: str, expires_at: float):
+        """Libera o nonce (scan recusado por outro motivo; o token segue válido)"""
+        with self._lock:
+            self._buckets.get(int(expires_at // self.bucket_seconds), set()).discard(nonce)
+
+    def _prune(self, now: float):
+        current = int(now // self.bucket_seconds)
+        for bucket in [b for b in self._buckets if b < current]:
+            del self._buckets[bucket]
+        self._next_prune = (current + 1) * self.bucket_seconds
+
+    def __len__(self) -> int:
+        return sum(len(seen) for seen in self._buckets.values())
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+            self._next_prune = 0.0
+
+
+class QRMissionCatalog:
+    """Missões CHECKIN_QR ativas, recarregadas quando missions muda ou após o TTL"""
+
+    MISS_RELOAD_SECONDS = 1.0
+
+    def __init__(self, ttl_seconds: float = 60.0, clock: Callable[[], float] = time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._missions: Optional[Dict[int, QRMission]] = None
+        self._loaded_at = 0.0
+        self._version = -1
+        self.loads = 0
+
+    def get(self, db: Session, mission_id: int) -> Optional[QRMission]:
+        missions = self._missions
+        if (missions is None or self._version != version_registry.get("missions")
+                or self.clock() - self._loaded_at >= self.ttl_seconds):
+            missions = self._load(db)
+        mission = missions.get(mission_id)
+        if mission is None and self.clock() - self._loaded_at >= self.MISS_RELOAD_SECONDS:
+            # Missão criada em outro worker (o token é assinado, então o id veio de nós)
+            mission = self._load(db).get(mission_id)
+        return mission
+
+    def _load(self, db: Session) -> Dict[int, QRMission]:
+        version = version_registry.get("missions")
+        rows = db.query(Mission).filter(Mission.type == MissionType.CHECKIN_QR, Mission.is_active == True).all()
+        missions = {
+            m.id: QRMission(id=m.id, xp_reward=m.xp_reward, token_reward=float(m.token_reward or 0),
+                            window_start=m.window_start, window_end=m.window_end)
+            for m in rows
+        }
+        self._missions, self._loaded_at, self._version = missions, self.clock(), version
+        self.loads += 1
+        return missions
+
+    def clear(self):
+        self._missions = None
+        self._version = -1
+
+
+class QRVerifier:
+    """Verificação de scans (online e em lote)"""
+
+    def __init__(self, seen: Optional[SeenNonceSet] = None, catalog: Optional[QRMissionCatalog] = None,
+                 clock: Callable[[], float] = time.time):
+        self.seen = seen or SeenNonceSet(clock=clock)
+        self.catalog = catalog or QRMissionCatalog()
+        self.clock = clock
+
+    def verify(self, db: Session, user_id: int, token: str) -> ScanResult:
+        """Verifica um scan feito agora"""
+        return self.verify_batch(db, user_id, [(token, None)])[0]
+
+    def verify_batch(self, db: Session, user_id: int,
+                     scans: Sequence[Tuple[str, Optional[datetime]]]) -> List[ScanResult]:
+        """
+        Verifica scans na ordem recebida (scanned_at em UTC; None = agora)
+
+        Um único commit no fim; qualquer erro de banco desfaz o lote inteiro.
+        """
+        now = self.clock()
+        results: List[Optional[ScanResult]] = [None] * len(scans)
+        claims: List[_Claim] = []
+
+        for index, (token, scanned_at) in enumerate(scans):
+            at = now if scanned_at is None else _epoch(scanned_at)
+            if at > now + CLOCK_SKEW_SECONDS or at < now - settings.QR_OFFLINE_MAX_AGE_SECONDS:
+                results[index] = ScanResult(INVALID)
+                continue
+            data = decode_qr_token(token, at)
+            if data is None:
+                results[index] = ScanResult(INVALID)
+                continue
+            mission = self.catalog.get(db, data["mission_id"])
+            if mission is None:
+                results[index] = ScanResult(MISSION_INVALID, data["mission_id"])
+                continue
+            at_dt = datetime.utcfromtimestamp(at)
+            if not mission.in_window(at_dt):
+                results[index] = ScanResult(OUTSIDE_WINDOW, mission.id)
+                continue
+            if not self.seen.add(data["nonce"], data["exp"]):
+                results[index] = ScanResult(REPLAY, mission.id)
+                continue
+            claims.append(_Claim(index, data["nonce"], data["exp"], mission, at_dt))
+
+        if claims:
+            try:
+                self._award_claims(db, user_id, claims, results)
+                db.commit()
+            except Exception:
+                db.rollback()
+                for claim in claims:
+                    self.seen.discard(claim.nonce, claim.expires_at)
+                raise
+        return results
+
+    def _award_claims(self, db: Session, user_id: int, claims: List[_Claim], results: List[Optional[ScanResult]]):
+        by_day: Dict[str, List[_Claim]] = defaultdict(list)
+        for claim in claims:
+            by_day[day_str_tz(claim.scanned_at)].append(claim)
+
+        for day, day_claims in by_day.items():
+            done = completed_keys(db, user_id, [legacy_mission_key(c.mission.id) for c in day_claims], day)
+            for claim in day_claims:
+                key = legacy_mission_key(claim.mission.id)
+                if key in done:
+                    self.seen.discard(claim.nonce, claim.expires_at)
+                    results[claim.index] = ScanResult(ALREADY_COMPLETED, claim.mission.id)
+                    continue
+                inserted = db.execute(
+                    text("""
+                        INSERT INTO qr_nonces (nonce, user_id, mission_id, expires_at)
+                        VALUES (:nonce, :user_id, :mission_id, :expires_at)
+                        ON CONFLICT(nonce) DO NOTHING
+                    """),
+                    {"nonce": claim.nonce, "user_id": user_id, "mission_id": claim.mission.id,
+                     "expires_at": claim.expires_at}
+                ).rowcount
+                if not inserted:
+                    # Já usado em outro worker
+                    results[claim.index] = ScanResult(REPLAY, claim.mission.id)
+                    continue
+                mc = award(db, user_id, claim.mission, "qr", {"nonce": claim.nonce},
+                           completed_at=claim.scanned_at, commit=False)
+                done.add(key)
+                if mc is None:
+                    # Concluída por outro scan (token diferente) ao mesmo tempo:
+                    # o nonce continua disponível
+                    db.execute(text("DELETE FROM qr_nonces WHERE nonce = :nonce"), {"nonce": claim.nonce})
+                    self.seen.discard(claim.nonce, claim.expires_at)
+                    results[claim.index] = ScanResult(ALREADY_COMPLETED, claim.mission.id)
+                    continue
+                results[claim.index] = ScanResult(ACCEPTED, claim.mission.id, mc.xp_awarded, mc.tokens_awarded)
+
+
+def _epoch(value: datetime) -> float:
+    if value.tzinfo is None:
+        return (value - datetime(1970, 1, 1)).total_seconds()
+    return value.timestamp()
+
+
+def prune_expired_nonces(db: Session, now: Optional[float] = None) -> int:
+    """Remove nonces que nem um scan offline ainda aceitaria"""
+    cutoff = int((now if now is not None else time.time()) - settings.QR_OFFLINE_MAX_AGE_SECONDS)
+    deleted = db.execute(text("DELETE FROM qr_nonces WHERE expires_at < :cutoff"), {"cutoff": cutoff}).rowcount
+    db.commit()
+    if deleted:
+        logger.info(f"qr.nonces_pruned count={deleted}")
+    return deleted
+
+
+# Instância global (um conjunto de nonces e um catálogo por processo)
+qr_verifier = QRVerifier()
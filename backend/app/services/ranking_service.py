@@ -1,14 +1,34 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, func
+from sqlalchemy import desc, func, select
 from typing import List, Optional
 from datetime import datetime
 from ..models.ranking import UserRanking
 from ..models.user import User
 from ..schemas.ranking import UserRankingResponse, RankingResponse
+from ..utils.fast_json import RowEncoder, decimal_str, dumps, iso
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Layout das colunas de get_ranking_rows (caminho rápido de /ranking/*)
+RANKING_ENCODER = RowEncoder(
+    [
+        "id", "user_id", "total_xp", ("total_tokens", decimal_str),
+        "missions_completed", "posts_created", "likes_received",
+        "xp_rank", "token_rank", "mission_rank", "overall_rank",
+        ("last_updated", iso),
+        ("user", ("id", "nickname", "level")),
+    ],
+    model=UserRankingResponse,
+)
+
+_RANK_COLUMNS = {
+    "xp": UserRanking.xp_rank,
+    "tokens": UserRanking.token_rank,
+    "missions": UserRanking.mission_rank,
+    "overall": UserRanking.overall_rank,
+}
+
 
 class RankingService:
     """Serviço para gerenciamento de rankings"""
@@ -65,8 +85,20 @@ class RankingService:
     
     def _update_all_user_metrics(self):
         """Atualiza métricas de todos os usuários"""
+        from ..models.post import Post
+        
         users = self.db.query(User).filter(User.is_active == True).all()
         
+        # Posts e likes de todos os autores em uma consulta (User não tem relacionamento posts)
+        post_totals = {
+            author_id: (count, likes or 0)
+            for author_id, count, likes in self.db.execute(
+                select(Post.author_id, func.count(Post.id), func.sum(Post.likes_count))
+                .where(Post.is_active == True)
+                .group_by(Post.author_id)
+            )
+        }
+        
         for user in users:
             ranking = self.db.query(UserRanking).filter(UserRanking.user_id == user.id).first()
             if not ranking:
@@ -77,11 +109,7 @@ class RankingService:
             ranking.total_xp = user.xp
             ranking.total_tokens = user.tokens_earned
             ranking.missions_completed = user.missions_completed
-            ranking.posts_created = len(user.posts)
-            
-            # Calcular likes recebidos
-            likes_received = sum(post.likes_count for post in user.posts)
-            ranking.likes_received = likes_received
+            ranking.posts_created, ranking.likes_received = post_totals.get(user.id, (0, 0))
             
             ranking.last_updated = datetime.utcnow()
     
@@ -148,6 +176,39 @@ class RankingService:
             has_next=has_next
         )
     
+    def get_ranking_rows(self, ranking_type: str = "overall", limit: int = 20, offset: int = 0) -> List[tuple]:
+        """Página do ranking como tuplas (layout de RANKING_ENCODER), usuário no mesmo select"""
+        rank_column = _RANK_COLUMNS.get(ranking_type, UserRanking.overall_rank)
+        return self.db.execute(
+            select(
+                UserRanking.id, UserRanking.user_id, UserRanking.total_xp, UserRanking.total_tokens,
+                UserRanking.missions_completed, UserRanking.posts_created, UserRanking.likes_received,
+                UserRanking.xp_rank, UserRanking.token_rank, UserRanking.mission_rank, UserRanking.overall_rank,
+                UserRanking.last_updated,
+                func.coalesce(User.id, UserRanking.user_id),
+                func.coalesce(User.nickname, "Usuário"),
+                func.coalesce(User.level, 1),
+            )
+            .outerjoin(User, User.id == UserRanking.user_id)
+            .where(rank_column.isnot(None))
+            .order_by(rank_column)
+            .offset(offset)
+            .limit(limit)
+        ).all()
+    
+    def get_ranking_page_json(self, ranking_type: str = "overall", page: int = 1, page_size: int = 20) -> bytes:
+        """Mesmo conteúdo de get_ranking_page (RankingResponse), já codificado em JSON"""
+        offset = (page - 1) * page_size
+        rows = self.get_ranking_rows(ranking_type, page_size, offset)
+        total_count = self.db.execute(select(func.count()).select_from(UserRanking)).scalar() or 0
+        return dumps({
+            "rankings": RANKING_ENCODER.to_dicts(rows),
+            "total_count": total_count,
+            "page": page,
+            "page_size": page_size,
+            "has_next": (offset + page_size) < total_count,
+        })
+    
     def get_user_position(self, user_id: int, ranking_type: str = "overall") -> Optional[int]:
         """Obtém posição do usuário no ranking"""
         user_ranking = self.get_user_ranking(user_id)
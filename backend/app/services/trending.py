@@ -0,0 +1,286 @@
+"""
+Índice em memória do feed "em alta" (trending) de posts
+
+O score de um post é a soma ponderada dos seus eventos (publicação,
+likes, comentários, compartilhamentos), cada um decaindo pela metade a
+cada TRENDING_HALF_LIFE_HOURS:
+
+    score(agora) = sum(peso_i * 2 ** -((agora - t_i) / meia_vida))
+
+Como todos os posts decaem no mesmo ritmo, a ordem entre eles só muda
+quando chega um evento. O índice guarda log2(sum(peso_i * 2 ** (t_i /
+meia_vida))), que não depende de "agora": cada evento soma um termo (em
+espaço log, sem overflow) e reposiciona só aquele post numa lista
+ordenada (bisect). O top-K e a paginação por cursor saem da lista sem
+SQL de ordenação; o score atual é 2 ** (chave - agora / meia_vida).
+
+- Eventos chegam por PostService (após o commit de cada operação)
+- O índice é carregado do banco na primeira leitura e recarregado após
+  TRENDING_REBUILD_SECONDS (eventos de outros workers, remoções)
+- A compactação periódica descarta posts com score atual abaixo de
+  TRENDING_MIN_SCORE e limita o índice a TRENDING_MAX_POSTS
+
+Na recarga, likes e comentários usam o próprio created_at; shares não têm
+tabela e contam a partir da publicação do post. Descurtir subtrai o peso
+no instante atual: anula exatamente um like recente (alternar like não
+infla o score) e a recarga corrige o desconto de likes antigos.
+"""
+
+import math
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.post import Post, PostComment, PostLike
+
+_LN2 = math.log(2)
+
+# (-chave, -post_id): ordem crescente = score decrescente, empate pelo post mais novo
+Entry = Tuple[float, int]
+
+
+def _timestamp(value: Optional[datetime], default: float) -> float:
+    if value is None:
+        return default
+    if value.tzinfo is None:
+        # Datas do banco são UTC sem fuso (CURRENT_TIMESTAMP)
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _log_add(a: float, b: float) -> float:
+    """log2(2**a + 2**b) sem overflow"""
+    high, low = (a, b) if a >= b else (b, a)
+    return high + math.log1p(2.0 ** (low - high)) / _LN2
+
+
+def _log_sub(a: float, b: float) -> Optional[float]:
+    """log2(2**a - 2**b), None se o resultado não for positivo"""
+    if b >= a:
+        return None
+    return a + math.log1p(-(2.0 ** (b - a))) / _LN2
+
+
+def encode_cursor(entry: Entry) -> str:
+    return f"{-entry[0]!r}:{-entry[1]}"
+
+
+def decode_cursor(cursor: str) -> Entry:
+    """Cursor opaco de page() (ValueError se inválido)"""
+    key, post_id = cursor.split(":")
+    key = float(key)
+    if not math.isfinite(key):
+        raise ValueError("cursor inválido")
+    return (-key, -int(post_id))
+
+
+class TrendingIndex:
+    """Posts ordenados por score com decaimento temporal"""
+
+    def __init__(self, half_life_seconds: float = 6 * 3600, window_seconds: float = 48 * 3600,
+                 like_weight: float = 1.0, comment_weight: float = 2.0, share_weight: float = 3.0,
+                 post_weight: float = 1.0, min_score: float = 0.05, max_posts: int = 5000,
+                 rebuild_seconds: float = 300.0, clock: Callable[[], float] = time.time):
+        self.half_life_seconds = half_life_seconds
+        self.window_seconds = window_seconds
+        self.weights = (like_weight, comment_weight, share_weight)
+        self.post_weight = post_weight
+        self.min_score = min_score
+        self.max_posts = max_posts
+        self.rebuild_seconds = rebuild_seconds
+        self.clock = clock
+        self._keys: Dict[int, float] = {}
+        self._order: List[Entry] = []
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+        self.rebuilds = 0
+        self.compacted = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded_at is not None
+
+    def record(self, post_id: int, likes: int = 0, comments: int = 0, shares: int = 0,
+               at: Optional[float] = None):
+        """Aplica eventos de engajamento (deltas negativos descontam o peso)"""
+        if not self.loaded:
+            # A primeira leitura carrega tudo do banco
+            return
+        at = self.clock() if at is None else at
+        with self._lock:
+            for count, weight in zip((likes, comments, shares), self.weights):
+                if count:
+                    self._apply(post_id, self._term(abs(count) * weight, at), count > 0)
+
+    def record_post(self, post_id: int, at: Optional[float] = None):
+        """Post novo entra no índice com o peso de publicação"""
+        if not self.loaded or self.post_weight <= 0:
+            return
+        at = self.clock() if at is None else at
+        with self._lock:
+            self._apply(post_id, self._term(self.post_weight, at), True)
+
+    def discard(self, post_id: int):
+        with self._lock:
+            self._remove(post_id)
+
+    def score(self, post_id: int) -> float:
+        """Score atual do post (0 se fora do índice)"""
+        key = self._keys.get(post_id)
+        return 0.0 if key is None else self._decayed(key, self.clock())
+
+    def page(self, db: Session, limit: int, cursor: Optional[str] = None) -> Tuple[List[Tuple[int, float]], Optional[str]]:
+        """
+        Próxima página do feed em alta
+
+        Returns:
+            ([(post_id, score atual)], cursor da próxima página ou None)
+        """
+        after = decode_cursor(cursor) if cursor else None
+        self._ensure(db)
+        now = self.clock()
+        with self._lock:
+            start = bisect_right(self._order, after) if after is not None else 0
+            entries = self._order[start:start + limit + 1]
+        has_more = len(entries) > limit
+        entries = entries[:limit]
+        items = [(-post_id, self._decayed(-key, now)) for key, post_id in entries]
+        return items, encode_cursor(entries[-1]) if has_more else None
+
+    def compact(self) -> int:
+        """Descarta posts abaixo de min_score e acima de max_posts; retorna quantos saíram"""
+        if not self.loaded:
+            return 0
+        # Chave mínima para score atual >= min_score
+        threshold = math.log2(self.min_score) + self.clock() / self.half_life_seconds
+        with self._lock:
+            cut = bisect_right(self._order, (-threshold, 0))
+            cut = min(cut, self.max_posts)
+            dropped = self._order[cut:]
+            if not dropped:
+                return 0
+            del self._order[cut:]
+            for _, post_id in dropped:
+                del self._keys[-post_id]
+            self.compacted += len(dropped)
+            return len(dropped)
+
+    def rebuild(self, db: Session):
+        """Recarrega os scores a partir do banco (janela TRENDING_WINDOW_HOURS)"""
+        now = self.clock()
+        since = datetime.utcfromtimestamp(now - self.window_seconds)
+        keys: Dict[int, float] = {}
+
+        def add(post_id, weight, created_at):
+            if weight <= 0:
+                return
+            term = self._term(weight, _timestamp(created_at, now))
+            key = keys.get(post_id)
+            keys[post_id] = term if key is None else _log_add(key, term)
+
+        like_weight, comment_weight, share_weight = self.weights
+        posts = db.execute(
+            select(Post.id, Post.created_at, Post.shares_count)
+            .where(and_(Post.is_active == True, Post.created_at >= since))
+        )
+        for post_id, created_at, shares in posts:
+            add(post_id, self.post_weight + shares * share_weight, created_at)
+        likes = db.execute(
+            select(PostLike.post_id, PostLike.created_at)
+            .join(Post, Post.id == PostLike.post_id)
+            .where(and_(Post.is_active == True, PostLike.created_at >= since))
+        )
+        for post_id, created_at in likes:
+            add(post_id, like_weight, created_at)
+        comments = db.execute(
+            select(PostComment.post_id, PostComment.created_at)
+            .join(Post, Post.id == PostComment.post_id)
+            .where(and_(Post.is_active == True, PostComment.is_active == True, PostComment.created_at >= since))
+        )
+        for post_id, created_at in comments:
+            add(post_id, comment_weight, created_at)
+
+        order = sorted((-key, -post_id) for post_id, key in keys.items())
+        with self._lock:
+            self._keys = keys
+            self._order = order
+            self._loaded_at = now
+            self.rebuilds += 1
+        self.compact()
+
+    def clear(self):
+        """Esvazia o índice (próxima leitura recarrega do banco)"""
+        with self._lock:
+            self._keys = {}
+            self._order = []
+            self._loaded_at = None
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "posts": len(self._keys),
+            "rebuilds": self.rebuilds,
+            "compacted": self.compacted,
+        }
+
+    def _ensure(self, db: Session):
+        loaded_at = self._loaded_at
+        if loaded_at is not None and (self.rebuild_seconds <= 0 or self.clock() - loaded_at < self.rebuild_seconds):
+            return
+        # Com o índice já carregado, as outras requisições não esperam a recarga
+        if not self._rebuild_lock.acquire(blocking=loaded_at is None):
+            return
+        try:
+            if self._loaded_at == loaded_at:
+                self.rebuild(db)
+        finally:
+            self._rebuild_lock.release()
+
+    def _term(self, weight: float, at: float) -> float:
+        return math.log2(weight) + at / self.half_life_seconds
+
+    def _decayed(self, key: float, now: float) -> float:
+        return 2.0 ** (key - now / self.half_life_seconds)
+
+    def _apply(self, post_id: int, term: float, add: bool):
+        # Chamado com o lock
+        key = self._keys.get(post_id)
+        if add:
+            new_key = term if key is None else _log_add(key, term)
+        elif key is None:
+            return
+        else:
+            new_key = _log_sub(key, term)
+        self._remove(post_id)
+        if new_key is not None:
+            self._keys[post_id] = new_key
+            insort(self._order, (-new_key, -post_id))
+
+    def _remove(self, post_id: int):
+        # Chamado com o lock
+        key = self._keys.pop(post_id, None)
+        if key is not None:
+            entry = (-key, -post_id)
+            i = bisect_left(self._order, entry)
+            if i < len(self._order) and self._order[i] == entry:
+                del self._order[i]
+
+
+# Instância global (um índice por processo)
+trending_index = TrendingIndex(
+    half_life_seconds=settings.TRENDING_HALF_LIFE_HOURS * 3600,
+    window_seconds=settings.TRENDING_WINDOW_HOURS * 3600,
+    like_weight=settings.TRENDING_LIKE_WEIGHT,
+    comment_weight=settings.TRENDING_COMMENT_WEIGHT,
+    share_weight=settings.TRENDING_SHARE_WEIGHT,
+    post_weight=settings.TRENDING_POST_WEIGHT,
+    min_score=settings.TRENDING_MIN_SCORE,
+    max_posts=settings.TRENDING_MAX_POSTS,
+    rebuild_seconds=settings.TRENDING_REBUILD_SECONDS,
+)
@@ -5,6 +5,7 @@ from datetime import datetime
 from ..models.user import User
 from ..schemas.user import UserCreate, UserUpdate
 from ..core.security import create_access_token, hash_password, verify_password
+from .user_stats import invalidate_user_stats, user_stats_cache
 import logging
 
 logger = logging.getLogger(__name__)
@@ -86,6 +87,7 @@ class UserService:
                 setattr(user, field, value)
             
             user.updated_at = datetime.utcnow()
+            invalidate_user_stats(self.db, user_id)
             self.db.commit()
             self.db.refresh(user)
             
@@ -120,6 +122,7 @@ class UserService:
                 return False
             
             user.add_xp(amount)
+            invalidate_user_stats(self.db, user_id)
             self.db.commit()
             
             # Atualizar ranking
@@ -140,6 +143,7 @@ class UserService:
                 return False
             
             user.add_tokens(amount, to_yield)
+            invalidate_user_stats(self.db, user_id)
             self.db.commit()
             
             # Atualizar ranking
@@ -160,6 +164,7 @@ class UserService:
                 return False
             
             user.missions_completed += 1
+            invalidate_user_stats(self.db, user_id)
             self.db.commit()
             
             # Atualizar ranking
@@ -223,48 +228,11 @@ class UserService:
     # Função de transações removida - não estamos mais usando Stellar SDK
     
     def get_user_stats(self, user_id: int) -> Optional[dict]:
-        """Obtém estatísticas do usuário"""
+        """Obtém estatísticas do usuário (uma consulta agregada, em cache por usuário)"""
         try:
-            user = self.get_user_by_id(user_id)
-            if not user:
+            stats = user_stats_cache.get(self.db, user_id)
+            if stats is None:
                 logger.warning(f"Usuário {user_id} não encontrado")
-                return None
-            
-            # Estatísticas básicas
-            stats = {
-                "user_id": user.id,
-                "nickname": user.nickname,
-                "level": user.level,
-                "xp": user.xp,
-                "tokens_earned": str(user.tokens_earned),
-                "tokens_available": str(user.tokens_available),
-                "tokens_in_yield": str(user.tokens_in_yield),
-                "missions_completed": user.missions_completed,
-                "is_minor": user.is_minor,
-                "is_eligible_for_yield": user.is_eligible_for_yield
-            }
-            
-            # Adicionar estatísticas de posts
-            try:
-                from ..services.post_service import PostService
-                post_service = PostService(self.db)
-                user_posts = post_service.get_user_posts(user_id)
-                stats["posts_created"] = len(user_posts)
-            except Exception as e:
-                logger.error(f"Erro ao obter estatísticas de posts: {e}")
-                stats["posts_created"] = 0
-            
-            # Adicionar estatísticas de missões
-            try:
-                from ..services.mission_service import MissionService
-                mission_service = MissionService(self.db)
-                user_missions = mission_service.get_user_missions(user_id)
-                completed_missions = [m for m in user_missions if m.get("is_completed", False)]
-                stats["missions_completed"] = len(completed_missions)
-            except Exception as e:
-                logger.error(f"Erro ao obter estatísticas de missões: {e}")
-                stats["missions_completed"] = 0
-            
             return stats
         except Exception as e:
             logger.error(f"Erro ao obter estatísticas do usuário {user_id}: {e}")
@@ -0,0 +1,126 @@
+"""
+Estatísticas do usuário (/users/stats) em uma consulta, com cache por usuário
+
+Perfil, posts ativos e missões concluídas saem de um único SELECT:
+posts_created conta pelo índice (author_id, is_active) e
+missions_completed conta as linhas do índice unificado de conclusões
+(legado, v2 e tempo real) pela chave primária (user_id, ...).
+
+O resultado fica em cache por USER_STATS_CACHE_TTL_SECONDS e é
+invalidado pelas escritas deste processo que mudam os totais (posts,
+conclusões de missão, XP/tokens) via invalidate_user_stats: na escrita e
+de novo no fim da transação, para que uma leitura feita entre a escrita e
+o commit não fique em cache. Outras escritas (carteira, outros workers)
+aparecem em no máximo um TTL.
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+USER_STATS_SQL = text("""
+    SELECT u.id, u.nickname, u.level, u.xp,
+           u.tokens_earned, u.tokens_available, u.tokens_in_yield,
+           p.posts_created,
+           (SELECT COUNT(*) FROM mission_completion_index WHERE user_id = u.id) AS missions_completed
+    FROM users u
+    CROSS JOIN (
+        SELECT COUNT(*) AS posts_created FROM posts WHERE author_id = :user_id AND is_active = 1
+    ) p
+    WHERE u.id = :user_id
+""")
+
+
+def _decimal_str(value) -> str:
+    # Mesmo formato de str(Decimal) do Numeric(10, 2) da sessão ORM
+    return f"{float(value or 0):.2f}"
+
+
+def load_user_stats(db: Session, user_id: int) -> Optional[dict]:
+    """Estatísticas direto do banco (um statement); None se o usuário não existe"""
+    row = db.execute(USER_STATS_SQL, {"user_id": user_id}).first()
+    if row is None:
+        return None
+    user_id, nickname, level, xp, tokens_earned, tokens_available, tokens_in_yield, posts, missions = row
+    return {
+        "user_id": user_id,
+        "nickname": nickname,
+        "level": level,
+        "xp": xp or 0,
+        "tokens_earned": _decimal_str(tokens_earned),
+        "tokens_available": _decimal_str(tokens_available),
+        "tokens_in_yield": _decimal_str(tokens_in_yield),
+        "posts_created": posts,
+        "missions_completed": missions,
+    }
+
+
+class UserStatsCache:
+    """Resultado de load_user_stats por usuário, com TTL e invalidação"""
+
+    def __init__(self, ttl_seconds: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._entries: Dict[int, Tuple[dict, float]] = {}
+        # Invalidações por usuário: carga iniciada antes de uma invalidação não é guardada
+        self._generations: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, db: Session, user_id: int) -> Optional[dict]:
+        entry = self._entries.get(user_id)
+        now = self.clock()
+        if entry is not None and now - entry[1] < self.ttl_seconds:
+            self.hits += 1
+            return dict(entry[0])
+
+        self.misses += 1
+        generation = self._generations.get(user_id, 0)
+        stats = load_user_stats(db, user_id)
+        if stats is not None and self.ttl_seconds > 0:
+            with self._lock:
+                if self._generations.get(user_id, 0) == generation:
+                    self._entries[user_id] = (stats, now)
+        return None if stats is None else dict(stats)
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+            self._generations = {}
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {"users": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+# Instância global (um cache por processo)
+user_stats_cache = UserStatsCache(ttl_seconds=settings.USER_STATS_CACHE_TTL_SECONDS)
+
+_PENDING_KEY = "user_stats_pending"
+
+
+def invalidate_user_stats(db: Session, user_id: int):
+    """Invalida as estatísticas do usuário agora e ao fim da transação de `db`"""
+    user_stats_cache.invalidate(user_id)
+    db.info.setdefault(_PENDING_KEY, set()).add(user_id)
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _invalidate_pending(session: Session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        for user_id in pending:
+            user_stats_cache.invalidate(user_id)
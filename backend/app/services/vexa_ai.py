@@ -1,5 +1,4 @@
 from typing import List, Dict
-import httpx
 from app.core.config import settings
 import logging
 from fastapi import HTTPException
@@ -11,6 +10,7 @@ def _is_placeholder(k: str | None) -> bool:
     return not k or str(k).startswith("sk-your")
 
 async def _call_openai(payload: dict, api_key: str):
+    import httpx  # import tardio: só carregado na primeira chamada à VEXA
     headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
     async with httpx.AsyncClient(timeout=30.0) as client:
         resp = await client.post("https://api.openai.com/v1/chat/completions", json=payload, headers=headers)
@@ -18,6 +18,7 @@ async def _call_openai(payload: dict, api_key: str):
         return resp.json()
 
 async def vexa_call(payload: dict):
+    import httpx
     # Nenhuma chave válida → falhar rápido
     if _is_placeholder(settings.OPENAI_API_KEY_TEST) and _is_placeholder(settings.OPENAI_API_KEY):
         raise HTTPException(status_code=503, detail="OPENAI_API_KEY/OPENAI_API_KEY_TEST ausentes ou placeholder. Configure no backend/.env.")
@@ -122,6 +122,17 @@ def auth_user_override():
 @pytest.fixture(scope="function")
 def client(auth_user_override, app_db_override):
     """Cliente de teste para FastAPI"""
+    from app.main import rate_limiter
+    from app.services.chat_buffer import chat_message_buffer
+    from app.services.post_counters import post_counter_buffer
+    from app.services.trending import trending_index
+    from app.services.user_stats import user_stats_cache
+    rate_limiter.reset()
+    # Ids de sala/post se repetem entre testes no banco compartilhado
+    chat_message_buffer.clear()
+    post_counter_buffer.clear()
+    trending_index.clear()
+    user_stats_cache.clear()
     return TestClient(app)
 
 
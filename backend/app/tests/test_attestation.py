@@ -0,0 +1,110 @@
+"""
+Testes dos lotes de attestation (árvore de Merkle)
+"""
+
+import pytest
+from sqlalchemy import text
+
+from app.services.attestation_service import (
+    AttestationBatcher,
+    attestation_batcher,
+    MerkleTree,
+    hash_leaf,
+    verify_proof,
+)
+
+
+@pytest.fixture
+def attest_db(db_session):
+    db_session.execute(text("DELETE FROM attestation_leaves"))
+    db_session.execute(text("DELETE FROM attestation_batches"))
+    db_session.commit()
+    yield db_session
+    db_session.execute(text("DELETE FROM attestation_leaves"))
+    db_session.execute(text("DELETE FROM attestation_batches"))
+    db_session.commit()
+
+
+def test_incremental_tree_matches_full_rebuild():
+    leaves = [hash_leaf(f"{i}|1.0|t") for i in range(13)]
+    tree = MerkleTree(leaves[:7])
+    tree.update({i: leaves[i] for i in range(7, 13)})
+    changed = hash_leaf("3|2.0|t2")
+    tree.update({3: changed})
+
+    expected = MerkleTree(leaves[:3] + [changed] + leaves[4:])
+    assert tree.root == expected.root
+    for index in range(13):
+        leaf = expected.levels[0][index]
+        assert verify_proof(leaf.hex(), tree.proof(index), tree.root.hex())
+    assert not verify_proof(leaves[3].hex(), tree.proof(3), tree.root.hex())
+
+
+def test_batches_rehash_only_changed_leaves(attest_db):
+    attest_db.execute(text(
+        "INSERT INTO impact_scores (user_id, score, breakdown, updated_at) VALUES "
+        "(801, 3.0, '{}', '2024-06-01 10:00:00'), (802, 5.0, '{}', '2024-06-01 10:00:00')"
+    ))
+    attest_db.commit()
+    batcher = AttestationBatcher()
+
+    first = batcher.build_batch(attest_db)
+    assert first["leaf_count"] == 2 and first["changed"] == 2
+    assert batcher.build_batch(attest_db) is None
+
+    attest_db.execute(text("UPDATE impact_scores SET score = 6.0, updated_at = '2024-06-02 10:00:00' WHERE user_id = 802"))
+    attest_db.commit()
+    second = batcher.build_batch(attest_db)
+    assert second["changed"] == 1 and second["root"] != first["root"]
+
+    # Outro worker (árvore vazia) sincroniza a partir do banco
+    proof = AttestationBatcher().get_proof(attest_db, 802)
+    assert proof["batch_id"] == second["batch_id"]
+    assert proof["leaf_data"] == "802|6.0|2024-06-02 10:00:00"
+    assert verify_proof(proof["leaf_hash"], proof["proof"], proof["root"])
+
+
+def test_attest_and_verify_endpoints(client, attest_db):
+    attest_db.execute(text(
+        "INSERT INTO impact_scores (user_id, score, breakdown, updated_at) VALUES (999, 3.0, '{}', '2024-06-01 10:00:00')"
+    ))
+    attest_db.commit()
+
+    data = client.post("/impact/attest/verify", json={"root": "0x00", "proof": [], "leaf_hash": "0x00"}).json()
+    assert data == {"valid": False, "batch_id": None}
+
+    proof = attestation_batcher.get_proof(attest_db, 999)
+    body = {"root": proof["root"], "proof": proof["proof"], "leaf_data": proof["leaf_data"]}
+    data = client.post("/impact/attest/verify", json=body).json()
+    assert data == {"valid": True, "batch_id": proof["batch_id"]}
+
+
+def test_failed_commit_resyncs_tree(attest_db, monkeypatch):
+    attest_db.execute(text(
+        "INSERT INTO impact_scores (user_id, score, breakdown, updated_at) VALUES "
+        "(811, 3.0, '{}', '2024-06-01 10:00:00'), (812, 5.0, '{}', '2024-06-01 10:00:00')"
+    ))
+    attest_db.commit()
+    batcher = AttestationBatcher()
+    first = batcher.build_batch(attest_db)
+
+    attest_db.execute(text("UPDATE impact_scores SET score = 9.0, updated_at = '2024-06-02 10:00:00' WHERE user_id = 811"))
+    attest_db.commit()
+    commit = attest_db.commit
+
+    def failing_commit():
+        raise RuntimeError("disk I/O error")
+
+    monkeypatch.setattr(attest_db, "commit", failing_commit)
+    with pytest.raises(RuntimeError):
+        batcher.build_batch(attest_db)
+    monkeypatch.setattr(attest_db, "commit", commit)
+
+    # Lote não gravado: a próxima chamada parte do banco, não da árvore alterada
+    latest = attest_db.execute(text("SELECT MAX(id) FROM attestation_batches")).scalar()
+    assert latest == first["batch_id"]
+    second = batcher.build_batch(attest_db)
+    assert second["changed"] == 1
+    proof = AttestationBatcher().get_proof(attest_db, 811)
+    assert proof["root"] == second["root"]
+    assert verify_proof(proof["leaf_hash"], proof["proof"], proof["root"])
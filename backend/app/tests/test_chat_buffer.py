@@ -0,0 +1,210 @@
+"""
+Testes do buffer em memória de mensagens recentes por sala
+"""
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+
+from app.db.migrate import migrate
+from app.models.chat import ChatMessage, ChatRoom
+from app.models.user import User
+from app.schemas.chat import ChatMessageCreate
+from app.services import chat_service as chat_service_module
+from app.services.chat_buffer import ChatMessageBuffer, MessageRow
+from app.services.chat_service import ChatService
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'chat.db'}")
+    migrate(engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        db.add(User(id=1, nickname="ana", password_hash="x", level=3))
+        db.add_all([ChatRoom(id=room_id, name=f"Sala {room_id}") for room_id in (1, 2, 3)])
+        db.add_all([ChatMessage(room_id=1, user_id=1, content=f"m{i}") for i in range(30)])
+        db.commit()
+    clock = FakeClock()
+    buffer = ChatMessageBuffer(size=20, max_bytes=1 << 20, revalidate_seconds=1.0,
+                               max_age_seconds=60.0, clock=clock)
+    monkeypatch.setattr(chat_service_module, "chat_message_buffer", buffer)
+    return engine, Session, buffer, clock
+
+
+def _count_statements(engine):
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    return statements
+
+
+def test_hot_room_reads_are_sql_free(env):
+    engine, Session, buffer, _ = env
+    db = Session()
+    service = ChatService(db)
+    first = service.get_room_message_rows(1, limit=10)
+    assert [row.content for row in first[:2]] == ["m29", "m28"]
+    assert first[0].user == {"id": 1, "nickname": "ana", "level": 3}
+
+    statements = _count_statements(engine)
+    assert service.get_room_message_rows(1, limit=10, offset=5) == first[5:] + service.get_room_message_rows(1, 5, 10)
+    assert statements == []
+    db.close()
+
+
+def test_deep_history_falls_back_to_db(env):
+    engine, Session, buffer, _ = env
+    db = Session()
+    service = ChatService(db)
+    service.get_room_message_rows(1, limit=10)
+
+    statements = _count_statements(engine)
+    rows = service.get_room_message_rows(1, limit=10, offset=15)
+    assert [row[3] for row in rows] == [f"m{i}" for i in range(14, 4, -1)]
+    assert len(statements) == 1
+    db.close()
+
+
+def test_create_message_appends_to_loaded_room(env):
+    engine, Session, buffer, _ = env
+    db = Session()
+    service = ChatService(db)
+    service.get_room_message_rows(1, limit=5)
+    service.create_message(1, ChatMessageCreate(room_id=1, content="nova"))
+
+    statements = _count_statements(engine)
+    assert service.get_room_message_rows(1, limit=1)[0].content == "nova"
+    assert statements == []
+    db.close()
+
+
+def test_small_room_is_complete_in_buffer(env):
+    engine, Session, buffer, _ = env
+    db = Session()
+    service = ChatService(db)
+    assert service.get_room_message_rows(2, limit=10) == []
+    service.create_message(1, ChatMessageCreate(room_id=2, content="oi"))
+
+    statements = _count_statements(engine)
+    assert [row.content for row in service.get_room_message_rows(2, limit=10)] == ["oi"]
+    assert statements == []
+    db.close()
+
+
+def test_revalidation_picks_up_other_workers(env):
+    engine, Session, buffer, clock = env
+    db = Session()
+    service = ChatService(db)
+    service.get_room_message_rows(1, limit=5)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO chat_messages (room_id, user_id, content, is_filtered, is_active) "
+                          "VALUES (1, 1, 'de outro worker', 0, 1)"))
+
+    assert service.get_room_message_rows(1, limit=1)[0].content == "m29"
+    clock.now += 1.5
+    assert service.get_room_message_rows(1, limit=1)[0].content == "de outro worker"
+    db.close()
+
+
+def _row(message_id, room_id=1):
+    return MessageRow(message_id, 1, room_id, f"id{message_id}", False, None, True, None, 1, "ana", 3)
+
+
+def test_out_of_order_append_is_inserted_in_place(env):
+    _, Session, buffer, _ = env
+    db = Session()
+    last_id = buffer.recent(db, 1, 1)[0].id
+    # Commits concorrentes: o id maior chega primeiro
+    buffer.append(_row(last_id + 2))
+    buffer.append(_row(last_id + 1))
+    assert [row.id for row in buffer.recent(db, 1, 3)] == [last_id + 2, last_id + 1, last_id]
+    assert [row.id for row in buffer.since(db, 1, last_id, 10)] == [last_id + 1, last_id + 2]
+
+    # Repetida ou mais antiga que todo o anel cheio: nada muda (fica no banco)
+    ids = [row.id for row in buffer.recent(db, 1, 20)]
+    buffer.append(_row(ids[5]))
+    buffer.append(_row(ids[-1] - 1))
+    assert [row.id for row in buffer.recent(db, 1, 20)] == ids
+    db.close()
+
+
+def test_since_stops_before_message_still_in_flight(env):
+    _, Session, buffer, _ = env
+    db = Session()
+    last_id = buffer.recent(db, 1, 1)[0].id
+    buffer.reserve(1, last_id + 1)
+    buffer.reserve(1, last_id + 2)
+    buffer.append(_row(last_id + 2))
+    buffer.release(1, last_id + 2)
+    # O cliente não pode avançar o cursor por cima de last_id + 1
+    assert buffer.since(db, 1, last_id, 10) == []
+    assert buffer.in_flight(1) == last_id + 1
+
+    buffer.append(_row(last_id + 1))
+    buffer.release(1, last_id + 1)
+    assert [row.id for row in buffer.since(db, 1, last_id, 10)] == [last_id + 1, last_id + 2]
+    assert buffer.in_flight(1) is None
+
+    # Falha antes do append: o anel é descartado e relido do banco
+    buffer.reserve(1, last_id + 3)
+    buffer.release(1, last_id + 3)
+    assert not buffer.is_cached(1)
+    db.close()
+
+
+def test_delete_invalidates_room(env):
+    _, Session, buffer, _ = env
+    db = Session()
+    service = ChatService(db)
+    newest = service.get_room_message_rows(1, limit=1)[0]
+    assert service.delete_message(newest.id, 1)
+    assert not buffer.is_cached(1)
+    assert service.get_room_message_rows(1, limit=1)[0].content == "m28"
+    db.close()
+
+
+def test_lru_eviction_under_memory_budget(env):
+    _, Session, buffer, _ = env
+    db = Session()
+    db.add_all([ChatMessage(room_id=room_id, user_id=1, content=f"m{i}") for room_id in (2, 3) for i in range(30)])
+    db.commit()
+    service = ChatService(db)
+    service.get_room_message_rows(1, limit=5)
+    one_room = buffer.stats()["bytes"]
+    buffer.max_bytes = one_room * 2 + one_room // 2
+
+    service.get_room_message_rows(2, limit=5)
+    service.get_room_message_rows(1, limit=5)  # sala 1 volta a ser a mais recente
+    service.get_room_message_rows(3, limit=5)
+    assert buffer.is_cached(1) and buffer.is_cached(3)
+    assert not buffer.is_cached(2)
+    assert buffer.stats()["bytes"] <= buffer.max_bytes
+    db.close()
+
+
+def test_messages_endpoint_uses_buffer(client, db_session):
+    room = ChatRoom(name="buffer")
+    db_session.add(room)
+    db_session.commit()
+    try:
+        sent = client.post(f"/chat/rooms/{room.id}/messages", json={"room_id": room.id, "content": "olá"})
+        assert sent.status_code == 200
+
+        first = client.get(f"/chat/rooms/{room.id}/messages")
+        second = client.get(f"/chat/rooms/{room.id}/messages")
+        assert first.json() == second.json()
+        assert [m["content"] for m in first.json()] == ["olá"]
+        assert first.json()[0]["id"] == sent.json()["id"]
+        assert client.get("/chat/rooms/987654/messages").status_code == 404
+    finally:
+        db_session.execute(text("DELETE FROM chat_messages WHERE room_id = :r"), {"r": room.id})
+        db_session.delete(room)
+        db_session.commit()
@@ -0,0 +1,178 @@
+"""
+Testes da entrega de mensagens novas do chat (notificador, long-poll e SSE)
+"""
+
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.db.migrate import migrate
+from app.models.chat import ChatMessage, ChatRoom
+from app.models.user import User
+from app.routers import chat as chat_router
+from app.schemas.chat import ChatMessageCreate
+from app.services import chat_service as chat_service_module
+from app.services.chat_buffer import ChatMessageBuffer
+from app.services.chat_notifier import ChatNotifier, chat_notifier
+from app.services.chat_service import ChatService
+
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'chat.db'}")
+    migrate(engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        db.add(User(id=1, nickname="ana", password_hash="x"))
+        db.add(ChatRoom(id=1, name="Geral"))
+        db.add_all([ChatMessage(room_id=1, user_id=1, content=f"m{i}") for i in range(30)])
+        db.commit()
+    buffer = ChatMessageBuffer(size=20)
+    monkeypatch.setattr(chat_service_module, "chat_message_buffer", buffer)
+    monkeypatch.setattr(chat_router, "chat_message_buffer", buffer)
+    chat_notifier.clear()
+    yield engine, Session
+    chat_notifier.clear()
+
+
+def test_notifier_wakes_waiters_from_other_threads():
+    notifier = ChatNotifier()
+
+    async def scenario():
+        waiter = asyncio.create_task(notifier.wait(1, 10, timeout=5))
+        await asyncio.sleep(0.01)
+        assert notifier.waiting() == 1
+        threading.Thread(target=notifier.notify, args=(1, 11)).start()
+        woke = await waiter
+        return woke, await notifier.wait(1, 10, timeout=5), await notifier.wait(1, 11, timeout=0.01)
+
+    assert asyncio.run(scenario()) == (True, True, False)
+    assert notifier.waiting() == 0
+
+
+def test_messages_since_reads_buffer_without_sql(env):
+    engine, Session = env
+    db = Session()
+    service = ChatService(db)
+    last_id = service.get_room_message_rows(1, 1)[0].id
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    assert service.get_messages_since(1, last_id, 100) == []
+    assert [row.content for row in service.get_messages_since(1, last_id - 3, 2)] == ["m27", "m28"]
+    assert statements == []
+
+    # since_id anterior ao anel: banco
+    rows = service.get_messages_since(1, 0, 5)
+    assert [row[3] for row in rows] == ["m0", "m1", "m2", "m3", "m4"]
+    assert len(statements) == 1
+    db.close()
+
+
+def _poll(db, since_id, timeout):
+    return chat_router.poll_room_messages(room_id=1, since_id=since_id, timeout=timeout, limit=100, db=db)
+
+
+def test_long_poll_returns_on_new_message(env):
+    _, Session = env
+    reader, writer = Session(), Session()
+    since_id = ChatService(reader).get_room_message_rows(1, 1)[0].id
+
+    async def scenario():
+        poll = asyncio.create_task(_poll(reader, since_id, timeout=5))
+        await asyncio.sleep(0.05)
+        assert not poll.done()
+        start = time.perf_counter()
+        ChatService(writer).create_message(1, ChatMessageCreate(room_id=1, content="nova"))
+        response = await poll
+        return response, time.perf_counter() - start
+
+    response, latency = asyncio.run(scenario())
+    assert [m["content"] for m in json.loads(response.body)] == ["nova"]
+    assert latency < 0.5
+    reader.close()
+    writer.close()
+
+
+def test_long_poll_times_out_empty(env):
+    _, Session = env
+    db = Session()
+    since_id = ChatService(db).get_room_message_rows(1, 1)[0].id
+    response = asyncio.run(_poll(db, since_id, timeout=0.05))
+    assert json.loads(response.body) == []
+    db.close()
+
+
+def test_sse_stream_yields_backlog_new_messages_and_keepalive(env):
+    _, Session = env
+    reader, writer = Session(), Session()
+    since_id = ChatService(reader).get_room_message_rows(1, 2)[1].id
+
+    async def scenario():
+        events = chat_router.message_events(ChatService(reader), 1, since_id, keepalive_seconds=0.05)
+        frames = [await events.__anext__()]
+        frames.append(await events.__anext__())  # keepalive
+        next_frame = asyncio.ensure_future(events.__anext__())
+        await asyncio.sleep(0.01)
+        ChatService(writer).create_message(1, ChatMessageCreate(room_id=1, content="ao vivo"))
+        frames.append(await next_frame)
+        await events.aclose()
+        return frames
+
+    backlog, keepalive, live = asyncio.run(scenario())
+    assert backlog.startswith(b"id: ") and b'"content":"m29"' in backlog
+    assert keepalive == b": keepalive\n\n"
+    assert b"event: message" in live and b'"content":"ao vivo"' in live
+    reader.close()
+    writer.close()
+
+
+def test_sse_does_not_skip_message_committed_out_of_order(env, monkeypatch):
+    engine, Session = env
+    reader = Session()
+    writers = sessionmaker(bind=create_engine(engine.url, connect_args={"check_same_thread": False}))
+    since_id = ChatService(reader).get_room_message_rows(1, 1)[0].id
+    buffer = chat_service_module.chat_message_buffer
+    b_done, release_a = threading.Event(), threading.Event()
+    append = buffer.append
+
+    def interleaved_append(row):
+        if row.content == "a":
+            # B grava e notifica depois do commit de A, antes do append de A
+            with writers() as db:
+                ChatService(db).create_message(1, ChatMessageCreate(room_id=1, content="b"))
+            b_done.set()
+            release_a.wait(5)
+        append(row)
+
+    monkeypatch.setattr(buffer, "append", interleaved_append)
+
+    def write_a():
+        with writers() as db:
+            ChatService(db).create_message(1, ChatMessageCreate(room_id=1, content="a"))
+
+    async def scenario():
+        events = chat_router.message_events(ChatService(reader), 1, since_id, keepalive_seconds=5)
+        first = asyncio.ensure_future(events.__anext__())
+        writer = asyncio.ensure_future(asyncio.to_thread(write_a))
+        await asyncio.to_thread(b_done.wait, 5)
+        await asyncio.sleep(0.05)  # leitor acordado por B
+        release_a.set()
+        await writer
+        frames = [await first, await events.__anext__()]
+        await events.aclose()
+        return frames
+
+    frames = asyncio.run(scenario())
+    assert [json.loads(frame.split(b"data: ")[1])["content"] for frame in frames] == ["a", "b"]
+    reader.close()
+
+
+def test_realtime_endpoints_validate_room(client):
+    assert client.get("/chat/rooms/987654/messages/since", params={"since_id": 0, "timeout": 0}).status_code == 404
+    assert client.get("/chat/rooms/987654/stream").status_code == 404
@@ -0,0 +1,108 @@
+"""
+Testes das estatísticas incrementais de salas de chat (contadores + HyperLogLog)
+"""
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+
+from app.db.migrate import migrate
+from app.models.chat import ChatMessage, ChatRoom
+from app.models.user import User
+from app.schemas.chat import ChatMessageCreate
+from app.services import chat_service as chat_service_module
+from app.services.chat_buffer import ChatMessageBuffer
+from app.services.chat_service import ChatService
+from app.services.chat_stats import platform_unique_chatters, recount_room_stats
+from app.utils.hyperloglog import HyperLogLog
+
+
+@pytest.mark.parametrize("n", [0, 1, 50, 5000, 50000])
+def test_hyperloglog_estimate_within_error(n):
+    sketch = HyperLogLog.of(range(n))
+    tolerance = max(2, int(n * 0.1))
+    assert abs(sketch.count() - n) <= tolerance
+    assert HyperLogLog.from_bytes(sketch.to_bytes()).registers == sketch.registers
+
+
+def test_hyperloglog_sparse_blob_is_small_and_merge_is_union():
+    small = HyperLogLog.of(range(20))
+    assert len(small.to_bytes()) < 100
+    a = HyperLogLog.of(range(0, 3000))
+    b = HyperLogLog.of(range(2000, 5000))
+    assert abs(a.merge(b).count() - 5000) <= 500
+    assert not a.add(10)  # já presente
+
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'chat.db'}")
+    Session = sessionmaker(bind=engine)
+    # Mensagens anteriores à migração 010 (backfill)
+    migrate(engine, target=9)
+    with Session() as db:
+        db.add_all([User(id=i, nickname=f"u{i}", password_hash="x") for i in range(1, 6)])
+        db.add_all([ChatRoom(id=1, name="Geral"), ChatRoom(id=2, name="Dúvidas")])
+        db.add_all([ChatMessage(room_id=1, user_id=1 + i % 3, content=f"m{i}") for i in range(9)])
+        db.commit()
+    migrate(engine)
+    monkeypatch.setattr(chat_service_module, "chat_message_buffer", ChatMessageBuffer(size=0))
+    return engine, Session
+
+
+def test_migration_backfills_existing_messages(env):
+    _, Session = env
+    with Session() as db:
+        stats = ChatService(db).get_room_stats(1)
+        assert (stats["message_count"], stats["unique_users"]) == (9, 3)
+        assert ChatService(db).get_room_stats(2)["message_count"] == 0
+
+
+def test_counters_follow_insert_and_soft_delete(env):
+    engine, Session = env
+    with Session() as db:
+        service = ChatService(db)
+        for user_id in (4, 4, 5):
+            service.create_message(user_id, ChatMessageCreate(room_id=2, content="oi"))
+        message_id = db.execute(text("SELECT MAX(id) FROM chat_messages WHERE room_id = 2")).scalar()
+        assert service.delete_message(message_id, 5)
+        assert service.delete_message(message_id, 5)  # já removida: não desconta de novo
+
+        statements = []
+        event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+        stats = service.get_room_stats(2)
+        assert (stats["message_count"], stats["unique_users"]) == (2, 2)
+        assert not any("chat_messages" in sql for sql in statements)
+
+
+def test_platform_unique_chatters_merges_rooms(env):
+    _, Session = env
+    with Session() as db:
+        service = ChatService(db)
+        for user_id in (1, 4):
+            service.create_message(user_id, ChatMessageCreate(room_id=2, content="oi"))
+        assert platform_unique_chatters(db) == 4
+        assert platform_unique_chatters(db, [2]) == 2
+        assert service.get_platform_stats() == {"rooms": 2, "message_count": 11, "unique_chatters": 4}
+
+
+def test_recount_repairs_drift(env):
+    _, Session = env
+    with Session() as db:
+        # Remoção feita fora do serviço (ex.: moderação direta no banco)
+        db.execute(text("UPDATE chat_messages SET is_active = 0 WHERE room_id = 1 AND user_id = 3"))
+        db.commit()
+        assert ChatService(db).get_room_stats(1)["unique_users"] == 3
+
+        drift = recount_room_stats(db)
+        assert [(d["room_id"], d["message_count"], d["unique_exact"]) for d in drift] == [(1, 6, 2)]
+        stats = ChatService(db).get_room_stats(1)
+        assert (stats["message_count"], stats["unique_users"]) == (6, 2)
+        assert recount_room_stats(db) == []
+
+
+def test_stats_endpoints(client):
+    assert client.get("/chat/rooms/987654/stats").status_code == 404
+    response = client.get("/chat/stats")
+    assert response.status_code == 200
+    assert set(response.json()) == {"rooms", "message_count", "unique_chatters"}
@@ -0,0 +1,118 @@
+"""
+Testes do índice unificado de conclusões de missões
+"""
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.db.migrate import migrate
+from app.models.mission import Mission, MissionType
+from app.models.user import User
+from app.services import completion_index
+from app.services.completion_index import legacy_mission_key, realtime_mission_key, v2_mission_key
+from app.services.daily_mission_cache import daily_mission_cache
+from app.services.mission_service import award, completed_today, has_completed_today
+from app.services.missions_v2_service import complete_mission, today_str_tz
+
+
+@pytest.fixture
+def migrated(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'index.db'}")
+    migrate(engine)
+    with engine.begin() as conn:
+        conn.execute(text("""
+            INSERT INTO users (id, nickname, email, password_hash, is_active, xp, tokens_available, tokens_earned)
+            VALUES (1, 'user1', 'user1@test.local', 'x', 1, 0, 0, 0)
+        """))
+    daily_mission_cache.clear()
+    yield engine, sessionmaker(bind=engine)
+    daily_mission_cache.clear()
+
+
+def test_v2_completion_is_indexed_by_trigger(migrated):
+    _, Session = migrated
+    db = Session()
+    complete_mission(db, db.get(User, 1), "CHECKIN")
+
+    assert completion_index.is_completed(db, 1, v2_mission_key("checkin"))
+    assert not completion_index.is_completed(db, 1, v2_mission_key("LIKE_POST"))
+    keys = [v2_mission_key(code) for code in ("CHECKIN", "LIKE_POST", "INVITE_FRIEND")]
+    assert completion_index.completed_keys(db, 1, keys) == {"v2:CHECKIN"}
+    db.close()
+
+
+def test_legacy_award_and_lookups(migrated):
+    _, Session = migrated
+    db = Session()
+    missions = [
+        Mission(title=f"m{i}", description="d", category="community", type=MissionType.IN_APP_ACTION)
+        for i in range(3)
+    ]
+    db.add_all(missions)
+    db.commit()
+
+    assert not has_completed_today(db, 1, missions[0].id)
+    award(db, 1, missions[0], "in_app", {})
+    assert has_completed_today(db, 1, missions[0].id)
+    assert completed_today(db, 1, [m.id for m in missions]) == {missions[0].id}
+    assert completed_today(db, 1, []) == set()
+    db.close()
+
+
+def test_mark_completed_is_idempotent(migrated):
+    _, Session = migrated
+    db = Session()
+    key = realtime_mission_key("quiz-1")
+    assert completion_index.mark_completed(db, 1, key, source="realtime")
+    assert not completion_index.mark_completed(db, 1, key, source="realtime")
+    db.commit()
+    assert completion_index.is_completed(db, 1, key, day=today_str_tz())
+    assert not completion_index.is_completed(db, 1, key, day="2000-01-01")
+    db.close()
+
+
+def test_lookup_uses_primary_key(migrated):
+    _, Session = migrated
+    db = Session()
+    plan = " ".join(str(row[-1]) for row in db.execute(text("""
+        EXPLAIN QUERY PLAN SELECT 1 FROM mission_completion_index
+        WHERE user_id = 1 AND mission_key = 'v2:CHECKIN' AND day = '2030-01-01'
+    """)))
+    assert "PRIMARY KEY" in plan
+    db.close()
+
+
+def test_backfill_from_all_systems(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'backfill.db'}")
+    migrate(engine, target=7)
+    with engine.begin() as conn:
+        conn.execute(text("""
+            INSERT INTO user_mission_progress (user_id, mission_id, date, status)
+            SELECT 1, id, '2030-01-01', 'completed' FROM daily_missions WHERE code = 'CHECKIN'
+        """))
+        conn.execute(text("""
+            INSERT INTO missions (id, title, description, category, xp_reward, token_reward, is_daily,
+                                  is_active, difficulty, type)
+            VALUES (7, 'm', 'd', 'community', 0, 0, 1, 1, 'easy', 'IN_APP_ACTION')
+        """))
+        conn.execute(
+            text("INSERT INTO mission_completions (user_id, mission_id, completed_at) VALUES (1, 7, :t)"),
+            {"t": datetime(2030, 1, 2, 1, 30)}  # 22:30 do dia 1 em São Paulo
+        )
+        conn.execute(text("""
+            INSERT INTO mission_attempts (user_id, mission_slug, event_id, status, evidence_hash, evaluated_at)
+            VALUES (1, 'quiz-1', 1, 'approved', 'h', '2030-01-03 12:00:00'),
+                   (1, 'quiz-2', 1, 'rejected', 'h', '2030-01-03 12:00:00')
+        """))
+    migrate(engine)
+
+    with engine.connect() as conn:
+        rows = set(conn.execute(text("SELECT mission_key, day, source FROM mission_completion_index")).fetchall())
+    assert rows == {
+        ("v2:CHECKIN", "2030-01-01", "v2"),
+        (legacy_mission_key(7), "2030-01-01", "legacy"),
+        ("rt:quiz-1", "2030-01-03", "realtime"),
+    }
@@ -0,0 +1,171 @@
+"""
+Testes do cache em processo das missões diárias v2 (catálogo, bitmaps e virada)
+"""
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+
+from app.db.migrate import migrate
+from app.models.user import User
+from app.services.daily_mission_cache import DailyMissionCache, daily_mission_cache
+from app.services.missions_v2_service import complete_mission, today_str_tz
+from app.utils.http_cache import version_registry
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeDay:
+    def __init__(self, day: str):
+        self.day = day
+
+    def __call__(self) -> str:
+        return self.day
+
+
+@pytest.fixture
+def migrated(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'daily.db'}")
+    migrate(engine)
+    with engine.begin() as conn:
+        conn.execute(
+            text("""
+                INSERT INTO users (id, nickname, email, password_hash, is_active, xp, tokens_available, tokens_earned)
+                VALUES (:id, :n, :e, 'x', 1, 0, 0, 0)
+            """),
+            [{"id": i, "n": f"user{i}", "e": f"user{i}@test.local"} for i in range(1, 4)]
+        )
+    daily_mission_cache.clear()
+    yield engine, sessionmaker(bind=engine)
+    daily_mission_cache.clear()
+
+
+def _count_statements(engine):
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    return statements
+
+
+def _mission_id(db, code):
+    return db.execute(text("SELECT id FROM daily_missions WHERE code = :c"), {"c": code}).scalar()
+
+
+def test_catalog_is_cached_until_table_version_changes(migrated):
+    engine, Session = migrated
+    db = Session()
+    cache = DailyMissionCache(ttl_seconds=60, clock=FakeClock())
+    statements = _count_statements(engine)
+
+    codes = [m.code for m in cache.catalog(db)]
+    assert codes == ["CHECKIN", "LIKE_POST", "INVITE_FRIEND"]
+    cache.catalog(db)
+    assert len(statements) == 1
+
+    version_registry.bump(["daily_missions"])
+    cache.catalog(db)
+    assert len(statements) == 2
+    db.close()
+
+
+def test_completion_updates_bitmap_without_reload(migrated):
+    _, Session = migrated
+    db = Session()
+    day = today_str_tz()
+    checkin = _mission_id(db, "CHECKIN")
+
+    assert daily_mission_cache.completed_bits(db, 1, day) == 0
+    assert daily_mission_cache.db_loads == 1
+
+    complete_mission(db, db.get(User, 1), "CHECKIN")
+    assert daily_mission_cache.completed_bits(db, 1, day) == 1 << checkin
+    assert daily_mission_cache.db_loads == 1
+    db.close()
+
+
+def test_bitmap_entries_expire_after_ttl(migrated):
+    _, Session = migrated
+    db = Session()
+    clock = FakeClock()
+    cache = DailyMissionCache(ttl_seconds=60, clock=clock, today=FakeDay("2030-01-01"))
+    checkin = _mission_id(db, "CHECKIN")
+
+    assert cache.completed_bits(db, 1, "2030-01-01") == 0
+    # Conclusão feita por outro worker: só aparece após o TTL
+    db.execute(text("""
+        INSERT INTO user_mission_progress (user_id, mission_id, date, status)
+        VALUES (1, :m, '2030-01-01', 'completed')
+    """), {"m": checkin})
+    db.commit()
+    assert cache.completed_bits(db, 1, "2030-01-01") == 0
+    clock.now += 60
+    assert cache.completed_bits(db, 1, "2030-01-01") == 1 << checkin
+    assert cache.db_loads == 2
+    db.close()
+
+
+def test_prewarmed_rollover_serves_new_day_without_db(migrated):
+    engine, Session = migrated
+    db = Session()
+    clock = FakeClock()
+    today = FakeDay("2030-01-01")
+    cache = DailyMissionCache(ttl_seconds=60, clock=clock, today=today)
+    checkin = _mission_id(db, "CHECKIN")
+
+    assert cache.completed_bits(db, 1, "2030-01-01") == 0
+    cache.prewarm(db, "2030-01-02", seconds_until_start=30)
+    assert cache.completed_bits(db, 1, "2030-01-01") == 0  # dia atual intacto
+
+    clock.now += 30
+    today.day = "2030-01-02"
+    statements = _count_statements(engine)
+    for user_id in range(1, 4):
+        assert cache.completed_bits(db, user_id, "2030-01-02") == 0
+    cache.mark_completed(2, "2030-01-02", checkin)
+    assert cache.completed_bits(db, 2, "2030-01-02") == 1 << checkin
+    cache.catalog(db)
+    assert statements == []
+    assert cache.stats()["day"] == "2030-01-02"
+
+    # Passada a janela, usuários sem entrada voltam a ser lidos do banco
+    clock.now += 60
+    cache.completed_bits(db, 3, "2030-01-02")
+    assert len(statements) >= 1
+    db.close()
+
+
+def test_other_dates_bypass_cache(migrated):
+    _, Session = migrated
+    db = Session()
+    cache = DailyMissionCache(ttl_seconds=60, clock=FakeClock(), today=FakeDay("2030-01-02"))
+    cache.completed_bits(db, 1, "2030-01-01")
+    cache.completed_bits(db, 1, "2030-01-01")
+    assert cache.db_loads == 2
+    assert cache.stats()["users"] == 0
+    db.close()
+
+
+def test_completion_during_load_is_not_lost(migrated):
+    _, Session = migrated
+    db = Session()
+    cache = DailyMissionCache(ttl_seconds=60, clock=FakeClock(), today=FakeDay("2030-01-01"))
+    checkin = _mission_id(db, "CHECKIN")
+    load = cache._load_bits
+
+    def load_then_complete(db, user_id, day):
+        # Carga lê o banco antes do commit da conclusão concorrente
+        bits = load(db, user_id, day)
+        cache.mark_completed(user_id, day, checkin)
+        return bits
+
+    cache._load_bits = load_then_complete
+    assert cache.completed_bits(db, 1, "2030-01-01") == 1 << checkin
+    cache._load_bits = load
+    assert cache.completed_bits(db, 1, "2030-01-01") == 1 << checkin
+    assert cache.db_loads == 1
+    db.close()
@@ -0,0 +1,117 @@
+"""
+Testes do caminho rápido de serialização JSON (RowEncoder + selects Core)
+"""
+
+from datetime import datetime
+from decimal import Decimal
+from typing import List
+
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import text
+
+from app.models.chat import ChatMessage, ChatRoom
+from app.models.post import Post
+from app.models.ranking import UserRanking
+from app.models.user import User
+from app.schemas.chat import ChatMessageResponse
+from app.schemas.post import PostResponse
+from app.schemas.ranking import RankingResponse
+from app.utils.fast_json import RowEncoder, decimal_str, iso
+
+
+class _Item(BaseModel):
+    id: int
+    name: str
+    created_at: str
+    owner: dict
+    tags: list = []
+
+
+def test_row_encoder_layout():
+    encoder = RowEncoder(
+        ["id", "name", ("created_at", iso), ("owner", ("id", "nickname"))],
+        constants={"tags": []},
+        model=_Item,
+    )
+    rows = [(1, "a", datetime(2024, 1, 2, 3, 4, 5), 7, "ana")]
+    assert encoder.width == 5
+    assert encoder.to_dicts(rows) == [{
+        "id": 1,
+        "name": "a",
+        "created_at": "2024-01-02T03:04:05",
+        "owner": {"id": 7, "nickname": "ana"},
+        "tags": [],
+    }]
+    assert encoder.encode(rows).startswith(b'[{"id":1,')
+    assert decimal_str(Decimal("1.500000")) == "1.500000"
+
+
+def test_row_encoder_rejects_layout_incompatible_with_model():
+    with pytest.raises(ValueError):
+        RowEncoder(["id", "name"], model=_Item)
+    with pytest.raises(ValueError):
+        RowEncoder(["id", "name", "created_at", "owner", "unknown"], model=_Item)
+
+
+@pytest.fixture
+def social_data(db_session):
+    author = User(nickname="fastjson_author", password_hash="x", level=3)
+    db_session.add(author)
+    db_session.flush()
+
+    room = ChatRoom(name="fastjson")
+    db_session.add(room)
+    db_session.flush()
+
+    for i in range(5):
+        db_session.add(Post(author_id=author.id, content=f"post {i}"))
+        db_session.add(ChatMessage(user_id=author.id, room_id=room.id, content=f"msg {i}"))
+    # Post de autor inexistente (LEFT JOIN cai no autor padrão)
+    db_session.add(Post(author_id=424242, content="órfão"))
+    db_session.add(UserRanking(user_id=author.id, total_xp=10, total_tokens=Decimal("1.5"), overall_rank=1, xp_rank=1))
+    db_session.commit()
+
+    yield author, room
+
+    for table in ("posts", "chat_messages", "chat_rooms", "user_rankings"):
+        db_session.execute(text(f"DELETE FROM {table}"))
+    db_session.execute(text("DELETE FROM users WHERE nickname = 'fastjson_author'"))
+    db_session.commit()
+
+
+def test_timeline_matches_response_model(client: TestClient, social_data):
+    author, _ = social_data
+    response = client.get("/posts/timeline?limit=100")
+    assert response.status_code == 200
+
+    posts = TypeAdapter(List[PostResponse]).validate_json(response.content)
+    assert len(posts) == 6
+    by_author = {p.author_id: p for p in posts}
+    assert by_author[author.id].author == {"id": author.id, "nickname": "fastjson_author", "level": 3}
+    assert by_author[424242].author == {"id": 424242, "nickname": "Usuário", "level": 1}
+    assert all(p.likes == [] and p.comments == [] for p in posts)
+
+
+def test_room_messages_match_response_model(client: TestClient, social_data):
+    author, room = social_data
+    response = client.get(f"/chat/rooms/{room.id}/messages")
+    assert response.status_code == 200
+
+    messages = TypeAdapter(List[ChatMessageResponse]).validate_json(response.content)
+    assert len(messages) == 5
+    assert messages[0].user["nickname"] == "fastjson_author"
+
+
+def test_ranking_matches_response_model(client: TestClient, social_data):
+    author, _ = social_data
+    response = client.get("/ranking/overall")
+    assert response.status_code == 200
+
+    ranking = RankingResponse.model_validate_json(response.content)
+    assert ranking.total_count == 1
+    assert ranking.rankings[0].user_id == author.id
+    assert ranking.rankings[0].total_tokens == "1.500000"
+    assert ranking.rankings[0].user["level"] == 3
+    assert not ranking.has_next
@@ -0,0 +1,132 @@
+"""
+Testes do cache de GETs condicionais (ETag por versão de tabela)
+"""
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.utils.http_cache import (
+    ConditionalGetMiddleware,
+    ResponseCache,
+    cached_get,
+    version_registry,
+    written_tables,
+)
+
+
+def test_written_tables_parses_write_statements():
+    assert written_tables("INSERT INTO users (id) VALUES (1)") == "users"
+    assert written_tables('  update "feature_flags" SET enabled = 1') == "feature_flags"
+    assert written_tables("DELETE FROM post_likes WHERE id = 1") == "post_likes"
+    assert written_tables("INSERT OR IGNORE INTO missions VALUES (1)") == "missions"
+    assert written_tables("SELECT * FROM users") is None
+    assert written_tables("CREATE TABLE IF NOT EXISTS x (id INTEGER)") is None
+
+
+def test_write_bumps_version_after_commit(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'cache.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE cache_items (id INTEGER PRIMARY KEY, name TEXT)"))
+
+    before = version_registry.get("cache_items")
+    Session = sessionmaker(bind=engine)
+    with Session() as session:
+        session.execute(text("INSERT INTO cache_items (name) VALUES ('a')"))
+        during = version_registry.get("cache_items")
+        session.commit()
+    after = version_registry.get("cache_items")
+
+    assert during > before
+    assert after > during
+
+
+def test_response_cache_is_bounded():
+    cache = ResponseCache(max_entries=3, max_bytes=10_000)
+    for i in range(10):
+        cache.put(f"e{i}", [], b"x" * 100)
+    assert cache.stats()["entries"] == 3
+    assert cache.get("e0") is None
+    assert cache.get("e9") is not None
+
+    small = ResponseCache(max_entries=100, max_bytes=250)
+    for i in range(10):
+        small.put(f"e{i}", [], b"x" * 100)
+    assert small.stats()["bytes"] <= 250
+
+
+def _make_app(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'app.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE cache_flags (key TEXT PRIMARY KEY, enabled INTEGER)"))
+        conn.execute(text("INSERT INTO cache_flags VALUES ('A', 1)"))
+
+    calls = {"count": 0}
+    app = FastAPI()
+
+    @app.get("/flags")
+    @cached_get(tables=("cache_flags",))
+    def flags():
+        calls["count"] += 1
+        with engine.connect() as conn:
+            rows = conn.execute(text("SELECT key, enabled FROM cache_flags")).fetchall()
+        return {r[0]: bool(r[1]) for r in rows}
+
+    @app.get("/me")
+    @cached_get(tables=("cache_flags",), vary_user=True)
+    def me():
+        calls["count"] += 1
+        return {"ok": True}
+
+    cache = ResponseCache()
+    app.add_middleware(ConditionalGetMiddleware, cache=cache)
+    return app, engine, calls, cache
+
+
+def test_middleware_304_and_cached_body(tmp_path):
+    app, engine, calls, cache = _make_app(tmp_path)
+    client = TestClient(app)
+
+    first = client.get("/flags")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert first.json() == {"A": True}
+    assert calls["count"] == 1
+
+    # If-None-Match com a versão atual: 304 sem executar o handler
+    revalidated = client.get("/flags", headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == etag
+    assert calls["count"] == 1
+
+    # Sem If-None-Match: corpo servido do cache
+    cached = client.get("/flags")
+    assert cached.status_code == 200
+    assert cached.json() == {"A": True}
+    assert calls["count"] == 1
+
+    # Escrita na tabela muda o ETag
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE cache_flags SET enabled = 0 WHERE key = 'A'"))
+    changed = client.get("/flags", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert changed.json() == {"A": False}
+    assert calls["count"] == 2
+
+    stats = cache.stats()
+    assert stats["not_modified"] == 1
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["hit_ratio"] == 0.5
+
+
+def test_middleware_bypasses_user_routes_without_token(tmp_path):
+    app, _, calls, cache = _make_app(tmp_path)
+    client = TestClient(app)
+
+    for _ in range(3):
+        assert client.get("/me").status_code == 200
+    assert calls["count"] == 3
+    assert cache.stats()["misses"] == 0
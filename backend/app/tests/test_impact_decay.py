@@ -0,0 +1,49 @@
+"""
+Testes do Impact Score com decaimento temporal
+"""
+
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import text
+
+from app.services.impact_decay_service import run_decay_job, get_decayed_leaderboard
+
+NOW = datetime(2024, 6, 30, 12, 0, 0, tzinfo=timezone.utc)
+
+
+def _insert(db, user_id, weight, ts):
+    db.execute(
+        text("INSERT INTO impact_events (user_id, type, weight, timestamp) VALUES (:u, 'donation', :w, :ts)"),
+        {"u": user_id, "w": weight, "ts": ts},
+    )
+
+
+def test_decay_job_halves_weight_per_half_life(db_session):
+    _insert(db_session, 601, 4.0, "2024-06-30 12:00:00")  # agora: peso cheio
+    _insert(db_session, 601, 4.0, "2024-05-31 12:00:00")  # 30 dias: metade
+    _insert(db_session, 602, 2.0, "2024-06-30 12:00:00")
+    db_session.commit()
+
+    stats = run_decay_job(db_session, now=NOW, chunk_size=2)
+    assert stats["users"] == 2
+
+    board = get_decayed_leaderboard(db_session)
+    assert [entry["user_id"] for entry in board] == [601, 602]
+    assert board[0]["decayed_score"] == pytest.approx(6.0)
+    assert board[1]["decayed_score"] == pytest.approx(2.0)
+    assert board[0]["position"] == 1
+    # Usuários sem linha em impact_scores recebem o agregado completo
+    assert board[0]["score"] == 8.0
+
+
+def test_leaderboard_endpoint(client, db_session):
+    _insert(db_session, 999, 3.0, "2024-06-30 12:00:00")
+    db_session.commit()
+    run_decay_job(db_session, now=NOW)
+
+    response = client.get("/impact/leaderboard?limit=5")
+    assert response.status_code == 200
+    body = response.json()
+    assert body[0]["user_id"] == 999
+    assert body[0]["decayed_score"] == pytest.approx(3.0)
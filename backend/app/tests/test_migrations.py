@@ -0,0 +1,144 @@
+"""
+Testes do runner de migrações versionadas
+"""
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.db.migrate import (
+    MIGRATIONS_DIR,
+    MigrationError,
+    discover_migrations,
+    migrate,
+    pending_versions,
+    schema_is_current,
+    split_sql,
+)
+
+
+@pytest.fixture
+def fresh_engine(tmp_path):
+    return create_engine(f"sqlite:///{tmp_path / 'migrations.db'}")
+
+
+def _write(directory, name, content):
+    (directory / name).write_text(content, encoding="utf-8")
+
+
+def test_discover_migrations_is_ordered_and_checksummed():
+    migrations = discover_migrations(MIGRATIONS_DIR)
+    versions = [m.version for m in migrations]
+    assert versions == sorted(versions)
+    assert versions[0] == 1
+    assert all(len(m.checksum) == 64 for m in migrations)
+
+
+def test_split_sql_keeps_semicolons_inside_strings():
+    statements = split_sql("-- comentário\nCREATE TABLE t (a TEXT);\nINSERT INTO t VALUES ('x;y');\n-- fim\n")
+    assert statements == ["-- comentário\nCREATE TABLE t (a TEXT);", "INSERT INTO t VALUES ('x;y');"]
+
+
+def test_migrate_fresh_database_then_idempotent(fresh_engine):
+    assert not schema_is_current(fresh_engine)
+
+    applied = migrate(fresh_engine)
+    assert applied == [m.version for m in discover_migrations(MIGRATIONS_DIR)]
+    assert schema_is_current(fresh_engine)
+
+    with fresh_engine.connect() as conn:
+        tables = {row[0] for row in conn.execute(text("SELECT name FROM sqlite_master WHERE type='table'"))}
+        missions = conn.execute(text("SELECT COUNT(*) FROM daily_missions")).scalar()
+        flag_cols = {row[1] for row in conn.execute(text("PRAGMA table_info(feature_flags)"))}
+    assert {"users", "impact_events", "impact_scores", "staking_tiers", "mission_events"} <= tables
+    assert missions == 3
+    assert {"key", "enabled", "flag_name", "flag_value"} <= flag_cols
+
+    assert migrate(fresh_engine) == []
+
+
+def test_migrate_upgrades_legacy_database(fresh_engine):
+    # Banco criado pelo ensure_core_schema antigo (feature_flags key/enabled, users sem avatar)
+    with fresh_engine.begin() as conn:
+        conn.execute(text("CREATE TABLE feature_flags (key TEXT PRIMARY KEY, enabled INTEGER NOT NULL DEFAULT 0)"))
+        conn.execute(text("CREATE TABLE users (id INTEGER PRIMARY KEY, nickname TEXT)"))
+
+    migrate(fresh_engine)
+
+    with fresh_engine.connect() as conn:
+        user_cols = {row[1] for row in conn.execute(text("PRAGMA table_info(users)"))}
+        flags = {row[0] for row in conn.execute(text("SELECT key FROM feature_flags WHERE key IS NOT NULL"))}
+    assert {"avatar_url", "avatar_glb_url", "avatar_png_url"} <= user_cols
+    assert {"ONCHAIN_TESTNET", "WITHDRAWALS_ENABLED"} <= flags
+
+
+def test_checksum_mismatch_is_rejected(tmp_path, fresh_engine):
+    _write(tmp_path, "001_a.sql", "CREATE TABLE a (id INTEGER);")
+    assert migrate(fresh_engine, tmp_path) == [1]
+
+    _write(tmp_path, "001_a.sql", "CREATE TABLE a (id INTEGER, x TEXT);")
+    with pytest.raises(MigrationError):
+        migrate(fresh_engine, tmp_path)
+
+
+def test_python_migration_and_pending_versions(tmp_path, fresh_engine):
+    _write(tmp_path, "001_a.sql", "CREATE TABLE a (id INTEGER);")
+    _write(tmp_path, "002_b.py", (
+        "from sqlalchemy import text\n"
+        "def upgrade(conn):\n"
+        "    conn.execute(text('INSERT INTO a (id) VALUES (42)'))\n"
+    ))
+    assert pending_versions(fresh_engine, tmp_path) == [1, 2]
+
+    assert migrate(fresh_engine, tmp_path, target=1) == [1]
+    assert pending_versions(fresh_engine, tmp_path) == [2]
+
+    assert migrate(fresh_engine, tmp_path) == [2]
+    with fresh_engine.connect() as conn:
+        assert conn.execute(text("SELECT id FROM a")).scalar() == 42
+
+
+def test_failed_migration_is_not_recorded(tmp_path, fresh_engine):
+    _write(tmp_path, "001_a.sql", "CREATE TABLE a (id INTEGER);")
+    _write(tmp_path, "002_b.sql", "INSERT INTO tabela_inexistente VALUES (1);")
+
+    with pytest.raises(MigrationError):
+        migrate(fresh_engine, tmp_path)
+    assert pending_versions(fresh_engine, tmp_path) == [2]
+
+
+def test_failed_migration_rolls_back_ddl(tmp_path, fresh_engine):
+    _write(tmp_path, "001_a.sql", (
+        "CREATE TABLE x (id INTEGER);\n"
+        "ALTER TABLE x ADD COLUMN y TEXT;\n"
+        "INSERT INTO tabela_inexistente VALUES (1);\n"
+    ))
+    with pytest.raises(MigrationError):
+        migrate(fresh_engine, tmp_path)
+    with fresh_engine.connect() as conn:
+        tables = {row[0] for row in conn.execute(text("SELECT name FROM sqlite_master WHERE type='table'"))}
+    assert "x" not in tables
+
+    # Corrigida, a mesma migração (não idempotente) aplica do zero
+    _write(tmp_path, "001_a.sql", "CREATE TABLE x (id INTEGER);\nALTER TABLE x ADD COLUMN y TEXT;\n")
+    assert migrate(fresh_engine, tmp_path) == [1]
+
+
+def test_migrations_do_not_import_models_or_services():
+    for migration in discover_migrations(MIGRATIONS_DIR):
+        source = migration.path.read_text(encoding="utf-8")
+        assert "app.models" not in source and "app.services" not in source, migration.path.name
+
+
+def test_migrated_schema_covers_models(fresh_engine):
+    # Mudanças nos modelos precisam de migração própria (001 está congelada)
+    import app.models  # noqa: F401
+    from app.models import chat, missions_v2, ranking  # noqa: F401
+    from app.core.database import Base
+
+    migrate(fresh_engine)
+    with fresh_engine.connect() as conn:
+        for table in Base.metadata.sorted_tables:
+            columns = {row[1] for row in conn.execute(text(f"PRAGMA table_info({table.name})"))}
+            assert {c.name for c in table.columns} <= columns, table.name
+            indexes = {row[1] for row in conn.execute(text(f"PRAGMA index_list({table.name})"))}
+            assert {i.name for i in table.indexes} <= indexes, table.name
@@ -0,0 +1,159 @@
+"""
+Testes dos contadores de posts com escrita adiada (write-behind)
+"""
+
+import threading
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+
+from app.db.migrate import migrate
+from app.models.post import Post
+from app.models.ranking import UserRanking
+from app.models.user import User
+from app.schemas.post import PostCommentCreate
+from app.services import post_service as post_service_module
+from app.services.post_counters import PostCounterBuffer
+from app.services.post_service import PostService
+
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'posts.db'}", connect_args={"check_same_thread": False})
+    migrate(engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        db.add_all([User(id=i, nickname=f"u{i}", password_hash="x") for i in range(1, 4)])
+        db.add_all([Post(id=1, author_id=1, content="viral"), Post(id=2, author_id=2, content="outro")])
+        db.add(UserRanking(user_id=1))
+        db.commit()
+    buffer = PostCounterBuffer(max_ops=1000)
+    monkeypatch.setattr(post_service_module, "post_counter_buffer", buffer)
+    return engine, Session, buffer
+
+
+def _db_counts(db, post_id):
+    return tuple(db.execute(
+        text("SELECT likes_count, comments_count, shares_count FROM posts WHERE id = :id"), {"id": post_id}
+    ).one())
+
+
+def test_reads_merge_pending_deltas_before_flush(env):
+    _, Session, buffer = env
+    db = Session()
+    service = PostService(db)
+    assert service.like_post(2, 1) and service.like_post(3, 1)
+    assert service.like_post(3, 1)  # descurtir
+    service.comment_post(2, 1, PostCommentCreate(content="boa"))
+    service.share_post(1)
+
+    assert _db_counts(db, 1) == (0, 0, 0)
+    assert service.get_post_stats(1)["likes_count"] == 1
+    assert service._post_to_dict(service.get_post_by_id(1))["comments_count"] == 1
+    timeline = {row[0]: row[4:7] for row in service.get_timeline_rows()}
+    assert timeline == {1: (1, 1, 1), 2: (0, 0, 0)}
+    db.close()
+
+
+def test_flush_is_one_update_per_batch_and_refreshes_ranking(env):
+    engine, Session, buffer = env
+    db = Session()
+    service = PostService(db)
+    for user_id in (2, 3):
+        service.like_post(user_id, 1)
+    service.share_post(2)
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    assert buffer.flush(db) == 2
+    updates = [sql for sql in statements if sql.lstrip().startswith("UPDATE posts")]
+    assert len(updates) == 1
+    assert _db_counts(db, 1) == (2, 0, 0) and _db_counts(db, 2) == (0, 0, 1)
+    assert db.execute(text("SELECT likes_received FROM user_rankings WHERE user_id = 1")).scalar() == 2
+    assert buffer.pending(1) is None and buffer.flush(db) == 0
+    db.close()
+
+
+def test_max_ops_triggers_flush_in_request(env, monkeypatch):
+    _, Session, _ = env
+    buffer = PostCounterBuffer(max_ops=3)
+    monkeypatch.setattr(post_service_module, "post_counter_buffer", buffer)
+    db = Session()
+    service = PostService(db)
+    for _ in range(3):
+        service.share_post(1)
+    assert _db_counts(db, 1) == (0, 0, 3)
+    assert buffer.stats()["pending_ops"] == 0
+    db.close()
+
+
+def test_disabled_buffer_writes_through(env, monkeypatch):
+    _, Session, _ = env
+    monkeypatch.setattr(post_service_module, "post_counter_buffer", PostCounterBuffer(enabled=False))
+    db = Session()
+    PostService(db).like_post(2, 2)
+    assert _db_counts(db, 2) == (1, 0, 0)
+    db.close()
+
+
+def test_failed_flush_keeps_deltas(env):
+    _, Session, buffer = env
+    db = Session()
+    buffer.add(1, likes=2, shares=1)
+    db.execute(text("DROP TABLE user_rankings"))
+    with pytest.raises(Exception):
+        buffer.flush(db)
+    assert buffer.pending(1) == (2, 0, 1)
+    db.close()
+
+
+def test_shutdown_flush_waits_for_flush_in_progress(env, monkeypatch):
+    _, Session, buffer = env
+    started, resume = threading.Event(), threading.Event()
+    write = buffer._write
+
+    def slow_write(db, batch):
+        started.set()
+        resume.wait(5)
+        write(db, batch)
+
+    def job():
+        with Session() as db:
+            buffer.flush(db)
+
+    monkeypatch.setattr(buffer, "_write", slow_write)
+    buffer.add(1, likes=1)
+    thread = threading.Thread(target=job)
+    thread.start()
+    started.wait(5)
+    buffer.add(1, shares=1)
+
+    db = Session()
+    assert buffer.flush(db) == 0  # job em curso: desiste
+    threading.Timer(0.05, resume.set).start()
+    assert buffer.flush(db, wait=True) == 1
+    thread.join()
+    assert _db_counts(db, 1) == (1, 0, 1)
+    db.close()
+
+
+def test_concurrent_likers_on_one_post(env):
+    _, Session, buffer = env
+
+    def liker(user_ids):
+        db = Session()
+        service = PostService(db)
+        for user_id in user_ids:
+            assert service.like_post(user_id, 1)
+        db.close()
+
+    threads = [threading.Thread(target=liker, args=(range(100 + 50 * t, 150 + 50 * t),)) for t in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    with Session() as db:
+        buffer.flush(db)
+        assert _db_counts(db, 1) == (200, 0, 0)
+        assert db.execute(text("SELECT COUNT(*) FROM post_likes WHERE post_id = 1")).scalar() == 200
@@ -0,0 +1,142 @@
+"""
+Testes dos comentários e liked_by_me embutidos nas listagens de posts
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from starlette.requests import Request
+
+from app.core.auth import create_access_token, get_current_user_optional
+from app.db.migrate import migrate
+from app.main import app
+from app.models.post import Post, PostComment, PostLike
+from app.models.user import User
+from app.schemas.post import PostResponse
+from app.services import post_service as post_service_module
+from app.services.post_counters import PostCounterBuffer
+from app.services.post_service import PostService
+
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'embeds.db'}")
+    migrate(engine)
+    Session = sessionmaker(bind=engine)
+    now = datetime.utcnow()
+    with Session() as db:
+        db.add_all([User(id=i, nickname=f"u{i}", password_hash="x", level=i) for i in range(1, 4)])
+        db.add_all([Post(id=i, author_id=1 + i % 2, content=f"post {i}", created_at=now - timedelta(minutes=i))
+                    for i in range(1, 31)])
+        for post_id in range(1, 31):
+            db.add_all([PostComment(user_id=1 + c % 3, post_id=post_id, content=f"c{post_id}.{c}",
+                                    created_at=now - timedelta(seconds=100 - c)) for c in range(post_id % 6)])
+        db.add(PostComment(user_id=1, post_id=5, content="apagado", created_at=now, is_active=False))
+        db.add_all([PostLike(user_id=3, post_id=p) for p in (2, 5, 29)])
+        db.commit()
+    monkeypatch.setattr(post_service_module, "post_counter_buffer", PostCounterBuffer(max_ops=1000))
+    return engine, Session
+
+
+def _count_statements(engine):
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    return statements
+
+
+@pytest.mark.parametrize("limit", [5, 30])
+def test_extras_cost_two_queries_per_page(env, limit):
+    engine, Session = env
+    db = Session()
+    service = PostService(db)
+    statements = _count_statements(engine)
+    posts = service.search_posts("post", limit, 0)
+    service.embed_page_extras(posts, comments_limit=3, viewer_id=3, liked_by_me=True)
+    assert len(posts) == limit
+    assert len(statements) == 3  # página + comentários + likes
+    db.close()
+
+
+def test_recent_comments_per_post_in_chronological_order(env):
+    _, Session = env
+    db = Session()
+    service = PostService(db)
+    posts = service.embed_page_extras(service.get_user_posts(2, 30, 0), comments_limit=3)
+    by_id = {post["id"]: post for post in posts}
+    # post 5: comentários c5.0..c5.4 (+ um inativo); ficam os 3 mais recentes
+    assert [c["content"] for c in by_id[5]["comments"]] == ["c5.2", "c5.3", "c5.4"]
+    assert by_id[7]["comments"][0]["user"] == {"id": 1, "nickname": "u1", "level": 1}
+    assert by_id[7]["comments"][0]["created_at"]
+    assert [c["content"] for c in by_id[3]["comments"]] == ["c3.0", "c3.1", "c3.2"]
+    assert all("liked_by_me" not in post for post in posts)
+    for post in posts:
+        PostResponse(**post)
+    db.close()
+
+
+def test_liked_by_me_flags(env):
+    _, Session = env
+    db = Session()
+    service = PostService(db)
+    posts = service.embed_page_extras(service.search_posts("post", 30, 0), viewer_id=3, liked_by_me=True)
+    assert {post["id"] for post in posts if post["liked_by_me"]} == {2, 5, 29}
+    anonymous = service.embed_page_extras(service.search_posts("post", 5, 0), liked_by_me=True)
+    assert not any(post["liked_by_me"] for post in anonymous)
+    db.close()
+
+
+@pytest.fixture
+def viewer_override():
+    app.dependency_overrides[get_current_user_optional] = lambda: User(id=999, nickname="testuser")
+    yield
+    app.dependency_overrides.pop(get_current_user_optional, None)
+
+
+def test_listing_endpoints_accept_embeds(client, db_session, viewer_override):
+    post = Post(author_id=999, content="embutidos endpoint")
+    db_session.add(post)
+    db_session.flush()
+    db_session.add(PostComment(user_id=999, post_id=post.id, content="primeiro"))
+    db_session.add(PostLike(user_id=999, post_id=post.id))
+    db_session.commit()
+
+    params = {"comments": 2, "liked_by_me": True}
+    for path, extra in (("/posts/timeline", {"limit": 100}), ("/posts/my-posts", {}),
+                        ("/posts/search", {"q": "embutidos endpoint"})):
+        response = client.get(path, params={**params, **extra})
+        assert response.status_code == 200, path
+        found = next(p for p in response.json() if p["id"] == post.id)
+        assert found["liked_by_me"] is True, path
+        assert [c["content"] for c in found["comments"]] == ["primeiro"], path
+
+    comments = client.get(f"/posts/{post.id}/comments")
+    assert comments.status_code == 200 and comments.json()[0]["user"]["id"] == 999
+
+    plain = client.get("/posts/timeline").json()
+    assert all(p["comments"] == [] and p.get("liked_by_me") is None for p in plain)
+    assert client.get("/posts/timeline", params={"comments": 50}).status_code == 422
+
+
+def _viewer(db, headers):
+    request = Request({"type": "http", "headers": [(k.encode(), v.encode()) for k, v in headers.items()]})
+    return asyncio.run(get_current_user_optional(request, db))
+
+
+def test_viewer_from_cookie_or_header(env):
+    _, Session = env
+    db = Session()
+    token = create_access_token({"sub": "3"})
+    assert _viewer(db, {"cookie": f"connectus_access_token={token}"}).id == 3
+    assert _viewer(db, {"authorization": f"Bearer {token}"}).id == 3
+    assert _viewer(db, {}) is None
+    db.close()
+
+
+def test_anonymous_liked_by_me_is_rejected(client):
+    for path, params in (("/posts/timeline", {}), ("/posts/search", {"q": "x"})):
+        assert client.get(path, params={**params, "liked_by_me": True}).status_code == 401, path
+        assert client.get(path, params=params).status_code == 200, path
@@ -0,0 +1,139 @@
+"""
+Testes do toggle atômico de likes (índice único + ON CONFLICT)
+"""
+
+import threading
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+
+from app.db.migrate import migrate
+from app.models.post import Post, PostLike
+from app.models.user import User
+from app.services import post_service as post_service_module
+from app.services.post_counters import PostCounterBuffer
+from app.services.post_service import PostService
+
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'likes.db'}", connect_args={"check_same_thread": False})
+    migrate(engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        db.add_all([User(id=i, nickname=f"u{i}", password_hash="x") for i in range(1, 4)])
+        db.add_all([Post(id=i, author_id=1, content=f"p{i}") for i in range(1, 4)])
+        db.add(Post(id=4, author_id=1, content="removido", is_active=False))
+        db.commit()
+    buffer = PostCounterBuffer(max_ops=1000)
+    monkeypatch.setattr(post_service_module, "post_counter_buffer", buffer)
+    return engine, Session, buffer
+
+
+def _likes(db, post_id):
+    return db.execute(text("SELECT COUNT(*) FROM post_likes WHERE post_id = :id"), {"id": post_id}).scalar()
+
+
+def test_toggle_uses_at_most_two_statements(env):
+    engine, Session, _ = env
+    db = Session()
+    service = PostService(db)
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    assert service.toggle_like(2, 1) is True
+    assert len(statements) == 2
+    statements.clear()
+    assert service.toggle_like(2, 1) is False
+    assert len(statements) == 1
+    assert _likes(db, 1) == 0
+    db.close()
+
+
+def test_toggle_rejects_missing_or_inactive_post(env):
+    _, Session, buffer = env
+    db = Session()
+    service = PostService(db)
+    assert service.toggle_like(2, 999) is None
+    assert service.toggle_like(2, 4) is None
+    assert not service.like_post(2, 4)
+    assert _likes(db, 4) == 0 and buffer.pending(4) is None
+    db.close()
+
+
+def test_unique_index_blocks_duplicate_rows(env):
+    _, Session, _ = env
+    db = Session()
+    db.add_all([PostLike(user_id=2, post_id=1), PostLike(user_id=2, post_id=1)])
+    with pytest.raises(IntegrityError):
+        db.commit()
+    db.close()
+
+
+def test_concurrent_double_click_counts_once(env):
+    _, Session, buffer = env
+    barrier = threading.Barrier(8)
+    results = []
+
+    def click():
+        db = Session()
+        barrier.wait()
+        results.append(PostService(db).toggle_like(3, 2))
+        db.close()
+
+    threads = [threading.Thread(target=click) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    with Session() as db:
+        buffer.flush(db)
+        likes = _likes(db, 2)
+        likes_count = db.execute(text("SELECT likes_count FROM posts WHERE id = 2")).scalar()
+    # Cada clique alterna; contador sempre igual ao número de linhas
+    assert None not in results
+    assert likes == results.count(True) - results.count(False)
+    assert likes in (0, 1) and likes_count == likes
+
+
+def test_liked_post_ids_bulk_lookup(env):
+    engine, Session, _ = env
+    db = Session()
+    service = PostService(db)
+    service.toggle_like(2, 1)
+    service.toggle_like(2, 3)
+    service.toggle_like(3, 2)
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    assert service.get_liked_post_ids(2, [1, 2, 3, 999]) == {1, 3}
+    assert service.get_liked_post_ids(2, []) == set()
+    assert len(statements) == 1
+    db.close()
+
+
+def test_migration_removes_duplicates_and_fixes_counts(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    migrate(engine, target=10)
+    with engine.begin() as conn:
+        # Banco anterior ao índice único, com cliques duplos gravados
+        conn.execute(text("INSERT INTO users (id, nickname, password_hash) VALUES (1, 'a', 'x'), (2, 'b', 'x')"))
+        conn.execute(text("INSERT INTO posts (id, author_id, content, likes_count, comments_count, shares_count, is_active) "
+                          "VALUES (1, 1, 'p', 5, 0, 0, 1)"))
+        conn.execute(text("INSERT INTO post_likes (user_id, post_id) VALUES (1, 1), (1, 1), (2, 1), (2, 1), (2, 1)"))
+    migrate(engine)
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM post_likes")).scalar() == 2
+        assert conn.execute(text("SELECT likes_count FROM posts WHERE id = 1")).scalar() == 2
+        with pytest.raises(IntegrityError):
+            conn.execute(text("INSERT INTO post_likes (user_id, post_id) VALUES (1, 1)"))
+
+
+def test_liked_endpoint(client):
+    response = client.get("/posts/liked", params={"ids": "1,2,abc"})
+    assert response.status_code == 400
+    response = client.get("/posts/liked", params={"ids": "987654"})
+    assert response.status_code == 200 and response.json() == {"liked": []}
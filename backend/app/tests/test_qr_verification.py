@@ -0,0 +1,177 @@
+"""
+Testes da verificação de QR de check-in (replay, catálogo em cache e lote offline)
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from jose import jwt
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.db.migrate import migrate
+from app.models.mission import Mission, MissionType
+from app.services import qr_verification as qr_verification_module
+from app.services.qr_verification import (
+    ACCEPTED, ALREADY_COMPLETED, INVALID, MISSION_INVALID, REPLAY,
+    QRMissionCatalog, QRVerifier, SeenNonceSet, issue_qr_token, prune_expired_nonces,
+)
+
+NOW = 1_900_000_000.0  # 2030-03-17 17:46 UTC
+
+
+class FakeClock:
+    def __init__(self, now: float = NOW):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def env(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'qr.db'}")
+    migrate(engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        db.add_all([
+            Mission(id=1, title="Evento", description="d", category="community", xp_reward=20,
+                    token_reward=3, type=MissionType.CHECKIN_QR),
+            Mission(id=2, title="Post", description="d", category="community",
+                    type=MissionType.IN_APP_ACTION),
+        ])
+        db.commit()
+    clock = FakeClock()
+    return engine, Session, clock
+
+
+def _verifier(clock):
+    return QRVerifier(seen=SeenNonceSet(clock=clock), catalog=QRMissionCatalog(), clock=clock)
+
+
+def test_token_is_single_use_and_replay_skips_db(env):
+    engine, Session, clock = env
+    verifier = _verifier(clock)
+    db = Session()
+    token = issue_qr_token(1, now=NOW)
+
+    first = verifier.verify(db, 1, token)
+    assert (first.status, first.xp, first.tokens) == (ACCEPTED, 20, 3)
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    assert verifier.verify(db, 2, token).status == REPLAY
+    assert statements == []
+    db.close()
+
+
+def test_already_completed_releases_nonce(env):
+    _, Session, clock = env
+    verifier = _verifier(clock)
+    db = Session()
+    assert verifier.verify(db, 1, issue_qr_token(1, now=NOW)).ok
+
+    token = issue_qr_token(1, now=NOW)
+    assert verifier.verify(db, 1, token).status == ALREADY_COMPLETED
+    # O token não foi consumido: outro usuário ainda pode usá-lo
+    assert verifier.verify(db, 2, token).ok
+    db.close()
+
+
+def test_replay_across_workers_is_rejected_by_db(env):
+    _, Session, clock = env
+    db = Session()
+    token = issue_qr_token(1, now=NOW)
+    assert _verifier(clock).verify(db, 1, token).ok
+    assert _verifier(clock).verify(db, 2, token).status == REPLAY
+    assert db.execute(text("SELECT COUNT(*) FROM mission_completions")).scalar() == 1
+    db.close()
+
+
+def test_concurrent_scans_of_different_tokens_pay_once(env, monkeypatch):
+    _, Session, clock = env
+    db = Session()
+    # Os dois scans passam pela checagem prévia antes de qualquer um gravar
+    monkeypatch.setattr(qr_verification_module, "completed_keys", lambda *args: set())
+    assert _verifier(clock).verify(db, 1, issue_qr_token(1, now=NOW)).ok
+
+    token = issue_qr_token(1, now=NOW)
+    assert _verifier(clock).verify(db, 1, token).status == ALREADY_COMPLETED
+    assert db.execute(text("SELECT COUNT(*) FROM mission_completions")).scalar() == 1
+    # O nonce perdedor foi liberado
+    assert _verifier(clock).verify(db, 2, token).ok
+    db.close()
+
+
+def test_invalid_tokens(env):
+    _, Session, clock = env
+    verifier = _verifier(clock)
+    db = Session()
+    expired = issue_qr_token(1, ttl_seconds=60, now=NOW - 120)
+    legacy = jwt.encode({"mission_id": 1, "exp": int(NOW) + 60}, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    forged = jwt.encode({"typ": "mission_qr", "mission_id": 1, "nonce": "x", "iat": int(NOW), "exp": int(NOW) + 60},
+                        "outra-chave", algorithm=settings.ALGORITHM)
+
+    for token in (expired, legacy, forged, "lixo"):
+        assert verifier.verify(db, 1, token).status == INVALID
+    assert verifier.verify(db, 1, issue_qr_token(2, now=NOW)).status == MISSION_INVALID
+    assert verifier.catalog.loads == 1
+    db.close()
+
+
+def test_batch_of_offline_scans(env):
+    _, Session, clock = env
+    verifier = _verifier(clock)
+    db = Session()
+    scanned = datetime.utcfromtimestamp(NOW) - timedelta(hours=2)
+    old_token = issue_qr_token(1, ttl_seconds=60, now=NOW - 7200)  # expirou há quase 2h
+    other_day = datetime.utcfromtimestamp(NOW) - timedelta(days=1)
+    yesterday_token = issue_qr_token(1, ttl_seconds=60, now=NOW - 86400)
+    too_old = datetime.utcfromtimestamp(NOW) - timedelta(seconds=settings.QR_OFFLINE_MAX_AGE_SECONDS + 60)
+
+    results = verifier.verify_batch(db, 7, [
+        (old_token, scanned),
+        (old_token, scanned),                               # mesmo nonce no lote
+        (issue_qr_token(1, ttl_seconds=60, now=NOW - 7100), scanned + timedelta(seconds=100)),
+        (yesterday_token, other_day),                       # outro dia: aceito
+        (issue_qr_token(1, now=NOW - 120), scanned),         # escaneado antes de emitido
+        (issue_qr_token(1, ttl_seconds=60, now=too_old.timestamp()), too_old),
+    ])
+    assert [r.status for r in results] == [ACCEPTED, REPLAY, ALREADY_COMPLETED, ACCEPTED, INVALID, INVALID]
+
+    days = {row[0] for row in db.execute(text("SELECT day FROM mission_completion_index WHERE user_id = 7"))}
+    assert len(days) == 2
+    db.close()
+
+
+def test_seen_nonce_partitions_are_dropped_after_expiry():
+    clock = FakeClock()
+    seen = SeenNonceSet(bucket_seconds=60, clock=clock)
+    for i in range(10):
+        assert seen.add(f"n{i}", NOW + 30)
+    assert not seen.add("n0", NOW + 30)
+    assert len(seen) == 10
+
+    clock.now += 120
+    assert seen.add("novo", clock.now + 30)
+    assert len(seen) == 1
+
+
+def test_prune_expired_nonces(env):
+    _, Session, clock = env
+    db = Session()
+    assert _verifier(clock).verify(db, 1, issue_qr_token(1, now=NOW)).ok
+    assert prune_expired_nonces(db, now=NOW) == 0
+    assert prune_expired_nonces(db, now=NOW + settings.QR_OFFLINE_MAX_AGE_SECONDS + 3600) == 1
+    db.close()
+
+
+def test_batch_endpoint_reports_per_scan_results(client):
+    response = client.post("/missions/verify-qr/batch", json={"scans": [{"token": "lixo"}]})
+    assert response.status_code == 200
+    assert response.json() == {
+        "ok": True, "accepted": 0,
+        "results": [{"status": INVALID, "mission_id": None, "xp": 0, "tokens": 0}],
+    }
+    assert client.post("/missions/verify-qr", json={"token": "lixo"}).status_code == 400
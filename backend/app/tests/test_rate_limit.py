@@ -0,0 +1,137 @@
+"""
+Testes do rate limiter GCRA e do middleware por rota
+"""
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.utils.rate_limit import (
+    MemoryGCRABackend,
+    RateLimiter,
+    RateLimitMiddleware,
+    RatePolicy,
+    SQLiteGCRABackend,
+    rate_limit,
+)
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_gcra_allows_burst_then_denies():
+    clock = FakeClock()
+    limiter = RateLimiter(MemoryGCRABackend(), clock=clock)
+    policy = RatePolicy(max_requests=5, period_seconds=60)
+
+    results = [limiter.check("k", policy)[0] for _ in range(6)]
+    assert results == [True] * 5 + [False]
+
+    allowed, retry_after = limiter.check("k", policy)
+    assert not allowed
+    assert 0 < retry_after <= 12.0
+
+    # Após um intervalo de emissão (60/5 = 12s) libera mais uma
+    clock.now += 12.0
+    assert limiter.check("k", policy)[0]
+    assert not limiter.check("k", policy)[0]
+    assert limiter.allowed == 6
+
+
+def test_gcra_keys_are_independent():
+    clock = FakeClock()
+    limiter = RateLimiter(MemoryGCRABackend(), clock=clock)
+    policy = RatePolicy(max_requests=1, period_seconds=60)
+
+    assert limiter.check("a", policy)[0]
+    assert not limiter.check("a", policy)[0]
+    assert limiter.check("b", policy)[0]
+
+
+def test_memory_backend_evicts_idle_keys():
+    backend = MemoryGCRABackend()
+    policy = RatePolicy(max_requests=10, period_seconds=10)
+    now = 1000.0
+    for i in range(100):
+        backend.hit(f"ip-{i}", policy, now)
+    assert len(backend) == 100
+
+    # Muito depois, todas as chaves estão ociosas e são descartadas aos poucos
+    later = now + 3600
+    for i in range(100):
+        backend.hit("active", policy, later + i * 0.001)
+    assert len(backend) == 1
+
+
+def test_memory_backend_caps_keys():
+    backend = MemoryGCRABackend(max_keys=50)
+    policy = RatePolicy(max_requests=10, period_seconds=60)
+    for i in range(500):
+        backend.hit(f"ip-{i}", policy, 1000.0)
+    assert len(backend) <= 51
+
+
+def test_sqlite_backend_shared_between_instances(tmp_path):
+    path = str(tmp_path / "ratelimit.db")
+    clock = FakeClock()
+    worker_a = RateLimiter(SQLiteGCRABackend(path), clock=clock)
+    worker_b = RateLimiter(SQLiteGCRABackend(path), clock=clock)
+    policy = RatePolicy(max_requests=4, period_seconds=60)
+
+    results = [
+        (worker_a if i % 2 == 0 else worker_b).check("k", policy)[0]
+        for i in range(6)
+    ]
+    assert results == [True] * 4 + [False] * 2
+
+    allowed, retry_after = worker_a.check("k", policy)
+    assert not allowed and retry_after > 0
+
+    clock.now += 15.0
+    assert worker_b.check("k", policy)[0]
+
+
+def _make_app(limiter: RateLimiter) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/limited")
+    @rate_limit(max_requests=2, window_minutes=1)
+    def limited():
+        return {"ok": True}
+
+    @app.get("/items/{item_id}")
+    @rate_limit(max_requests=1, window_minutes=1, key="route")
+    def item(item_id: int):
+        return {"id": item_id}
+
+    @app.get("/free")
+    def free():
+        return {"ok": True}
+
+    app.add_middleware(RateLimitMiddleware, limiter=limiter)
+    return app
+
+
+def test_middleware_applies_route_policies():
+    limiter = RateLimiter(MemoryGCRABackend(), clock=FakeClock())
+    client = TestClient(_make_app(limiter))
+
+    assert client.get("/limited").status_code == 200
+    assert client.get("/limited").status_code == 200
+    response = client.get("/limited")
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) >= 1
+    assert "Rate limit atingido" in response.json()["detail"]
+
+    # Rota com parâmetro: chave "route" compartilha o bucket entre ids
+    assert client.get("/items/1").status_code == 200
+    assert client.get("/items/2").status_code == 429
+
+    # Rota sem política não é contada
+    for _ in range(10):
+        assert client.get("/free").status_code == 200
+    assert limiter.allowed == 3
@@ -0,0 +1,69 @@
+"""
+Testes dos rollups diários de analytics
+"""
+
+import pytest
+from sqlalchemy import text
+
+from app.services.rollup_service import catch_up_rollups, get_daily_series, rebuild_rollups
+
+
+@pytest.fixture
+def rollup_db(db_session):
+    db_session.execute(text("DELETE FROM daily_rollups"))
+    db_session.execute(text("DELETE FROM rollup_watermarks"))
+    db_session.commit()
+    yield db_session
+    db_session.execute(text("DELETE FROM daily_rollups"))
+    db_session.execute(text("DELETE FROM rollup_watermarks"))
+    db_session.commit()
+
+
+def _event(db, user_id, event_type, weight, ts):
+    db.execute(
+        text("INSERT INTO impact_events (user_id, type, weight, timestamp) VALUES (:u, :t, :w, :ts)"),
+        {"u": user_id, "t": event_type, "w": weight, "ts": ts},
+    )
+
+
+def test_catch_up_is_incremental(rollup_db):
+    _event(rollup_db, 701, "donation", 2.0, "2024-06-01 10:00:00")
+    _event(rollup_db, 701, "donation", 1.0, "2024-06-01 11:00:00")
+    _event(rollup_db, 702, "peer_review", 1.0, "2024-06-02 09:00:00")
+    rollup_db.commit()
+
+    assert catch_up_rollups(rollup_db)["impact"] >= 3
+    # Sem linhas novas: nada a fazer
+    assert catch_up_rollups(rollup_db)["impact"] == 0
+
+    _event(rollup_db, 701, "mission_completed", 3.0, "2024-06-02 12:00:00")
+    rollup_db.commit()
+    catch_up_rollups(rollup_db)
+
+    series = get_daily_series(rollup_db, 701, days=3, end="2024-06-02")
+    assert [p["date"] for p in series] == ["2024-05-31", "2024-06-01", "2024-06-02"]
+    assert series[0]["count"] == 0
+    assert series[1]["count"] == 2 and series[1]["weight"] == 3.0
+    assert series[2]["by_source"]["impact"] == {"count": 1, "weight": 3.0}
+
+    platform = get_daily_series(rollup_db, 0, days=2, end="2024-06-02")
+    assert [p["count"] for p in platform] == [2, 2]
+
+    # Reconstrução do zero produz o mesmo resultado
+    rebuild_rollups(rollup_db)
+    assert get_daily_series(rollup_db, 701, days=3, end="2024-06-02") == series
+
+
+def test_user_series_endpoint(client, rollup_db):
+    _event(rollup_db, 999, "community_vote", 2.0, "2024-06-02 08:00:00")
+    rollup_db.commit()
+    catch_up_rollups(rollup_db)
+
+    response = client.get("/analytics/users/999/daily?days=2&end=2024-06-02&source=impact")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["start"] == "2024-06-01" and body["end"] == "2024-06-02"
+    assert body["series"][1]["count"] == 1
+
+    response = client.get("/analytics/platform/daily?days=1&end=2024-13-01")
+    assert response.status_code == 400
@@ -0,0 +1,85 @@
+"""
+Testes do registro de prontidão de schema e das rotas de wallet sem DDL
+"""
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+
+from app.core.schema_readiness import SchemaRegistry, schema_registry
+from app.db.migrate import migrate
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _session(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'schema.db'}")
+    return engine, sessionmaker(bind=engine)()
+
+
+def test_ready_result_is_cached(tmp_path):
+    engine, db = _session(tmp_path)
+    db.execute(text("CREATE TABLE a (id INTEGER, x TEXT)"))
+    registry = SchemaRegistry()
+    registry.require("sub", tables=("a",), columns={"a": ("x",)})
+
+    assert registry.is_ready(db, "sub")
+    assert registry.is_ready(db, "sub")
+    assert registry.checks == 1
+
+
+def test_missing_schema_is_rechecked_after_interval(tmp_path):
+    engine, db = _session(tmp_path)
+    clock = FakeClock()
+    registry = SchemaRegistry(clock=clock)
+    registry.require("sub", tables=("a",), columns={"a": ("x",)})
+
+    assert not registry.is_ready(db, "sub")
+    db.execute(text("CREATE TABLE a (id INTEGER)"))
+    assert not registry.is_ready(db, "sub")
+    assert registry.checks == 1
+
+    # Tabela existe mas falta a coluna
+    clock.now += registry.RECHECK_SECONDS
+    assert not registry.is_ready(db, "sub")
+
+    db.execute(text("ALTER TABLE a ADD COLUMN x TEXT"))
+    clock.now += registry.RECHECK_SECONDS
+    assert registry.is_ready(db, "sub")
+    assert registry.checks == 3
+
+
+def test_wallet_routes_are_ready_after_migrations(tmp_path):
+    engine, db = _session(tmp_path)
+    migrate(engine)
+    registry = SchemaRegistry()
+    registry.require("wallet", tables=("wallet_addresses", "token_transfers"),
+                     columns={"wallet_addresses": ("nonce",)})
+    registry.require("wallet_ledger", tables=("token_ledger", "v_wallet_balance"))
+    assert registry.is_ready(db, "wallet")
+    assert registry.is_ready(db, "wallet_ledger")
+
+
+def test_wallet_status_issues_no_ddl(client, engine):
+    statements = []
+
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement.strip().split()[0].upper())
+
+    schema_registry.reset()
+    event.listen(engine, "before_cursor_execute", _capture)
+    try:
+        for _ in range(3):
+            response = client.get("/wallet/status")
+            assert response.status_code == 200
+            assert response.json()["connected"] is False
+    finally:
+        event.remove(engine, "before_cursor_execute", _capture)
+
+    assert statements
+    assert not {"CREATE", "ALTER", "DROP", "INSERT", "UPDATE", "DELETE"} & set(statements)
@@ -0,0 +1,39 @@
+"""
+Testes de import do app: dependências pesadas só são carregadas sob demanda
+"""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+_PROBE = """
+import json, sys
+import app.main
+paths = sorted({r.path for r in app.main.app.routes})
+print(json.dumps({"modules": sorted(sys.modules), "paths": paths}))
+"""
+
+
+def _import_app(**env_overrides):
+    env = dict(os.environ, **env_overrides)
+    result = subprocess.run(
+        [sys.executable, "-c", _PROBE], cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_heavy_dependencies_not_imported_at_startup():
+    loaded = set(_import_app()["modules"])
+    assert not {"eth_account", "httpx", "numpy", "uvicorn"} & loaded
+
+
+def test_disabled_subsystems_are_not_imported():
+    result = _import_app(ENABLE_AI="false", ENABLE_WALLET="false", ENABLE_STAKING="false")
+    loaded = set(result["modules"])
+    assert not {"app.routers.ai", "app.routers.wallet", "app.routers.staking", "app.services.vexa_ai"} & loaded
+    assert not any(p.startswith(("/ai", "/wallet", "/staking")) for p in result["paths"])
+    assert "/missions" in result["paths"]
@@ -0,0 +1,173 @@
+"""
+Testes do feed em alta (score com decaimento temporal mantido em memória)
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+
+from app.db.migrate import migrate
+from app.models.post import Post, PostComment, PostLike
+from app.models.user import User
+from app.schemas.post import PostCommentCreate, PostCreate
+from app.services import post_service as post_service_module
+from app.services.post_counters import PostCounterBuffer
+from app.services.post_service import PostService
+from app.services.trending import TrendingIndex, decode_cursor
+
+HOUR = 3600.0
+
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def _index(clock, **kwargs):
+    params = dict(half_life_seconds=HOUR, min_score=0.1, rebuild_seconds=0, clock=clock)
+    params.update(kwargs)
+    index = TrendingIndex(**params)
+    index._loaded_at = clock()  # sem banco
+    return index
+
+
+def _ids(index, limit=100):
+    return [post_id for post_id, _ in index.page(None, limit)[0]]
+
+
+def test_score_decays_by_half_life_and_order_follows_events():
+    clock = Clock(1_000_000.0)
+    index = _index(clock)
+    index.record(1, likes=4)
+    clock.now += HOUR
+    index.record(2, likes=3)
+    # 4 likes uma meia-vida atrás valem 2 agora
+    assert index.score(1) == pytest.approx(2.0)
+    assert index.score(2) == pytest.approx(3.0)
+    assert _ids(index) == [2, 1]
+
+    index.record(1, comments=1)  # +2
+    assert _ids(index) == [1, 2]
+    clock.now += 2 * HOUR
+    # Ordem não muda só com o tempo
+    assert _ids(index) == [1, 2]
+    assert index.score(1) == pytest.approx(1.0)
+
+    # Curtir e descurtir em seguida se anulam (spam de toggle não sobe o score)
+    for _ in range(10):
+        index.record(1, likes=1)
+        index.record(1, likes=-1)
+    assert index.score(1) == pytest.approx(1.0)
+    index.record(2, likes=-100)
+    assert _ids(index) == [1]
+
+
+def test_cursor_pages_cover_all_posts_once():
+    clock = Clock(5_000_000.0)
+    index = _index(clock)
+    for post_id in range(1, 26):
+        index.record(post_id, shares=post_id % 7 + 1)
+
+    seen, cursor = [], None
+    while True:
+        items, cursor = index.page(None, 10, cursor)
+        seen.extend(post_id for post_id, _ in items)
+        if cursor is None:
+            break
+    assert sorted(seen) == list(range(1, 26)) and len(seen) == 25
+    scores = [index.score(post_id) for post_id in seen]
+    assert scores == sorted(scores, reverse=True)
+    with pytest.raises(ValueError):
+        decode_cursor("abc")
+
+
+def test_compaction_drops_decayed_and_excess_posts():
+    clock = Clock(1_000_000.0)
+    index = _index(clock, max_posts=3)
+    index.record(1, likes=1)
+    clock.now += 3 * HOUR
+    for post_id in (2, 3, 4, 5):
+        index.record(post_id, likes=post_id)
+    # post 1 vale 1/8 < 0.1 depois de mais meia-vida; depois só os 3 maiores ficam
+    clock.now += HOUR
+    assert index.compact() == 2
+    assert _ids(index) == [5, 4, 3]
+    assert index.stats()["posts"] == 3 and index.compact() == 0
+
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'trending.db'}", connect_args={"check_same_thread": False})
+    migrate(engine)
+    Session = sessionmaker(bind=engine)
+    now = datetime.utcnow()
+    with Session() as db:
+        db.add_all([User(id=i, nickname=f"u{i}", password_hash="x") for i in range(1, 6)])
+        db.add_all([
+            Post(id=1, author_id=1, content="antigo", created_at=now - timedelta(hours=30)),
+            Post(id=2, author_id=1, content="curtido", created_at=now - timedelta(hours=2)),
+            Post(id=3, author_id=2, content="novo", created_at=now - timedelta(minutes=5)),
+            Post(id=4, author_id=2, content="removido", created_at=now, is_active=False),
+        ])
+        db.add_all([PostLike(user_id=u, post_id=2, created_at=now - timedelta(hours=1)) for u in range(1, 5)])
+        db.add(PostComment(user_id=3, post_id=1, content="ainda vivo", created_at=now - timedelta(hours=1)))
+        db.commit()
+    index = TrendingIndex(half_life_seconds=6 * HOUR, min_score=0.05, rebuild_seconds=0)
+    monkeypatch.setattr(post_service_module, "trending_index", index)
+    monkeypatch.setattr(post_service_module, "post_counter_buffer", PostCounterBuffer(max_ops=1000))
+    return engine, Session, index
+
+
+def test_rebuild_from_database_and_live_events(env):
+    engine, Session, index = env
+    db = Session()
+    service = PostService(db)
+    rows, scores, cursor = service.get_trending_rows(10)
+    assert [row[0] for row in rows] == [2, 1, 3] and cursor is None
+    assert scores[2] > scores[1] > scores[3]
+    assert index.rebuilds == 1
+
+    # Eventos vivos reordenam sem SQL de ordenação nem recarga
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    for user_id in range(1, 6):
+        service.comment_post(user_id, 3, PostCommentCreate(content="!"))
+    statements.clear()
+    rows, _, _ = service.get_trending_rows(2)
+    assert [row[0] for row in rows] == [3, 2]
+    assert rows[0][5] == 5  # comments_count com o delta pendente
+    assert len(statements) == 1 and "ORDER BY" not in statements[0]
+    assert index.rebuilds == 1
+
+    post = service.create_post(5, PostCreate(content="recém publicado"))
+    assert index.score(post.id) == pytest.approx(1.0, rel=0.01)
+    assert service.delete_post(post.id, 5)
+    assert index.score(post.id) == 0
+    db.close()
+
+
+def test_trending_skips_posts_deleted_elsewhere(env):
+    _, Session, index = env
+    db = Session()
+    service = PostService(db)
+    service.get_trending_rows(10)
+    db.execute(text("UPDATE posts SET is_active = 0 WHERE id = 2"))
+    db.commit()
+    rows, _, _ = service.get_trending_rows(10)
+    assert [row[0] for row in rows] == [1, 3]
+    assert index.score(2) == 0
+    db.close()
+
+
+def test_trending_endpoint(client):
+    response = client.get("/posts/trending", params={"limit": 5})
+    assert response.status_code == 200
+    body = response.json()
+    assert set(body) == {"posts", "next_cursor"}
+    assert all("trending_score" in post for post in body["posts"])
+    assert client.get("/posts/trending", params={"cursor": "x"}).status_code == 400
@@ -0,0 +1,111 @@
+"""
+Testes das estatísticas do usuário (consulta única + cache por usuário)
+"""
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+
+from app.db.migrate import migrate
+from app.models.post import Post
+from app.models.user import User
+from app.schemas.post import PostCreate
+from app.services import completion_index
+from app.services import user_stats as user_stats_module
+from app.services.post_service import PostService
+from app.services.user_service import UserService
+from app.services.user_stats import UserStatsCache, load_user_stats
+
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'stats.db'}")
+    migrate(engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        db.add_all([User(id=1, nickname="ana", password_hash="x", xp=120, level=2, tokens_earned=10),
+                    User(id=2, nickname="bia", password_hash="x")])
+        db.add_all([Post(author_id=1, content=f"p{i}", is_active=i % 10 != 0) for i in range(250)])
+        db.add(Post(author_id=2, content="outro"))
+        db.commit()
+        for day in ("2026-01-01", "2026-01-02"):
+            completion_index.mark_completed(db, 1, "v2:CHECKIN", source="v2", day=day)
+        completion_index.mark_completed(db, 1, "legacy:3", source="legacy", day="2026-01-02")
+        db.commit()
+    cache = UserStatsCache(ttl_seconds=60)
+    monkeypatch.setattr(user_stats_module, "user_stats_cache", cache)
+    monkeypatch.setattr("app.services.user_service.user_stats_cache", cache)
+    return engine, Session, cache
+
+
+def test_totals_are_correct_in_one_statement(env):
+    engine, Session, _ = env
+    db = Session()
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    stats = load_user_stats(db, 1)
+    assert len(statements) == 1
+    assert stats == {
+        "user_id": 1, "nickname": "ana", "level": 2, "xp": 120,
+        "tokens_earned": "10.00", "tokens_available": "0.00", "tokens_in_yield": "0.00",
+        "posts_created": 225, "missions_completed": 3,
+    }
+    assert load_user_stats(db, 404) is None
+    db.close()
+
+
+def test_count_uses_author_index(env):
+    engine, _, _ = env
+    with engine.connect() as conn:
+        plan = " ".join(str(row[-1]) for row in conn.execute(text(
+            "EXPLAIN QUERY PLAN SELECT COUNT(*) FROM posts WHERE author_id = 1 AND is_active = 1"
+        )))
+    assert "COVERING INDEX idx_posts_author_active" in plan
+
+
+def test_cache_hits_and_invalidation_on_writes(env):
+    engine, Session, cache = env
+    db = Session()
+    service = UserService(db)
+    assert service.get_user_stats(1)["posts_created"] == 225
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    assert service.get_user_stats(1)["posts_created"] == 225
+    assert statements == [] and cache.hits == 1
+
+    post = PostService(db).create_post(1, PostCreate(content="novo"))
+    assert service.get_user_stats(1)["posts_created"] == 226
+    PostService(db).delete_post(post.id, 1)
+    assert service.get_user_stats(1)["posts_created"] == 225
+
+    completion_index.mark_completed(db, 1, "rt:evento", source="realtime", day="2026-01-03")
+    db.commit()
+    assert service.get_user_stats(1)["missions_completed"] == 4
+
+    assert service.get_user_stats(404) is None
+    db.close()
+
+
+def test_read_between_write_and_commit_is_not_cached(env):
+    _, Session, cache = env
+    writer, reader = Session(), Session()
+    cache.get(reader, 2)
+    reader.rollback()
+    completion_index.mark_completed(writer, 2, "legacy:1", source="legacy", day="2026-01-01")
+    # Leitura antes do commit do writer: valor antigo, mas não entra no cache
+    assert cache.get(reader, 2)["missions_completed"] == 0
+    reader.rollback()
+    writer.commit()
+    assert cache.get(reader, 2)["missions_completed"] == 1
+    writer.close()
+    reader.close()
+
+
+def test_stats_endpoint(client, db_session):
+    db_session.merge(User(id=999, nickname="testuser", password_hash="x"))
+    db_session.commit()
+    response = client.get("/users/stats")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["user_id"] == 999 and "posts_created" in body and "missions_completed" in body
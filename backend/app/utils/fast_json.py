@@ -0,0 +1,141 @@
+"""
+Caminho rápido de serialização JSON para endpoints de listagem
+
+Os serviços devolvem tuplas de selects Core (sem ORM nem Pydantic por item)
+e um RowEncoder, com o layout de campos pré-computado, monta os dicts e
+codifica a página inteira de uma vez (orjson, ou pydantic_core como
+fallback). As rotas continuam declarando response_model, então o schema
+OpenAPI não muda; como o handler devolve um Response pronto, o FastAPI não
+revalida a saída.
+"""
+
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Type, Union
+
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependência opcional
+    orjson = None
+
+if orjson is None:  # pragma: no cover
+    from pydantic_core import to_json as _to_json
+
+
+def dumps(obj: Any) -> bytes:
+    """Serializa para JSON (bytes) com o encoder mais rápido disponível"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default)
+    return _to_json(obj)  # pragma: no cover
+
+
+def _default(value: Any):
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Tipo não serializável: {type(value).__name__}")
+
+
+def iso(value: Optional[Union[datetime, date]]) -> Optional[str]:
+    """datetime -> ISO 8601 (mesmo formato de .isoformat() usado nos serviços)"""
+    return value.isoformat() if value is not None else None
+
+
+def decimal_str(value: Optional[Decimal]) -> Optional[str]:
+    return str(value) if value is not None else None
+
+
+# Item de layout: "campo", ("campo", conversor) ou ("campo", (subcampos...))
+LayoutItem = Union[str, Tuple[str, Callable[[Any], Any]], Tuple[str, Sequence[str]]]
+
+
+class FastJSONResponse(Response):
+    """Response JSON que aceita bytes já codificados ou objetos simples"""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
+
+
+class RowEncoder:
+    """
+    Converte tuplas de um select em dicts com layout fixo
+
+    O layout é compilado uma única vez em uma função `tupla -> dict`
+    (um literal de dict com índices fixos), então o custo por linha é só o
+    de montar o dict. Subcampos consomem colunas consecutivas e viram um
+    dict aninhado.
+
+    Args:
+        layout: Campos na ordem das colunas do select
+        constants: Campos fixos adicionados a cada linha
+        model: Response model para validar (na construção) que o layout
+            cobre os campos obrigatórios e não cria campos extras
+    """
+
+    def __init__(self, layout: Sequence[LayoutItem], constants: Optional[Dict[str, Any]] = None,
+                 model: Optional[Type[BaseModel]] = None):
+        self.constants = constants or {}
+        self.fields: List[str] = []
+        self.width = 0
+        self._row_to_dict = self._compile(layout)
+        if model is not None:
+            self._check_model(model)
+
+    def _compile(self, layout: Sequence[LayoutItem]) -> Callable[[Sequence[Any]], Dict[str, Any]]:
+        namespace: Dict[str, Any] = {}
+        parts: List[str] = []
+        index = 0
+        for n, item in enumerate(layout):
+            if isinstance(item, str):
+                name, spec = item, None
+            else:
+                name, spec = item[0], item[1]
+            self.fields.append(name)
+
+            if spec is None:
+                parts.append(f"{name!r}: r[{index}]")
+                index += 1
+            elif callable(spec):
+                namespace[f"_c{n}"] = spec
+                parts.append(f"{name!r}: _c{n}(r[{index}])")
+                index += 1
+            else:
+                inner = ", ".join(f"{sub!r}: r[{i}]" for i, sub in enumerate(spec, index))
+                parts.append(f"{name!r}: {{{inner}}}")
+                index += len(spec)
+
+        for k, (name, value) in enumerate(self.constants.items()):
+            namespace[f"_k{k}"] = value
+            parts.append(f"{name!r}: _k{k}")
+            self.fields.append(name)
+
+        self.width = index
+        source = "lambda r: {" + ", ".join(parts) + "}"
+        return eval(source, namespace)  # noqa: S307 - código gerado a partir do layout
+
+    def _check_model(self, model: Type[BaseModel]):
+        declared = set(model.model_fields)
+        produced = set(self.fields)
+        missing = {name for name, field in model.model_fields.items() if field.is_required()} - produced
+        extra = produced - declared
+        if missing or extra:
+            raise ValueError(
+                f"Layout incompatível com {model.__name__}: faltando={sorted(missing)} extras={sorted(extra)}"
+            )
+
+    def to_dicts(self, rows: Iterable[Sequence[Any]]) -> List[Dict[str, Any]]:
+        row_to_dict = self._row_to_dict
+        return [row_to_dict(row) for row in rows]
+
+    def encode(self, rows: Iterable[Sequence[Any]]) -> bytes:
+        """Lista JSON (bytes) com uma entrada por linha"""
+        return dumps(self.to_dicts(rows))
+
+    def response(self, rows: Iterable[Sequence[Any]], status_code: int = 200) -> FastJSONResponse:
+        return FastJSONResponse(self.encode(rows), status_code=status_code)
@@ -0,0 +1,304 @@
+"""
+Cache de GETs condicionais (ETag / If-None-Match) por contadores de versão
+
+O ETag não é calculado a partir do corpo: cada tabela tem um contador de
+versão em memória, incrementado a cada escrita (eventos do SQLAlchemy), e o
+ETag de uma resposta é o hash de (rota, path+query, usuário, versões das
+tabelas de que ela depende). Assim o middleware responde 304 ou devolve o
+corpo serializado do cache sem executar o handler nem tocar no banco.
+
+- Rotas declaram dependências com o decorator @cached_get (não envolve o
+  handler) e o ConditionalGetMiddleware (ASGI puro) aplica a política.
+- Escritas fora deste processo (scripts, outros servidores) não incrementam
+  os contadores; HTTP_CACHE_MAX_AGE_SECONDS limita por quanto tempo um ETag
+  continua válido nesse caso.
+"""
+
+import hashlib
+import logging
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool
+
+from app.utils.route_policies import RoutePolicyTable, user_id_from_scope
+
+logger = logging.getLogger(__name__)
+
+CACHE_POLICY_ATTR = "__cache_policy__"
+_PENDING_KEY = "http_cache_pending_tables"
+
+_WRITE_RE = re.compile(
+    r"^\s*(?:INSERT(?:\s+OR\s+\w+)?\s+INTO|REPLACE\s+INTO|UPDATE(?:\s+OR\s+\w+)?|DELETE\s+FROM)\s+[\"`\[]?(\w+)",
+    re.IGNORECASE,
+)
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """Tabelas de que a resposta depende e se ela varia por usuário"""
+    tables: Tuple[str, ...]
+    vary_user: bool = False
+    key_extra: Optional[Callable[[], str]] = None
+
+
+class VersionRegistry:
+    """Contadores de versão por tabela (em memória, por processo)"""
+
+    def __init__(self):
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        # Contadores recomeçam a cada boot: o id evita colisão com ETags antigos
+        self.boot_id = uuid.uuid4().hex
+
+    def bump(self, tables: Iterable[str]):
+        with self._lock:
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+
+    def snapshot(self, tables: Iterable[str]) -> Tuple[int, ...]:
+        versions = self._versions
+        return tuple(versions.get(table, 0) for table in tables)
+
+    def get(self, table: str) -> int:
+        return self._versions.get(table, 0)
+
+
+def written_tables(statement: str) -> Optional[str]:
+    """Tabela alvo de um INSERT/UPDATE/DELETE, ou None para leituras/DDL"""
+    match = _WRITE_RE.match(statement)
+    return match.group(1).lower() if match else None
+
+
+def install_write_tracking(registry: "VersionRegistry"):
+    """
+    Incrementa as versões a cada escrita feita por qualquer Engine do processo
+
+    A versão sobe quando a escrita é executada e de novo quando a conexão
+    volta ao pool (após commit/rollback). O segundo incremento evita que uma
+    leitura feita entre a escrita e o commit fique em cache com a versão nova.
+    """
+
+    @event.listens_for(Engine, "after_cursor_execute")
+    def _track_write(conn, cursor, statement, parameters, context, executemany):
+        table = written_tables(statement)
+        if table is None:
+            return
+        conn.info.setdefault(_PENDING_KEY, set()).add(table)
+        registry.bump((table,))
+
+    @event.listens_for(Pool, "checkin")
+    def _flush_pending(dbapi_connection, connection_record):
+        if connection_record is None:
+            return
+        pending = connection_record.info.pop(_PENDING_KEY, None)
+        if pending:
+            registry.bump(pending)
+
+
+class ResponseCache:
+    """LRU de corpos serializados por ETag, limitado por entradas e bytes"""
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 16 * 1024 * 1024,
+                 max_entry_bytes: int = 256 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self._entries: "OrderedDict[str, Tuple[List[Tuple[bytes, bytes]], bytes]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.not_modified = 0
+        self.hits = 0
+        self.misses = 0
+
+    def configure(self, max_entries: int, max_bytes: int):
+        with self._lock:
+            self.max_entries = max_entries
+            self.max_bytes = max_bytes
+
+    def get(self, etag: str) -> Optional[Tuple[List[Tuple[bytes, bytes]], bytes]]:
+        with self._lock:
+            entry = self._entries.get(etag)
+            if entry is not None:
+                self._entries.move_to_end(etag)
+            return entry
+
+    def put(self, etag: str, headers: List[Tuple[bytes, bytes]], body: bytes):
+        if len(body) > self.max_entry_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(etag, None)
+            if old is not None:
+                self._bytes -= len(old[1])
+            self._entries[etag] = (headers, body)
+            self._bytes += len(body)
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.not_modified = self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, float]:
+        total = self.not_modified + self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "not_modified": self.not_modified,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.not_modified + self.hits) / total, 4) if total else 0.0,
+        }
+
+
+def cached_get(tables: Iterable[str], vary_user: bool = False,
+               key_extra: Optional[Callable[[], str]] = None):
+    """
+    Decorator que declara as dependências de cache de uma rota GET
+
+    Não envolve o handler: apenas anota a função, e o ConditionalGetMiddleware
+    responde 304 / corpo em cache enquanto as versões das tabelas não mudarem.
+
+    Args:
+        tables: Tabelas lidas pelo handler
+        vary_user: Resposta depende do usuário autenticado (JWT)
+        key_extra: Função com componente extra da chave (ex.: data do dia)
+
+    Returns:
+        Decorator
+    """
+    policy = CachePolicy(tables=tuple(tables), vary_user=vary_user, key_extra=key_extra)
+
+    def decorator(func: Callable):
+        setattr(func, CACHE_POLICY_ATTR, policy)
+        return func
+    return decorator
+
+
+def _etag_matches(if_none_match: bytes, etag: bytes) -> bool:
+    if if_none_match.strip() == b"*":
+        return True
+    opaque = etag[2:] if etag.startswith(b"W/") else etag
+    for candidate in if_none_match.split(b","):
+        candidate = candidate.strip()
+        if candidate.startswith(b"W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+class ConditionalGetMiddleware:
+    """
+    Middleware ASGI que aplica as políticas declaradas com @cached_get
+
+    Rotas que variam por usuário sem token válido passam direto para o handler
+    (que responde 401), então o cache nunca substitui a autenticação.
+    """
+
+    def __init__(self, app, registry: Optional[VersionRegistry] = None,
+                 cache: Optional[ResponseCache] = None, max_age_seconds: float = 300):
+        self.app = app
+        self.registry = registry or version_registry
+        self.cache = cache or response_cache
+        self.max_age_seconds = max_age_seconds
+        self.routes = RoutePolicyTable(CACHE_POLICY_ATTR)
+
+    def _etag(self, scope, template: str, policy: CachePolicy, user_id: Optional[str]) -> bytes:
+        epoch = int(time.time() // self.max_age_seconds) if self.max_age_seconds > 0 else 0
+        extra = policy.key_extra() if policy.key_extra else ""
+        key = "|".join((
+            self.registry.boot_id,
+            template,
+            scope["path"],
+            scope.get("query_string", b"").decode("latin-1"),
+            user_id or "",
+            extra,
+            ",".join(map(str, self.registry.snapshot(policy.tables))),
+            str(epoch),
+        ))
+        return b'W/"' + hashlib.blake2b(key.encode(), digest_size=12).hexdigest().encode() + b'"'
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        match = self.routes.resolve(scope)
+        if match is None:
+            await self.app(scope, receive, send)
+            return
+
+        template, policy = match
+        user_id = None
+        if policy.vary_user:
+            user_id = user_id_from_scope(scope)
+            if user_id is None:
+                await self.app(scope, receive, send)
+                return
+
+        etag = self._etag(scope, template, policy, user_id)
+        cache_headers = [
+            (b"etag", etag),
+            (b"cache-control", b"private, no-cache" if policy.vary_user else b"no-cache"),
+        ]
+        if policy.vary_user:
+            cache_headers.append((b"vary", b"Authorization, Cookie"))
+
+        if_none_match = None
+        for name, value in scope.get("headers", ()):
+            if name == b"if-none-match":
+                if_none_match = value
+                break
+
+        if if_none_match is not None and _etag_matches(if_none_match, etag):
+            self.cache.not_modified += 1
+            await send({"type": "http.response.start", "status": 304, "headers": cache_headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        key = etag.decode()
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.cache.hits += 1
+            headers, body = cached
+            await send({"type": "http.response.start", "status": 200, "headers": headers + cache_headers})
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        self.cache.misses += 1
+        captured: Dict[str, object] = {"status": None, "headers": [], "chunks": [], "cacheable": False}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                captured["status"] = message["status"]
+                captured["headers"] = [h for h in headers if h[0].lower() in (b"content-type", b"content-length")]
+                captured["cacheable"] = message["status"] == 200 and not any(
+                    h[0].lower() == b"set-cookie" for h in headers
+                )
+                if captured["cacheable"]:
+                    message = dict(message, headers=headers + cache_headers)
+            elif message["type"] == "http.response.body" and captured["cacheable"]:
+                captured["chunks"].append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    self.cache.put(key, captured["headers"], b"".join(captured["chunks"]))
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+# Instâncias globais (um cache por processo)
+version_registry = VersionRegistry()
+response_cache = ResponseCache()
+install_write_tracking(version_registry)
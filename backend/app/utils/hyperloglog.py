@@ -0,0 +1,95 @@
+"""
+HyperLogLog: estimativa de cardinalidade (valores distintos) em memória fixa
+
+Com precisão p, o sketch tem m = 2^p registradores de um byte e erro
+padrão de ~1.04/sqrt(m) (p=10: 1 KiB, ~3%). Sketches da mesma precisão
+se combinam com merge (máximo por registrador): a união de salas dá o
+total de usuários distintos da plataforma sem reler as mensagens.
+
+Serialização compacta: poucos registradores preenchidos são gravados
+como pares (índice, valor); acima disso, o vetor denso.
+"""
+
+import struct
+from hashlib import blake2b
+from math import log
+from typing import Iterable, Optional
+
+DEFAULT_PRECISION = 10
+_SPARSE_FLAG = 0x80
+_PAIR = struct.Struct(">HB")
+
+
+def _hash64(value) -> int:
+    return int.from_bytes(blake2b(str(value).encode(), digest_size=8).digest(), "big")
+
+
+class HyperLogLog:
+    """Sketch HyperLogLog com hash de 64 bits (sem correção de faixa alta)"""
+
+    __slots__ = ("p", "m", "registers")
+
+    def __init__(self, p: int = DEFAULT_PRECISION, registers: Optional[bytearray] = None):
+        if not 4 <= p <= 16:
+            raise ValueError("Precisão do HyperLogLog deve estar entre 4 e 16")
+        self.p = p
+        self.m = 1 << p
+        self.registers = registers if registers is not None else bytearray(self.m)
+
+    @classmethod
+    def of(cls, values: Iterable, p: int = DEFAULT_PRECISION) -> "HyperLogLog":
+        sketch = cls(p)
+        for value in values:
+            sketch.add(value)
+        return sketch
+
+    def add(self, value) -> bool:
+        """Adiciona um valor; retorna True se algum registrador mudou"""
+        h = _hash64(value)
+        index = h >> (64 - self.p)
+        rest = h & ((1 << (64 - self.p)) - 1)
+        rank = (64 - self.p) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+            return True
+        return False
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        """União in-place com outro sketch da mesma precisão"""
+        if other.p != self.p:
+            raise ValueError("Sketches com precisões diferentes")
+        registers = self.registers
+        for i, value in enumerate(other.registers):
+            if value > registers[i]:
+                registers[i] = value
+        return self
+
+    def count(self) -> int:
+        m = self.m
+        alpha = {16: 0.673, 32: 0.697, 64: 0.709}.get(m, 0.7213 / (1 + 1.079 / m))
+        zeros = self.registers.count(0)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        if estimate <= 2.5 * m and zeros:
+            # Faixa baixa: contagem linear (praticamente exata para salas pequenas)
+            return round(m * log(m / zeros))
+        return round(estimate)
+
+    def to_bytes(self) -> bytes:
+        filled = [(i, r) for i, r in enumerate(self.registers) if r]
+        if len(filled) * _PAIR.size < self.m:
+            return bytes([_SPARSE_FLAG | self.p]) + b"".join(_PAIR.pack(i, r) for i, r in filled)
+        return bytes([self.p]) + bytes(self.registers)
+
+    @classmethod
+    def from_bytes(cls, data: Optional[bytes], p: int = DEFAULT_PRECISION) -> "HyperLogLog":
+        """Desserializa (blob vazio/None = sketch vazio de precisão p)"""
+        if not data:
+            return cls(p)
+        header, body = data[0], data[1:]
+        sketch = cls(header & ~_SPARSE_FLAG)
+        if header & _SPARSE_FLAG:
+            for index, rank in _PAIR.iter_unpack(body):
+                sketch.registers[index] = rank
+        else:
+            sketch.registers[:] = body
+        return sketch
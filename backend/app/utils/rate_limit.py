@@ -1,63 +1,249 @@
 """
-Rate limiting simples para endpoints
+Rate limiting por GCRA (Generic Cell Rate Algorithm)
+
+Cada chave guarda um único float (TAT - theoretical arrival time), então o
+custo por requisição é O(1) e chaves ociosas podem ser descartadas sem perda
+(uma chave com TAT no passado equivale a uma chave nova).
+
+- Políticas são declaradas por rota com o decorator @rate_limit (não envolve
+  o handler) e aplicadas pelo RateLimitMiddleware (ASGI puro).
+- Chaves: "ip", "user" (sub do JWT, com fallback para IP) ou "route" (global).
+- Backend em memória (por processo) ou SQLite compartilhado entre workers.
 """
 
-from collections import defaultdict
-from datetime import datetime, timedelta
-from typing import Callable
-from fastapi import Request, HTTPException, status
-from functools import wraps
+import json
 import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+
+from app.utils.route_policies import RoutePolicyTable, client_ip_from_scope, user_id_from_scope
 
 logger = logging.getLogger(__name__)
 
-# Armazenamento em memória (limpa em produção seria necessário Redis)
-_rate_limiter: dict[str, list[datetime]] = defaultdict(list)
+RATE_LIMIT_ATTR = "__rate_limit_policy__"
+VALID_KEYS = ("ip", "user", "route")
+
+
+@dataclass(frozen=True)
+class RatePolicy:
+    """Até `max_requests` por `period_seconds` (rajada = max_requests)"""
+    max_requests: int
+    period_seconds: float
+    key: str = "ip"
+
+    def __post_init__(self):
+        if self.key not in VALID_KEYS:
+            raise ValueError(f"Chave de rate limit inválida: {self.key}")
+        if self.max_requests < 1 or self.period_seconds <= 0:
+            raise ValueError("max_requests e period_seconds devem ser positivos")
+
+    @property
+    def emission_interval(self) -> float:
+        return self.period_seconds / self.max_requests
+
+
+class MemoryGCRABackend:
+    """Estado por chave em memória (LRU com descarte de chaves ociosas)"""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._tat: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key: str, policy: RatePolicy, now: float) -> Tuple[bool, float]:
+        """Registra uma requisição; retorna (permitida, retry_after_segundos)"""
+        interval = policy.emission_interval
+        with self._lock:
+            tat = self._tat.get(key, now)
+            new_tat = (tat if tat > now else now) + interval
+            allowed = new_tat - now <= policy.period_seconds
+            if allowed:
+                self._tat[key] = new_tat
+            self._tat.move_to_end(key)
+            self._evict(now)
+        if allowed:
+            return True, 0.0
+        return False, new_tat - now - policy.period_seconds
+
+    def _evict(self, now: float):
+        # Remove do início da LRU chaves ociosas (TAT já passou) e excedentes
+        for _ in range(2):
+            if not self._tat:
+                return
+            oldest_key, oldest_tat = next(iter(self._tat.items()))
+            if oldest_tat <= now or len(self._tat) > self.max_keys:
+                del self._tat[oldest_key]
+            else:
+                return
+
+    def __len__(self) -> int:
+        return len(self._tat)
+
+    def reset(self):
+        with self._lock:
+            self._tat.clear()
+
+
+class SQLiteGCRABackend:
+    """
+    Estado compartilhado entre workers em um arquivo SQLite dedicado
+
+    Cada hit é um único upsert condicional, atômico entre processos.
+    """
+
+    EVICT_EVERY = 1000
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._calls = 0
+        conn = self._conn()
+        conn.execute("CREATE TABLE IF NOT EXISTS rate_limits (key TEXT PRIMARY KEY, tat REAL NOT NULL)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+        return conn
+
+    def hit(self, key: str, policy: RatePolicy, now: float) -> Tuple[bool, float]:
+        interval = policy.emission_interval
+        conn = self._conn()
+        cursor = conn.execute(
+            """
+            INSERT INTO rate_limits (key, tat) VALUES (?1, ?2 + ?3)
+            ON CONFLICT(key) DO UPDATE SET tat = MAX(tat, ?2) + ?3
+            WHERE MAX(tat, ?2) + ?3 - ?2 <= ?4
+            """,
+            (key, now, interval, policy.period_seconds),
+        )
+        self._calls += 1
+        if self._calls % self.EVICT_EVERY == 0:
+            conn.execute("DELETE FROM rate_limits WHERE tat <= ?", (now,))
+        if cursor.rowcount:
+            return True, 0.0
+        row = conn.execute("SELECT tat FROM rate_limits WHERE key = ?", (key,)).fetchone()
+        tat = row[0] if row else now
+        return False, max(tat, now) + interval - now - policy.period_seconds
 
+    def reset(self):
+        self._conn().execute("DELETE FROM rate_limits")
 
-def rate_limit(max_requests: int = 10, window_minutes: int = 1):
+
+class RateLimiter:
+    """Aplica políticas sobre um backend"""
+
+    def __init__(self, backend=None, clock: Callable[[], float] = time.time):
+        self.backend = backend or MemoryGCRABackend()
+        self.clock = clock
+        self.allowed = 0
+        self.denied = 0
+
+    def check(self, bucket: str, policy: RatePolicy) -> Tuple[bool, float]:
+        allowed, retry_after = self.backend.hit(bucket, policy, self.clock())
+        if allowed:
+            self.allowed += 1
+        else:
+            self.denied += 1
+        return allowed, retry_after
+
+    def reset(self):
+        self.backend.reset()
+        self.allowed = 0
+        self.denied = 0
+
+
+def rate_limit(max_requests: int = 10, window_minutes: float = 1, key: str = "ip"):
     """
-    Decorator para rate limiting simples
-    
+    Decorator que declara a política de rate limit da rota
+
+    Não envolve o handler: apenas anota a função, e o RateLimitMiddleware
+    aplica a política antes de a rota executar.
+
     Args:
         max_requests: Número máximo de requisições
         window_minutes: Janela de tempo em minutos
-        
+        key: "ip", "user" ou "route"
+
     Returns:
         Decorator
     """
+    policy = RatePolicy(max_requests=max_requests, period_seconds=window_minutes * 60, key=key)
+
     def decorator(func: Callable):
-        @wraps(func)
-        async def wrapper(request: Request, *args, **kwargs):
-            # Obter IP do cliente
-            client_ip = request.client.host if request.client else "unknown"
-            
-            # Limpar requisições antigas
-            now = datetime.utcnow()
-            window_start = now - timedelta(minutes=window_minutes)
-            
-            # Limpar requisições fora da janela
-            _rate_limiter[client_ip] = [
-                timestamp
-                for timestamp in _rate_limiter[client_ip]
-                if timestamp > window_start
-            ]
-            
-            # Verificar limite
-            if len(_rate_limiter[client_ip]) >= max_requests:
-                logger.warning(f"Rate limit atingido para IP: {client_ip}")
-                raise HTTPException(
-                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                    detail=f"Rate limit atingido. Máximo {max_requests} requisições por {window_minutes} minuto(s)"
-                )
-            
-            # Adicionar nova requisição
-            _rate_limiter[client_ip].append(now)
-            
-            # Executar função
-            return await func(request, *args, **kwargs)
-        
-        return wrapper
+        setattr(func, RATE_LIMIT_ATTR, policy)
+        return func
     return decorator
 
 
+class RateLimitMiddleware:
+    """
+    Middleware ASGI que aplica as políticas declaradas com @rate_limit
+
+    A tabela de rotas com política é montada na primeira requisição a partir
+    de scope["app"].routes (ver RoutePolicyTable).
+    """
+
+    def __init__(self, app, limiter: Optional[RateLimiter] = None,
+                 policies: Optional[Dict[Tuple[str, str], RatePolicy]] = None):
+        self.app = app
+        self.limiter = limiter or default_limiter
+        self.routes = RoutePolicyTable(RATE_LIMIT_ATTR, policies)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        match = self.routes.resolve(scope)
+        if match is None:
+            await self.app(scope, receive, send)
+            return
+
+        template, policy = match
+        if policy.key == "route":
+            subject = "*"
+        else:
+            subject = user_id_from_scope(scope) if policy.key == "user" else None
+            if subject is None:
+                subject = client_ip_from_scope(scope)
+        bucket = f"{scope['method']} {template}|{policy.key}:{subject}"
+
+        allowed, retry_after = self.limiter.check(bucket, policy)
+        if allowed:
+            await self.app(scope, receive, send)
+            return
+
+        logger.warning(f"Rate limit atingido: {bucket}")
+        window_minutes = policy.period_seconds / 60
+        body = json.dumps({
+            "detail": f"Rate limit atingido. Máximo {policy.max_requests} requisições por {window_minutes:g} minuto(s)"
+        }).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, int(retry_after + 0.999))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def build_limiter(shared_path: Optional[str] = None) -> RateLimiter:
+    """Limiter em memória, ou compartilhado via SQLite se `shared_path` for informado"""
+    if shared_path:
+        return RateLimiter(SQLiteGCRABackend(shared_path))
+    return RateLimiter(MemoryGCRABackend())
+
+
+# Instância padrão do middleware quando nenhum limiter é informado
+default_limiter = RateLimiter()
@@ -0,0 +1,92 @@
+"""
+Utilitários para middlewares ASGI que aplicam políticas declaradas por rota
+
+Os decorators (ex.: @rate_limit, @cached_get) apenas anotam o handler com um
+atributo; os middlewares montam, na primeira requisição, uma tabela
+(método, path) -> política a partir de scope["app"].routes.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class RoutePolicyTable:
+    """
+    Tabela de políticas por rota
+
+    Rotas estáticas vão para um dict (O(1)) e rotas com parâmetros para uma
+    lista curta de regex.
+    """
+
+    def __init__(self, attr: str, extra: Optional[Dict[Tuple[str, str], Any]] = None):
+        self.attr = attr
+        self.extra = extra or {}
+        self._static: Optional[Dict[Tuple[str, str], Tuple[str, Any]]] = None
+        self._dynamic: List[Tuple[str, object, str, Any]] = []
+
+    @property
+    def built(self) -> bool:
+        return self._static is not None
+
+    def build(self, app):
+        # Políticas explícitas de rotas estáticas valem mesmo sem rota registrada
+        static: Dict[Tuple[str, str], Tuple[str, Any]] = {
+            (method, path): (path, policy)
+            for (method, path), policy in self.extra.items()
+            if "{" not in path
+        }
+        dynamic = []
+        for route in getattr(app, "routes", []):
+            endpoint = getattr(route, "endpoint", None)
+            path = getattr(route, "path", None)
+            methods = getattr(route, "methods", None) or set()
+            if endpoint is None or path is None:
+                continue
+            for method in methods:
+                policy = self.extra.get((method, path)) or getattr(endpoint, self.attr, None)
+                if policy is None:
+                    continue
+                if "{" in path:
+                    dynamic.append((method, route.path_regex, path, policy))
+                else:
+                    static[(method, path)] = (path, policy)
+        self._static = static
+        self._dynamic = dynamic
+
+    def resolve(self, scope) -> Optional[Tuple[str, Any]]:
+        """(template da rota, política) para a requisição, ou None"""
+        if self._static is None:
+            self.build(scope.get("app"))
+        method, path = scope["method"], scope["path"]
+        match = self._static.get((method, path))
+        if match is not None:
+            return match
+        for route_method, regex, template, policy in self._dynamic:
+            if route_method == method and regex.match(path):
+                return template, policy
+        return None
+
+
+def user_id_from_scope(scope) -> Optional[str]:
+    """sub do JWT (cookie ou Authorization), verificado; None se ausente/inválido"""
+    token = None
+    for name, value in scope.get("headers", ()):
+        if name == b"authorization" and value.startswith(b"Bearer "):
+            token = value[7:].decode("latin-1")
+            break
+        if name == b"cookie" and b"connectus_access_token=" in value:
+            for part in value.decode("latin-1").split(";"):
+                k, _, v = part.strip().partition("=")
+                if k == "connectus_access_token":
+                    token = v
+                    break
+    if not token:
+        return None
+    from app.core.auth import verify_token
+    payload = verify_token(token)
+    sub = payload.get("sub") if payload else None
+    return str(sub) if sub is not None else None
+
+
+def client_ip_from_scope(scope) -> str:
+    client = scope.get("client")
+    return client[0] if client else "unknown"
@@ -9,7 +9,8 @@ import os
 # Adicionar o diretório atual ao path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from app.core.database import create_tables
+from app.core.database import engine
+from app.db.migrate import migrate
 from app.core.config import settings
 
 def main():
@@ -17,12 +18,10 @@ def main():
     print(f"📁 Database URL: {settings.DATABASE_URL}")
     
     try:
-        # Criar tabelas
-        create_tables()
+        # Aplicar migrações pendentes
+        applied = migrate(engine)
         print("✅ Banco de dados inicializado com sucesso!")
-        print("📋 Tabelas criadas:")
-        print("   - users")
-        print("   - (outras tabelas serão criadas conforme necessário)")
+        print(f"📋 Migrações aplicadas: {applied or 'nenhuma (schema já atualizado)'}")
         
     except Exception as e:
         print(f"❌ Erro ao inicializar banco de dados: {e}")
@@ -11,6 +11,7 @@ import uvicorn
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app.core.config import settings
+from app.db.migrate import main as migrate
 
 def main():
     print("🚀 Iniciando servidor Connectus...")
@@ -19,6 +20,11 @@ def main():
     print(f"🔧 Health: http://127.0.0.1:8000/health")
     print(f"🐛 Debug: {settings.DEBUG}")
     
+    # Migrações pendentes antes de subir (como o Procfile)
+    if migrate([]) != 0:
+        print("❌ Erro ao aplicar migrações")
+        sys.exit(1)
+    
     try:
         uvicorn.run(
             "app.main:app",
@@ -1,3 +1,5 @@
 #!/bin/bash
 # [CONNECTUS HOTFIX] Script de execução com reload-exclude para evitar loops
+# Migrações pendentes antes de subir (como o Procfile)
+python -m app.db.migrate || exit 1
 uvicorn app.main:app --host 127.0.0.1 --port 8000 --reload --reload-exclude "scripts/*" --reload-exclude "*.db*"
@@ -1,22 +1,15 @@
 # backend/scripts/apply_sql_migration.py
-import sys, sqlite3, pathlib
-from _db_path import get_db_path
+# Wrapper do runner de migrações (app/db/migrate.py): aplica as migrações
+# pendentes de app/db/migrations, registrando-as em schema_migrations.
+import sys, pathlib
 
-if len(sys.argv) < 2:
-    print("Usage: python backend/scripts/apply_sql_migration.py <path/to.sql>")
-    sys.exit(1)
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
 
-sql_file = pathlib.Path(sys.argv[1])
-if not sql_file.exists():
-    print("SQL file not found:", sql_file)
-    sys.exit(2)
-
-db = get_db_path()
-sql = sql_file.read_text(encoding="utf-8")
+from app.db.migrate import main
 
-con = sqlite3.connect(db)
-con.executescript(sql)
-con.commit()
-con.close()
-print(f"[OK] Applied {sql_file} to {db}")
+if len(sys.argv) > 1 and sys.argv[1].endswith(".sql"):
+    print("Arquivos avulsos não são mais aplicados diretamente; "
+          "coloque-os em app/db/migrations/NNN_nome.sql e rode este script sem argumentos.")
+    sys.exit(2)
 
+sys.exit(main(sys.argv[1:]))
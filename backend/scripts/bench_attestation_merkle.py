@@ -0,0 +1,88 @@
+"""
+Benchmark dos lotes de attestation (árvore de Merkle)
+
+Popula impact_scores com N usuários em um banco SQLite temporário, mede o
+lote inicial completo, um lote incremental com uma fração de folhas
+alteradas e a geração/verificação de provas.
+
+Uso:
+    python scripts/bench_attestation_merkle.py [--users 1000000] [--changed 0.01]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+import app.models  # noqa: F401 - registra modelos no metadata
+from app.services.attestation_service import AttestationBatcher, verify_proof
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--changed", type=float, default=0.01, help="fração de folhas alteradas")
+    parser.add_argument("--proofs", type=int, default=1000)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(prefix="bench_merkle_", suffix=".db")
+    os.close(fd)
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    rng = random.Random(42)
+    results = {"benchmark": "attestation_merkle", "users": args.users}
+    try:
+        db.execute(
+            text("INSERT INTO impact_scores (user_id, score, breakdown, updated_at) "
+                 "VALUES (:u, :s, '{}', '2024-06-01 00:00:00')"),
+            [{"u": u, "s": float(rng.randint(0, 500))} for u in range(1, args.users + 1)]
+        )
+        db.commit()
+
+        batcher = AttestationBatcher()
+        start = time.perf_counter()
+        batcher.build_batch(db)
+        results["full_build_seconds"] = round(time.perf_counter() - start, 2)
+
+        changed = max(1, int(args.users * args.changed))
+        db.execute(
+            text("UPDATE impact_scores SET score = score + 1, updated_at = '2024-06-02 00:00:00' WHERE user_id = :u"),
+            [{"u": u} for u in rng.sample(range(1, args.users + 1), changed)]
+        )
+        db.commit()
+        start = time.perf_counter()
+        batch = batcher.build_batch(db)
+        results["incremental_changed"] = batch["changed"]
+        results["incremental_build_seconds"] = round(time.perf_counter() - start, 2)
+
+        user_ids = [rng.randint(1, args.users) for _ in range(args.proofs)]
+        start = time.perf_counter()
+        proofs = [batcher.get_proof(db, u) for u in user_ids]
+        results["proof_us"] = round((time.perf_counter() - start) / args.proofs * 1e6, 1)
+        results["proof_length"] = len(proofs[0]["proof"])
+
+        start = time.perf_counter()
+        assert all(verify_proof(p["leaf_hash"], p["proof"], p["root"]) for p in proofs)
+        results["verify_us"] = round((time.perf_counter() - start) / args.proofs * 1e6, 1)
+    finally:
+        db.close()
+        engine.dispose()
+        os.remove(path)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
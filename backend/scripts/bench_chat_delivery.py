@@ -0,0 +1,146 @@
+"""
+Benchmark de entrega de mensagens do chat: polling vs long-poll
+
+N clientes acompanham uma sala enquanto mensagens chegam em intervalos
+aleatórios. Compara:
+
+- polling: cada cliente relê a página (50 mensagens) a cada --interval s
+- long-poll: cada cliente aguarda no ChatNotifier e lê só o que é novo
+
+Mede a latência de entrega (envio -> cliente recebe), statements SQL e
+bytes serializados por segundo.
+
+Uso:
+    python scripts/bench_chat_delivery.py [--clients 200] [--seconds 5] [--messages 20] [--interval 2]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.db.migrate import migrate
+from app.models.chat import ChatMessage, ChatRoom
+from app.models.user import User
+from app.schemas.chat import ChatMessageCreate
+from app.services import chat_service as chat_service_module
+from app.services.chat_buffer import ChatMessageBuffer
+from app.services.chat_notifier import chat_notifier
+from app.services.chat_service import MESSAGE_ENCODER, ChatService
+
+
+async def run(name, client_loop, Session, engine, args):
+    chat_service_module.chat_message_buffer = ChatMessageBuffer(size=0 if name == "polling" else 200)
+    chat_notifier.clear()
+    statements = [0]
+    listener = lambda *a: statements.__setitem__(0, statements[0] + 1)  # noqa: E731
+    event.listen(engine, "before_cursor_execute", listener)
+
+    sent_at = {}
+    latencies = []
+    encoded = [0]
+    stop = asyncio.Event()
+
+    async def sender():
+        rng = random.Random(3)
+        db = Session()
+        for _ in range(args.messages):
+            await asyncio.sleep(rng.uniform(0, 2 * args.seconds / args.messages))
+            message = ChatService(db).create_message(1, ChatMessageCreate(room_id=1, content="oi"))
+            sent_at[message.id] = time.perf_counter()
+        await asyncio.sleep(args.interval)
+        stop.set()
+        db.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(sender(), *(client_loop(Session, stop, sent_at, latencies, encoded, args)
+                                      for _ in range(args.clients)))
+    elapsed = time.perf_counter() - start
+    event.remove(engine, "before_cursor_execute", listener)
+
+    latencies.sort()
+    print(f"{name:<9} latência p50={statistics.median(latencies) * 1000:7.1f} ms "
+          f"p99={latencies[max(int(len(latencies) * 0.99) - 1, 0)] * 1000:7.1f} ms "
+          f"sql/s={statements[0] / elapsed:7.0f} KiB/s={encoded[0] / elapsed / 1024:8.0f}")
+
+
+async def polling_client(Session, stop, sent_at, latencies, encoded, args):
+    db = Session()
+    seen = max(sent_at, default=0)
+    await asyncio.sleep(random.uniform(0, args.interval))
+    while not stop.is_set():
+        service = ChatService(db)
+        service.get_room_by_id(1)
+        rows = service.get_room_message_rows(1, 50, 0)
+        encoded[0] += len(MESSAGE_ENCODER.encode(rows))
+        now = time.perf_counter()
+        for row in rows:
+            if row[0] > seen and row[0] in sent_at:
+                latencies.append(now - sent_at[row[0]])
+        seen = max([seen] + [row[0] for row in rows])
+        db.close()
+        await asyncio.sleep(args.interval)
+
+
+async def long_poll_client(Session, stop, sent_at, latencies, encoded, args):
+    db = Session()
+    service = ChatService(db)
+    since_id = service.get_room_message_rows(1, 1)[0][0]
+    while not stop.is_set():
+        baseline = chat_notifier.last_id(1)
+        rows = service.get_messages_since(1, since_id, 100)
+        db.close()
+        if rows:
+            encoded[0] += len(MESSAGE_ENCODER.encode(rows))
+            now = time.perf_counter()
+            latencies.extend(now - sent_at[row[0]] for row in rows if row[0] in sent_at)
+            since_id = rows[-1][0]
+            continue
+        await chat_notifier.wait(1, max(since_id, baseline), 0.5)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--messages", type=int, default=20)
+    parser.add_argument("--interval", type=float, default=2, help="Intervalo do polling (s)")
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(prefix="bench_chat_delivery_", suffix=".db")
+    os.close(fd)
+    os.remove(path)
+    try:
+        engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+        migrate(engine)
+        Session = sessionmaker(bind=engine)
+        with Session() as db:
+            db.add(User(id=1, nickname="bench", password_hash="x"))
+            db.add(ChatRoom(id=1, name="Geral"))
+            db.add_all([ChatMessage(room_id=1, user_id=1, content=f"m{i}") for i in range(200)])
+            db.commit()
+
+        print(f"clientes={args.clients} mensagens={args.messages} em ~{args.seconds}s polling={args.interval}s")
+        asyncio.run(run("polling", polling_client, Session, engine, args))
+        asyncio.run(run("long-poll", long_poll_client, Session, engine, args))
+    finally:
+        for suffix in ("", "-wal", "-shm", "-journal"):
+            try:
+                os.remove(path + suffix)
+            except FileNotFoundError:
+                pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark de leitura de mensagens recentes do chat (salas quentes)
+
+Várias threads fazem polling de /chat/rooms/{id}/messages em poucas salas
+enquanto uma fração das requisições envia mensagens. Compara:
+
+- banco: verificação da sala + select com JOIN do autor a cada leitura
+- buffer: ChatMessageBuffer (anel em memória por sala)
+
+Uso:
+    python scripts/bench_chat_messages.py [--threads 8] [--requests 500] [--rooms 4] [--writes 0.05]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.migrate import migrate
+from app.models.chat import ChatMessage, ChatRoom
+from app.models.user import User
+from app.schemas.chat import ChatMessageCreate
+from app.services import chat_service as chat_service_module
+from app.services.chat_buffer import ChatMessageBuffer
+from app.services.chat_service import MESSAGE_ENCODER, ChatService
+
+
+def run(name, buffer, Session, args):
+    chat_service_module.chat_message_buffer = buffer
+    latencies = []
+    lock = threading.Lock()
+
+    def worker(seed):
+        rng = random.Random(seed)
+        db = Session()
+        service = ChatService(db)
+        local = []
+        for _ in range(args.requests):
+            room_id = rng.randint(1, args.rooms)
+            start = time.perf_counter()
+            if rng.random() < args.writes:
+                service.create_message(rng.randint(1, 50), ChatMessageCreate(room_id=room_id, content="bench"))
+            else:
+                if not buffer.is_cached(room_id):
+                    service.get_room_by_id(room_id)
+                MESSAGE_ENCODER.encode(service.get_room_message_rows(room_id, 50, 0))
+            local.append(time.perf_counter() - start)
+        db.close()
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.threads)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p99 = latencies[max(int(len(latencies) * 0.99) - 1, 0)] * 1000
+    print(f"{name:<7} {len(latencies) / elapsed:8.0f} req/s p50={statistics.median(latencies) * 1000:6.2f} ms "
+          f"p99={p99:7.2f} ms {buffer.stats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=500, help="Requisições por thread")
+    parser.add_argument("--rooms", type=int, default=4)
+    parser.add_argument("--writes", type=float, default=0.05, help="Fração de envios de mensagem")
+    parser.add_argument("--history", type=int, default=2000, help="Mensagens pré-existentes por sala")
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(prefix="bench_chat_", suffix=".db")
+    os.close(fd)
+    os.remove(path)
+    try:
+        engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False, "timeout": 30})
+        migrate(engine)
+        Session = sessionmaker(bind=engine)
+        with Session() as db:
+            db.add_all([User(id=i, nickname=f"user{i}", password_hash="x") for i in range(1, 51)])
+            db.add_all([ChatRoom(id=i, name=f"Sala {i}") for i in range(1, args.rooms + 1)])
+            db.add_all([
+                ChatMessage(room_id=room_id, user_id=1 + i % 50, content=f"mensagem {i}")
+                for room_id in range(1, args.rooms + 1) for i in range(args.history)
+            ])
+            db.commit()
+
+        print(f"threads={args.threads} req/thread={args.requests} salas={args.rooms} escritas={args.writes:.0%}")
+        run("banco", ChatMessageBuffer(size=0), Session, args)
+        run("buffer", ChatMessageBuffer(), Session, args)
+    finally:
+        for suffix in ("", "-wal", "-shm", "-journal"):
+            try:
+                os.remove(path + suffix)
+            except FileNotFoundError:
+                pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark de estatísticas de sala de chat
+
+Compara, numa sala com muitas mensagens:
+
+- legado: COUNT(*) + COUNT(DISTINCT user_id) sobre chat_messages
+- atual: leitura de chat_room_stats pela chave primária
+- plataforma: união dos HyperLogLog de todas as salas vs COUNT(DISTINCT)
+
+Uso:
+    python scripts/bench_chat_stats.py [--messages 200000] [--users 5000] [--rooms 50]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.db.migrate import migrate
+from app.services.chat_stats import get_room_counters, platform_unique_chatters, rebuild_room_stats
+
+
+def timed(name, func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"{name:<22} {elapsed * 1000:9.3f} ms  {result}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=200000)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--rooms", type=int, default=50)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(prefix="bench_chat_stats_", suffix=".db")
+    os.close(fd)
+    os.remove(path)
+    try:
+        engine = create_engine(f"sqlite:///{path}")
+        migrate(engine)
+        rng = random.Random(7)
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO chat_rooms (id, name, is_private, is_public, is_active) VALUES (:id, 'sala', 0, 1, 1)"),
+                         [{"id": i} for i in range(1, args.rooms + 1)])
+            # Metade das mensagens na sala 1 (sala quente)
+            conn.execute(
+                text("INSERT INTO chat_messages (room_id, user_id, content, is_filtered, is_active) VALUES (:r, :u, 'x', 0, 1)"),
+                [{"r": 1 if i % 2 else rng.randint(1, args.rooms), "u": rng.randint(1, args.users)}
+                 for i in range(args.messages)]
+            )
+            rebuild_room_stats(conn)
+
+        db = sessionmaker(bind=engine)()
+        print(f"mensagens={args.messages} usuários={args.users} salas={args.rooms}")
+        timed("sala legado", lambda: db.execute(text(
+            "SELECT COUNT(*), COUNT(DISTINCT user_id) FROM chat_messages WHERE room_id = 1 AND is_active = 1"
+        )).one(), 20)
+        timed("sala atual", lambda: get_room_counters(db, 1), 20)
+        timed("plataforma exata", lambda: db.execute(text(
+            "SELECT COUNT(DISTINCT user_id) FROM chat_messages WHERE is_active = 1"
+        )).scalar(), 5)
+        timed("plataforma HLL", lambda: platform_unique_chatters(db), 5)
+        db.close()
+    finally:
+        for suffix in ("", "-wal", "-shm", "-journal"):
+            try:
+                os.remove(path + suffix)
+            except FileNotFoundError:
+                pass
+
+
+if __name__ == "__main__":
+    main()
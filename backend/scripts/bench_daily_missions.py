@@ -0,0 +1,176 @@
+"""
+Benchmark da leitura de missões diárias na virada do dia
+
+Simula a onda de requisições logo após a meia-noite: muitos usuários
+distintos pedem as missões do novo dia ao mesmo tempo. Compara:
+
+- sem cache: catálogo + progresso lidos do banco a cada requisição
+- cache: catálogo/bitmaps em processo, sem pré-aquecimento (todo usuário
+  é um miss na virada)
+- cache+prewarm: o dia seguinte foi preparado antes da meia-noite
+
+Mede p50/p99 antes e depois da virada, com um escritor concorrente
+completando missões.
+
+Uso:
+    python scripts/bench_daily_missions.py [--users 2000] [--threads 8] [--requests 400]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.db.migrate import migrate
+from app.services.daily_mission_cache import DailyMissionCache
+from app.services.missions_v2_service import get_daily_missions, get_user_progress_map
+
+DAY_BEFORE = "2030-01-01"
+DAY_AFTER = "2030-01-02"
+
+
+class BenchDay:
+    def __init__(self, day: str):
+        self.day = day
+
+    def __call__(self) -> str:
+        return self.day
+
+
+def uncached_read(db, user_id, day):
+    missions = get_daily_missions(db)
+    progress = get_user_progress_map(db, user_id, day)
+    return sum(1 for m in missions if progress.get(m.id) == "completed")
+
+
+def cached_reader(cache):
+    def read(db, user_id, day):
+        missions = cache.catalog(db)
+        bits = cache.completed_bits(db, user_id, day)
+        return sum(1 for m in missions if bits & m.bit)
+    return read
+
+
+def measure(read, Session, day, users, threads, requests):
+    latencies = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(threads)
+
+    def worker(offset):
+        db = Session()
+        local = []
+        barrier.wait()
+        for i in range(requests):
+            user_id = 1 + (offset * requests + i) % users
+            start = time.perf_counter()
+            try:
+                read(db, user_id, day)
+            except OperationalError:
+                db.rollback()
+            local.append(time.perf_counter() - start)
+        db.close()
+        with lock:
+            latencies.extend(local)
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    latencies.sort()
+    return statistics.median(latencies) * 1000, latencies[int(len(latencies) * 0.99) - 1] * 1000
+
+
+def run(name, read_factory, Session, args, prewarm=False):
+    stop = threading.Event()
+
+    def writer():
+        # Conclusões concorrentes no dia novo
+        db = Session()
+        i = 0
+        while not stop.is_set():
+            try:
+                db.execute(text("""
+                    INSERT OR IGNORE INTO user_mission_progress (user_id, mission_id, date, status)
+                    VALUES (:u, 1, :d, 'completed')
+                """), {"u": 1 + i % args.users, "d": DAY_AFTER})
+                db.commit()
+            except OperationalError:
+                db.rollback()
+            i += 1
+            time.sleep(0.002)
+        db.close()
+
+    today = BenchDay(DAY_BEFORE)
+    read, cache = read_factory(today)
+    # Aquecimento do dia anterior (estado estável)
+    before = measure(read, Session, DAY_BEFORE, args.users, args.threads, args.requests)
+    before = measure(read, Session, DAY_BEFORE, args.users, args.threads, args.requests)
+    if prewarm:
+        with Session() as db:
+            cache.prewarm(db, DAY_AFTER, seconds_until_start=0)
+
+    writer_thread = threading.Thread(target=writer)
+    writer_thread.start()
+    today.day = DAY_AFTER
+    after = measure(read, Session, DAY_AFTER, args.users, args.threads, args.requests)
+    stop.set()
+    writer_thread.join()
+
+    loads = f" leituras do banco={cache.db_loads}" if cache is not None else ""
+    print(f"{name:<14} antes p50={before[0]:6.3f} p99={before[1]:7.3f} ms | "
+          f"virada p50={after[0]:6.3f} p99={after[1]:7.3f} ms{loads}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=400, help="Requisições por thread em cada fase")
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(prefix="bench_daily_", suffix=".db")
+    os.close(fd)
+    os.remove(path)
+    try:
+        engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False, "timeout": 5})
+        migrate(engine)
+        with engine.begin() as conn:
+            conn.execute(
+                text("""
+                    INSERT INTO user_mission_progress (user_id, mission_id, date, status)
+                    VALUES (:u, :m, :d, 'completed')
+                """),
+                [{"u": u, "m": 1 + u % 3, "d": DAY_BEFORE} for u in range(1, args.users + 1)]
+            )
+        Session = sessionmaker(bind=engine)
+
+        def with_cache(today):
+            cache = DailyMissionCache(ttl_seconds=60, today=today)
+            return cached_reader(cache), cache
+
+        print(f"usuários={args.users} threads={args.threads} requisições/thread={args.requests}")
+        run("sem cache", lambda today: (uncached_read, None), Session, args)
+        run("cache", with_cache, Session, args)
+        run("cache+prewarm", with_cache, Session, args, prewarm=True)
+    finally:
+        for suffix in ("", "-wal", "-shm", "-journal"):
+            try:
+                os.remove(path + suffix)
+            except FileNotFoundError:
+                pass
+
+
+if __name__ == "__main__":
+    main()
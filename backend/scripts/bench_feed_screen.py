@@ -0,0 +1,115 @@
+"""
+Benchmark de uma tela do feed: chamadas por post vs extras embutidos
+
+Simula o frontend montando uma tela da timeline (--page posts):
+
+- por post: GET /posts/timeline + GET /posts/{id}/comments e
+  GET /posts/{id}/stats para cada post
+- embutido: GET /posts/timeline?comments=3&liked_by_me=true
+
+Reporta requisições HTTP, statements SQL e tempo por tela (TestClient,
+sem rede; em produção cada requisição a menos também economiza RTT).
+
+Uso:
+    python scripts/bench_feed_screen.py [--posts 2000] [--page 20] [--screens 50]
+"""
+
+import argparse
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+
+from app.core.auth import get_current_user_optional
+from app.core.database import get_db
+from app.db.migrate import migrate
+from app.main import app, rate_limiter
+from app.models.user import User
+
+
+def per_post_screen(client, page):
+    posts = client.get("/posts/timeline", params={"limit": page}).json()
+    for post in posts:
+        client.get(f"/posts/{post['id']}/comments", params={"limit": 3})
+        client.get(f"/posts/{post['id']}/stats")
+    return 1 + 2 * len(posts)
+
+
+def embedded_screen(client, page):
+    client.get("/posts/timeline", params={"limit": page, "comments": 3, "liked_by_me": True})
+    return 1
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--posts", type=int, default=2000)
+    parser.add_argument("--page", type=int, default=20)
+    parser.add_argument("--screens", type=int, default=50)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(prefix="bench_feed_", suffix=".db")
+    os.close(fd)
+    os.remove(path)
+    try:
+        engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+        migrate(engine)
+        Session = sessionmaker(bind=engine)
+        rng = random.Random(11)
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO users (id, nickname, password_hash, level) VALUES (:id, :n, 'x', 1)"),
+                         [{"id": i, "n": f"u{i}"} for i in range(1, 201)])
+            conn.execute(text("INSERT INTO posts (id, author_id, content, likes_count, comments_count, shares_count, "
+                              "is_active) VALUES (:id, :a, 'p', 0, 0, 0, 1)"),
+                         [{"id": i, "a": rng.randint(1, 200)} for i in range(1, args.posts + 1)])
+            conn.execute(text("INSERT INTO post_comments (user_id, post_id, content, is_active) VALUES (:u, :p, 'c', 1)"),
+                         [{"u": rng.randint(1, 200), "p": rng.randint(1, args.posts)} for _ in range(args.posts * 5)])
+            conn.execute(text("INSERT OR IGNORE INTO post_likes (user_id, post_id) VALUES (:u, :p)"),
+                         [{"u": rng.randint(1, 200), "p": rng.randint(1, args.posts)} for _ in range(args.posts * 5)])
+
+        def _get_db():
+            with Session() as db:
+                yield db
+
+        app.dependency_overrides[get_db] = _get_db
+        app.dependency_overrides[get_current_user_optional] = lambda: User(id=1, nickname="u1")
+        statements = [0]
+        event.listen(engine, "before_cursor_execute",
+                     lambda *a: statements.__setitem__(0, statements[0] + 1))
+        client = TestClient(app)
+        logging.getLogger("httpx").setLevel(logging.WARNING)
+
+        print(f"posts={args.posts} página={args.page} telas={args.screens}")
+        for name, screen in (("por post", per_post_screen), ("embutido", embedded_screen)):
+            rate_limiter.reset()
+            statements[0] = 0
+            requests, latencies = 0, []
+            for _ in range(args.screens):
+                start = time.perf_counter()
+                requests += screen(client, args.page)
+                latencies.append(time.perf_counter() - start)
+            print(f"{name:<9} requisições/tela={requests / args.screens:5.1f} "
+                  f"sql/tela={statements[0] / args.screens:6.1f} "
+                  f"p50={statistics.median(latencies) * 1000:7.1f} ms")
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+        app.dependency_overrides.pop(get_current_user_optional, None)
+        for suffix in ("", "-wal", "-shm", "-journal"):
+            try:
+                os.remove(path + suffix)
+            except FileNotFoundError:
+                pass
+
+
+if __name__ == "__main__":
+    main()
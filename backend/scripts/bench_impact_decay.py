@@ -0,0 +1,88 @@
+"""
+Benchmark do job de Impact Score com decaimento temporal
+
+Gera N eventos sintéticos (distribuídos entre U usuários nos últimos 365
+dias) em um banco SQLite temporário e mede o tempo do job completo.
+
+Uso:
+    python scripts/bench_impact_decay.py [--events 1000000] [--users 50000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+import app.models  # noqa: F401 - registra modelos no metadata
+from app.services.impact_decay_service import run_decay_job
+
+
+def _seed(engine, events: int, users: int, batch: int = 200_000):
+    rng = np.random.default_rng(42)
+    now = int(time.time())
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        for start in range(0, events, batch):
+            n = min(batch, events - start)
+            user_ids = rng.integers(1, users + 1, n)
+            weights = rng.choice([1.0, 2.0, 3.0], n)
+            ts = now - rng.integers(0, 365 * 86400, n)
+            cursor.executemany(
+                "INSERT INTO impact_events (user_id, type, weight, timestamp) "
+                "VALUES (?, 'donation', ?, datetime(?, 'unixepoch'))",
+                zip(user_ids.tolist(), weights.tolist(), ts.tolist()),
+            )
+        raw.commit()
+    finally:
+        raw.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=50_000)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(prefix="bench_decay_", suffix=".db")
+    os.close(fd)
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    try:
+        start = time.perf_counter()
+        _seed(engine, args.events, args.users)
+        seed_seconds = time.perf_counter() - start
+
+        db = sessionmaker(bind=engine)()
+        try:
+            stats = run_decay_job(db)
+        finally:
+            db.close()
+
+        print(json.dumps({
+            "benchmark": "impact_decay",
+            "events": args.events,
+            "users": args.users,
+            "seed_seconds": round(seed_seconds, 2),
+            "compute_seconds": round(stats["compute_seconds"], 2),
+            "total_seconds": round(stats["total_seconds"], 2),
+            "events_per_second": round(args.events / stats["compute_seconds"]),
+        }, indent=2))
+    finally:
+        engine.dispose()
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
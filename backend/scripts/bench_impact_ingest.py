@@ -0,0 +1,89 @@
+"""
+Benchmark de ingestão de eventos de Impact Score
+
+Mede o custo de create_impact_event (delta incremental) para usuários com
+histórico crescente de eventos e compara com o recálculo completo.
+
+Uso:
+    python scripts/bench_impact_ingest.py [--sizes 0,1000,10000,100000] [--events 200]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+import app.models  # noqa: F401 - registra modelos no metadata
+from app.schemas.impact import ImpactEventIn
+from app.services.impact_service import create_impact_event, recalc_impact_score
+
+
+def _seed_history(session, user_id: int, size: int):
+    if size <= 0:
+        return
+    rows = [{"u": user_id, "t": "mission_completed", "w": 3.0} for _ in range(size)]
+    session.execute(text("INSERT INTO impact_events (user_id, type, weight) VALUES (:u, :t, :w)"), rows)
+    session.commit()
+    recalc_impact_score(session, user_id)
+
+
+def run(sizes, events_per_size):
+    fd, path = tempfile.mkstemp(prefix="bench_impact_", suffix=".db")
+    os.close(fd)
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    results = []
+    try:
+        for user_id, size in enumerate(sizes, start=1):
+            session = Session()
+            try:
+                _seed_history(session, user_id, size)
+
+                start = time.perf_counter()
+                for _ in range(events_per_size):
+                    create_impact_event(session, user_id, ImpactEventIn(type="donation", weight=1.0))
+                ingest_us = (time.perf_counter() - start) / events_per_size * 1e6
+
+                start = time.perf_counter()
+                recalc_impact_score(session, user_id)
+                recalc_us = (time.perf_counter() - start) * 1e6
+
+                results.append({
+                    "history_events": size,
+                    "ingest_us_per_event": round(ingest_us, 1),
+                    "full_recalc_us": round(recalc_us, 1),
+                })
+            finally:
+                session.close()
+    finally:
+        engine.dispose()
+        os.remove(path)
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="0,1000,10000,100000")
+    parser.add_argument("--events", type=int, default=200)
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    results = run(sizes, args.events)
+    print(json.dumps({"benchmark": "impact_ingest", "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
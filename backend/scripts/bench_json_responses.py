@@ -0,0 +1,100 @@
+"""
+Benchmark de serialização de páginas de listagem
+
+Compara, por página, o caminho padrão do FastAPI (validação Pydantic por
+item via response_model + jsonable_encoder + json.dumps) com o caminho
+rápido (tuplas do select -> RowEncoder -> orjson).
+
+Uso:
+    python scripts/bench_json_responses.py [--page-size 100] [--repeat 300]
+"""
+
+import argparse
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+from typing import List
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.schemas.chat import ChatMessageResponse
+from app.schemas.impact import ImpactEventOut
+from app.schemas.post import PostResponse
+from app.schemas.ranking import UserRankingResponse
+from app.services.chat_service import MESSAGE_ENCODER
+from app.services.impact_service import IMPACT_EVENT_ENCODER
+from app.services.post_service import TIMELINE_ENCODER
+from app.services.ranking_service import RANKING_ENCODER
+
+
+def _rows(page_size: int):
+    now = datetime(2025, 1, 1, 12, 0, 0)
+    posts = [
+        (i, 7, f"conteúdo do post {i} " * 4, None, i % 13, i % 5, i % 3, True,
+         now - timedelta(minutes=i), None, 7, "autor", 3)
+        for i in range(page_size)
+    ]
+    messages = [
+        (i, 7, 1, f"mensagem {i}", False, None, True, now - timedelta(seconds=i), 7, "autor", 3)
+        for i in range(page_size)
+    ]
+    rankings = [
+        (i, i, 1000 - i, Decimal("12.500000"), i % 40, i % 10, i % 25, i + 1, i + 1, i + 1, i + 1, now, i, f"user{i}", 2)
+        for i in range(page_size)
+    ]
+    events = [
+        (i, 7, "mission_completed", 3.0, {"missionId": i, "note": "ok"}, now - timedelta(hours=i))
+        for i in range(page_size)
+    ]
+    return {
+        "posts": (posts, TIMELINE_ENCODER, PostResponse),
+        "chat": (messages, MESSAGE_ENCODER, ChatMessageResponse),
+        "ranking": (rankings, RANKING_ENCODER, UserRankingResponse),
+        "impact": (events, IMPACT_EVENT_ENCODER, ImpactEventOut),
+    }
+
+
+def _time(func, repeat: int) -> float:
+    func()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def run(page_size: int, repeat: int):
+    print(f"{'endpoint':<10} {'padrão (µs)':>12} {'rápido (µs)':>12} {'ganho':>7} {'bytes':>8}")
+    for name, (rows, encoder, model) in _rows(page_size).items():
+        adapter = TypeAdapter(List[model])
+        dicts = encoder.to_dicts(rows)
+
+        def baseline():
+            # O que o FastAPI faz com response_model: valida, converte e serializa
+            validated = adapter.validate_python(dicts)
+            return json.dumps(jsonable_encoder(validated), ensure_ascii=False).encode()
+
+        def fast():
+            return encoder.encode(rows)
+
+        slow_t = _time(baseline, repeat)
+        fast_t = _time(fast, repeat)
+        print(f"{name:<10} {slow_t * 1e6:12.1f} {fast_t * 1e6:12.1f} {slow_t / fast_t:6.1f}x {len(fast()):8d}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de serialização de listagens")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=300)
+    args = parser.parse_args()
+    run(args.page_size, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Benchmark de likes e compartilhamentos concorrentes em um único post (post viral)
+
+--likers usuários distintos curtem (e depois compartilham) o mesmo post ao
+mesmo tempo, distribuídos em --threads threads. Compara:
+
+- legado: SELECT do like + SELECT do post + likes_count += 1 no ORM +
+  commit + recálculo de likes_received no ranking + commit, por like
+- write-through: toggle atômico (DELETE ... RETURNING ou INSERT ... ON
+  CONFLICT DO NOTHING, no máximo 2 statements) + flush imediato do contador
+- write-behind: mesmo toggle + delta em memória; contador gravado em
+  UPDATE com CASE no flush (PostCounterBuffer)
+
+Reporta ops/s, latência, falhas (lock do SQLite) e os contadores finais.
+
+Uso:
+    python scripts/bench_post_likes.py [--likers 1000] [--threads 32]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import and_, create_engine, func, text
+from sqlalchemy.orm import sessionmaker
+
+from app.db.migrate import migrate
+from app.models.post import Post, PostLike
+from app.models.ranking import UserRanking
+from app.models.user import User
+from app.services import post_service as post_service_module
+from app.services.post_counters import PostCounterBuffer
+from app.services.post_service import PostService
+
+
+def legacy_like(db, user_id, post_id):
+    """Caminho antigo de PostService.like_post"""
+    existing = db.query(PostLike).filter(and_(PostLike.user_id == user_id, PostLike.post_id == post_id)).first()
+    post = db.query(Post).filter(and_(Post.id == post_id, Post.is_active == True)).first()
+    if existing:
+        db.delete(existing)
+        post.likes_count = max(0, post.likes_count - 1)
+    else:
+        db.add(PostLike(user_id=user_id, post_id=post_id))
+        post.likes_count += 1
+    db.commit()
+    ranking = db.query(UserRanking).filter(UserRanking.user_id == post.author_id).first()
+    ranking.likes_received = db.query(func.sum(Post.likes_count)).filter(Post.author_id == post.author_id).scalar() or 0
+    db.commit()
+    return True
+
+
+def legacy_share(db, user_id, post_id):
+    """Caminho antigo de PostService.share_post"""
+    post = db.query(Post).filter(and_(Post.id == post_id, Post.is_active == True)).first()
+    post.shares_count += 1
+    db.commit()
+    return True
+
+
+def run(name, like, Session, engine, args):
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM post_likes"))
+        conn.execute(text("UPDATE posts SET likes_count = 0, shares_count = 0"))
+    latencies, failures = [], [0]
+    lock = threading.Lock()
+
+    def one(user_id):
+        # Uma sessão por requisição, como no app
+        start = time.perf_counter()
+        with Session() as db:
+            try:
+                ok = like(db, user_id, 1)
+            except Exception:
+                db.rollback()
+                ok = False
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            failures[0] += not ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        list(pool.map(one, range(1, args.likers + 1)))
+    elapsed = time.perf_counter() - start
+
+    buffer = post_service_module.post_counter_buffer
+    with Session() as db:
+        buffer.flush(db)
+        likes_count, shares_count = db.execute(text("SELECT likes_count, shares_count FROM posts WHERE id = 1")).one()
+        rows = db.execute(text("SELECT COUNT(*) FROM post_likes")).scalar()
+    latencies.sort()
+    p99 = latencies[max(int(len(latencies) * 0.99) - 1, 0)] * 1000
+    print(f"{name:<20} {args.likers / elapsed:7.0f} ops/s p50={statistics.median(latencies) * 1000:7.2f} ms "
+          f"p99={p99:8.2f} ms falhas={failures[0]} likes_count={likes_count} shares_count={shares_count} "
+          f"post_likes={rows}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--likers", type=int, default=1000)
+    parser.add_argument("--threads", type=int, default=32)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(prefix="bench_likes_", suffix=".db")
+    os.close(fd)
+    os.remove(path)
+    try:
+        engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False, "timeout": 30},
+                               pool_size=args.threads, max_overflow=0)
+        migrate(engine)
+        Session = sessionmaker(bind=engine)
+        with Session() as db:
+            db.add_all([User(id=i, nickname=f"u{i}", password_hash="x") for i in range(1, args.likers + 1)])
+            db.add(Post(id=1, author_id=1, content="viral"))
+            db.add(UserRanking(user_id=1))
+            db.commit()
+
+        print(f"likers={args.likers} threads={args.threads}")
+        like = lambda db, user_id, post_id: PostService(db).like_post(user_id, post_id)  # noqa: E731
+        share = lambda db, user_id, post_id: PostService(db).share_post(post_id)  # noqa: E731
+        for action, legacy, current in (("like", legacy_like, like), ("share", legacy_share, share)):
+            post_service_module.post_counter_buffer = PostCounterBuffer(enabled=False)
+            run(f"{action} legado", legacy, Session, engine, args)
+            run(f"{action} write-through", current, Session, engine, args)
+            post_service_module.post_counter_buffer = PostCounterBuffer(max_ops=500)
+            run(f"{action} write-behind", current, Session, engine, args)
+    finally:
+        for suffix in ("", "-wal", "-shm", "-journal"):
+            try:
+                os.remove(path + suffix)
+            except FileNotFoundError:
+                pass
+
+
+if __name__ == "__main__":
+    main()
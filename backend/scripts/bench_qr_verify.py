@@ -0,0 +1,148 @@
+"""
+Benchmark de verificação de QR de check-in sob rajada de scans
+
+Simula a entrada de um evento: várias threads verificam scans de usuários
+distintos, e uma fração dos scans reaproveita um token já usado (QR
+compartilhado/replay). Compara:
+
+- legado: decode do JWT + Mission por id + varredura de conclusões do dia
+  + award a cada scan (replays de outros usuários são aceitos)
+- atual: QRVerifier (catálogo em cache, nonces vistos em memória, índice
+  de conclusões, uso único em qr_nonces)
+
+Uso:
+    python scripts/bench_qr_verify.py [--threads 8] [--scans 300] [--replay 0.5]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime
+from pathlib import Path
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from jose import jwt
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.db.migrate import migrate
+from app.models.mission import Mission, MissionCompletion, MissionType
+from app.services.qr_verification import QRMissionCatalog, QRVerifier, SeenNonceSet, issue_qr_token
+
+
+def legacy_verify(db, user_id, token):
+    """Caminho antigo de /missions/verify-qr"""
+    data = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    mission = db.get(Mission, data["mission_id"])
+    if not mission or mission.type != MissionType.CHECKIN_QR:
+        return False
+    start = datetime.combine(date.today(), datetime.min.time())
+    end = datetime.combine(date.today(), datetime.max.time())
+    done = db.query(MissionCompletion).filter(
+        MissionCompletion.user_id == user_id, MissionCompletion.mission_id == mission.id,
+        MissionCompletion.completed_at >= start, MissionCompletion.completed_at <= end
+    ).first()
+    if done:
+        return False
+    db.add(MissionCompletion(user_id=user_id, mission_id=mission.id, proof_type="qr",
+                             xp_awarded=mission.xp_reward, tokens_awarded=int(mission.token_reward)))
+    db.commit()
+    return True
+
+
+def make_workload(threads, scans, replay, seed=7):
+    rng = random.Random(seed)
+    shared = issue_qr_token(1)
+    workload = []
+    user_id = 1
+    for _ in range(threads):
+        queue = []
+        for _ in range(scans):
+            token = shared if rng.random() < replay else issue_qr_token(1)
+            queue.append((user_id, token))
+            user_id += 1
+        workload.append(queue)
+    return workload
+
+
+def run(name, verify, Session, workload):
+    latencies = []
+    accepted = [0]
+    lock = threading.Lock()
+
+    def worker(queue):
+        db = Session()
+        local, ok = [], 0
+        for user_id, token in queue:
+            start = time.perf_counter()
+            try:
+                ok += bool(verify(db, user_id, token))
+            except OperationalError:
+                db.rollback()
+            local.append(time.perf_counter() - start)
+        db.close()
+        with lock:
+            latencies.extend(local)
+            accepted[0] += ok
+
+    threads = [threading.Thread(target=worker, args=(queue,)) for queue in workload]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    total = sum(len(queue) for queue in workload)
+    latencies.sort()
+    p99 = latencies[max(int(len(latencies) * 0.99) - 1, 0)] * 1000
+    print(f"{name:<7} {total / elapsed:8.0f} scans/s p50={statistics.median(latencies) * 1000:6.2f} ms "
+          f"p99={p99:7.2f} ms aceitos={accepted[0]}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--scans", type=int, default=300, help="Scans por thread")
+    parser.add_argument("--replay", type=float, default=0.5, help="Fração de scans com token já usado")
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(prefix="bench_qr_", suffix=".db")
+    os.close(fd)
+    os.remove(path)
+    try:
+        engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False, "timeout": 30})
+        migrate(engine)
+        Session = sessionmaker(bind=engine)
+        with Session() as db:
+            db.add(Mission(id=1, title="Evento", description="d", category="community", xp_reward=20,
+                           token_reward=3, type=MissionType.CHECKIN_QR))
+            db.commit()
+
+        print(f"threads={args.threads} scans/thread={args.scans} replay={args.replay:.0%}")
+        workload = make_workload(args.threads, args.scans, args.replay)
+        run("legado", legacy_verify, Session, workload)
+
+        with engine.begin() as conn:
+            conn.execute(text("DELETE FROM mission_completions"))
+        verifier = QRVerifier(seen=SeenNonceSet(), catalog=QRMissionCatalog())
+        run("atual", lambda db, user_id, token: verifier.verify(db, user_id, token).ok, Session, workload)
+    finally:
+        for suffix in ("", "-wal", "-shm", "-journal"):
+            try:
+                os.remove(path + suffix)
+            except FileNotFoundError:
+                pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark do rate limiter GCRA
+
+Mede o custo por verificação (µs) dos backends em memória e SQLite
+compartilhado, e o overhead do RateLimitMiddleware numa chamada ASGI
+completa em relação ao app sem middleware.
+
+Uso:
+    python scripts/bench_rate_limit.py [--checks 200000] [--keys 10000] [--requests 20000]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.utils.rate_limit import (
+    MemoryGCRABackend,
+    RateLimiter,
+    RateLimitMiddleware,
+    RatePolicy,
+    SQLiteGCRABackend,
+)
+
+
+def bench_backend(name: str, limiter: RateLimiter, checks: int, keys: int):
+    policy = RatePolicy(max_requests=100, period_seconds=60)
+    buckets = [f"GET /x|ip:10.0.{i // 256}.{i % 256}" for i in range(keys)]
+    start = time.perf_counter()
+    for i in range(checks):
+        limiter.check(buckets[i % keys], policy)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<10} checks={checks:>8} keys={keys:>7} {elapsed / checks * 1e6:8.2f} µs/check "
+          f"(allowed={limiter.allowed} denied={limiter.denied})")
+
+
+async def _endpoint(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+async def _noop_receive():
+    return {"type": "http.request", "body": b""}
+
+
+async def _noop_send(message):
+    return None
+
+
+async def _drive(app, requests: int, clients: int) -> float:
+    start = time.perf_counter()
+    for i in range(requests):
+        scope = {
+            "type": "http",
+            "method": "POST",
+            "path": "/impact/event",
+            "headers": [],
+            "client": (f"10.1.{(i % clients) // 256}.{(i % clients) % 256}", 50000),
+        }
+        await app(scope, _noop_receive, _noop_send)
+    return time.perf_counter() - start
+
+
+def bench_middleware(requests: int, clients: int):
+    policy = RatePolicy(max_requests=1_000_000, period_seconds=60)
+    middleware = RateLimitMiddleware(
+        _endpoint,
+        limiter=RateLimiter(MemoryGCRABackend()),
+        policies={("POST", "/impact/event"): policy},
+    )
+
+    base = asyncio.run(_drive(_endpoint, requests, clients))
+    with_limit = asyncio.run(_drive(middleware, requests, clients))
+    overhead = (with_limit - base) / requests * 1e6
+    print(f"middleware requests={requests} base={base / requests * 1e6:.2f} µs "
+          f"com_limite={with_limit / requests * 1e6:.2f} µs overhead={overhead:.2f} µs/req")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do rate limiter GCRA")
+    parser.add_argument("--checks", type=int, default=200_000)
+    parser.add_argument("--keys", type=int, default=10_000)
+    parser.add_argument("--requests", type=int, default=20_000)
+    args = parser.parse_args()
+
+    bench_backend("memory", RateLimiter(MemoryGCRABackend()), args.checks, args.keys)
+
+    fd, path = tempfile.mkstemp(prefix="bench_ratelimit_", suffix=".db")
+    os.close(fd)
+    try:
+        bench_backend("sqlite", RateLimiter(SQLiteGCRABackend(path)), args.checks // 10, args.keys)
+    finally:
+        for suffix in ("", "-wal", "-shm"):
+            try:
+                os.remove(path + suffix)
+            except FileNotFoundError:
+                pass
+
+    bench_middleware(args.requests, args.keys)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark do custo de schema no startup dos workers
+
+Compara, num banco já migrado:
+- legado: o que cada boot fazia antes (create_all + PRAGMA/CREATE IF NOT
+  EXISTS dos hooks _ensure_*, equivalente a reexecutar 001_baseline)
+- atual: a checagem rápida schema_is_current (uma consulta)
+
+e mostra o custo da primeira migração num banco vazio (feito uma vez, fora
+de banda).
+
+Uso:
+    python scripts/bench_startup.py [--boots 50] [--users 0]
+"""
+
+import argparse
+import importlib.util
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import create_engine, text
+
+from app.db.migrate import MIGRATIONS_DIR, migrate, schema_is_current
+
+
+def _load_baseline():
+    path = next(MIGRATIONS_DIR.glob("001_*.py"))
+    spec = importlib.util.spec_from_file_location("bench_baseline", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.upgrade
+
+
+def _timed(func, runs: int) -> float:
+    start = time.perf_counter()
+    for _ in range(runs):
+        func()
+    return (time.perf_counter() - start) / runs
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--boots", type=int, default=50)
+    parser.add_argument("--users", type=int, default=0, help="Usuários inseridos antes de medir")
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(prefix="bench_startup_", suffix=".db")
+    os.close(fd)
+    os.remove(path)
+    try:
+        # Engine novo por boot, como um worker recém-iniciado
+        url = f"sqlite:///{path}"
+
+        start = time.perf_counter()
+        migrate(create_engine(url))
+        first = time.perf_counter() - start
+
+        if args.users:
+            with create_engine(url).begin() as conn:
+                conn.execute(
+                    text("INSERT INTO users (nickname, email, password_hash, is_active) VALUES (:n, :e, 'x', 1)"),
+                    [{"n": f"u{i}", "e": f"u{i}@bench.local"} for i in range(args.users)]
+                )
+
+        baseline = _load_baseline()
+
+        def legacy_boot():
+            engine = create_engine(url)
+            with engine.begin() as conn:
+                baseline(conn)
+            engine.dispose()
+
+        def fast_boot():
+            engine = create_engine(url)
+            assert schema_is_current(engine)
+            engine.dispose()
+
+        legacy = _timed(legacy_boot, args.boots)
+        fast = _timed(fast_boot, args.boots)
+
+        print(f"primeira migração (banco vazio): {first * 1000:8.2f} ms")
+        print(f"boot legado (schema patching):   {legacy * 1000:8.2f} ms/boot")
+        print(f"boot atual (checagem de versão): {fast * 1000:8.2f} ms/boot  ({legacy / fast:.0f}x)")
+    finally:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+if __name__ == "__main__":
+    main()
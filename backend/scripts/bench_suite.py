@@ -0,0 +1,371 @@
+"""
+Suíte de benchmarks em processo (serviços e rotas) com baseline
+
+Gera um banco SQLite temporário no tamanho escolhido (--size), cronometra
+as funções quentes dos serviços chamando-as direto e as rotas principais
+por um cliente ASGI em processo (httpx.ASGITransport, sem rede nem
+servidor). Os benchmarks específicos (scripts/bench_*.py) continuam
+servindo para investigar um caminho; esta suíte é o retrato geral para
+comparar entre commits.
+
+Saída em JSON (stdout ou --output):
+
+    {"meta": {...}, "results": {"<caso>": {"p50_ms": ..., "p95_ms": ..., ...}}}
+
+Com --compare, cada caso é comparado ao baseline: regressão quando o p50
+passa de baseline * (1 + --threshold) e a diferença é maior que
+--min-delta-ms (ruído em casos sub-milissegundo). Regressões saem em
+stderr e o processo termina com código 1. O baseline versionado
+(scripts/bench_baseline.json) foi gerado com --size small; regenere com
+--save-baseline na máquina de referência ao aceitar uma mudança de
+desempenho.
+
+Uso:
+    python scripts/bench_suite.py [--size small] [--repeat 50] [--only posts,routes]
+    python scripts/bench_suite.py --compare scripts/bench_baseline.json [--threshold 0.25]
+    python scripts/bench_suite.py --save-baseline scripts/bench_baseline.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.db.migrate import migrate
+
+DEFAULT_BASELINE = Path(__file__).parent / "bench_baseline.json"
+
+SIZES = {
+    "tiny": {"users": 30, "posts": 200, "messages": 200, "impact_events": 500, "mission_events": 100},
+    "small": {"users": 500, "posts": 5000, "messages": 5000, "impact_events": 20000, "mission_events": 2000},
+    "medium": {"users": 5000, "posts": 50000, "messages": 50000, "impact_events": 200000, "mission_events": 20000},
+}
+
+# Casos pesados rodam menos vezes (fração de --repeat, mínimo 3)
+HEAVY_FRACTION = 0.1
+
+
+def _ts(dt: datetime) -> str:
+    return dt.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def build_dataset(engine, size: Dict[str, int], seed: int = 42):
+    """Popula o banco migrado com dados sintéticos (executemany, uma transação)"""
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    users, posts = size["users"], size["posts"]
+
+    def ago(days: float) -> str:
+        return _ts(now - timedelta(seconds=rng.uniform(0, days * 86400)))
+
+    with engine.begin() as conn:
+        conn.execute(text("""
+            INSERT INTO users (id, nickname, password_hash, xp, level, tokens_earned, tokens_available,
+                               tokens_in_yield, is_active, missions_completed)
+            VALUES (:id, :nickname, 'x', :xp, :level, :tokens, :tokens, 0, 1, :missions)
+        """), [{"id": i, "nickname": f"bench{i}", "xp": rng.randint(0, 5000), "level": rng.randint(1, 20),
+                "tokens": round(rng.uniform(0, 100), 2), "missions": rng.randint(0, 50)}
+               for i in range(1, users + 1)])
+        conn.execute(text("""
+            INSERT INTO posts (id, author_id, content, likes_count, comments_count, shares_count, is_active, created_at)
+            VALUES (:id, :author, :content, 0, 0, 0, 1, :at)
+        """), [{"id": i, "author": rng.randint(1, users), "content": f"post {i} " * 8, "at": ago(7)}
+               for i in range(1, posts + 1)])
+        likes = {(rng.randint(1, users), rng.randint(1, posts)) for _ in range(posts * 3)}
+        conn.execute(text("INSERT INTO post_likes (user_id, post_id, created_at) VALUES (:u, :p, :at)"),
+                     [{"u": u, "p": p, "at": ago(7)} for u, p in likes])
+        conn.execute(text("""
+            UPDATE posts SET likes_count = (SELECT COUNT(*) FROM post_likes WHERE post_id = posts.id)
+        """))
+        conn.execute(text("""
+            INSERT INTO post_comments (user_id, post_id, content, is_active, created_at)
+            VALUES (:u, :p, 'comentário', 1, :at)
+        """), [{"u": rng.randint(1, users), "p": rng.randint(1, posts), "at": ago(7)} for _ in range(posts)])
+        conn.execute(text("""INSERT INTO user_rankings
+                (user_id, total_xp, total_tokens, missions_completed, posts_created, likes_received)
+            VALUES (:id, 0, 0, 0, 0, 0)"""), [{"id": i} for i in range(1, users + 1)])
+
+        conn.execute(text("INSERT INTO chat_rooms (id, name, is_private, is_public, is_active, created_at) VALUES (1, 'Geral', 0, 1, 1, :at)"),
+                     {"at": _ts(now)})
+        conn.execute(text("""
+            INSERT INTO chat_messages (room_id, user_id, content, is_filtered, is_active, created_at)
+            VALUES (1, :u, :content, 0, 1, :at)
+        """), [{"u": rng.randint(1, users), "content": f"mensagem {i}", "at": _ts(now - timedelta(seconds=size["messages"] - i))}
+               for i in range(size["messages"])])
+
+        conn.execute(text("""
+            INSERT INTO impact_events (user_id, type, weight, timestamp)
+            VALUES (:u, :type, :weight, :at)
+        """), [{"u": rng.randint(1, users), "type": rng.choice(["donation", "volunteer", "mission_completed"]),
+                "weight": rng.choice([1.0, 2.0, 3.0]), "at": ago(365)} for _ in range(size["impact_events"])])
+
+        conn.execute(text("""
+            INSERT INTO mission_rules (mission_slug, rule_name, rule_config, is_active)
+            VALUES ('bench-share', 'Compartilhar 3 vezes', :config, 1)
+        """), {"config": json.dumps({"event_count": {"event_type": "share", "min": 3}})})
+        conn.execute(text("""
+            INSERT INTO mission_events (user_id, mission_slug, event_type, payload, payload_hash, created_at)
+            VALUES (:u, 'bench-share', 'share', '{}', :hash, :at)
+        """), [{"u": rng.randint(1, users), "hash": f"{i:064x}", "at": ago(30)}
+               for i in range(size["mission_events"])])
+
+
+class Case:
+    """Um caso da suíte: `run(i)` é cronometrado; `heavy` reduz as repetições"""
+
+    def __init__(self, name: str, run: Callable[[int], object], heavy: bool = False):
+        self.name = name
+        self.run = run
+        self.heavy = heavy
+
+
+def service_cases(Session, size: Dict[str, int]) -> List[Case]:
+    from app.models.user import User
+    from app.schemas.chat import ChatMessageCreate
+    from app.services.chat_service import ChatService
+    from app.services.impact_service import recalc_impact_score
+    from app.services.mission_engine import MissionEngine
+    from app.services.missions_v2_service import complete_mission
+    from app.services.post_service import PostService
+    from app.services.ranking_service import RankingService
+
+    users = size["users"]
+
+    def session_call(fn):
+        # Uma sessão por chamada, como uma requisição
+        def run(i):
+            with Session() as db:
+                return fn(db, i)
+        return run
+
+    def update_all_rankings(db, i):
+        RankingService(db).update_all_rankings()
+
+    def timeline(db, i):
+        return PostService(db).get_timeline_posts(20, (i % 5) * 20)
+
+    def create_message(db, i):
+        return ChatService(db).create_message(1 + i % users, ChatMessageCreate(room_id=1, content=f"bench {i}"))
+
+    def evaluate(db, i):
+        return MissionEngine(db.connection(), 1 + i % users).evaluate("bench-share", {"event_type": "share"})
+
+    def recalc(db, i):
+        return recalc_impact_score(db, 1 + i % users)
+
+    def complete(db, i):
+        # Usuários diferentes: a 1ª passada conclui, as seguintes caem em "já concluída"
+        user = db.get(User, 1 + i % users)
+        return complete_mission(db, user, "CHECKIN")
+
+    return [
+        Case("ranking.update_all_rankings", session_call(update_all_rankings), heavy=True),
+        Case("posts.get_timeline_posts", session_call(timeline)),
+        Case("chat.create_message", session_call(create_message)),
+        Case("mission_engine.evaluate", session_call(evaluate)),
+        Case("impact.recalc_impact_score", session_call(recalc)),
+        Case("missions_v2.complete_mission", session_call(complete)),
+    ]
+
+
+ROUTES = [
+    ("GET", "/posts/timeline?limit=20"),
+    ("GET", "/posts/timeline?limit=20&comments=3&liked_by_me=true"),
+    ("GET", "/posts/trending?limit=20"),
+    ("GET", "/chat/rooms/1/messages?limit=50"),
+    ("POST", "/chat/rooms/1/messages"),
+    ("GET", "/ranking"),
+    ("GET", "/impact/leaderboard"),
+    ("GET", "/users/stats"),
+    ("GET", "/missions/daily"),
+]
+
+
+def route_cases(Session, loop: asyncio.AbstractEventLoop) -> List[Case]:
+    import httpx
+
+    from app.core.auth import get_current_active_user, get_current_user, get_current_user_optional
+    from app.core.database import get_db
+    from app.main import app, rate_limiter
+    from app.models.user import User
+
+    def _get_db():
+        with Session() as db:
+            yield db
+
+    viewer = User(id=1, nickname="bench1", is_active=True)
+    app.dependency_overrides[get_db] = _get_db
+    for dependency in (get_current_active_user, get_current_user, get_current_user_optional):
+        app.dependency_overrides[dependency] = lambda: viewer
+
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+
+    def route(method, path):
+        body = {"room_id": 1, "content": "bench"} if method == "POST" else None
+
+        def run(i):
+            # Limite por IP fora da medição (todas as requisições vêm do mesmo cliente)
+            rate_limiter.reset()
+            response = loop.run_until_complete(client.request(method, path, json=body))
+            if response.status_code >= 400:
+                raise RuntimeError(f"{method} {path} -> {response.status_code}")
+            return response
+        return run
+
+    return [Case(f"route {method} {path}", route(method, path)) for method, path in ROUTES]
+
+
+def time_case(case: Case, repeat: int, warmup: int = 1) -> Dict[str, float]:
+    iterations = max(3, int(repeat * HEAVY_FRACTION)) if case.heavy else repeat
+    for i in range(warmup):
+        case.run(-1 - i)
+    samples = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        case.run(i)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return {
+        "iterations": iterations,
+        "p50_ms": round(statistics.median(samples) * 1000, 4),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 4),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 4),
+        "min_ms": round(samples[0] * 1000, 4),
+    }
+
+
+def run_suite(size_name: str = "small", repeat: int = 50, only: Optional[List[str]] = None) -> dict:
+    """Cria o banco, roda os casos e devolve o documento JSON de resultados"""
+    size = SIZES[size_name]
+    fd, path = tempfile.mkstemp(prefix="bench_suite_", suffix=".db")
+    os.close(fd)
+    os.remove(path)
+    loop = asyncio.new_event_loop()
+    results = {}
+    try:
+        engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+        migrate(engine)
+        start = time.perf_counter()
+        build_dataset(engine, size)
+        seed_seconds = time.perf_counter() - start
+        Session = sessionmaker(bind=engine)
+
+        cases = service_cases(Session, size)
+        if not only or "routes" in only:
+            cases += route_cases(Session, loop)
+        for case in cases:
+            if only and not any(case.name.startswith(prefix) or (prefix == "routes" and case.name.startswith("route "))
+                                for prefix in only):
+                continue
+            results[case.name] = time_case(case, repeat)
+            print(f"{case.name:<60} p50={results[case.name]['p50_ms']:10.3f} ms", file=sys.stderr)
+    finally:
+        _reset_app()
+        loop.close()
+        for suffix in ("", "-wal", "-shm", "-journal"):
+            try:
+                os.remove(path + suffix)
+            except FileNotFoundError:
+                pass
+
+    return {
+        "meta": {
+            "size": size_name,
+            "dataset": size,
+            "repeat": repeat,
+            "seed_seconds": round(seed_seconds, 2),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "created_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        },
+        "results": results,
+    }
+
+
+def _reset_app():
+    main = sys.modules.get("app.main")
+    if main is not None:
+        main.app.dependency_overrides.clear()
+    # Estado em memória criado com os ids do banco temporário
+    from app.services.chat_buffer import chat_message_buffer
+    from app.services.post_counters import post_counter_buffer
+    from app.services.trending import trending_index
+    from app.services.user_stats import user_stats_cache
+    chat_message_buffer.clear()
+    post_counter_buffer.clear()
+    trending_index.clear()
+    user_stats_cache.clear()
+
+
+def compare(current: dict, baseline: dict, threshold: float, min_delta_ms: float) -> List[dict]:
+    """Casos cujo p50 piorou além do limite (casos ausentes em um dos lados são ignorados)"""
+    regressions = []
+    for name, result in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if base is None:
+            continue
+        ratio = result["p50_ms"] / base["p50_ms"] if base["p50_ms"] else float("inf")
+        if ratio > 1 + threshold and result["p50_ms"] - base["p50_ms"] > min_delta_ms:
+            regressions.append({"case": name, "baseline_p50_ms": base["p50_ms"],
+                                "p50_ms": result["p50_ms"], "ratio": round(ratio, 2)})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", choices=sorted(SIZES), default="small")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--only", help="Prefixos de casos separados por vírgula (ex.: posts,chat,routes)")
+    parser.add_argument("--output", help="Arquivo para o JSON de resultados (padrão: stdout)")
+    parser.add_argument("--compare", nargs="?", const=str(DEFAULT_BASELINE), help="Baseline para comparar")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Piora relativa tolerada no p50")
+    parser.add_argument("--min-delta-ms", type=float, default=0.5, help="Piora absoluta mínima para contar")
+    parser.add_argument("--save-baseline", nargs="?", const=str(DEFAULT_BASELINE), help="Grava o resultado como baseline")
+    args = parser.parse_args()
+    # Logs INFO por requisição distorcem os tempos e poluem a saída
+    logging.disable(logging.INFO)
+
+    only = [prefix.strip() for prefix in args.only.split(",")] if args.only else None
+    document = run_suite(args.size, args.repeat, only)
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        if baseline.get("meta", {}).get("size") != args.size:
+            print(f"aviso: baseline gerado com --size {baseline.get('meta', {}).get('size')}", file=sys.stderr)
+        document["regressions"] = compare(document, baseline, args.threshold, args.min_delta_ms)
+
+    rendered = json.dumps(document, indent=2, ensure_ascii=False)
+    if args.output:
+        Path(args.output).write_text(rendered + "\n", encoding="utf-8")
+    else:
+        print(rendered)
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(rendered + "\n", encoding="utf-8")
+
+    for regression in document.get("regressions", []):
+        print(f"REGRESSÃO {regression['case']}: {regression['baseline_p50_ms']} ms -> "
+              f"{regression['p50_ms']} ms ({regression['ratio']}x)", file=sys.stderr)
+    if document.get("regressions"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
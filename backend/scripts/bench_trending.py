@@ -0,0 +1,129 @@
+"""
+Benchmark do feed em alta: ORDER BY do score no banco vs TrendingIndex
+
+Gera --posts posts com likes/comentários espalhados nas últimas 48h e
+compara a primeira página (20 posts) de:
+
+- sql: score com decaimento calculado por post (soma dos eventos com
+  pow()) e ORDER BY sobre todos os posts a cada requisição
+- índice: página do TrendingIndex em memória + select dos 20 posts por id
+
+Reporta latência por página e o custo de aplicar um evento no índice.
+
+Uso:
+    python scripts/bench_trending.py [--posts 20000] [--events 200000] [--pages 200]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.db.migrate import migrate
+from app.services import post_service as post_service_module
+from app.services.post_service import PostService
+from app.services.trending import TrendingIndex
+
+HALF_LIFE = 6 * 3600
+
+SQL_TRENDING = text("""
+    SELECT p.id, p.content,
+        pow(2, -((julianday('now') - julianday(p.created_at)) * 86400.0 / :half_life))
+        + COALESCE((SELECT SUM(pow(2, -((julianday('now') - julianday(l.created_at)) * 86400.0 / :half_life)))
+                    FROM post_likes l WHERE l.post_id = p.id), 0)
+        + 2 * COALESCE((SELECT SUM(pow(2, -((julianday('now') - julianday(c.created_at)) * 86400.0 / :half_life)))
+                        FROM post_comments c WHERE c.post_id = p.id), 0) AS score
+    FROM posts p
+    WHERE p.is_active = 1
+    ORDER BY score DESC
+    LIMIT 20
+""")
+
+
+def timed(fn, repeat):
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+    return statistics.median(latencies) * 1000, max(latencies) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--posts", type=int, default=20000)
+    parser.add_argument("--events", type=int, default=200000)
+    parser.add_argument("--pages", type=int, default=200)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(prefix="bench_trending_", suffix=".db")
+    os.close(fd)
+    os.remove(path)
+    try:
+        engine = create_engine(f"sqlite:///{path}")
+        migrate(engine)
+        Session = sessionmaker(bind=engine)
+        rng = random.Random(7)
+        now = datetime.utcnow()
+
+        def ago():
+            return (now - timedelta(seconds=rng.uniform(0, 48 * 3600))).strftime("%Y-%m-%d %H:%M:%S")
+
+        users = 2000
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO users (id, nickname, password_hash, level) VALUES (:id, :n, 'x', 1)"),
+                         [{"id": i, "n": f"u{i}"} for i in range(1, users + 1)])
+            conn.execute(text("INSERT INTO posts (id, author_id, content, likes_count, comments_count, shares_count, "
+                              "is_active, created_at) VALUES (:id, 1, 'p', 0, 0, 0, 1, :at)"),
+                         [{"id": i, "at": ago()} for i in range(1, args.posts + 1)])
+            # Popularidade concentrada (poucos posts recebem a maioria dos eventos)
+            likes = {(rng.randint(1, users), min(int(rng.paretovariate(1.2)), args.posts))
+                     for _ in range(args.events)}
+            conn.execute(text("INSERT INTO post_likes (user_id, post_id, created_at) VALUES (:u, :p, :at)"),
+                         [{"u": u, "p": p, "at": ago()} for u, p in likes])
+            conn.execute(text("INSERT INTO post_comments (user_id, post_id, content, is_active, created_at) "
+                              "VALUES (1, :p, 'c', 1, :at)"),
+                         [{"p": rng.randint(1, args.posts), "at": ago()} for _ in range(args.events // 10)])
+
+        index = TrendingIndex(half_life_seconds=HALF_LIFE, rebuild_seconds=0)
+        post_service_module.trending_index = index
+        print(f"posts={args.posts} likes={len(likes)} comentários={args.events // 10}")
+
+        with Session() as db:
+            p50, worst = timed(lambda: db.execute(SQL_TRENDING, {"half_life": HALF_LIFE}).all(), max(args.pages // 20, 3))
+            print(f"{'sql ORDER BY':<18} p50={p50:9.2f} ms max={worst:9.2f} ms")
+
+            start = time.perf_counter()
+            index.rebuild(db)
+            print(f"{'índice: recarga':<18} {(time.perf_counter() - start) * 1000:9.2f} ms ({index.stats()['posts']} posts)")
+
+            service = PostService(db)
+            p50, worst = timed(lambda: service.get_trending_rows(20), args.pages)
+            print(f"{'índice: página':<18} p50={p50:9.2f} ms max={worst:9.2f} ms")
+
+        start = time.perf_counter()
+        for _ in range(args.events // 10):
+            index.record(rng.randint(1, args.posts), likes=1)
+        per_event = (time.perf_counter() - start) / (args.events // 10) * 1e6
+        print(f"{'índice: evento':<18} {per_event:9.2f} µs")
+    finally:
+        for suffix in ("", "-wal", "-shm", "-journal"):
+            try:
+                os.remove(path + suffix)
+            except FileNotFoundError:
+                pass
+
+
+if __name__ == "__main__":
+    main()
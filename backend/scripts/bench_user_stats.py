@@ -0,0 +1,104 @@
+"""
+Benchmark de /users/stats para um usuário com milhares de posts
+
+Compara:
+
+- legado: User pelo ORM + get_user_posts (20 posts pelo ORM e uma busca
+  de autor por post) só para len() + todas as conclusões de missão do
+  usuário carregadas para contar em Python
+- consulta única: load_user_stats (um SELECT agregado)
+- cache: UserStatsCache (acerto em memória)
+
+Uso:
+    python scripts/bench_user_stats.py [--posts 5000] [--missions 500] [--repeat 200]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import and_, create_engine, desc, event, text
+from sqlalchemy.orm import sessionmaker
+
+from app.db.migrate import migrate
+from app.models.completion_index import MissionCompletionIndex
+from app.models.post import Post
+from app.models.user import User
+from app.services.user_stats import UserStatsCache, load_user_stats
+
+
+def legacy_stats(db, user_id):
+    """Caminho antigo de UserService.get_user_stats (sem os campos inexistentes)"""
+    user = db.query(User).filter(User.id == user_id).first()
+    stats = {"user_id": user.id, "nickname": user.nickname, "xp": user.xp}
+    posts = db.query(Post).filter(
+        and_(Post.author_id == user_id, Post.is_active == True)
+    ).order_by(desc(Post.created_at)).offset(0).limit(20).all()
+    for post in posts:
+        db.query(User).filter(User.id == post.author_id).first()
+    stats["posts_created"] = len(posts)
+    completions = db.query(MissionCompletionIndex).filter(MissionCompletionIndex.user_id == user_id).all()
+    stats["missions_completed"] = len(completions)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--posts", type=int, default=5000)
+    parser.add_argument("--missions", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(prefix="bench_user_stats_", suffix=".db")
+    os.close(fd)
+    os.remove(path)
+    try:
+        engine = create_engine(f"sqlite:///{path}")
+        migrate(engine)
+        Session = sessionmaker(bind=engine)
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO users (id, nickname, password_hash, xp, level) VALUES (:id, :n, 'x', 0, 1)"),
+                         [{"id": i, "n": f"u{i}"} for i in range(1, 101)])
+            # Usuário 1 com --posts posts; os demais com alguns cada
+            conn.execute(text("INSERT INTO posts (author_id, content, likes_count, comments_count, shares_count, "
+                              "is_active) VALUES (:a, 'p', 0, 0, 0, 1)"),
+                         [{"a": 1} for _ in range(args.posts)] + [{"a": 1 + i % 100} for i in range(args.posts)])
+            conn.execute(text("INSERT INTO mission_completion_index (user_id, mission_key, day, source) "
+                              "VALUES (1, :k, '2026-01-01', 'legacy')"),
+                         [{"k": f"legacy:{i}"} for i in range(args.missions)])
+
+        statements = [0]
+        event.listen(engine, "before_cursor_execute", lambda *a: statements.__setitem__(0, statements[0] + 1))
+        cache = UserStatsCache(ttl_seconds=3600)
+        print(f"posts do usuário={args.posts} missões concluídas={args.missions}")
+        for name, fn in (("legado", legacy_stats), ("consulta única", load_user_stats),
+                         ("cache", cache.get)):
+            with Session() as db:
+                result = fn(db, 1)
+                statements[0] = 0
+                latencies = []
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    fn(db, 1)
+                    latencies.append(time.perf_counter() - start)
+                    db.rollback()
+            print(f"{name:<15} p50={statistics.median(latencies) * 1000:8.3f} ms "
+                  f"sql/req={statements[0] / args.repeat:5.1f} posts_created={result['posts_created']} "
+                  f"missions_completed={result['missions_completed']}")
+    finally:
+        for suffix in ("", "-wal", "-shm", "-journal"):
+            try:
+                os.remove(path + suffix)
+            except FileNotFoundError:
+                pass
+
+
+if __name__ == "__main__":
+    main()
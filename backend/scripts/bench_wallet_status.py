@@ -0,0 +1,149 @@
+"""
+Benchmark de polls concorrentes de GET /wallet/status
+
+Compara o caminho antigo (CREATE TABLE IF NOT EXISTS x2 + commit a cada
+poll) com o atual (verificação de schema em cache + SELECT somente leitura),
+com várias threads fazendo polls e um escritor concorrente no mesmo banco.
+
+Uso:
+    python scripts/bench_wallet_status.py [--threads 8] [--polls 500] [--writer-rate 200]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.core.schema_readiness import schema_registry
+from app.db.migrate import migrate
+from app.routers.wallet import wallet_status
+
+
+def legacy_wallet_status(db, user):
+    """Caminho antigo: DDL + commit antes da leitura"""
+    db.execute(text("""
+        CREATE TABLE IF NOT EXISTS wallet_addresses (
+            user_id INTEGER PRIMARY KEY, address TEXT, verified_at DATETIME
+        )
+    """))
+    db.execute(text("""
+        CREATE TABLE IF NOT EXISTS token_transfers (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER NOT NULL,
+            amount NUMERIC NOT NULL DEFAULT 0, status TEXT NOT NULL DEFAULT 'pending',
+            tx_hash TEXT, created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """))
+    db.commit()
+    db.execute(text("SELECT enabled FROM feature_flags WHERE key='ONCHAIN_TESTNET'")).fetchone()
+    db.execute(text("SELECT enabled FROM feature_flags WHERE key='WITHDRAWALS_ENABLED'")).fetchone()
+    return db.execute(
+        text("SELECT address, verified_at FROM wallet_addresses WHERE user_id=:uid"), {"uid": user.id}
+    ).fetchone()
+
+
+def run(name, handler, Session, threads, polls, writer_rate):
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def writer():
+        # Escritor concorrente: transações curtas em outra tabela
+        interval = 1.0 / writer_rate if writer_rate > 0 else None
+        db = Session()
+        i = 0
+        while interval and not stop.is_set():
+            try:
+                db.execute(text("INSERT INTO token_ledger (user_id, type, amount) VALUES (:u, 'bench', 1)"),
+                           {"u": i % 100})
+                db.commit()
+            except OperationalError:
+                db.rollback()
+            i += 1
+            time.sleep(interval)
+        db.close()
+
+    def poller(offset):
+        db = Session()
+        local = []
+        for i in range(polls):
+            user = SimpleNamespace(id=(offset * polls + i) % 1000)
+            start = time.perf_counter()
+            try:
+                handler(db, user)
+            except OperationalError:
+                with lock:
+                    errors[0] += 1
+                db.rollback()
+            local.append(time.perf_counter() - start)
+        db.close()
+        with lock:
+            latencies.extend(local)
+
+    writer_thread = threading.Thread(target=writer)
+    writer_thread.start()
+    workers = [threading.Thread(target=poller, args=(n,)) for n in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    writer_thread.join()
+
+    latencies.sort()
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    print(f"{name:<8} polls={len(latencies):>6} {len(latencies) / elapsed:9.0f} polls/s "
+          f"p50={p50:6.2f} ms p99={p99:7.2f} ms erros={errors[0]}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--polls", type=int, default=500)
+    parser.add_argument("--writer-rate", type=float, default=200, help="Escritas/s concorrentes (0 desliga)")
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(prefix="bench_wallet_", suffix=".db")
+    os.close(fd)
+    os.remove(path)
+    try:
+        engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False, "timeout": 5})
+        migrate(engine)
+        with engine.begin() as conn:
+            conn.execute(
+                text("INSERT INTO wallet_addresses (user_id, address, nonce) VALUES (:u, :a, 'n')"),
+                [{"u": u, "a": f"0x{u:040x}"} for u in range(0, 1000, 2)]
+            )
+        Session = sessionmaker(bind=engine)
+        schema_registry.reset()
+
+        print(f"threads={args.threads} polls/thread={args.polls} escritas/s={args.writer_rate:g}")
+        run("legado", legacy_wallet_status, Session, args.threads, args.polls, args.writer_rate)
+        run("atual", lambda db, user: wallet_status(db=db, user=user), Session,
+            args.threads, args.polls, args.writer_rate)
+        print(f"verificações de schema no caminho atual: {schema_registry.checks}")
+    finally:
+        for suffix in ("", "-wal", "-shm", "-journal"):
+            try:
+                os.remove(path + suffix)
+            except FileNotFoundError:
+                pass
+
+
+if __name__ == "__main__":
+    main()
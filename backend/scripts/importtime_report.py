@@ -0,0 +1,113 @@
+"""
+Relatório de tempo de import do app (python -X importtime)
+
+Importa app.main em subprocessos limpos, mostra os módulos mais caros e
+falha (exit 1) se o tempo total passar do orçamento ou se algum módulo
+pesado que deveria ser carregado sob demanda aparecer no import.
+
+Uso:
+    python scripts/importtime_report.py [--runs 3] [--top 20] [--budget-ms 2500]
+    python scripts/importtime_report.py --disable ENABLE_AI ENABLE_WALLET ENABLE_STAKING
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+BACKEND_DIR = Path(__file__).parent.parent
+
+# Dependências que não devem ser importadas no startup (carregadas no primeiro uso)
+DEFAULT_FORBIDDEN = ("eth_account", "httpx", "openai", "numpy", "uvicorn")
+
+_LINE_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+
+def measure(module: str, env: Dict[str, str]) -> List[Tuple[str, int, int, int]]:
+    """Uma execução: lista (módulo, self_us, cumulativo_us, profundidade)"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        sys.stderr.write(result.stderr[-2000:])
+        raise SystemExit(f"Falha ao importar {module}")
+    entries = []
+    for line in result.stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append((name, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--budget-ms", type=float, default=2500.0,
+                        help="Tempo máximo (mediana) de import do módulo")
+    parser.add_argument("--forbid", nargs="*", default=list(DEFAULT_FORBIDDEN),
+                        help="Módulos que não podem ser importados no startup")
+    parser.add_argument("--disable", nargs="*", default=[],
+                        help="Flags de subsistemas desligadas nesta medição (ex.: ENABLE_AI)")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    for flag in args.disable:
+        env[flag] = "false"
+
+    runs = [measure(args.module, env) for _ in range(args.runs)]
+    totals = [next(c for name, _, c, _ in entries if name == args.module) for entries in runs]
+    total_ms = statistics.median(totals) / 1000
+
+    # Módulos da última execução, agregados por pacote de topo (dependências)
+    # e por módulo do app
+    entries = runs[-1]
+    imported = {name for name, _, _, _ in entries}
+    packages: Dict[str, int] = {}
+    for name, _, cumulative, _ in entries:
+        root = name.split(".")[0]
+        if name == root:
+            packages[root] = max(packages.get(root, 0), cumulative)
+    app_modules = sorted(
+        ((name, cumulative) for name, _, cumulative, _ in entries
+         if name.startswith("app.") and name != args.module),
+        key=lambda item: item[1], reverse=True,
+    )
+
+    print(f"import {args.module}: {total_ms:.1f} ms (mediana de {args.runs}; "
+          f"min {min(totals) / 1000:.1f} / max {max(totals) / 1000:.1f}) orçamento={args.budget_ms:.0f} ms")
+    if args.disable:
+        print(f"subsistemas desligados: {', '.join(args.disable)}")
+
+    print("\nPacotes mais caros (cumulativo):")
+    for name, cumulative in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    print("\nMódulos do app mais caros (cumulativo):")
+    for name, cumulative in app_modules[:args.top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    failures = []
+    if total_ms > args.budget_ms:
+        failures.append(f"tempo de import {total_ms:.1f} ms acima do orçamento de {args.budget_ms:.0f} ms")
+    loaded = sorted(set(args.forbid) & imported)
+    if loaded:
+        failures.append(f"módulos pesados importados no startup: {', '.join(loaded)}")
+
+    if failures:
+        print("\nFALHOU:")
+        for failure in failures:
+            print(f"  - {failure}")
+        sys.exit(1)
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()
@@ -13,7 +13,7 @@ sys.path.append(str(Path(__file__).parent.parent))
 
 from sqlalchemy.orm import Session
 from app.core.database import SessionLocal, engine
-from app.models import Base
+from app.db.migrate import migrate
 from app.services.mission_service import MissionService
 from app.services.chat_service import ChatService
 from app.services.ranking_service import RankingService
@@ -28,9 +28,9 @@ logger = logging.getLogger(__name__)
 
 
 def create_tables():
-    """Criar todas as tabelas"""
+    """Criar todas as tabelas (migrações pendentes)"""
     try:
-        Base.metadata.create_all(bind=engine)
+        migrate(engine)
         logger.info("Tabelas criadas com sucesso")
     except Exception as e:
         logger.error(f"Erro ao criar tabelas: {e}")
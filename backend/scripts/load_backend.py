@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+"""
+ConnectUS Backend - gerador de carga HTTP concorrente
+
+Versão com carga do smoke_backend.py: milhares de usuários virtuais (VUs)
+em asyncio contra um uvicorn local. Cada VU entra no ritmo de chegada
+configurado, faz login (registrando a conta load<N> na primeira vez),
+repete os checks do smoke (/auth/me, /avatars, /missions) e depois
+sorteia ações da mistura (--mix) com um tempo de pensar (--think) entre
+elas até o fim de --duration:
+
+    timeline  GET /posts/timeline
+    post      POST /posts
+    like      POST /posts/{id}/like (post visto na última timeline)
+    chat      GET + POST /chat/rooms/{id}/messages
+    missions  GET /missions/daily + POST /missions/complete (CHECKIN)
+    ranking   GET /ranking + GET /ranking/my-position
+    impact    POST /impact/event + GET /impact/score/{id} + GET /impact/leaderboard
+
+Por endpoint: histograma de latência (buckets logarítmicos de 5%),
+p50/p95/p99, taxa de erro (status >= 400 ou falha de transporte) e
+vazão. A latência inclui a espera por conexão livre no pool do cliente
+(--max-connections), como um usuário real perceberia.
+
+Só aceita URLs locais. Com --spawn sobe o próprio uvicorn num banco
+SQLite temporário (migrado no startup) e o encerra no final.
+
+Uso:
+    python scripts/load_backend.py --spawn --users 500 --arrival-rate 50 --duration 60
+    python scripts/load_backend.py --users 2000 --arrival-rate 100 --arrival poisson \\
+        --think 0.5:2 --mix timeline=40,like=20,chat=15,missions=10,post=8,ranking=5,impact=2 \\
+        --output load.json
+"""
+import argparse
+import asyncio
+import http.cookiejar
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from smoke_backend import BASE_URL
+
+LOCAL_HOSTS = {"127.0.0.1", "localhost", "::1"}
+
+DEFAULT_MIX = "timeline=40,like=20,chat=15,missions=10,post=8,ranking=5,impact=2"
+
+# Histograma: bucket i cobre até HIST_BASE_MS * HIST_GROWTH ** i
+HIST_BASE_MS = 0.1
+HIST_GROWTH = 1.05
+
+
+class LatencyHistogram:
+    """Latências em buckets logarítmicos (memória constante, erro relativo <= 5%)"""
+
+    def __init__(self):
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total_ms = 0.0
+        self.min_ms = math.inf
+        self.max_ms = 0.0
+
+    def record(self, ms: float):
+        index = 0 if ms <= HIST_BASE_MS else math.ceil(math.log(ms / HIST_BASE_MS, HIST_GROWTH))
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total_ms += ms
+        self.min_ms = min(self.min_ms, ms)
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(self.count * q))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(HIST_BASE_MS * HIST_GROWTH ** index, self.max_ms)
+        return self.max_ms
+
+    def to_dict(self) -> dict:
+        return {
+            "p50_ms": round(self.percentile(0.50), 2),
+            "p95_ms": round(self.percentile(0.95), 2),
+            "p99_ms": round(self.percentile(0.99), 2),
+            "mean_ms": round(self.total_ms / self.count, 2) if self.count else 0.0,
+            "min_ms": round(self.min_ms, 2) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 2),
+            # Limite superior do bucket (ms) -> requisições
+            "histogram": {f"{HIST_BASE_MS * HIST_GROWTH ** i:.2f}": n for i, n in sorted(self.buckets.items())},
+        }
+
+
+class EndpointStats:
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.errors = 0
+        self.statuses: Dict[str, int] = {}
+
+    def record(self, status: str, ms: float, ok: bool):
+        self.latency.record(ms)
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        if not ok:
+            self.errors += 1
+
+
+class LoadRun:
+    """Estado compartilhado pelos VUs: cliente HTTP, métricas e configuração"""
+
+    def __init__(self, client: httpx.AsyncClient, args, mix: Dict[str, int]):
+        self.client = client
+        self.args = args
+        self.actions = list(mix)
+        self.weights = list(mix.values())
+        self.stats: Dict[str, EndpointStats] = {}
+        self.room_id: Optional[int] = None
+        self.deadline = 0.0
+        self.started_users = 0
+        self.active_users = 0
+        self.failed_logins = 0
+
+    async def call(self, name: str, method: str, path: str, token: Optional[str] = None,
+                   body: Optional[dict] = None, expected: tuple = ()) -> Optional[httpx.Response]:
+        """
+        Requisição medida sob o nome do endpoint (template, não a URL concreta);
+        status em `expected` não contam como erro
+        """
+        headers = {"Authorization": f"Bearer {token}"} if token else None
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, path, json=body, headers=headers)
+        except httpx.HTTPError as e:
+            self._record(name, type(e).__name__, start, False)
+            return None
+        ok = response.status_code < 400 or response.status_code in expected
+        self._record(name, str(response.status_code), start, ok)
+        return response
+
+    def _record(self, name: str, status: str, start: float, ok: bool):
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = EndpointStats()
+        stats.record(status, (time.perf_counter() - start) * 1000, ok)
+
+    def think_time(self, rng: random.Random) -> float:
+        low, high = self.args.think
+        return rng.uniform(low, high)
+
+
+class VirtualUser:
+    def __init__(self, run: LoadRun, index: int):
+        self.run = run
+        self.nickname = f"{run.args.user_prefix}{index:05d}"
+        self.rng = random.Random(run.args.seed * 100003 + index)
+        self.token: Optional[str] = None
+        self.user_id: Optional[int] = None
+        self.post_ids: List[int] = []
+
+    async def login(self) -> bool:
+        credentials = {"nickname": self.nickname, "password": self.run.args.password}
+        # 401 aqui é a conta ainda não registrada
+        response = await self.run.call("POST /auth/login", "POST", "/auth/login", body=credentials, expected=(401,))
+        if response is not None and response.status_code == 401:
+            await self.run.call("POST /auth/register", "POST", "/auth/register", body={
+                **credentials,
+                "full_name": f"Load {self.nickname}",
+                "email": f"{self.nickname}@load.local",
+                "age": 25,
+            })
+            response = await self.run.call("POST /auth/login", "POST", "/auth/login", body=credentials)
+        if response is None or response.status_code != 200:
+            return False
+        self.token = response.json()["access_token"]
+
+        # Mesmos checks autenticados do smoke_backend
+        me = await self.run.call("GET /auth/me", "GET", "/auth/me", self.token)
+        if me is not None and me.status_code == 200:
+            self.user_id = me.json().get("id")
+        await self.run.call("GET /avatars", "GET", "/avatars", self.token)
+        await self.run.call("GET /missions", "GET", "/missions", self.token)
+        return True
+
+    async def session(self):
+        run = self.run
+        run.started_users += 1
+        if not await self.login():
+            run.failed_logins += 1
+            return
+        run.active_users += 1
+        try:
+            iterations = 0
+            while time.monotonic() < run.deadline:
+                if run.args.iterations and iterations >= run.args.iterations:
+                    break
+                action = self.rng.choices(run.actions, run.weights)[0]
+                await getattr(self, f"do_{action}")()
+                iterations += 1
+                await asyncio.sleep(run.think_time(self.rng))
+        finally:
+            run.active_users -= 1
+
+    async def do_timeline(self):
+        response = await self.run.call("GET /posts/timeline", "GET", "/posts/timeline?limit=20", self.token)
+        if response is not None and response.status_code == 200:
+            self.post_ids = [post["id"] for post in response.json()]
+
+    async def do_post(self):
+        response = await self.run.call("POST /posts", "POST", "/posts", self.token,
+                                       {"content": f"post de carga {self.rng.random():.6f}"})
+        if response is not None and response.status_code == 200:
+            self.post_ids.append(response.json()["id"])
+
+    async def do_like(self):
+        if not self.post_ids:
+            await self.do_timeline()
+            if not self.post_ids:
+                return
+        post_id = self.rng.choice(self.post_ids)
+        await self.run.call("POST /posts/{id}/like", "POST", f"/posts/{post_id}/like", self.token)
+
+    async def do_chat(self):
+        room = self.run.room_id
+        if room is None:
+            return
+        await self.run.call("GET /chat/rooms/{id}/messages", "GET", f"/chat/rooms/{room}/messages?limit=50", self.token)
+        await self.run.call("POST /chat/rooms/{id}/messages", "POST", f"/chat/rooms/{room}/messages", self.token,
+                            {"room_id": room, "content": f"oi {self.rng.randint(0, 9999)}"})
+
+    async def do_missions(self):
+        await self.run.call("GET /missions/daily", "GET", "/missions/daily", self.token)
+        await self.run.call("POST /missions/complete", "POST", "/missions/complete", self.token, {"code": "CHECKIN"})
+
+    async def do_ranking(self):
+        await self.run.call("GET /ranking", "GET", "/ranking", self.token)
+        await self.run.call("GET /ranking/my-position", "GET", "/ranking/my-position", self.token)
+
+    async def do_impact(self):
+        await self.run.call("POST /impact/event", "POST", "/impact/event", self.token, {"type": "community_vote"})
+        if self.user_id is not None:
+            await self.run.call("GET /impact/score/{id}", "GET", f"/impact/score/{self.user_id}", self.token)
+        await self.run.call("GET /impact/leaderboard", "GET", "/impact/leaderboard", self.token)
+
+
+async def prepare(run: LoadRun) -> bool:
+    """Checa o backend (como o smoke) e escolhe a sala de chat dos VUs"""
+    status = await run.call("GET /public/feature-flags", "GET", "/public/feature-flags")
+    if status is None or status.status_code != 200:
+        print(f"[ERRO] Backend não responde em {run.args.base_url}", file=sys.stderr)
+        return False
+    if "chat" not in run.actions:
+        return True
+    setup_user = VirtualUser(run, 0)
+    if not await setup_user.login():
+        print("[ERRO] Login do usuário de preparação falhou", file=sys.stderr)
+        return False
+    rooms = await run.call("GET /chat/rooms", "GET", "/chat/rooms", setup_user.token)
+    if rooms is not None and rooms.status_code == 200 and not rooms.json():
+        await run.call("POST /chat/init-default-rooms", "POST", "/chat/init-default-rooms", setup_user.token)
+        rooms = await run.call("GET /chat/rooms", "GET", "/chat/rooms", setup_user.token)
+    if rooms is not None and rooms.status_code == 200 and rooms.json():
+        run.room_id = rooms.json()[0]["id"]
+    else:
+        print("[AVISO] Nenhuma sala de chat disponível: ação chat desativada", file=sys.stderr)
+    return True
+
+
+async def run_load(args, mix: Dict[str, int]) -> dict:
+    limits = httpx.Limits(max_connections=args.max_connections, max_keepalive_connections=args.max_connections)
+    # Cliente compartilhado por todos os VUs: sem cookies, senão o cookie do
+    # último login autenticaria as requisições de todos (só vale o Bearer)
+    no_cookies = http.cookiejar.CookieJar(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits,
+                                 cookies=no_cookies) as client:
+        run = LoadRun(client, args, mix)
+        if not await prepare(run):
+            sys.exit(1)
+        run.stats.clear()  # preparação fora das métricas
+
+        rng = random.Random(args.seed)
+        started = time.monotonic()
+        run.deadline = started + args.duration
+        tasks = []
+        for index in range(1, args.users + 1):
+            if time.monotonic() >= run.deadline:
+                break
+            tasks.append(asyncio.create_task(VirtualUser(run, index).session()))
+            if args.arrival_rate > 0:
+                gap = rng.expovariate(args.arrival_rate) if args.arrival == "poisson" else 1 / args.arrival_rate
+                await asyncio.sleep(gap)
+        await asyncio.gather(*tasks)
+        elapsed = time.monotonic() - started
+
+    endpoints = {}
+    for name, stats in sorted(run.stats.items()):
+        count = stats.latency.count
+        endpoints[name] = {
+            "requests": count,
+            "errors": stats.errors,
+            "error_rate": round(stats.errors / count, 4) if count else 0.0,
+            "throughput_rps": round(count / elapsed, 2) if elapsed else 0.0,
+            "statuses": stats.statuses,
+            **stats.latency.to_dict(),
+        }
+    total = sum(e["requests"] for e in endpoints.values())
+    errors = sum(e["errors"] for e in endpoints.values())
+    return {
+        "meta": {
+            "base_url": args.base_url,
+            "users": run.started_users,
+            "failed_logins": run.failed_logins,
+            "arrival_rate": args.arrival_rate,
+            "arrival": args.arrival,
+            "think": list(args.think),
+            "duration_s": args.duration,
+            "elapsed_s": round(elapsed, 2),
+            "mix": mix,
+            "max_connections": args.max_connections,
+        },
+        "totals": {
+            "requests": total,
+            "errors": errors,
+            "error_rate": round(errors / total, 4) if total else 0.0,
+            "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+        },
+        "endpoints": endpoints,
+    }
+
+
+def print_report(report: dict):
+    print("=" * 100)
+    print(" ConnectUS Backend Load Test")
+    print("=" * 100)
+    meta, totals = report["meta"], report["totals"]
+    print(f" VUs: {meta['users']} (logins falhos: {meta['failed_logins']})  "
+          f"duração: {meta['elapsed_s']}s  requisições: {totals['requests']}  "
+          f"vazão: {totals['throughput_rps']} req/s  erros: {totals['error_rate']:.2%}")
+    print()
+    print(f"{'endpoint':<34}{'req':>8}{'req/s':>9}{'erro%':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>10}")
+    for name, e in report["endpoints"].items():
+        print(f"{name:<34}{e['requests']:>8}{e['throughput_rps']:>9.1f}{e['error_rate']:>8.1%}"
+              f"{e['p50_ms']:>9.1f}{e['p95_ms']:>9.1f}{e['p99_ms']:>9.1f}{e['max_ms']:>10.1f}")
+    print("=" * 100)
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if not hasattr(VirtualUser, f"do_{name}"):
+            raise argparse.ArgumentTypeError(f"ação desconhecida: {name}")
+        try:
+            mix[name] = int(weight)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"peso inválido para {name}: {weight!r}")
+    if not any(w > 0 for w in mix.values()):
+        raise argparse.ArgumentTypeError("a mistura precisa de ao menos um peso positivo")
+    return {name: weight for name, weight in mix.items() if weight > 0}
+
+
+def parse_think(value: str):
+    low, _, high = value.partition(":")
+    try:
+        low = float(low)
+        high = float(high) if high else low
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"tempo de pensar inválido: {value!r}")
+    if low < 0 or high < low:
+        raise argparse.ArgumentTypeError(f"tempo de pensar inválido: {value!r}")
+    return (low, high)
+
+
+def spawn_server(workers: int):
+    """Sobe uvicorn numa porta livre com banco SQLite temporário; retorna (processo, url, banco)"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    fd, db_path = tempfile.mkstemp(prefix="load_backend_", suffix=".db")
+    os.close(fd)
+    os.remove(db_path)
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{db_path}", "AUTO_MIGRATE": "true"}
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=str(Path(__file__).parent.parent), env=env,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"uvicorn terminou com código {process.returncode}")
+        try:
+            if httpx.get(f"{url}/public/feature-flags", timeout=1).status_code == 200:
+                return process, url, db_path
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("uvicorn não respondeu em 60s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default=BASE_URL, help=f"Backend local (padrão: {BASE_URL})")
+    parser.add_argument("--spawn", action="store_true", help="Sobe um uvicorn próprio com banco temporário")
+    parser.add_argument("--workers", type=int, default=1, help="Workers do uvicorn com --spawn")
+    parser.add_argument("--users", type=int, default=100, help="Total de usuários virtuais")
+    parser.add_argument("--arrival-rate", type=float, default=10.0, help="VUs iniciados por segundo (0 = todos de uma vez)")
+    parser.add_argument("--arrival", choices=["constant", "poisson"], default="constant")
+    parser.add_argument("--duration", type=float, default=60.0, help="Duração do teste em segundos")
+    parser.add_argument("--iterations", type=int, default=0, help="Máximo de ações por VU (0 = até o fim)")
+    parser.add_argument("--think", type=parse_think, default=(1.0, 3.0), help="Tempo de pensar MIN[:MAX] em segundos")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX), help=f"Pesos das ações (padrão: {DEFAULT_MIX})")
+    parser.add_argument("--max-connections", type=int, default=200)
+    parser.add_argument("--timeout", type=float, default=5.0, help="Timeout por requisição (s)")
+    parser.add_argument("--user-prefix", default="load")
+    parser.add_argument("--password", default="load123456")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Grava o relatório em JSON")
+    args = parser.parse_args()
+
+    process = db_path = None
+    if args.spawn:
+        process, args.base_url, db_path = spawn_server(args.workers)
+    elif urlparse(args.base_url).hostname not in LOCAL_HOSTS:
+        parser.error("o gerador de carga só roda contra um backend local (127.0.0.1/localhost)")
+
+    try:
+        report = asyncio.run(run_load(args, args.mix))
+    finally:
+        if process is not None:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                # Requisições presas não deixam o uvicorn encerrar
+                process.kill()
+                process.wait()
+            for suffix in ("", "-wal", "-shm", "-journal"):
+                try:
+                    os.remove(db_path + suffix)
+                except FileNotFoundError:
+                    pass
+
+    print_report(report)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    sys.exit(0 if report["totals"]["requests"] and report["meta"]["failed_logins"] < report["meta"]["users"] else 1)
+
+
+if __name__ == "__main__":
+    main()
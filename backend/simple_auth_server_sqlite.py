@@ -15,6 +15,7 @@ from typing import Optional, List, Dict, Any
 
 # Importar rotas de IA
 from ai_routes import ai_router
+from ai_context import invalidate_user_context
 
 # Configurações
 SECRET_KEY = "connectus-secret-key-2024"
@@ -720,6 +721,8 @@ async def update_profile(profile_data: dict, request: Request):
                 WHERE id = ?
             """, values)
             conn.commit()
+            # Perfil mudou: descartar snapshot de contexto da IA
+            invalidate_user_context(user["id"])
         
         # Buscar usuário atualizado
         cursor.execute("SELECT * FROM users WHERE id = ?", (user["id"],))
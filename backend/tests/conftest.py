@@ -0,0 +1,14 @@
+"""
+Configuração dos testes de integração que usam o banco do app
+"""
+
+import pytest
+
+from app.core.database import engine
+from app.db.migrate import migrate
+
+
+@pytest.fixture(scope="session", autouse=True)
+def migrated_app_db():
+    """Banco do app no schema atual (o startup não migra sem AUTO_MIGRATE)"""
+    migrate(engine)
@@ -0,0 +1,92 @@
+import sqlite3
+
+from ai_context import SharedConnection, UserContextCache
+
+
+def _make_db(path):
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE users (id INTEGER PRIMARY KEY, nickname TEXT, full_name TEXT, bio TEXT,
+                            age INTEGER, xp INTEGER, level INTEGER);
+        CREATE TABLE ai_conversations (id INTEGER PRIMARY KEY, user_id INTEGER, query TEXT,
+                                       response TEXT, category TEXT, created_at TEXT);
+        CREATE TABLE missions (id INTEGER PRIMARY KEY, title TEXT, description TEXT, xp_reward INTEGER);
+        CREATE TABLE user_missions (user_id INTEGER, mission_id INTEGER, completed INTEGER);
+        INSERT INTO users VALUES (1, 'ana', 'Ana', 'bio', 17, 100, 2);
+        INSERT INTO missions VALUES (1, 'Estudar', 'desc', 50);
+    """)
+    conn.commit()
+    conn.close()
+
+
+def test_context_snapshot_cached_and_invalidated(tmp_path):
+    db_path = str(tmp_path / "ctx.db")
+    _make_db(db_path)
+    cache = UserContextCache(SharedConnection(db_path))
+
+    ctx = cache.get(1)
+    assert ctx["user"]["nickname"] == "ana"
+    assert ctx["completed_missions"] == []
+
+    # Missão completada diretamente no banco: snapshot em cache não muda
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO user_missions VALUES (1, 1, 1)")
+    conn.commit()
+    conn.close()
+    assert cache.get(1)["completed_missions"] == []
+    assert cache.stats()["hits"] == 1
+
+    cache.invalidate(1)
+    assert cache.get(1)["completed_missions"] == [("Estudar", "desc", 50)]
+    assert cache.stats()["misses"] == 2
+
+
+def test_record_conversation_updates_snapshot(tmp_path):
+    db_path = str(tmp_path / "ctx.db")
+    _make_db(db_path)
+    cache = UserContextCache(SharedConnection(db_path))
+
+    cache.get(1)
+    cache.record_conversation(1, "estudos", "o que é fotossíntese?", "2024-01-01T00:00:00")
+    ctx = cache.get(1)
+    assert ctx["recent_conversations"][0] == ("estudos", "o que é fotossíntese?", "2024-01-01T00:00:00")
+    assert ctx["user"]["xp"] == 100
+    assert cache.get(42) == {}
+
+
+def test_snapshot_built_before_invalidation_not_cached(tmp_path):
+    db_path = str(tmp_path / "ctx.db")
+    _make_db(db_path)
+    cache = UserContextCache(SharedConnection(db_path))
+
+    build = cache._build
+
+    def build_then_invalidate(user_id):
+        snapshot = build(user_id)
+        # Perfil alterado enquanto o snapshot era montado
+        cache.invalidate(user_id)
+        return snapshot
+
+    cache._build = build_then_invalidate
+    assert cache.get(1)["user"]["nickname"] == "ana"
+    assert cache.stats()["entries"] == 0
+
+    cache._build = build
+    cache.get(1)
+    assert cache.stats()["entries"] == 1
+
+
+def test_cache_size_bounded(tmp_path):
+    db_path = str(tmp_path / "ctx.db")
+    _make_db(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.executemany("INSERT INTO users (id, nickname) VALUES (?, ?)", [(i, f"u{i}") for i in range(2, 6)])
+    conn.commit()
+    conn.close()
+    cache = UserContextCache(SharedConnection(db_path), max_entries=2)
+
+    for user_id in range(1, 6):
+        cache.get(user_id)
+    assert cache.stats()["entries"] == 2
+    cache.get(5)
+    assert cache.stats()["hits"] == 1